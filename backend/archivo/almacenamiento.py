@@ -0,0 +1,73 @@
+# archivo/almacenamiento.py
+"""
+Metadatos de contenido (tamaño, MIME, SHA-256) y deduplicación por contenido.
+
+Un mismo contenido se guarda una sola vez: los registros que lo comparten apuntan
+al mismo nombre en el storage. El conteo de referencias es el número de filas que
+apuntan a ese nombre (filtrado por hash, que está indexado); el archivo físico se
+elimina cuando se libera la última referencia.
+"""
+import hashlib
+import logging
+import mimetypes
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+MIME_POR_DEFECTO = 'application/octet-stream'
+
+
+def calcular_metadatos(campo_archivo):
+    """
+    Recorre el archivo por bloques y retorna (tamanio_bytes, hash_sha256, tipo_mime).
+    No carga el archivo completo en memoria.
+    """
+    digest = hashlib.sha256()
+    tamanio = 0
+    for bloque in campo_archivo.chunks():
+        digest.update(bloque)
+        tamanio += len(bloque)
+
+    tipo_mime = (
+        getattr(getattr(campo_archivo, 'file', None), 'content_type', None)
+        or mimetypes.guess_type(campo_archivo.name or '')[0]
+        or MIME_POR_DEFECTO
+    )
+    return tamanio, digest.hexdigest(), tipo_mime
+
+
+def liberar_archivo(nombre, hash_contenido):
+    """
+    Elimina del storage el original si ningún Archivo lo referencia.
+    Debe llamarse después de eliminar/actualizar la fila dentro de la misma transacción;
+    el borrado físico ocurre al confirmarla.
+    """
+    from .models import Archivo
+
+    if not nombre:
+        return False
+    filas = Archivo.objects.filter(archivo=nombre)
+    if hash_contenido:
+        filas = filas.filter(hash_contenido=hash_contenido)
+    # Bloquea las demás referencias para no competir con una subida del mismo contenido
+    if filas.select_for_update().exists():
+        return False
+
+    storage = Archivo._meta.get_field('archivo').storage
+    transaction.on_commit(lambda: storage.delete(nombre))
+    logger.info(f"Contenido sin referencias eliminado del storage: {nombre}")
+    return True
+
+
+def liberar_derivado(nombre, hash_contenido):
+    """Elimina del storage un derivado si ningún ArchivoDerivado lo referencia"""
+    from .models import ArchivoDerivado
+
+    if not nombre:
+        return False
+    if ArchivoDerivado.objects.filter(hash_contenido=hash_contenido, archivo_derivado=nombre).exists():
+        return False
+
+    storage = ArchivoDerivado._meta.get_field('archivo_derivado').storage
+    transaction.on_commit(lambda: storage.delete(nombre))
+    return True
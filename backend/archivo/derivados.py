@@ -0,0 +1,267 @@
+# archivo/derivados.py
+"""
+Generación de derivados de imágenes de producto (miniaturas, WebP y tamaños responsive).
+
+El redimensionado (CPU) corre en un pool de procesos; el proceso hijo solo recibe
+bytes y devuelve bytes, nunca toca la base de datos ni el storage. El guardado de
+los archivos y del modelo ArchivoDerivado se hace en el proceso principal.
+"""
+import hashlib
+import io
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from django.db import connection, transaction
+from backend.configuracion import leer
+
+logger = logging.getLogger(__name__)
+
+CONFIGURACION_POR_DEFECTO = {
+    'ANCHOS': [160, 320, 640, 1280],
+    'FORMATOS': ['webp', 'jpeg'],
+    'CALIDAD': 80,
+    'PROCESOS': 2,
+}
+
+EXTENSIONES = {'webp': 'webp', 'jpeg': 'jpg'}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def obtener_configuracion():
+    return leer('IMAGENES_DERIVADAS', CONFIGURACION_POR_DEFECTO)
+
+
+def _obtener_executor(procesos):
+    """Pool de procesos por worker, creado en el primer uso"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn: el hijo no hereda conexiones a la base de datos ni hilos del servidor
+            _executor = ProcessPoolExecutor(
+                max_workers=procesos,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _executor
+
+
+def _tiene_transparencia(imagen):
+    return imagen.mode in ('RGBA', 'LA') or (imagen.mode == 'P' and 'transparency' in imagen.info)
+
+
+def _preparar_modo(imagen, formato):
+    """JPEG no admite transparencia: se aplana sobre fondo blanco"""
+    from PIL import Image
+
+    if formato == 'jpeg':
+        if _tiene_transparencia(imagen):
+            imagen = imagen.convert('RGBA')
+            fondo = Image.new('RGB', imagen.size, (255, 255, 255))
+            fondo.paste(imagen, mask=imagen.getchannel('A'))
+            return fondo
+        return imagen if imagen.mode == 'RGB' else imagen.convert('RGB')
+
+    if _tiene_transparencia(imagen):
+        return imagen if imagen.mode == 'RGBA' else imagen.convert('RGBA')
+    return imagen if imagen.mode == 'RGB' else imagen.convert('RGB')
+
+
+def generar_variantes(contenido, anchos, formatos, calidad):
+    """
+    Redimensiona la imagen a cada ancho y formato (se ejecuta en el proceso hijo).
+    No amplía: si la imagen es más angosta que todos los anchos se usa su ancho original.
+    Retorna una lista de dicts con formato, ancho, alto, contenido y hash.
+    """
+    from PIL import Image, ImageOps
+
+    variantes = []
+    with Image.open(io.BytesIO(contenido)) as original:
+        imagen = ImageOps.exif_transpose(original)
+        ancho_original, alto_original = imagen.size
+        destinos = sorted({ancho for ancho in anchos if ancho < ancho_original}) or [ancho_original]
+
+        for ancho in destinos:
+            alto = max(1, round(alto_original * ancho / ancho_original))
+            redimensionada = imagen if ancho == ancho_original else imagen.resize(
+                (ancho, alto), Image.Resampling.LANCZOS
+            )
+            for formato in formatos:
+                salida = io.BytesIO()
+                preparada = _preparar_modo(redimensionada, formato)
+                if formato == 'jpeg':
+                    preparada.save(salida, 'JPEG', quality=calidad, optimize=True, progressive=True)
+                else:
+                    preparada.save(salida, 'WEBP', quality=calidad, method=4)
+                datos = salida.getvalue()
+                variantes.append({
+                    'formato': formato,
+                    'ancho': ancho,
+                    'alto': alto,
+                    'contenido': datos,
+                    'hash': hashlib.sha256(datos).hexdigest(),
+                })
+    return variantes
+
+
+def reemplazar_derivados(archivo, nuevos):
+    """
+    Sustituye los derivados de un Archivo. Los archivos anteriores se liberan después
+    de crear los nuevos, para no borrar contenido que los nuevos reutilizan.
+    """
+    from .almacenamiento import liberar_derivado
+    from .models import ArchivoDerivado
+
+    with transaction.atomic():
+        anteriores = list(archivo.derivados.all())
+        archivo.derivados.all().delete()
+        creados = ArchivoDerivado.objects.bulk_create(nuevos)
+        for derivado in anteriores:
+            liberar_derivado(derivado.archivo_derivado.name, derivado.hash_contenido)
+    return creados
+
+
+def eliminar_derivados(archivo):
+    """Elimina los derivados de un Archivo y los archivos que queden sin referencias"""
+    reemplazar_derivados(archivo, [])
+
+
+def guardar_derivados(id_archivo, variantes):
+    """Guarda las variantes en el storage y registra sus metadatos"""
+    from django.core.files.base import ContentFile
+    from .models import Archivo, ArchivoDerivado
+
+    archivo = Archivo.objects.filter(pk=id_archivo).first()
+    if not archivo:
+        # El archivo se eliminó mientras se procesaba
+        return []
+
+    # Derivados con el mismo contenido ya guardados se reutilizan
+    existentes = dict(
+        ArchivoDerivado.objects.filter(
+            hash_contenido__in=[variante['hash'] for variante in variantes]
+        ).values_list('hash_contenido', 'archivo_derivado')
+    )
+
+    nuevos = []
+    for variante in variantes:
+        derivado = ArchivoDerivado(
+            archivo=archivo,
+            formato=variante['formato'],
+            ancho=variante['ancho'],
+            alto=variante['alto'],
+            tamanio_bytes=len(variante['contenido']),
+            hash_contenido=variante['hash']
+        )
+        if variante['hash'] in existentes:
+            derivado.archivo_derivado = existentes[variante['hash']]
+        else:
+            nombre = f"{variante['hash'][:16]}_{variante['ancho']}w.{EXTENSIONES[variante['formato']]}"
+            derivado.archivo_derivado.save(nombre, ContentFile(variante['contenido']), save=False)
+        nuevos.append(derivado)
+
+    # Un archivo reemplazado reemplaza también sus derivados
+    creados = reemplazar_derivados(archivo, nuevos)
+
+    logger.info(f"{len(creados)} derivados generados para archivo {id_archivo}")
+    return creados
+
+
+def _al_terminar(id_archivo, futuro):
+    """Callback en un hilo del proceso principal"""
+    try:
+        guardar_derivados(id_archivo, futuro.result())
+    except Exception as e:
+        logger.error(f"Error al generar derivados del archivo {id_archivo}: {str(e)}")
+    finally:
+        # El hilo del executor abrió su propia conexión
+        connection.close()
+
+
+def copiar_derivados(archivo):
+    """
+    Si otro Archivo con el mismo contenido ya tiene derivados, los comparte
+    (mismos archivos en el storage) sin volver a procesar la imagen.
+    """
+    from .models import Archivo, ArchivoDerivado
+
+    if not archivo.hash_contenido:
+        return []
+    origen = Archivo.objects.filter(
+        hash_contenido=archivo.hash_contenido,
+        derivados__isnull=False
+    ).exclude(pk=archivo.pk).first()
+    if not origen:
+        return []
+
+    copias = [
+        ArchivoDerivado(
+            archivo=archivo,
+            archivo_derivado=derivado.archivo_derivado.name,
+            formato=derivado.formato,
+            ancho=derivado.ancho,
+            alto=derivado.alto,
+            tamanio_bytes=derivado.tamanio_bytes,
+            hash_contenido=derivado.hash_contenido
+        )
+        for derivado in origen.derivados.all()
+    ]
+    return reemplazar_derivados(archivo, copias)
+
+
+def procesar_archivo(id_archivo):
+    """Lee el original y genera sus derivados (en el pool o en línea si PROCESOS = 0)"""
+    from .models import Archivo
+
+    configuracion = obtener_configuracion()
+    try:
+        archivo = Archivo.objects.get(pk=id_archivo)
+        if copiar_derivados(archivo):
+            return
+        with archivo.archivo.open('rb') as original:
+            contenido = original.read()
+    except (Archivo.DoesNotExist, OSError, ValueError) as e:
+        logger.error(f"No se pudo leer el archivo {id_archivo} para generar derivados: {str(e)}")
+        return
+
+    argumentos = (contenido, configuracion['ANCHOS'], configuracion['FORMATOS'], configuracion['CALIDAD'])
+
+    if configuracion['PROCESOS'] <= 0:
+        try:
+            guardar_derivados(id_archivo, generar_variantes(*argumentos))
+        except Exception as e:
+            logger.error(f"Error al generar derivados del archivo {id_archivo}: {str(e)}")
+        return
+
+    futuro = _obtener_executor(configuracion['PROCESOS']).submit(generar_variantes, *argumentos)
+    futuro.add_done_callback(lambda f: _al_terminar(id_archivo, f))
+
+
+def encolar_derivados(archivo):
+    """Programa la generación de derivados de una imagen al confirmar la transacción"""
+    if archivo.tipo_archivo != 'imagen':
+        return
+    id_archivo = archivo.pk
+    transaction.on_commit(lambda: procesar_archivo(id_archivo))
+
+
+def construir_srcset(derivados, request=None):
+    """
+    Retorna {'webp': 'url 160w, url 320w, ...', 'jpeg': ...} y la URL de la miniatura
+    a partir de los derivados (idealmente precargados con prefetch_related)
+    """
+    por_formato = {}
+    for derivado in sorted(derivados, key=lambda d: d.ancho):
+        url = derivado.archivo_derivado.url
+        if request is not None:
+            url = request.build_absolute_uri(url)
+        por_formato.setdefault(derivado.formato, []).append((url, derivado.ancho))
+
+    srcset = {
+        formato: ', '.join(f'{url} {ancho}w' for url, ancho in entradas)
+        for formato, entradas in por_formato.items()
+    }
+    preferido = por_formato.get('webp') or por_formato.get('jpeg') or []
+    miniatura = preferido[0][0] if preferido else None
+    return srcset, miniatura
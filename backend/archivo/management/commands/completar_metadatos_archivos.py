@@ -0,0 +1,77 @@
+# archivo/management/commands/completar_metadatos_archivos.py
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Min
+from archivo.models import Archivo
+from archivo.almacenamiento import calcular_metadatos, liberar_archivo
+
+
+class Command(BaseCommand):
+    help = (
+        'Registra tamaño, tipo MIME y hash SHA-256 de los archivos subidos antes de '
+        'que se guardaran estos metadatos. Con --deduplicar, los archivos con el mismo '
+        'contenido pasan a compartir un único archivo en el storage.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=500, help='Filas por actualización (por defecto 500)')
+        parser.add_argument('--deduplicar', action='store_true', help='Unificar archivos con contenido idéntico')
+
+    def handle(self, *args, **options):
+        lote = options['lote']
+        pendientes = Archivo.objects.filter(hash_contenido__isnull=True).only('id_archivo', 'archivo')
+
+        actualizados = 0
+        faltantes = 0
+        buffer = []
+        for archivo in pendientes.iterator(chunk_size=lote):
+            try:
+                archivo.tamanio_bytes, archivo.hash_contenido, archivo.tipo_mime = calcular_metadatos(archivo.archivo)
+            except (OSError, ValueError) as e:
+                faltantes += 1
+                self.stderr.write(f'Archivo {archivo.id_archivo} ({archivo.archivo.name}) no disponible: {e}')
+                continue
+            finally:
+                archivo.archivo.close()
+
+            buffer.append(archivo)
+            if len(buffer) >= lote:
+                actualizados += self._guardar(buffer)
+                buffer = []
+        actualizados += self._guardar(buffer)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Metadatos registrados: {actualizados} archivos ({faltantes} no encontrados en el storage)'
+        ))
+
+        if options['deduplicar']:
+            unificados = self._deduplicar()
+            self.stdout.write(self.style.SUCCESS(f'Archivos unificados por contenido: {unificados}'))
+
+    def _guardar(self, archivos):
+        if not archivos:
+            return 0
+        Archivo.objects.bulk_update(archivos, ['tamanio_bytes', 'hash_contenido', 'tipo_mime'])
+        return len(archivos)
+
+    def _deduplicar(self):
+        """Apunta las copias al archivo del registro más antiguo y libera las demás"""
+        duplicados = Archivo.objects.filter(
+            hash_contenido__isnull=False
+        ).values('hash_contenido').annotate(
+            nombres=Count('archivo', distinct=True),
+            primero=Min('id_archivo')
+        ).filter(nombres__gt=1)
+
+        unificados = 0
+        for grupo in duplicados.iterator():
+            with transaction.atomic():
+                canonico = Archivo.objects.select_for_update().get(pk=grupo['primero'])
+                copias = Archivo.objects.select_for_update().filter(
+                    hash_contenido=grupo['hash_contenido']
+                ).exclude(archivo=canonico.archivo.name)
+                nombres = set(copias.values_list('archivo', flat=True))
+                unificados += copias.update(archivo=canonico.archivo.name)
+                for nombre in nombres:
+                    liberar_archivo(nombre, grupo['hash_contenido'])
+        return unificados
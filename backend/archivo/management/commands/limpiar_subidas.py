@@ -0,0 +1,20 @@
+# archivo/management/commands/limpiar_subidas.py
+from django.core.management.base import BaseCommand
+from archivo.subidas import limpiar_subidas_vencidas
+
+
+class Command(BaseCommand):
+    help = (
+        'Cancela las subidas por fragmentos sin actividad y los comprobantes subidos que no '
+        'se usaron en una solicitud, liberando su espacio en disco. Pensado para cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--horas', type=int, default=None,
+            help='Horas sin actividad (por defecto SUBIDAS_FRAGMENTADAS["HORAS_VIGENCIA"])'
+        )
+
+    def handle(self, *args, **options):
+        cantidad = limpiar_subidas_vencidas(options['horas'])
+        self.stdout.write(self.style.SUCCESS(f'Subidas vencidas canceladas: {cantidad}'))
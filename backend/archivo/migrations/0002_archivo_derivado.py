@@ -0,0 +1,35 @@
+# Generated by Django 5.1.4 on 2026-10-19 16:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('archivo', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivoDerivado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('archivo_derivado', models.FileField(upload_to='productos/derivados/%Y/%m/%d/')),
+                ('formato', models.CharField(choices=[('webp', 'WebP'), ('jpeg', 'JPEG')], max_length=10)),
+                ('ancho', models.PositiveIntegerField()),
+                ('alto', models.PositiveIntegerField()),
+                ('tamanio_bytes', models.PositiveIntegerField()),
+                ('hash_contenido', models.CharField(max_length=64)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('archivo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='derivados', to='archivo.archivo')),
+            ],
+            options={
+                'verbose_name': 'Archivo derivado',
+                'verbose_name_plural': 'Archivos derivados',
+                'db_table': 'archivo_derivado',
+                'ordering': ['archivo', 'formato', 'ancho'],
+                'unique_together': {('archivo', 'formato', 'ancho')},
+            },
+        ),
+    ]
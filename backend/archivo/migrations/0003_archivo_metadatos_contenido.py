@@ -0,0 +1,39 @@
+# Generated by Django 5.1.4 on 2026-10-19 16:34
+
+import archivo.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('archivo', '0002_archivo_derivado'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivo',
+            name='hash_contenido',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='archivo',
+            name='tamanio_bytes',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='archivo',
+            name='tipo_mime',
+            field=models.CharField(blank=True, editable=False, max_length=100, null=True),
+        ),
+        migrations.AlterField(
+            model_name='archivo',
+            name='archivo',
+            field=models.FileField(upload_to=archivo.models.ruta_archivo, verbose_name='Archivo'),
+        ),
+        migrations.AlterField(
+            model_name='archivoderivado',
+            name='hash_contenido',
+            field=models.CharField(db_index=True, max_length=64),
+        ),
+    ]
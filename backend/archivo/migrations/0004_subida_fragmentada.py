@@ -0,0 +1,44 @@
+# Generated by Django 5.1.4 on 2026-10-19 16:38
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('archivo', '0003_archivo_metadatos_contenido'),
+        ('empresas', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubidaFragmentada',
+            fields=[
+                ('id_subida', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('destino', models.CharField(choices=[('archivo', 'Archivo de producto'), ('comprobante', 'Comprobante de pago')], max_length=20)),
+                ('nombre_archivo', models.CharField(max_length=255)),
+                ('tipo_mime', models.CharField(blank=True, max_length=100, null=True)),
+                ('tamanio_total', models.PositiveBigIntegerField()),
+                ('bytes_recibidos', models.PositiveBigIntegerField(default=0)),
+                ('ruta', models.CharField(max_length=255)),
+                ('hash_contenido', models.CharField(blank=True, max_length=64, null=True)),
+                ('datos_destino', models.JSONField(blank=True, default=dict)),
+                ('estado', models.CharField(choices=[('en_progreso', 'En progreso'), ('completada', 'Completada'), ('utilizada', 'Utilizada'), ('cancelada', 'Cancelada')], default='en_progreso', max_length=20)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_modificacion', models.DateTimeField(auto_now=True)),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subidas', to='empresas.empresa')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subidas', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Subida fragmentada',
+                'verbose_name_plural': 'Subidas fragmentadas',
+                'db_table': 'subida_fragmentada',
+                'ordering': ['-fecha_creacion'],
+                'indexes': [models.Index(fields=['empresa', 'estado'], name='subida_empresa_estado_idx'), models.Index(fields=['estado', 'fecha_modificacion'], name='subida_estado_fecha_idx')],
+            },
+        ),
+    ]
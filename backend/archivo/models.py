@@ -1,14 +1,32 @@
-from django.db import models
+import os
+import uuid
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
 from producto.models import Producto
+from .almacenamiento import calcular_metadatos
+
+
+def ruta_archivo(instance, filename):
+    """Ruta direccionada por contenido: el mismo contenido siempre tiene el mismo nombre"""
+    extension = os.path.splitext(filename)[1].lower()
+    if instance.hash_contenido:
+        return f'productos/archivos/contenido/{instance.hash_contenido[:2]}/{instance.hash_contenido}{extension}'
+    return timezone.now().strftime('productos/archivos/%Y/%m/%d/') + filename
+
 
 class Archivo(models.Model):
     """Modelo para archivos asociados a productos (imágenes, documentos, etc.)"""
     id_archivo = models.AutoField(primary_key=True)
     nombre = models.CharField(max_length=255, blank=True, null=True)
     archivo = models.FileField(
-        upload_to='productos/archivos/%Y/%m/%d/',
+        upload_to=ruta_archivo,
         verbose_name="Archivo"
     )
+    # Metadatos registrados al subir (evitan un stat del storage por fila)
+    tamanio_bytes = models.PositiveBigIntegerField(null=True, blank=True, editable=False)
+    tipo_mime = models.CharField(max_length=100, null=True, blank=True, editable=False)
+    hash_contenido = models.CharField(max_length=64, null=True, blank=True, editable=False, db_index=True)
     tipo_archivo = models.CharField(max_length=50, blank=True, null=True)
     orden = models.IntegerField(default=0, help_text="Orden de visualización")
     descripcion = models.TextField(blank=True, null=True)
@@ -52,4 +70,93 @@ class Archivo(models.Model):
         if not self.nombre and self.archivo:
             self.nombre = self.archivo.name
         
-        super().save(*args, **kwargs)
\ No newline at end of file
+        if self.archivo and not self.archivo._committed:
+            # Archivo recién subido: registrar metadatos y reutilizar contenido idéntico
+            with transaction.atomic():
+                # Las subidas fragmentadas ya calcularon los metadatos mientras recibían los bytes
+                metadatos = getattr(self, '_metadatos_precalculados', None) or calcular_metadatos(self.archivo)
+                self.tamanio_bytes, self.hash_contenido, self.tipo_mime = metadatos
+                existente = Archivo.objects.select_for_update().filter(
+                    hash_contenido=self.hash_contenido
+                ).exclude(pk=self.pk).order_by('pk').first()
+                if existente:
+                    self.archivo = existente.archivo.name
+                super().save(*args, **kwargs)
+            return
+        
+        super().save(*args, **kwargs)
+
+class ArchivoDerivado(models.Model):
+    """Versión redimensionada de una imagen de producto (miniaturas, WebP, tamaños responsive)"""
+    FORMATOS = [
+        ('webp', 'WebP'),
+        ('jpeg', 'JPEG'),
+    ]
+
+    archivo = models.ForeignKey(
+        Archivo,
+        on_delete=models.CASCADE,
+        related_name='derivados'
+    )
+    # Nombre basado en el hash del contenido: la URL es inmutable
+    archivo_derivado = models.FileField(upload_to='productos/derivados/%Y/%m/%d/')
+    formato = models.CharField(max_length=10, choices=FORMATOS)
+    ancho = models.PositiveIntegerField()
+    alto = models.PositiveIntegerField()
+    tamanio_bytes = models.PositiveIntegerField()
+    hash_contenido = models.CharField(max_length=64, db_index=True)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "archivo_derivado"
+        ordering = ['archivo', 'formato', 'ancho']
+        verbose_name = "Archivo derivado"
+        verbose_name_plural = "Archivos derivados"
+        unique_together = ('archivo', 'formato', 'ancho')
+
+    def __str__(self):
+        return f"{self.archivo_id} - {self.formato} {self.ancho}w"
+
+
+class SubidaFragmentada(models.Model):
+    """Sesión de subida reanudable por fragmentos (iniciar / agregar / completar)"""
+    DESTINOS = [
+        ('archivo', 'Archivo de producto'),
+        ('comprobante', 'Comprobante de pago'),
+    ]
+    ESTADOS = [
+        ('en_progreso', 'En progreso'),
+        ('completada', 'Completada'),
+        ('utilizada', 'Utilizada'),
+        ('cancelada', 'Cancelada'),
+    ]
+
+    id_subida = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='subidas')
+    empresa = models.ForeignKey('empresas.Empresa', on_delete=models.CASCADE, related_name='subidas')
+    destino = models.CharField(max_length=20, choices=DESTINOS)
+    nombre_archivo = models.CharField(max_length=255)
+    tipo_mime = models.CharField(max_length=100, blank=True, null=True)
+    tamanio_total = models.PositiveBigIntegerField()
+    bytes_recibidos = models.PositiveBigIntegerField(default=0)
+    # Archivo parcial mientras está en progreso; ruta final una vez completada
+    ruta = models.CharField(max_length=255)
+    hash_contenido = models.CharField(max_length=64, blank=True, null=True)
+    # Datos para crear el Archivo al completar (producto, descripcion, orden)
+    datos_destino = models.JSONField(default=dict, blank=True)
+    estado = models.CharField(max_length=20, choices=ESTADOS, default='en_progreso')
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_modificacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "subida_fragmentada"
+        ordering = ['-fecha_creacion']
+        verbose_name = "Subida fragmentada"
+        verbose_name_plural = "Subidas fragmentadas"
+        indexes = [
+            models.Index(fields=['empresa', 'estado'], name='subida_empresa_estado_idx'),
+            models.Index(fields=['estado', 'fecha_modificacion'], name='subida_estado_fecha_idx'),
+        ]
+
+    def __str__(self):
+        return f"Subida {self.id_subida} - {self.nombre_archivo} ({self.bytes_recibidos}/{self.tamanio_total})"
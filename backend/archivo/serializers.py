@@ -1,29 +1,43 @@
 from rest_framework import serializers
 import os
-from .models import Archivo
+from producto.models import Producto
+from .models import Archivo, SubidaFragmentada
+from .derivados import construir_srcset
 
-class ArchivoSerializer(serializers.ModelSerializer):
+
+class ImagenesDerivadasMixin:
+    """Agrega las URLs de derivados listas para srcset (requiere prefetch_related('derivados'))"""
+
+    def get_imagenes(self, obj):
+        derivados = obj.derivados.all()
+        if obj.tipo_archivo != 'imagen' or not derivados:
+            return None
+        srcset, miniatura = construir_srcset(derivados, self.context.get('request'))
+        return {
+            'miniatura': miniatura,
+            'srcset': srcset
+        }
+
+class ArchivoSerializer(ImagenesDerivadasMixin, serializers.ModelSerializer):
     """Serializador para Archivo"""
     producto_nombre = serializers.CharField(source='producto.nombre', read_only=True)
     producto_empresa = serializers.CharField(source='producto.empresa.nombre', read_only=True)
     tamanio_kb = serializers.SerializerMethodField()
+    imagenes = serializers.SerializerMethodField()
     
     class Meta:
         model = Archivo
         fields = [
             'id_archivo', 'nombre', 'archivo', 'tipo_archivo',
             'orden', 'descripcion', 'fecha_creacion', 'producto',
-            'producto_nombre', 'producto_empresa', 'tamanio_kb'
+            'producto_nombre', 'producto_empresa', 'tamanio_kb', 'tipo_mime', 'imagenes'
         ]
-        read_only_fields = ['id_archivo', 'tipo_archivo', 'fecha_creacion', 'tamanio_kb']
+        read_only_fields = ['id_archivo', 'tipo_archivo', 'fecha_creacion', 'tamanio_kb', 'tipo_mime', 'imagenes']
     
     def get_tamanio_kb(self, obj):
-        """Obtener tamaño del archivo en KB"""
-        if obj.archivo:
-            try:
-                return round(obj.archivo.size / 1024, 2)
-            except:
-                return 0
+        """Obtener tamaño del archivo en KB (registrado al subir, sin consultar el storage)"""
+        if obj.tamanio_bytes is not None:
+            return round(obj.tamanio_bytes / 1024, 2)
         return 0
 
 class ArchivoCreateSerializer(serializers.ModelSerializer):
@@ -48,14 +62,48 @@ class ArchivoCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("El producto no pertenece a su empresa")
         return value
 
-class ArchivoPublicSerializer(serializers.ModelSerializer):
+class ArchivoPublicSerializer(ImagenesDerivadasMixin, serializers.ModelSerializer):
     """Serializador para vista pública de archivos"""
     producto = serializers.CharField(source='producto.nombre', read_only=True)
+    imagenes = serializers.SerializerMethodField()
     
     class Meta:
         model = Archivo
         fields = [
             'id_archivo', 'nombre', 'tipo_archivo', 'orden', 'archivo', 
-            'descripcion', 'fecha_creacion', 'producto'
+            'descripcion', 'fecha_creacion', 'producto', 'imagenes'
+        ]
+        read_only_fields = fields
+
+
+class SubidaIniciarSerializer(serializers.Serializer):
+    """Datos para iniciar una subida por fragmentos"""
+    nombre_archivo = serializers.CharField(max_length=255)
+    tamanio_total = serializers.IntegerField(min_value=1)
+    destino = serializers.ChoiceField(choices=SubidaFragmentada.DESTINOS, default='archivo')
+    producto = serializers.PrimaryKeyRelatedField(queryset=Producto.objects.all(), required=False)
+    descripcion = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    orden = serializers.IntegerField(required=False, default=0)
+
+    def validate(self, data):
+        if data['destino'] == 'archivo':
+            producto = data.get('producto')
+            if not producto:
+                raise serializers.ValidationError({'producto': 'Requerido para subir archivos de producto'})
+            empresa = self.context['request'].user.usuario_empresa.empresa
+            if producto.empresa_id != empresa.id_empresa:
+                raise serializers.ValidationError({'producto': 'El producto no pertenece a su empresa'})
+        return data
+
+
+class SubidaFragmentadaSerializer(serializers.ModelSerializer):
+    """Estado de una subida por fragmentos"""
+    offset = serializers.IntegerField(source='bytes_recibidos', read_only=True)
+
+    class Meta:
+        model = SubidaFragmentada
+        fields = [
+            'id_subida', 'destino', 'nombre_archivo', 'tipo_mime', 'tamanio_total',
+            'offset', 'hash_contenido', 'estado', 'fecha_creacion', 'fecha_modificacion'
         ]
         read_only_fields = fields
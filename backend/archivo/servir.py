@@ -0,0 +1,240 @@
+# archivo/servir.py
+"""
+Entrega de archivos de MEDIA_ROOT.
+
+Django solo decide si el archivo se puede ver (comprobantes de pago: administradores
+de la plataforma y la empresa dueña; archivos de producto: público) y arma las
+cabeceras. La transferencia de bytes se delega al proxy según SERVIR_MEDIA['MODO']:
+
+- 'x-accel':    nginx (X-Accel-Redirect a una location `internal`)
+- 'x-sendfile': Apache/lighttpd (X-Sendfile con la ruta absoluta)
+- 'django':     el worker entrega el archivo (desarrollo), con soporte de Range y ETag
+
+Configuración de nginx para 'x-accel' (PREFIJO_INTERNO = '/media-interna/'):
+
+    location /media-interna/ {
+        internal;
+        alias /app/media/;
+    }
+"""
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from backend.configuracion import leer
+
+CONFIGURACION_POR_DEFECTO = {
+    'MODO': 'django',
+    'PREFIJO_INTERNO': '/media-interna/',
+    'MAX_AGE': 24 * 60 * 60,
+    'MAX_AGE_INMUTABLE': 365 * 24 * 60 * 60,
+}
+
+# Rutas con nombre derivado del hash del contenido: nunca cambian
+PREFIJOS_INMUTABLES = ('productos/derivados/', 'productos/archivos/contenido/')
+PREFIJOS_PRIVADOS = ('comprobantes/',)
+# Nunca se entregan (archivos parciales de subidas en progreso)
+PREFIJOS_OCULTOS = ('subidas/',)
+
+TAMANIO_BLOQUE = 64 * 1024
+PATRON_RANGO = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def obtener_configuracion():
+    return leer('SERVIR_MEDIA', CONFIGURACION_POR_DEFECTO)
+
+
+def es_privado(ruta):
+    return ruta.startswith(PREFIJOS_PRIVADOS)
+
+
+def puede_ver(request, ruta):
+    """Comprobantes: administradores de la plataforma, la empresa de la suscripción o quien lo subió"""
+    if not es_privado(ruta):
+        # Archivos públicos: no se autentica (ni se consulta el usuario)
+        return True
+    usuario = request.user
+    if not usuario or not usuario.is_authenticated:
+        return False
+    if usuario.rol and usuario.rol.rol == 'admin':
+        return True
+
+    from suscripciones.models import Suscripcion
+    from .models import SubidaFragmentada
+
+    usuario_empresa = getattr(usuario, 'usuario_empresa', None)
+    if usuario_empresa and Suscripcion.objects.filter(
+        comprobante_pago=ruta,
+        empresa_id=usuario_empresa.empresa_id
+    ).exists():
+        return True
+    # Comprobante subido por fragmentos y aún no usado en una solicitud
+    return SubidaFragmentada.objects.filter(ruta=ruta, usuario=usuario, destino='comprobante').exists()
+
+
+def normalizar_ruta(ruta):
+    """
+    Ruta relativa a MEDIA_ROOT sin '.', '..' ni barras repetidas; None si sale de MEDIA_ROOT.
+    Los prefijos ocultos y privados se comparan contra esta ruta, nunca contra la recibida
+    ('productos/../comprobantes/x.pdf' es un comprobante).
+    """
+    ruta = posixpath.normpath(ruta.replace('\\', '/').lstrip('/'))
+    if ruta in ('.', '..') or ruta.startswith('../'):
+        return None
+    return ruta
+
+
+def resolver_ruta(ruta):
+    """Ruta normalizada y absoluta dentro de MEDIA_ROOT; Http404 si no existe, está oculta o sale de MEDIA_ROOT"""
+    ruta = normalizar_ruta(ruta)
+    if ruta is None or ruta.startswith(PREFIJOS_OCULTOS):
+        raise Http404('Archivo no encontrado')
+    try:
+        absoluta = safe_join(settings.MEDIA_ROOT, ruta)
+    except Exception:
+        # SuspiciousFileOperation: enlaces o rutas absolutas fuera de MEDIA_ROOT
+        raise Http404('Archivo no encontrado')
+    if not os.path.isfile(absoluta):
+        raise Http404('Archivo no encontrado')
+    return ruta, absoluta
+
+
+def cache_control(ruta, configuracion):
+    if es_privado(ruta):
+        return 'private, no-cache'
+    if ruta.startswith(PREFIJOS_INMUTABLES):
+        return f"public, max-age={configuracion['MAX_AGE_INMUTABLE']}, immutable"
+    return f"public, max-age={configuracion['MAX_AGE']}"
+
+
+def calcular_etag(estado):
+    return f'"{estado.st_size:x}-{int(estado.st_mtime):x}"'
+
+
+def _coincide_etag(cabecera, etag):
+    if not cabecera:
+        return False
+    if cabecera.strip() == '*':
+        return True
+    # Comparación débil: W/"x" equivale a "x"
+    etiquetas = [parte.strip().removeprefix('W/') for parte in cabecera.split(',')]
+    return etag in etiquetas
+
+
+def parsear_rango(cabecera, tamanio):
+    """
+    Retorna (inicio, fin) inclusivo para un único rango 'bytes=...', None si la cabecera
+    no aplica (ausente, mal formada o múltiples rangos: se entrega el archivo completo)
+    y ValueError si el rango no es satisfacible.
+    """
+    if not cabecera:
+        return None
+    coincidencia = PATRON_RANGO.match(cabecera.strip())
+    if not coincidencia:
+        return None
+    inicio, fin = coincidencia.groups()
+    if not inicio and not fin:
+        return None
+    if not inicio:
+        # bytes=-N: los últimos N bytes
+        sufijo = int(fin)
+        if sufijo == 0:
+            raise ValueError('Rango vacío')
+        return max(0, tamanio - sufijo), tamanio - 1
+    inicio = int(inicio)
+    fin = min(int(fin), tamanio - 1) if fin else tamanio - 1
+    if inicio >= tamanio or inicio > fin:
+        raise ValueError('Rango fuera del archivo')
+    return inicio, fin
+
+
+def _leer_rango(absoluta, inicio, longitud):
+    with open(absoluta, 'rb') as archivo:
+        archivo.seek(inicio)
+        restante = longitud
+        while restante > 0:
+            bloque = archivo.read(min(TAMANIO_BLOQUE, restante))
+            if not bloque:
+                break
+            restante -= len(bloque)
+            yield bloque
+
+
+def _respuesta_django(request, absoluta, estado, etag):
+    """Entrega desde el worker con soporte de Range / If-Range"""
+    tamanio = estado.st_size
+    rango_cabecera = request.headers.get('Range')
+    if_range = request.headers.get('If-Range')
+    if if_range and if_range != etag:
+        # El archivo cambió desde que el cliente obtuvo la primera parte
+        rango_cabecera = None
+
+    try:
+        rango = parsear_rango(rango_cabecera, tamanio)
+    except ValueError:
+        respuesta = HttpResponse(status=416)
+        respuesta['Content-Range'] = f'bytes */{tamanio}'
+        return respuesta
+
+    inicio, fin = rango if rango else (0, tamanio - 1)
+    longitud = fin - inicio + 1 if tamanio else 0
+    respuesta = StreamingHttpResponse(
+        _leer_rango(absoluta, inicio, longitud),
+        status=206 if rango else 200
+    )
+    respuesta['Content-Length'] = str(longitud)
+    if rango:
+        respuesta['Content-Range'] = f'bytes {inicio}-{fin}/{tamanio}'
+    return respuesta
+
+
+def respuesta_media(request, ruta):
+    """
+    Construye la respuesta para GET/HEAD de un archivo de MEDIA_ROOT.
+    Http404 si no existe o el usuario no puede verlo (no se revela su existencia).
+    """
+    configuracion = obtener_configuracion()
+    ruta, absoluta = resolver_ruta(ruta)
+    if not puede_ver(request, ruta):
+        raise Http404('Archivo no encontrado')
+
+    estado = os.stat(absoluta)
+    etag = calcular_etag(estado)
+    cabeceras = {
+        'ETag': etag,
+        'Last-Modified': http_date(estado.st_mtime),
+        'Cache-Control': cache_control(ruta, configuracion),
+    }
+
+    if _coincide_etag(request.headers.get('If-None-Match'), etag):
+        respuesta = HttpResponseNotModified()
+        for nombre, valor in cabeceras.items():
+            respuesta[nombre] = valor
+        return respuesta
+
+    modo = configuracion['MODO']
+    if modo == 'x-accel':
+        # nginx resuelve Range y envía el archivo (sendfile) desde la location interna
+        respuesta = HttpResponse()
+        respuesta['X-Accel-Redirect'] = quote(configuracion['PREFIJO_INTERNO'].rstrip('/') + '/' + ruta)
+    elif modo == 'x-sendfile':
+        respuesta = HttpResponse()
+        respuesta['X-Sendfile'] = absoluta
+    else:
+        respuesta = _respuesta_django(request, absoluta, estado, etag)
+
+    tipo, codificacion = mimetypes.guess_type(ruta)
+    respuesta['Content-Type'] = tipo or 'application/octet-stream'
+    if codificacion:
+        respuesta['Content-Encoding'] = codificacion
+    respuesta['Accept-Ranges'] = 'bytes'
+    for nombre, valor in cabeceras.items():
+        respuesta[nombre] = valor
+    if es_privado(ruta):
+        respuesta['Vary'] = 'Authorization, Cookie'
+    return respuesta
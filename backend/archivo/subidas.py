@@ -0,0 +1,347 @@
+# archivo/subidas.py
+"""
+Subidas reanudables por fragmentos (iniciar / agregar / completar).
+
+Cada fragmento se lee del cuerpo de la petición en bloques y se escribe directo al
+archivo parcial, por lo que la memoria por worker no depende del tamaño del archivo.
+El hash SHA-256 se calcula mientras llegan los bytes; si un fragmento lo atiende otro
+worker (sin el estado del hash en memoria) se recalcula leyendo el archivo al completar.
+"""
+import hashlib
+import logging
+import mimetypes
+import os
+import threading
+from datetime import timedelta
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+from backend.configuracion import leer
+from empresas.models import Empresa
+from .models import Archivo, SubidaFragmentada
+
+logger = logging.getLogger(__name__)
+
+TAMANIO_BLOQUE = 64 * 1024
+DIRECTORIO_PARCIALES = 'subidas/parciales'
+
+CONFIGURACION_POR_DEFECTO = {
+    'TAMANIO_FRAGMENTO': 5 * 1024 * 1024,
+    'TAMANIO_MAXIMO_ARCHIVO': 50 * 1024 * 1024,
+    'TAMANIO_MAXIMO_COMPROBANTE': 10 * 1024 * 1024,
+    'HORAS_VIGENCIA': 24,
+}
+
+# Estado del hash por subida en este proceso: {id_subida: (offset, hash)}
+_hashes = {}
+_hashes_lock = threading.Lock()
+
+
+class ErrorSubida(Exception):
+    """Error de una operación de subida, con el código HTTP a responder"""
+
+    def __init__(self, mensaje, codigo=400, **extra):
+        super().__init__(mensaje)
+        self.mensaje = mensaje
+        self.codigo = codigo
+        self.extra = extra
+
+
+class ArchivoParcial(File):
+    """
+    Archivo ya escrito en disco: FileSystemStorage lo mueve (rename) en lugar
+    de copiarlo al guardarlo en su ruta final
+    """
+
+    def __init__(self, ruta, nombre):
+        super().__init__(open(ruta, 'rb'), name=nombre)
+        self._ruta = ruta
+
+    def temporary_file_path(self):
+        return self._ruta
+
+
+def obtener_configuracion():
+    return leer('SUBIDAS_FRAGMENTADAS', CONFIGURACION_POR_DEFECTO)
+
+
+def _ruta_local(nombre):
+    # Escritura incremental: requiere un storage con sistema de archivos local
+    return default_storage.path(nombre)
+
+
+def uso_almacenamiento(empresa):
+    """Bytes usados por la empresa: archivos de productos + subidas en progreso"""
+    archivos = Archivo.objects.filter(
+        producto__empresa=empresa
+    ).aggregate(total=Sum('tamanio_bytes'))['total'] or 0
+    en_progreso = SubidaFragmentada.objects.filter(
+        empresa=empresa,
+        estado='en_progreso'
+    ).aggregate(total=Sum('tamanio_total'))['total'] or 0
+    return archivos + en_progreso
+
+
+def verificar_cuota(empresa, bytes_nuevos):
+    """Lanza ErrorSubida (413) si la subida supera el almacenamiento del plan"""
+    from planes.limites import obtener_plan_vigente
+
+    plan = obtener_plan_vigente(empresa)
+    if plan is None:
+        return
+    limite = plan.limite_almacenamiento_mb * 1024 * 1024
+    usado = uso_almacenamiento(empresa)
+    if usado + bytes_nuevos > limite:
+        raise ErrorSubida(
+            'La subida supera el almacenamiento del plan',
+            codigo=413,
+            usado_mb=round(usado / 1024 / 1024, 2),
+            limite_mb=plan.limite_almacenamiento_mb
+        )
+
+
+def reservar_almacenamiento(empresa, bytes_nuevos):
+    """
+    Bloquea la empresa y verifica la cuota; se llama dentro de la transacción que guarda
+    el archivo para que dos subidas concurrentes no pasen ambas con el mismo uso
+    """
+    Empresa.objects.select_for_update().filter(pk=empresa.pk).first()
+    verificar_cuota(empresa, bytes_nuevos)
+
+
+def iniciar_subida(usuario, empresa, destino, nombre_archivo, tamanio_total, datos_destino=None):
+    configuracion = obtener_configuracion()
+    nombre_archivo = os.path.basename(nombre_archivo or '').strip()
+
+    if not nombre_archivo:
+        raise ErrorSubida('El nombre del archivo es obligatorio')
+    if tamanio_total <= 0:
+        raise ErrorSubida('El tamaño total debe ser mayor a 0')
+
+    if destino == 'comprobante':
+        if not nombre_archivo.lower().endswith('.pdf'):
+            raise ErrorSubida('El comprobante debe ser PDF (.pdf)')
+        maximo = configuracion['TAMANIO_MAXIMO_COMPROBANTE']
+    else:
+        maximo = configuracion['TAMANIO_MAXIMO_ARCHIVO']
+    if tamanio_total > maximo:
+        raise ErrorSubida(f'El archivo no debe superar {maximo / 1024 / 1024:.0f}MB', codigo=413)
+
+    with transaction.atomic():
+        if destino == 'archivo':
+            reservar_almacenamiento(empresa, tamanio_total)
+
+        subida = SubidaFragmentada(
+            usuario=usuario,
+            empresa=empresa,
+            destino=destino,
+            nombre_archivo=nombre_archivo,
+            tipo_mime=mimetypes.guess_type(nombre_archivo)[0],
+            tamanio_total=tamanio_total,
+            datos_destino=datos_destino or {}
+        )
+        subida.ruta = f'{DIRECTORIO_PARCIALES}/{subida.id_subida}.part'
+        ruta = _ruta_local(subida.ruta)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        open(ruta, 'wb').close()
+        subida.save()
+
+    logger.info(f"Subida fragmentada iniciada: {subida.id_subida} ({tamanio_total} bytes) por {usuario.email}")
+    return subida
+
+
+def obtener_subida(id_subida, usuario, bloquear=False):
+    subidas = SubidaFragmentada.objects.filter(usuario=usuario)
+    if bloquear:
+        subidas = subidas.select_for_update()
+    subida = subidas.filter(id_subida=id_subida).first()
+    if not subida:
+        raise ErrorSubida('Subida no encontrada', codigo=404)
+    return subida
+
+
+def agregar_fragmento(id_subida, usuario, offset, flujo, longitud):
+    """
+    Escribe un fragmento en la posición `offset`. El offset debe coincidir con los
+    bytes ya recibidos; si no, se responde 409 con el offset correcto para reanudar.
+    """
+    configuracion = obtener_configuracion()
+
+    with transaction.atomic():
+        subida = obtener_subida(id_subida, usuario, bloquear=True)
+        if subida.estado != 'en_progreso':
+            raise ErrorSubida(f'La subida está {subida.estado}', codigo=409)
+        if offset != subida.bytes_recibidos:
+            raise ErrorSubida('El offset no coincide con los bytes recibidos', codigo=409, offset=subida.bytes_recibidos)
+        if not longitud or longitud <= 0:
+            raise ErrorSubida('El fragmento está vacío o no indica Content-Length')
+        if longitud > configuracion['TAMANIO_FRAGMENTO']:
+            raise ErrorSubida(f'El fragmento no debe superar {configuracion["TAMANIO_FRAGMENTO"]} bytes', codigo=413)
+        if offset + longitud > subida.tamanio_total:
+            raise ErrorSubida('El fragmento excede el tamaño total declarado', codigo=413)
+
+        clave = str(subida.id_subida)
+        with _hashes_lock:
+            estado_hash = _hashes.pop(clave, None)
+        digest = None
+        if offset == 0:
+            digest = hashlib.sha256()
+        elif estado_hash and estado_hash[0] == offset:
+            digest = estado_hash[1]
+
+        recibidos = 0
+        with open(_ruta_local(subida.ruta), 'r+b') as parcial:
+            parcial.seek(offset)
+            parcial.truncate()
+            while recibidos < longitud:
+                bloque = flujo.read(min(TAMANIO_BLOQUE, longitud - recibidos))
+                if not bloque:
+                    break
+                parcial.write(bloque)
+                if digest is not None:
+                    digest.update(bloque)
+                recibidos += len(bloque)
+
+            if recibidos != longitud:
+                # Fragmento cortado: se descarta para que el cliente lo reenvíe completo
+                parcial.truncate(offset)
+                raise ErrorSubida(
+                    'El fragmento llegó incompleto',
+                    codigo=400,
+                    offset=subida.bytes_recibidos
+                )
+
+        subida.bytes_recibidos = offset + recibidos
+        subida.save(update_fields=['bytes_recibidos', 'fecha_modificacion'])
+
+    if digest is not None:
+        with _hashes_lock:
+            _hashes[clave] = (subida.bytes_recibidos, digest)
+    return subida
+
+
+def _hash_final(subida):
+    clave = str(subida.id_subida)
+    with _hashes_lock:
+        estado_hash = _hashes.pop(clave, None)
+    if estado_hash and estado_hash[0] == subida.tamanio_total:
+        return estado_hash[1].hexdigest()
+
+    digest = hashlib.sha256()
+    with open(_ruta_local(subida.ruta), 'rb') as parcial:
+        for bloque in iter(lambda: parcial.read(TAMANIO_BLOQUE), b''):
+            digest.update(bloque)
+    return digest.hexdigest()
+
+
+def completar_subida(id_subida, usuario):
+    """
+    Cierra la subida. Para 'archivo' crea el Archivo del producto; para 'comprobante'
+    mueve el PDF a su ruta final y queda disponible para SolicitarSuscripcionView.
+    Retorna (subida, archivo) — archivo es None para comprobantes.
+    """
+    with transaction.atomic():
+        subida = obtener_subida(id_subida, usuario, bloquear=True)
+        if subida.estado != 'en_progreso':
+            raise ErrorSubida(f'La subida está {subida.estado}', codigo=409)
+        if subida.bytes_recibidos != subida.tamanio_total:
+            raise ErrorSubida(
+                'Faltan bytes por recibir',
+                codigo=409,
+                offset=subida.bytes_recibidos,
+                tamanio_total=subida.tamanio_total
+            )
+
+        ruta_parcial = _ruta_local(subida.ruta)
+        hash_contenido = _hash_final(subida)
+
+        if subida.destino == 'comprobante':
+            with open(ruta_parcial, 'rb') as parcial:
+                if parcial.read(5) != b'%PDF-':
+                    raise ErrorSubida('El comprobante no es un PDF válido')
+            contenido = ArchivoParcial(ruta_parcial, subida.nombre_archivo)
+            try:
+                ruta_final = default_storage.save(
+                    timezone.now().strftime('comprobantes/pagos/%Y/%m/%d/') + subida.nombre_archivo,
+                    contenido
+                )
+            finally:
+                contenido.close()
+            subida.ruta = ruta_final
+            subida.hash_contenido = hash_contenido
+            subida.estado = 'completada'
+            subida.save()
+            logger.info(f"Comprobante subido por fragmentos: {ruta_final}")
+            return subida, None
+
+        archivo = _crear_archivo(subida, ruta_parcial, hash_contenido)
+        subida.hash_contenido = hash_contenido
+        subida.estado = 'utilizada'
+        subida.save()
+
+    # Si el contenido ya existía (deduplicado) el parcial no se movió
+    if os.path.exists(ruta_parcial):
+        os.remove(ruta_parcial)
+    return subida, archivo
+
+
+def _crear_archivo(subida, ruta_parcial, hash_contenido):
+    from producto.models import Producto
+
+    datos = subida.datos_destino
+    producto = Producto.objects.filter(
+        id_producto=datos.get('producto'),
+        empresa=subida.empresa
+    ).first()
+    if not producto:
+        raise ErrorSubida('El producto no pertenece a su empresa')
+
+    contenido = ArchivoParcial(ruta_parcial, subida.nombre_archivo)
+    try:
+        archivo = Archivo(
+            producto=producto,
+            archivo=contenido,
+            nombre=os.path.splitext(subida.nombre_archivo)[0],
+            descripcion=datos.get('descripcion'),
+            orden=datos.get('orden', 0)
+        )
+        archivo._metadatos_precalculados = (
+            subida.tamanio_total,
+            hash_contenido,
+            subida.tipo_mime or 'application/octet-stream'
+        )
+        archivo.save()
+    finally:
+        contenido.close()
+    return archivo
+
+
+def cancelar_subida(subida):
+    """Descarta el archivo parcial y marca la subida como cancelada"""
+    with _hashes_lock:
+        _hashes.pop(str(subida.id_subida), None)
+    if subida.estado == 'en_progreso':
+        ruta = _ruta_local(subida.ruta)
+        if os.path.exists(ruta):
+            os.remove(ruta)
+    elif subida.estado == 'completada' and subida.destino == 'comprobante':
+        default_storage.delete(subida.ruta)
+    subida.estado = 'cancelada'
+    subida.save(update_fields=['estado', 'fecha_modificacion'])
+
+
+def limpiar_subidas_vencidas(horas=None):
+    """Cancela subidas sin actividad y comprobantes no utilizados. Retorna la cantidad."""
+    horas = horas or obtener_configuracion()['HORAS_VIGENCIA']
+    limite = timezone.now() - timedelta(hours=horas)
+    vencidas = SubidaFragmentada.objects.filter(
+        estado__in=['en_progreso', 'completada'],
+        fecha_modificacion__lt=limite
+    )
+    cantidad = 0
+    for subida in vencidas.iterator():
+        cancelar_subida(subida)
+        cantidad += 1
+    return cantidad
@@ -1,3 +1,504 @@
-from django.test import TestCase
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import uuid
+from datetime import timedelta
+from django.contrib.auth.models import AnonymousUser
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import Http404
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from backend.benchmarks.datos import generar_datos
+from planes.models import Plan
+from . import subidas
+from .almacenamiento import liberar_archivo
+from .derivados import generar_variantes, guardar_derivados
+from .models import Archivo, ArchivoDerivado, SubidaFragmentada
+from .servir import normalizar_ruta, respuesta_media
+from .subidas import ErrorSubida, agregar_fragmento, limpiar_subidas_vencidas
 
-# Create your tests here.
+
+class ServirMediaTest(TestCase):
+    """respuesta_media: los prefijos ocultos y privados se aplican a la ruta normalizada"""
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        for ruta in ('productos/foto.jpg', 'comprobantes/pagos/x.pdf', 'subidas/parcial.part'):
+            absoluta = os.path.join(self.media, ruta)
+            os.makedirs(os.path.dirname(absoluta), exist_ok=True)
+            with open(absoluta, 'wb') as archivo:
+                archivo.write(b'contenido')
+        configuracion = override_settings(MEDIA_ROOT=self.media)
+        configuracion.enable()
+        self.addCleanup(configuracion.disable)
+
+    def _get(self, ruta):
+        request = RequestFactory().get(f'/media/{ruta}')
+        request.user = AnonymousUser()
+        return respuesta_media(request, ruta)
+
+    def test_archivo_publico(self):
+        respuesta = self._get('productos/foto.jpg')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(b''.join(respuesta.streaming_content), b'contenido')
+
+    def test_normalizar_ruta(self):
+        self.assertEqual(normalizar_ruta('productos/../comprobantes/pagos/x.pdf'), 'comprobantes/pagos/x.pdf')
+        self.assertEqual(normalizar_ruta('/productos//./foto.jpg'), 'productos/foto.jpg')
+        self.assertIsNone(normalizar_ruta('../settings.py'))
+        self.assertIsNone(normalizar_ruta('productos/../../settings.py'))
+        self.assertIsNone(normalizar_ruta('productos\\..\\..\\settings.py'))
+
+    def test_comprobante_privado_para_anonimo(self):
+        for ruta in ('comprobantes/pagos/x.pdf', 'productos/../comprobantes/pagos/x.pdf',
+                     'productos/./../comprobantes//pagos/x.pdf'):
+            with self.subTest(ruta=ruta), self.assertRaises(Http404):
+                self._get(ruta)
+
+    def test_prefijo_oculto(self):
+        for ruta in ('subidas/parcial.part', 'productos/../subidas/parcial.part', './subidas/parcial.part'):
+            with self.subTest(ruta=ruta), self.assertRaises(Http404):
+                self._get(ruta)
+
+    def test_ruta_fuera_de_media_root(self):
+        for ruta in ('../etc/passwd', 'productos/../../etc/passwd'):
+            with self.subTest(ruta=ruta), self.assertRaises(Http404):
+                self._get(ruta)
+
+
+class CuotaArchivoMultipartTest(TestCase):
+    """La subida multipart (crear/) respeta el almacenamiento del plan como las fragmentadas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = generar_datos(empresas=1, productos=1, clientes=1, ventas=0)
+        Plan.objects.filter(nombre='Benchmark').update(limite_almacenamiento_mb=1)
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        configuracion = override_settings(MEDIA_ROOT=media)
+        configuracion.enable()
+        self.addCleanup(configuracion.disable)
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(self.datos['admin_empresa'])
+
+    def _subir(self, kilobytes, nombre='ficha.pdf'):
+        return self.cliente.post('/api/archivos/crear/', {
+            'producto': self.datos['producto'].pk,
+            'archivo': SimpleUploadedFile(nombre, os.urandom(kilobytes * 1024), content_type='application/pdf'),
+        }, format='multipart')
+
+    def test_dentro_de_la_cuota(self):
+        respuesta = self._subir(600)
+        self.assertEqual(respuesta.status_code, 201, respuesta.content)
+
+    def test_supera_la_cuota(self):
+        self.assertEqual(self._subir(600).status_code, 201)
+
+        respuesta = self._subir(600, 'otra.pdf')
+        self.assertEqual(respuesta.status_code, 413)
+        self.assertEqual(respuesta.json()['status'], 'error')
+        self.assertEqual(Archivo.objects.count(), 1)
+
+    def test_reemplazo_supera_la_cuota(self):
+        archivo = Archivo.objects.get(pk=self._subir(600).json()['data']['id_archivo'])
+
+        respuesta = self.cliente.patch(f'/api/archivos/{archivo.pk}/gestion/', {
+            'archivo': SimpleUploadedFile('grande.pdf', os.urandom(1100 * 1024), content_type='application/pdf'),
+        }, format='multipart')
+        self.assertEqual(respuesta.status_code, 413)
+        archivo.refresh_from_db()
+        self.assertEqual(archivo.tamanio_bytes, 600 * 1024)
+
+
+def _png(ancho, alto, color=(255, 0, 0, 128)):
+    """PNG en memoria (RGBA, semitransparente por defecto)"""
+    from PIL import Image
+
+    salida = io.BytesIO()
+    Image.new('RGBA', (ancho, alto), color).save(salida, 'PNG')
+    return salida.getvalue()
+
+
+@override_settings(IMAGENES_DERIVADAS={'PROCESOS': 0})
+class DerivadosImagenTest(TestCase):
+    """archivo/derivados.py: anchos y formatos generados, sin ampliar, y derivados compartidos por hash"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = generar_datos(empresas=1, productos=1, clientes=1, ventas=0)
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        configuracion = override_settings(MEDIA_ROOT=media)
+        configuracion.enable()
+        self.addCleanup(configuracion.disable)
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(self.datos['admin_empresa'])
+
+    def _subir(self, contenido, nombre='foto.png'):
+        # on_commit ejecuta encolar_derivados, que con PROCESOS = 0 procesa en línea
+        with self.captureOnCommitCallbacks(execute=True):
+            respuesta = self.cliente.post('/api/archivos/crear/', {
+                'producto': self.datos['producto'].pk,
+                'archivo': SimpleUploadedFile(nombre, contenido, content_type='image/png'),
+            }, format='multipart')
+        self.assertEqual(respuesta.status_code, 201, respuesta.content)
+        return Archivo.objects.get(pk=respuesta.json()['data']['id_archivo'])
+
+    def _eliminar(self, archivo):
+        with self.captureOnCommitCallbacks(execute=True):
+            respuesta = self.cliente.delete(f'/api/archivos/{archivo.pk}/gestion/')
+        self.assertEqual(respuesta.status_code, 204, respuesta.content)
+
+    @staticmethod
+    def _nombres(archivo):
+        return sorted(archivo.derivados.values_list('archivo_derivado', flat=True))
+
+    def test_anchos_y_formatos_sin_ampliar(self):
+        variantes = generar_variantes(_png(400, 200), [160, 320, 640, 1280], ['webp', 'jpeg'], 80)
+
+        self.assertEqual(
+            sorted((v['formato'], v['ancho'], v['alto']) for v in variantes),
+            [('jpeg', 160, 80), ('jpeg', 320, 160), ('webp', 160, 80), ('webp', 320, 160)]
+        )
+        for variante in variantes:
+            self.assertEqual(variante['hash'], hashlib.sha256(variante['contenido']).hexdigest())
+
+    def test_imagen_angosta_conserva_su_ancho(self):
+        variantes = generar_variantes(_png(100, 50), [160, 320], ['webp'], 80)
+
+        self.assertEqual([(v['ancho'], v['alto']) for v in variantes], [(100, 50)])
+
+    def test_jpeg_aplana_la_transparencia_sobre_blanco(self):
+        from PIL import Image
+
+        variantes = generar_variantes(_png(200, 100, (0, 0, 0, 0)), [160], ['jpeg', 'webp'], 90)
+        por_formato = {v['formato']: Image.open(io.BytesIO(v['contenido'])) for v in variantes}
+
+        self.assertEqual(por_formato['jpeg'].mode, 'RGB')
+        rojo, verde, azul = por_formato['jpeg'].getpixel((80, 40))
+        self.assertTrue(min(rojo, verde, azul) >= 250, (rojo, verde, azul))
+        # WebP conserva el canal alfa
+        self.assertEqual(por_formato['webp'].mode, 'RGBA')
+        self.assertEqual(por_formato['webp'].getpixel((80, 40))[3], 0)
+
+    def test_subida_genera_los_derivados(self):
+        archivo = self._subir(_png(400, 200))
+
+        self.assertEqual(
+            sorted(archivo.derivados.values_list('formato', 'ancho')),
+            [('jpeg', 160), ('jpeg', 320), ('webp', 160), ('webp', 320)]
+        )
+        for nombre in self._nombres(archivo):
+            self.assertTrue(default_storage.exists(nombre), nombre)
+
+    def test_guardar_reutiliza_derivados_por_hash(self):
+        contenido = _png(400, 200)
+        primero = self._subir(contenido)
+        # Otro original (otro contenido) con las mismas variantes: se reutilizan los archivos
+        segundo = self._subir(_png(400, 200, (0, 255, 0, 255)))
+        variantes = generar_variantes(contenido, [160, 320, 640, 1280], ['webp', 'jpeg'], 80)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            guardar_derivados(segundo.pk, variantes)
+
+        self.assertEqual(self._nombres(segundo), self._nombres(primero))
+        self.assertEqual(ArchivoDerivado.objects.values('archivo_derivado').distinct().count(), 4)
+
+    def test_reemplazo_libera_los_archivos_anteriores(self):
+        archivo = self._subir(_png(400, 200))
+        anteriores = self._nombres(archivo)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            guardar_derivados(archivo.pk, generar_variantes(_png(300, 300), [160], ['webp'], 80))
+
+        self.assertEqual(list(archivo.derivados.values_list('formato', 'ancho', 'alto')), [('webp', 160, 160)])
+        for nombre in anteriores:
+            self.assertFalse(default_storage.exists(nombre), nombre)
+
+    def test_contenido_repetido_comparte_derivados(self):
+        contenido = _png(400, 200)
+        primero = self._subir(contenido)
+        segundo = self._subir(contenido, 'copia.png')
+
+        # copiar_derivados: mismos archivos en el storage, sin volver a procesar
+        self.assertEqual(segundo.archivo.name, primero.archivo.name)
+        self.assertEqual(self._nombres(segundo), self._nombres(primero))
+
+        nombres = self._nombres(primero)
+        self._eliminar(primero)
+        for nombre in nombres + [segundo.archivo.name]:
+            self.assertTrue(default_storage.exists(nombre), nombre)
+
+        self._eliminar(segundo)
+        for nombre in nombres + [segundo.archivo.name]:
+            self.assertFalse(default_storage.exists(nombre), nombre)
+
+
+class DeduplicacionArchivosTest(TestCase):
+    """Archivo.save y liberar_archivo: el mismo contenido se guarda una vez y se borra con la última referencia"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = generar_datos(empresas=1, productos=1, clientes=1, ventas=0)
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        configuracion = override_settings(MEDIA_ROOT=media)
+        configuracion.enable()
+        self.addCleanup(configuracion.disable)
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(self.datos['admin_empresa'])
+
+    def _subir(self, contenido, nombre='ficha.pdf'):
+        respuesta = self.cliente.post('/api/archivos/crear/', {
+            'producto': self.datos['producto'].pk,
+            'archivo': SimpleUploadedFile(nombre, contenido, content_type='application/pdf'),
+        }, format='multipart')
+        self.assertEqual(respuesta.status_code, 201, respuesta.content)
+        return Archivo.objects.get(pk=respuesta.json()['data']['id_archivo'])
+
+    def _eliminar(self, archivo):
+        with self.captureOnCommitCallbacks(execute=True):
+            respuesta = self.cliente.delete(f'/api/archivos/{archivo.pk}/gestion/')
+        self.assertEqual(respuesta.status_code, 204, respuesta.content)
+
+    def test_mismo_contenido_un_solo_nombre(self):
+        contenido = b'%PDF-1.4 ficha tecnica'
+        primero = self._subir(contenido)
+        segundo = self._subir(contenido, 'copia.pdf')
+        distinto = self._subir(b'%PDF-1.4 otra ficha')
+
+        self.assertEqual(segundo.archivo.name, primero.archivo.name)
+        self.assertNotEqual(distinto.archivo.name, primero.archivo.name)
+        self.assertEqual(primero.hash_contenido, hashlib.sha256(contenido).hexdigest())
+        self.assertEqual((primero.tamanio_bytes, primero.tipo_mime), (len(contenido), 'application/pdf'))
+        self.assertIn(primero.hash_contenido, primero.archivo.name)
+        self.assertEqual(len(os.listdir(os.path.dirname(primero.archivo.path))), 1)
+
+    def test_se_elimina_con_la_ultima_referencia(self):
+        contenido = b'%PDF-1.4 compartido'
+        primero = self._subir(contenido)
+        segundo = self._subir(contenido, 'copia.pdf')
+        nombre = primero.archivo.name
+
+        self._eliminar(primero)
+        self.assertTrue(default_storage.exists(nombre))
+
+        # El borrado físico espera a que se confirme la transacción
+        with self.captureOnCommitCallbacks() as callbacks:
+            respuesta = self.cliente.delete(f'/api/archivos/{segundo.pk}/gestion/')
+        self.assertEqual(respuesta.status_code, 204)
+        self.assertTrue(default_storage.exists(nombre))
+        for callback in callbacks:
+            callback()
+        self.assertFalse(default_storage.exists(nombre))
+
+    def test_liberar_archivo_con_referencias(self):
+        archivo = self._subir(b'%PDF-1.4 referenciado')
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.assertFalse(liberar_archivo(archivo.archivo.name, archivo.hash_contenido))
+        self.assertEqual(callbacks, [])
+        self.assertTrue(default_storage.exists(archivo.archivo.name))
+
+    def test_reemplazo_conserva_el_contenido_compartido(self):
+        contenido = b'%PDF-1.4 original'
+        primero = self._subir(contenido)
+        self._subir(contenido, 'copia.pdf')
+        nombre = primero.archivo.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            respuesta = self.cliente.patch(f'/api/archivos/{primero.pk}/gestion/', {
+                'archivo': SimpleUploadedFile('nueva.pdf', b'%PDF-1.4 nueva', content_type='application/pdf'),
+            }, format='multipart')
+        self.assertEqual(respuesta.status_code, 200, respuesta.content)
+        primero.refresh_from_db()
+        self.assertNotEqual(primero.archivo.name, nombre)
+        self.assertTrue(default_storage.exists(nombre))
+        self.assertTrue(default_storage.exists(primero.archivo.name))
+
+
+class SubidaFragmentadaTest(TestCase):
+    """archivo/subidas.py: offsets, fragmentos cortados, hash al completar, comprobantes y limpieza"""
+
+    URL = '/api/archivos/subidas/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = generar_datos(empresas=1, productos=1, clientes=1, ventas=0)
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        configuracion = override_settings(MEDIA_ROOT=media)
+        configuracion.enable()
+        self.addCleanup(configuracion.disable)
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(self.datos['admin_empresa'])
+
+    def _iniciar(self, contenido, nombre='manual.pdf', destino='archivo'):
+        datos = {'nombre_archivo': nombre, 'tamanio_total': len(contenido), 'destino': destino}
+        if destino == 'archivo':
+            datos['producto'] = self.datos['producto'].pk
+        respuesta = self.cliente.post(self.URL, datos, format='json')
+        self.assertEqual(respuesta.status_code, 201, respuesta.content)
+        return respuesta.json()['data']['id_subida']
+
+    def _fragmento(self, id_subida, offset, contenido):
+        return self.cliente.generic(
+            'PATCH', f'{self.URL}{id_subida}/', contenido,
+            content_type='application/offset+octet-stream', HTTP_UPLOAD_OFFSET=str(offset)
+        )
+
+    def _completar(self, id_subida):
+        return self.cliente.post(f'{self.URL}{id_subida}/completar/')
+
+    def test_completa_y_crea_el_archivo(self):
+        contenido = b'%PDF-1.4 ' + os.urandom(3000)
+        id_subida = self._iniciar(contenido)
+
+        for offset in range(0, len(contenido), 1024):
+            respuesta = self._fragmento(id_subida, offset, contenido[offset:offset + 1024])
+            self.assertEqual(respuesta.status_code, 200, respuesta.content)
+        self.assertEqual(respuesta['Upload-Offset'], str(len(contenido)))
+
+        respuesta = self._completar(id_subida)
+        self.assertEqual(respuesta.status_code, 201, respuesta.content)
+        archivo = Archivo.objects.get(pk=respuesta.json()['data']['id_archivo'])
+        self.assertEqual(archivo.hash_contenido, hashlib.sha256(contenido).hexdigest())
+        self.assertEqual(archivo.tamanio_bytes, len(contenido))
+        with archivo.archivo.open('rb') as guardado:
+            self.assertEqual(guardado.read(), contenido)
+        subida = SubidaFragmentada.objects.get(pk=id_subida)
+        self.assertEqual((subida.estado, subida.hash_contenido), ('utilizada', archivo.hash_contenido))
+        self.assertFalse(os.path.exists(default_storage.path(subida.ruta)))
+
+    def test_offset_incorrecto(self):
+        contenido = b'%PDF-1.4 ' + b'x' * 100
+        id_subida = self._iniciar(contenido)
+        self.assertEqual(self._fragmento(id_subida, 0, contenido[:50]).status_code, 200)
+
+        for offset in (0, 80):
+            with self.subTest(offset=offset):
+                respuesta = self._fragmento(id_subida, offset, contenido[offset:])
+                self.assertEqual(respuesta.status_code, 409)
+                self.assertEqual(respuesta.json()['detail'], {'offset': 50})
+
+        respuesta = self.cliente.get(f'{self.URL}{id_subida}/')
+        self.assertEqual(respuesta['Upload-Offset'], '50')
+
+    def test_fragmento_cortado_se_descarta(self):
+        contenido = b'%PDF-1.4 ' + b'y' * 100
+        id_subida = self._iniciar(contenido)
+        self.assertEqual(self._fragmento(id_subida, 0, contenido[:40]).status_code, 200)
+
+        # El cuerpo trae menos bytes que los declarados
+        with self.assertRaises(ErrorSubida) as error:
+            agregar_fragmento(id_subida, self.datos['admin_empresa'], 40, io.BytesIO(contenido[40:70]), 69)
+        self.assertEqual(error.exception.extra, {'offset': 40})
+        subida = SubidaFragmentada.objects.get(pk=id_subida)
+        self.assertEqual(subida.bytes_recibidos, 40)
+        self.assertEqual(os.path.getsize(default_storage.path(subida.ruta)), 40)
+
+        # El cliente reenvía el fragmento completo desde el offset indicado
+        self.assertEqual(self._fragmento(id_subida, 40, contenido[40:]).status_code, 200)
+        respuesta = self._completar(id_subida)
+        self.assertEqual(respuesta.status_code, 201, respuesta.content)
+        self.assertEqual(
+            Archivo.objects.get(pk=respuesta.json()['data']['id_archivo']).hash_contenido,
+            hashlib.sha256(contenido).hexdigest()
+        )
+
+    def test_hash_se_recalcula_sin_el_estado_en_memoria(self):
+        contenido = b'%PDF-1.4 ' + os.urandom(500)
+        id_subida = self._iniciar(contenido)
+        self.assertEqual(self._fragmento(id_subida, 0, contenido[:200]).status_code, 200)
+        # Otro worker atiende el siguiente fragmento
+        subidas._hashes.clear()
+        self.assertEqual(self._fragmento(id_subida, 200, contenido[200:]).status_code, 200)
+        self.assertNotIn(str(id_subida), subidas._hashes)
+
+        respuesta = self._completar(id_subida)
+        self.assertEqual(respuesta.status_code, 201, respuesta.content)
+        self.assertEqual(
+            Archivo.objects.get(pk=respuesta.json()['data']['id_archivo']).hash_contenido,
+            hashlib.sha256(contenido).hexdigest()
+        )
+
+    def test_faltan_bytes(self):
+        contenido = b'%PDF-1.4 incompleto'
+        id_subida = self._iniciar(contenido)
+        self._fragmento(id_subida, 0, contenido[:5])
+
+        respuesta = self._completar(id_subida)
+        self.assertEqual(respuesta.status_code, 409)
+        self.assertEqual(respuesta.json()['detail'], {'offset': 5, 'tamanio_total': len(contenido)})
+
+    def test_comprobante_debe_ser_pdf(self):
+        respuesta = self.cliente.post(self.URL, {
+            'nombre_archivo': 'pago.png', 'tamanio_total': 10, 'destino': 'comprobante'
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(respuesta.json()['message'], 'El comprobante debe ser PDF (.pdf)')
+
+        # Extensión .pdf pero contenido que no es PDF
+        contenido = b'\x89PNG\r\n\x1a\n' + b'z' * 20
+        id_subida = self._iniciar(contenido, 'pago.pdf', destino='comprobante')
+        self.assertEqual(self._fragmento(id_subida, 0, contenido).status_code, 200)
+        respuesta = self._completar(id_subida)
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(respuesta.json()['message'], 'El comprobante no es un PDF válido')
+        self.assertEqual(SubidaFragmentada.objects.get(pk=id_subida).estado, 'en_progreso')
+
+    def test_comprobante_valido(self):
+        contenido = b'%PDF-1.4 comprobante'
+        id_subida = self._iniciar(contenido, 'pago.pdf', destino='comprobante')
+        self._fragmento(id_subida, 0, contenido)
+
+        respuesta = self._completar(id_subida)
+        self.assertEqual(respuesta.status_code, 201, respuesta.content)
+        subida = SubidaFragmentada.objects.get(pk=id_subida)
+        self.assertEqual(subida.estado, 'completada')
+        self.assertTrue(subida.ruta.startswith('comprobantes/pagos/'))
+        self.assertTrue(default_storage.exists(subida.ruta))
+
+    def test_cancelar_descarta_el_parcial(self):
+        contenido = b'%PDF-1.4 cancelada'
+        id_subida = self._iniciar(contenido)
+        self._fragmento(id_subida, 0, contenido[:6])
+        ruta = default_storage.path(SubidaFragmentada.objects.get(pk=id_subida).ruta)
+
+        respuesta = self.cliente.delete(f'{self.URL}{id_subida}/')
+        self.assertEqual(respuesta.status_code, 200, respuesta.content)
+        self.assertEqual(SubidaFragmentada.objects.get(pk=id_subida).estado, 'cancelada')
+        self.assertFalse(os.path.exists(ruta))
+        self.assertEqual(self._fragmento(id_subida, 6, contenido[6:]).status_code, 409)
+        self.assertEqual(self.cliente.delete(f'{self.URL}{id_subida}/').status_code, 409)
+
+    def test_limpiar_subidas_vencidas(self):
+        vencida = self._iniciar(b'%PDF-1.4 vencida')
+        comprobante = self._iniciar(b'%PDF-1.4 pago', 'pago.pdf', destino='comprobante')
+        self._fragmento(comprobante, 0, b'%PDF-1.4 pago')
+        self.assertEqual(self._completar(comprobante).status_code, 201)
+        vigente = self._iniciar(b'%PDF-1.4 vigente')
+        ruta_comprobante = SubidaFragmentada.objects.get(pk=comprobante).ruta
+        SubidaFragmentada.objects.filter(pk__in=[vencida, comprobante]).update(
+            fecha_modificacion=timezone.now() - timedelta(hours=25)
+        )
+
+        self.assertEqual(limpiar_subidas_vencidas(), 2)
+        self.assertEqual(
+            dict(SubidaFragmentada.objects.values_list('id_subida', 'estado')),
+            {uuid.UUID(vencida): 'cancelada', uuid.UUID(comprobante): 'cancelada', uuid.UUID(vigente): 'en_progreso'}
+        )
+        self.assertFalse(default_storage.exists(ruta_comprobante))
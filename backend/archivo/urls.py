@@ -2,7 +2,8 @@ from django.urls import path
 from .views import (
     ArchivoCreateView, ArchivoListView, 
     ArchivoDetailView, ArchivoUpdateDeleteView,
-    ArchivoPorProductoView
+    ArchivoPorProductoView, SubidaIniciarView,
+    SubidaFragmentoView, SubidaCompletarView
 )
 
 urlpatterns = [
@@ -11,4 +12,7 @@ urlpatterns = [
     path('<int:pk>/', ArchivoDetailView.as_view(), name='archivo_detail'),
     path('<int:pk>/gestion/', ArchivoUpdateDeleteView.as_view(), name='archivo_manage'),
     path('producto/<int:producto_id>/', ArchivoPorProductoView.as_view(), name='archivo_por_producto'),
+    path('subidas/', SubidaIniciarView.as_view(), name='subida_iniciar'),
+    path('subidas/<uuid:id_subida>/', SubidaFragmentoView.as_view(), name='subida_fragmento'),
+    path('subidas/<uuid:id_subida>/completar/', SubidaCompletarView.as_view(), name='subida_completar'),
 ]
\ No newline at end of file
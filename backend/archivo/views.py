@@ -1,9 +1,21 @@
 from rest_framework import generics, permissions, status, filters
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.parsers import MultiPartParser, FormParser
+from django.db import transaction
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import Archivo
-from .serializers import ArchivoSerializer, ArchivoCreateSerializer, ArchivoPublicSerializer
+from .serializers import (
+    ArchivoSerializer, ArchivoCreateSerializer, ArchivoPublicSerializer,
+    SubidaIniciarSerializer, SubidaFragmentadaSerializer
+)
+from .derivados import encolar_derivados, eliminar_derivados
+from .almacenamiento import liberar_archivo
+from .servir import respuesta_media
+from .subidas import (
+    ErrorSubida, iniciar_subida, obtener_subida, agregar_fragmento,
+    completar_subida, cancelar_subida, reservar_almacenamiento, obtener_configuracion as obtener_configuracion_subidas
+)
 from categoria.views import IsAdminEmpresa
 
 class IsAdminEmpresaOrReadOnly(permissions.BasePermission):
@@ -47,12 +59,21 @@ class ArchivoCreateView(generics.CreateAPIView):
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        archivo = serializer.save()
+        try:
+            with transaction.atomic():
+                # Misma cuota del plan que las subidas fragmentadas
+                reservar_almacenamiento(
+                    request.user.usuario_empresa.empresa, serializer.validated_data['archivo'].size
+                )
+                archivo = serializer.save()
+        except ErrorSubida as error:
+            return respuesta_error_subida(error)
+        encolar_derivados(archivo)
         
         return Response({
             'status': 'success',
             'message': 'Archivo subido exitosamente',
-            'data': ArchivoSerializer(archivo).data
+            'data': ArchivoSerializer(archivo, context=self.get_serializer_context()).data
         }, status=status.HTTP_201_CREATED)
 
 class ArchivoListView(generics.ListAPIView):
@@ -70,7 +91,7 @@ class ArchivoListView(generics.ListAPIView):
         # Solo archivos de productos de empresas activas
         return Archivo.objects.filter(
             producto__empresa__estado='activo'
-        ).select_related('producto__empresa')
+        ).select_related('producto__empresa').prefetch_related('derivados')
 
 class ArchivoDetailView(generics.RetrieveAPIView):
     """
@@ -82,14 +103,14 @@ class ArchivoDetailView(generics.RetrieveAPIView):
     def get_queryset(self):
         return Archivo.objects.filter(
             producto__empresa__estado='activo'
-        ).select_related('producto__empresa')
+        ).select_related('producto__empresa').prefetch_related('derivados')
 
 class ArchivoUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
     """
     Vista para actualizar y eliminar archivo (solo admin_empresa)
     """
     serializer_class = ArchivoSerializer
-    permission_classes = [permissions.IsAuthenticated, IsAdminEmpresa]
+    permission_classes = [permissions.IsAuthenticated, IsAdminEmpresaOrReadOnly]
     parser_classes = [MultiPartParser, FormParser]
     
     def get_queryset(self):
@@ -97,20 +118,44 @@ class ArchivoUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
         empresa = self.request.user.usuario_empresa.empresa
         return Archivo.objects.filter(
             producto__empresa=empresa
-        ).select_related('producto')
+        ).select_related('producto__empresa').prefetch_related('derivados')
+    
+    def perform_update(self, serializer):
+        anterior = (serializer.instance.archivo.name, serializer.instance.hash_contenido)
+        with transaction.atomic():
+            nuevo = serializer.validated_data.get('archivo')
+            if nuevo is not None:
+                # Solo cuenta lo que el reemplazo agrega al uso actual
+                reservar_almacenamiento(
+                    serializer.instance.producto.empresa,
+                    nuevo.size - (serializer.instance.tamanio_bytes or 0)
+                )
+            archivo = serializer.save()
+            # El contenido reemplazado se elimina solo si nadie más lo referencia
+            if archivo.archivo.name != anterior[0]:
+                liberar_archivo(*anterior)
+        # Un archivo nuevo invalida los derivados del anterior
+        if 'archivo' in serializer.validated_data:
+            encolar_derivados(archivo)
     
     def perform_destroy(self, instance):
-        # Eliminar el archivo físico del servidor
-        if instance.archivo:
-            instance.archivo.delete()
-        instance.delete()
+        # El contenido puede estar compartido con otros archivos (deduplicación):
+        # el archivo físico se elimina con la última referencia
+        nombre, hash_contenido = instance.archivo.name, instance.hash_contenido
+        with transaction.atomic():
+            eliminar_derivados(instance)
+            instance.delete()
+            liberar_archivo(nombre, hash_contenido)
     
     def update(self, request, *args, **kwargs):
         partial = kwargs.pop('partial', False)
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
-        self.perform_update(serializer)
+        try:
+            self.perform_update(serializer)
+        except ErrorSubida as error:
+            return respuesta_error_subida(error)
         
         return Response({
             'status': 'success',
@@ -139,5 +184,167 @@ class ArchivoPorProductoView(generics.ListAPIView):
         return Archivo.objects.filter(
             producto_id=producto_id,
             producto__empresa__estado='activo'
-        ).select_related('producto__empresa').order_by('orden')
+        ).select_related('producto__empresa').prefetch_related('derivados').order_by('orden')
     
+
+
+class SubidaIniciarView(generics.GenericAPIView):
+    """
+    Inicia una subida reanudable por fragmentos (solo admin_empresa)
+    POST /api/archivos/subidas/
+    Body: nombre_archivo, tamanio_total, destino ('archivo' | 'comprobante')
+          y para 'archivo': producto, descripcion, orden
+    """
+    serializer_class = SubidaIniciarSerializer
+    permission_classes = [permissions.IsAuthenticated, IsAdminEmpresa]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        datos = serializer.validated_data
+
+        datos_destino = {}
+        if datos['destino'] == 'archivo':
+            datos_destino = {
+                'producto': datos['producto'].id_producto,
+                'descripcion': datos.get('descripcion'),
+                'orden': datos.get('orden', 0)
+            }
+
+        try:
+            subida = iniciar_subida(
+                usuario=request.user,
+                empresa=request.user.usuario_empresa.empresa,
+                destino=datos['destino'],
+                nombre_archivo=datos['nombre_archivo'],
+                tamanio_total=datos['tamanio_total'],
+                datos_destino=datos_destino
+            )
+        except ErrorSubida as e:
+            return respuesta_error_subida(e)
+
+        return Response({
+            'status': 'success',
+            'message': 'Subida iniciada',
+            'data': SubidaFragmentadaSerializer(subida).data,
+            'tamanio_fragmento': obtener_configuracion_subidas()['TAMANIO_FRAGMENTO']
+        }, status=status.HTTP_201_CREATED)
+
+
+class SubidaFragmentoView(generics.GenericAPIView):
+    """
+    Estado, envío de fragmentos y cancelación de una subida
+    GET    /api/archivos/subidas/<id>/  -> offset actual (para reanudar)
+    PATCH  /api/archivos/subidas/<id>/  -> cuerpo binario del fragmento, encabezado Upload-Offset
+    DELETE /api/archivos/subidas/<id>/  -> cancela y descarta los bytes recibidos
+    """
+    serializer_class = SubidaFragmentadaSerializer
+    permission_classes = [permissions.IsAuthenticated, IsAdminEmpresa]
+
+    def get(self, request, id_subida, *args, **kwargs):
+        try:
+            subida = obtener_subida(id_subida, request.user)
+        except ErrorSubida as e:
+            return respuesta_error_subida(e)
+
+        respuesta = Response({
+            'status': 'success',
+            'data': self.get_serializer(subida).data
+        })
+        respuesta['Upload-Offset'] = str(subida.bytes_recibidos)
+        return respuesta
+
+    def patch(self, request, id_subida, *args, **kwargs):
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+            longitud = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return Response({
+                'status': 'error',
+                'message': 'Encabezados inválidos',
+                'detail': 'Se requieren Upload-Offset y Content-Length numéricos'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            # Se lee el cuerpo crudo por bloques; request.data nunca se evalúa
+            subida = agregar_fragmento(id_subida, request.user, offset, request.stream, longitud)
+        except ErrorSubida as e:
+            return respuesta_error_subida(e)
+
+        respuesta = Response({
+            'status': 'success',
+            'data': self.get_serializer(subida).data
+        })
+        respuesta['Upload-Offset'] = str(subida.bytes_recibidos)
+        return respuesta
+
+    def delete(self, request, id_subida, *args, **kwargs):
+        try:
+            with transaction.atomic():
+                subida = obtener_subida(id_subida, request.user, bloquear=True)
+                if subida.estado in ['utilizada', 'cancelada']:
+                    raise ErrorSubida(f'La subida está {subida.estado}', codigo=409)
+                cancelar_subida(subida)
+        except ErrorSubida as e:
+            return respuesta_error_subida(e)
+
+        return Response({
+            'status': 'success',
+            'message': 'Subida cancelada'
+        })
+
+
+class SubidaCompletarView(generics.GenericAPIView):
+    """
+    Completa una subida cuando se recibieron todos los bytes
+    POST /api/archivos/subidas/<id>/completar/
+    - destino 'archivo': crea el Archivo del producto
+    - destino 'comprobante': deja el PDF listo para /api/suscripciones/solicitar/ (id_subida)
+    """
+    serializer_class = SubidaFragmentadaSerializer
+    permission_classes = [permissions.IsAuthenticated, IsAdminEmpresa]
+
+    def post(self, request, id_subida, *args, **kwargs):
+        try:
+            subida, archivo = completar_subida(id_subida, request.user)
+        except ErrorSubida as e:
+            return respuesta_error_subida(e)
+
+        if archivo is not None:
+            encolar_derivados(archivo)
+            return Response({
+                'status': 'success',
+                'message': 'Archivo subido exitosamente',
+                'data': ArchivoSerializer(archivo, context=self.get_serializer_context()).data
+            }, status=status.HTTP_201_CREATED)
+
+        return Response({
+            'status': 'success',
+            'message': 'Comprobante subido exitosamente',
+            'data': self.get_serializer(subida).data
+        }, status=status.HTTP_201_CREATED)
+
+
+class ServirMediaView(APIView):
+    """
+    Entrega los archivos de MEDIA_URL (reemplaza a static() de desarrollo)
+    GET /media/<ruta>
+    Los archivos de producto son públicos; los comprobantes de pago solo para
+    administradores de la plataforma y la empresa dueña. Ver archivo/servir.py.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def perform_authentication(self, request):
+        # Autenticación perezosa: solo se resuelve el usuario al pedir un comprobante
+        pass
+
+    def get(self, request, ruta, *args, **kwargs):
+        return respuesta_media(request, ruta)
+
+
+def respuesta_error_subida(error):
+    return Response({
+        'status': 'error',
+        'message': error.mensaje,
+        'detail': error.extra or None
+    }, status=error.codigo)
@@ -0,0 +1,171 @@
+# backend/benchmarks/datos.py
+"""
+Generador de datos sintéticos para los benchmarks (backend/benchmarks/escenarios.py).
+
+Todo se inserta con bulk_create y un random.Random con semilla fija: dos ejecuciones con
+los mismos parámetros producen los mismos datos (mismas cantidades, precios y fechas
+relativas), así las mediciones de distintas ramas son comparables.
+"""
+import random
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+CONTRASENA = 'benchmark-1234'
+TAMANIO_LOTE = 1000
+DIAS_HISTORIA = 180
+DETALLES_POR_VENTA = 3
+NOTIFICACIONES_POR_USUARIO = 30
+# Stock del producto que vende el escenario de venta: alcanza para cualquier cantidad de iteraciones
+STOCK_ESCENARIO_VENTA = 1_000_000
+
+
+def generar_datos(empresas=2, productos=50, clientes=20, ventas=200, semilla=1):
+    """
+    Crea `empresas` empresas activas, cada una con admin_empresa, vendedor, suscripción
+    activa, `productos` productos (el primero con STOCK_ESCENARIO_VENTA unidades),
+    `clientes` clientes vinculados y `ventas` ventas históricas repartidas en DIAS_HISTORIA días. Retorna un dict con lo necesario para
+    autenticarse y armar las URLs de los escenarios.
+    """
+    from categoria.models import Categoria
+    from cliente.models import Cliente
+    from detalle_venta.models import DetalleVenta
+    from empresas.models import Empresa
+    from notificaciones.models import Notificacion
+    from planes.models import Plan
+    from producto.kardex import movimiento, registrar
+    from producto.models import Producto
+    from proveedor.models import Proveedor
+    from relacion_notifica.models import Notifica
+    from relacion_tiene.models import Tiene
+    from roles.models import Rol
+    from suscripciones.models import Suscripcion
+    from usuario_empresa.models import Usuario_Empresa
+    from usuarios.models import User
+    from ventas.models import Venta
+
+    azar = random.Random(semilla)
+    ahora = timezone.now()
+    # Un solo hash para todos: el costo del hasher se mide en el escenario de login
+    hash_contrasena = make_password(CONTRASENA)
+
+    roles = {
+        nombre: Rol.objects.get_or_create(rol=nombre, defaults={'descripcion': nombre, 'estado': 'activo'})[0]
+        for nombre in ('admin', 'admin_empresa', 'vendedor', 'cliente')
+    }
+    plan = Plan.objects.create(
+        nombre='Benchmark', precio=0, duracion_dias=365, limite_productos=productos * 10,
+        limite_usuarios=50, descripcion='Plan de benchmark'
+    )
+
+    lista_empresas = Empresa.objects.bulk_create([
+        Empresa(nombre=f'Empresa {i}', nit=f'BENCH-{i}', rubro='retail', direccion='-',
+                telefono='0', email=f'empresa{i}@bench.test', estado='activo')
+        for i in range(empresas)
+    ])
+    Suscripcion.objects.bulk_create([
+        Suscripcion(plan=plan, empresa=empresa, estado='activo', fecha_fin=ahora + timedelta(days=365))
+        for empresa in lista_empresas
+    ])
+
+    personal = User.objects.bulk_create([
+        User(email=f'{rol}{i}@bench.test', password=hash_contrasena, rol=roles[rol], estado='activo')
+        for i in range(empresas)
+        for rol in ('admin_empresa', 'vendedor')
+    ], batch_size=TAMANIO_LOTE)
+    usuarios_empresa = Usuario_Empresa.objects.bulk_create([
+        Usuario_Empresa(id_usuario=usuario, empresa=lista_empresas[indice // 2], estado='activo')
+        for indice, usuario in enumerate(personal)
+    ], batch_size=TAMANIO_LOTE)
+    vendedores = usuarios_empresa[1::2]
+
+    categorias = Categoria.objects.bulk_create([
+        Categoria(nombre=f'Categoría {i}-{j}', empresa=empresa)
+        for i, empresa in enumerate(lista_empresas)
+        for j in range(5)
+    ])
+    proveedores = Proveedor.objects.bulk_create([
+        Proveedor(nombre=f'Proveedor {i}-{j}', telefono='0', email=f'proveedor{i}-{j}@bench.test',
+                  direccion='-', empresa=empresa)
+        for i, empresa in enumerate(lista_empresas)
+        for j in range(3)
+    ])
+
+    lista_productos = [
+        Producto(
+            nombre=f'Producto {i}-{j}',
+            precio=Decimal(azar.randint(100, 50000)) / 100,
+            stock_actual=azar.randint(0, 500),
+            stock_minimo=azar.randint(0, 20),
+            categoria=categorias[i * 5 + j % 5],
+            proveedor=proveedores[i * 3 + j % 3],
+            empresa=empresa
+        )
+        for i, empresa in enumerate(lista_empresas)
+        for j in range(productos)
+    ]
+    for producto in lista_productos[::productos]:
+        producto.stock_actual = STOCK_ESCENARIO_VENTA
+    Producto.objects.bulk_create(lista_productos, batch_size=TAMANIO_LOTE)
+    registrar([movimiento(producto, 'inicial', producto.stock_actual) for producto in lista_productos])
+
+    usuarios_clientes = User.objects.bulk_create([
+        User(email=f'cliente{i}-{j}@bench.test', password=hash_contrasena, rol=roles['cliente'], estado='activo')
+        for i in range(empresas)
+        for j in range(clientes)
+    ], batch_size=TAMANIO_LOTE)
+    lista_clientes = Cliente.objects.bulk_create([
+        Cliente(id_usuario=usuario, nit=f'BENCH-C{usuario.pk}', nombre_cliente=f'Cliente {usuario.pk}',
+                direccion_cliente='-', telefono_cliente='0')
+        for usuario in usuarios_clientes
+    ], batch_size=TAMANIO_LOTE)
+    Tiene.objects.bulk_create([
+        Tiene(id_cliente=cliente, id_empresa=lista_empresas[indice // clientes], estado='activo')
+        for indice, cliente in enumerate(lista_clientes)
+    ], batch_size=TAMANIO_LOTE)
+
+    lista_ventas, lineas = [], []
+    for i, vendedor in enumerate(vendedores):
+        productos_empresa = lista_productos[i * productos:(i + 1) * productos]
+        clientes_empresa = lista_clientes[i * clientes:(i + 1) * clientes]
+        for _ in range(ventas):
+            elegidos = azar.sample(productos_empresa, min(DETALLES_POR_VENTA, len(productos_empresa)))
+            detalle = [(producto, azar.randint(1, 5)) for producto in elegidos]
+            lista_ventas.append(Venta(
+                usuario_empresa=vendedor,
+                cliente=azar.choice(clientes_empresa),
+                precio_total=sum(producto.precio * cantidad for producto, cantidad in detalle)
+            ))
+            lineas.append(detalle)
+    Venta.objects.bulk_create(lista_ventas, batch_size=TAMANIO_LOTE)
+    # fecha_venta es auto_now_add: se reparte en la historia después de insertar
+    for venta in lista_ventas:
+        venta.fecha_venta = ahora - timedelta(minutes=azar.randint(0, DIAS_HISTORIA * 24 * 60))
+    Venta.objects.bulk_update(lista_ventas, ['fecha_venta'], batch_size=TAMANIO_LOTE)
+    DetalleVenta.objects.bulk_create([
+        DetalleVenta(id_venta=venta, id_producto=producto, cantidad=cantidad,
+                     precio_unitario=producto.precio, subtotal=producto.precio * cantidad)
+        for venta, detalle in zip(lista_ventas, lineas)
+        for producto, cantidad in detalle
+    ], batch_size=TAMANIO_LOTE)
+
+    notificaciones = Notificacion.objects.bulk_create([
+        Notificacion(titulo=f'Notificación {i}', mensaje='Benchmark', tipo=azar.choice(['info', 'stock', 'venta']))
+        for i in range(NOTIFICACIONES_POR_USUARIO)
+    ])
+    Notifica.objects.bulk_create([
+        Notifica(id_usuario=usuario, id_notificacion=notificacion, leido=azar.random() < 0.5)
+        for usuario in personal
+        for notificacion in notificaciones
+    ], batch_size=TAMANIO_LOTE)
+
+    return {
+        'empresa': lista_empresas[0],
+        'admin_empresa': personal[0],
+        'vendedor': personal[1],
+        'producto': lista_productos[0],
+        'proveedor': proveedores[0],
+        'cliente': lista_clientes[0] if lista_clientes else None,
+        'contrasena': CONTRASENA,
+    }
@@ -0,0 +1,141 @@
+# backend/benchmarks/escenarios.py
+"""
+Benchmarks de los endpoints más usados sobre los datos de backend/benchmarks/datos.py.
+
+Por escenario:
+- consultas: consultas SQL de una solicitud (CaptureQueriesContext); no depende de la
+  máquina, es la métrica que se compara sin tolerancia
+- p50_ms / p95_ms: latencia de ITERACIONES solicitudes con el cliente de pruebas de
+  Django (todo el stack: middleware, autenticación JWT, vista y render)
+- memoria_kb: pico de memoria asignada durante una solicitud (tracemalloc), medido en
+  una solicitud aparte porque tracemalloc altera la latencia
+
+La verificación de reCAPTCHA del login se reemplaza por una respuesta positiva: es una
+llamada externa y no forma parte de lo que se mide.
+"""
+import math
+import time
+import tracemalloc
+from unittest import mock
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+CALENTAMIENTO = 2
+
+
+def _escenarios(datos):
+    """(nombre, usuario autenticado o None, método, url, cuerpo)"""
+    return [
+        # Venta del vendedor (ruta realizar-compra/ de ventas): validación de stock disponible,
+        # descuento con F() y kardex. El producto tiene stock para todas las iteraciones
+        ('realizar_venta', datos['vendedor'], 'post', '/api/ventas/realizar-compra/', {
+            'cliente_id': datos['cliente'].id_usuario_id,
+            'detalles': [{
+                'id_producto': datos['producto'].pk,
+                'cantidad': 1,
+                'precio_unitario': '1.00',
+            }]
+        }),
+        # Compra de reposición a un proveedor (compras/realizar/): suma stock
+        ('compra_reposicion', datos['vendedor'], 'post', '/api/compras/realizar/', {
+            'detalles': [{
+                'id_producto': datos['producto'].pk,
+                'cantidad': 1,
+                'precio_unitario': '1.00',
+                'id_proveedor': datos['proveedor'].pk,
+            }]
+        }),
+        ('listar_ventas', datos['vendedor'], 'get', '/api/ventas/listar-ventas/', None),
+        ('productos_empresa_detalles', datos['vendedor'], 'get',
+         f"/api/productos/empresa/{datos['empresa'].pk}/detalles/", None),
+        ('notificaciones_recientes', datos['vendedor'], 'get', '/api/notificaciones/recientes/', None),
+        ('login', None, 'post', '/api/auth/login/', {
+            'email': datos['vendedor'].email,
+            'password': datos['contrasena'],
+            'recaptcha_token': 'benchmark',
+        }),
+        ('dashboard_suscripciones', datos['admin_empresa'], 'get', '/api/suscripciones/todas/', None),
+    ]
+
+
+def _cliente(usuario):
+    cliente = Client()
+    if usuario is not None:
+        from rest_framework_simplejwt.tokens import RefreshToken
+        cliente.defaults['HTTP_AUTHORIZATION'] = f'Bearer {RefreshToken.for_user(usuario).access_token}'
+    return cliente
+
+
+def percentil(valores, porcentaje):
+    """Percentil por rango más cercano"""
+    ordenados = sorted(valores)
+    return ordenados[max(0, math.ceil(porcentaje / 100 * len(ordenados)) - 1)]
+
+
+def ejecutar(datos, iteraciones=20, solo=None):
+    """{escenario: {status, consultas, p50_ms, p95_ms, memoria_kb}}"""
+    resultados = {}
+    with mock.patch('cuentas.views.verify_recaptcha', return_value=True):
+        for nombre, usuario, metodo, url, cuerpo in _escenarios(datos):
+            if solo and nombre not in solo:
+                continue
+            cliente = _cliente(usuario)
+
+            def solicitud():
+                return getattr(cliente, metodo)(url, cuerpo, content_type='application/json') if cuerpo \
+                    else getattr(cliente, metodo)(url)
+
+            for _ in range(CALENTAMIENTO):
+                solicitud()
+
+            with CaptureQueriesContext(connection) as capturadas:
+                respuesta = solicitud()
+            # captured_queries lee connection.queries: se cuenta antes de la próxima solicitud
+            consultas = len(capturadas)
+
+            tracemalloc.start()
+            try:
+                solicitud()
+                _, pico = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+
+            tiempos = []
+            for _ in range(iteraciones):
+                inicio = time.perf_counter()
+                solicitud()
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+
+            resultados[nombre] = {
+                'status': respuesta.status_code,
+                'consultas': consultas,
+                'p50_ms': round(percentil(tiempos, 50), 2),
+                'p95_ms': round(percentil(tiempos, 95), 2),
+                'memoria_kb': round(pico / 1024, 1),
+            }
+    return resultados
+
+
+def comparar(actual, base, tolerancia=25, latencia=True):
+    """
+    Regresiones de `actual` respecto de `base` (mismo formato que ejecutar()): cualquier
+    consulta adicional, y latencia p95 o memoria más de `tolerancia` % por encima.
+    Retorna una lista de mensajes; vacía si no hay regresiones.
+    """
+    regresiones = []
+    for nombre, medicion in actual.items():
+        referencia = base.get(nombre)
+        if not referencia:
+            continue
+        if medicion['consultas'] > referencia['consultas']:
+            regresiones.append(f"{nombre}: {medicion['consultas']} consultas (base {referencia['consultas']})")
+        metricas = (['p95_ms'] if latencia else []) + ['memoria_kb']
+        for metrica in metricas:
+            limite = referencia[metrica] * (1 + tolerancia / 100)
+            if referencia[metrica] and medicion[metrica] > limite:
+                regresiones.append(
+                    f"{nombre}: {metrica} {medicion[metrica]} (base {referencia[metrica]}, "
+                    f"+{(medicion[metrica] / referencia[metrica] - 1) * 100:.0f}%)"
+                )
+    return regresiones
@@ -0,0 +1,46 @@
+# backend/carga_masiva.py
+"""
+Base común de las cargas masivas por filas (importación de productos, alta de empresas
+y alta de clientes): errores por fila, reporte de errores y la opción parcial.
+"""
+
+
+class ErrorCargaMasiva(Exception):
+    """Error que invalida la carga completa (no una fila)"""
+    pass
+
+
+def opcion_activada(valor):
+    """Opción booleana de la solicitud (parcial, crear_categorias): JSON, formulario o query string"""
+    return valor is True or str(valor).lower() in ['true', '1', 'yes']
+
+
+class CargaMasiva:
+    """
+    Acumula los errores por fila (numero desde 1) de una carga en etapas. Sin modo parcial,
+    cualquier error en una fila cancela la carga.
+    """
+    # Campo de la fila que se repite en el reporte de errores para identificarla
+    CAMPO_REFERENCIA = None
+
+    def __init__(self, filas, parcial=False):
+        self.filas = filas
+        self.parcial = parcial
+        self.errores = {}
+        self.validas = []
+
+    def _agregar_error(self, numero, campo, mensaje):
+        self.errores.setdefault(numero, {})[campo] = mensaje
+
+    @classmethod
+    def formatear_errores(cls, errores, filas):
+        """Reporte de errores por fila ordenado"""
+        reporte = []
+        for numero in sorted(errores):
+            fila = filas[numero - 1] if numero - 1 < len(filas) else {}
+            reporte.append({
+                'fila': numero,
+                cls.CAMPO_REFERENCIA: fila.get(cls.CAMPO_REFERENCIA) if isinstance(fila, dict) else None,
+                'errores': errores[numero]
+            })
+        return reporte
@@ -0,0 +1,21 @@
+# backend/configuracion.py
+"""
+Lectura de los bloques de configuración de settings (KARDEX_INVENTARIO, SERVIR_MEDIA,
+INSTRUMENTACION, ...) sobre los valores por defecto de cada módulo.
+"""
+from django.conf import settings
+
+
+def leer(nombre, defaults):
+    """
+    Retorna `defaults` actualizado con settings.<nombre>. Las claves cuyo valor por
+    defecto es un dict se combinan en lugar de reemplazarse (p. ej. HASH_CONTRASENAS['ARGON2']).
+    Se lee en cada llamada para que override_settings aplique en los tests.
+    """
+    personalizada = getattr(settings, nombre, None) or {}
+    configuracion = dict(defaults)
+    for clave, valor in personalizada.items():
+        if isinstance(defaults.get(clave), dict) and isinstance(valor, dict):
+            valor = {**defaults[clave], **valor}
+        configuracion[clave] = valor
+    return configuracion
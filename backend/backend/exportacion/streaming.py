@@ -0,0 +1,93 @@
+# backend/exportacion/streaming.py
+import csv
+import tempfile
+from datetime import datetime
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+# Filas que se traen de la base de datos por cada viaje del cursor
+TAMANIO_LOTE = 2000
+
+# Tamaño de los bloques de bytes enviados al cliente en XLSX
+TAMANIO_BLOQUE = 64 * 1024
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+class _Eco:
+    """Pseudo-buffer que devuelve lo escrito en lugar de guardarlo"""
+    def write(self, value):
+        return value
+
+
+def _normalizar(valor):
+    """Convierte fechas con zona horaria a hora local (Excel no soporta tz)"""
+    if isinstance(valor, datetime) and timezone.is_aware(valor):
+        return timezone.localtime(valor).replace(tzinfo=None, microsecond=0)
+    return valor
+
+
+def filas_desde_queryset(queryset, columnas):
+    """
+    Recorre el queryset con values() + iterator() sin cargarlo en memoria.
+    columnas: lista de tuplas (encabezado, campo_orm)
+    """
+    campos = [campo for _, campo in columnas]
+    for registro in queryset.values(*campos).iterator(chunk_size=TAMANIO_LOTE):
+        yield [_normalizar(registro[campo]) for campo in campos]
+
+
+def generar_csv(encabezados, filas):
+    """Generador de líneas CSV, una por fila"""
+    writer = csv.writer(_Eco())
+    # BOM para que Excel detecte UTF-8
+    yield '\ufeff'
+    yield writer.writerow(encabezados)
+    for fila in filas:
+        yield writer.writerow(fila)
+
+
+def generar_xlsx(encabezados, filas, titulo='Datos'):
+    """
+    Generador de bytes XLSX. openpyxl en modo write_only vuelca las filas
+    a disco a medida que llegan, así la memoria no depende del total de filas.
+    """
+    from openpyxl import Workbook
+
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet(title=titulo[:31])
+    hoja.append(encabezados)
+    for fila in filas:
+        hoja.append(fila)
+
+    with tempfile.TemporaryFile() as temporal:
+        libro.save(temporal)
+        temporal.seek(0)
+        while True:
+            bloque = temporal.read(TAMANIO_BLOQUE)
+            if not bloque:
+                break
+            yield bloque
+
+
+def respuesta_exportacion(queryset, columnas, nombre_archivo, formato='csv'):
+    """
+    Construye un StreamingHttpResponse CSV o XLSX a partir de un queryset
+    """
+    encabezados = [encabezado for encabezado, _ in columnas]
+    filas = filas_desde_queryset(queryset, columnas)
+
+    if formato == 'xlsx':
+        contenido = generar_xlsx(encabezados, filas, titulo=nombre_archivo)
+    else:
+        formato = 'csv'
+        contenido = generar_csv(encabezados, filas)
+
+    response = StreamingHttpResponse(contenido, content_type=FORMATOS[formato])
+    fecha = timezone.localtime().strftime('%Y%m%d_%H%M%S')
+    response['Content-Disposition'] = f'attachment; filename="{nombre_archivo}_{fecha}.{formato}"'
+    response['Cache-Control'] = 'no-store'
+    return response
@@ -0,0 +1,107 @@
+# backend/instrumentacion/metricas.py
+"""
+Métricas por vista acumuladas por InstrumentacionMiddleware: consultas SQL, tiempo en la
+base de datos, consultas repetidas, tiempo de render de la respuesta (el renderer de DRF;
+serializer.data se ejecuta dentro de la vista y queda en la duración total), bytes de
+respuesta y duración total. En respuestas streaming la medición termina al agotar el cuerpo.
+
+Los acumulados viven en memoria del proceso; con varios workers cada uno expone los
+suyos en /api/metricas/ y Prometheus los distingue por la etiqueta `instance`.
+"""
+import re
+import threading
+from backend.configuracion import leer
+
+CONFIGURACION_POR_DEFECTO = {
+    'ACTIVA': True,
+    # Expone tiempos internos a cualquier cliente: solo para desarrollo
+    'SERVER_TIMING': False,
+    # {'nombre-de-la-ruta': máximo de consultas}; None = sin presupuesto
+    'PRESUPUESTOS': {},
+    'PRESUPUESTO_POR_DEFECTO': None,
+    # 'log' registra una advertencia; 'error' lanza PresupuestoConsultasExcedido (tests)
+    'ACCION_EXCESO': 'log',
+    # Bearer token de /api/metricas/; vacío = endpoint deshabilitado
+    'TOKEN_METRICAS': '',
+}
+
+# (nombre, tipo, ayuda) en el orden en que se exponen
+METRICAS = [
+    ('solicitudes_total', 'counter', 'Solicitudes atendidas'),
+    ('consultas_total', 'counter', 'Consultas SQL ejecutadas'),
+    ('consultas_repetidas_total', 'counter', 'Consultas con la misma huella ya ejecutadas en la solicitud'),
+    ('segundos_bd_total', 'counter', 'Tiempo en la base de datos'),
+    ('segundos_render_total', 'counter', 'Tiempo de render de la respuesta'),
+    ('segundos_total', 'counter', 'Duración total de la solicitud'),
+    ('bytes_respuesta_total', 'counter', 'Bytes del cuerpo de la respuesta'),
+    ('presupuesto_excedido_total', 'counter', 'Solicitudes que superaron el presupuesto de consultas'),
+    ('consultas_maximo', 'gauge', 'Máximo de consultas en una solicitud'),
+]
+
+_lock = threading.Lock()
+_acumulados = {}
+
+_LITERALES = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_LISTAS = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+
+
+class PresupuestoConsultasExcedido(AssertionError):
+    """Una vista superó su presupuesto de consultas (ACCION_EXCESO='error')"""
+    pass
+
+
+def obtener_configuracion():
+    return leer('INSTRUMENTACION', CONFIGURACION_POR_DEFECTO)
+
+
+def huella(sql):
+    """SQL sin literales y con las listas IN de cualquier largo iguales"""
+    return _LISTAS.sub('(%s)', _LITERALES.sub('%s', sql))
+
+
+def presupuesto(configuracion, *claves):
+    """Presupuesto de la primera clave configurada (nombre de la ruta o patrón de URL)"""
+    for clave in claves:
+        if clave in configuracion['PRESUPUESTOS']:
+            return configuracion['PRESUPUESTOS'][clave]
+    return configuracion['PRESUPUESTO_POR_DEFECTO']
+
+
+def registrar(vista, medicion, excedido):
+    with _lock:
+        acumulado = _acumulados.setdefault(vista, dict.fromkeys((nombre for nombre, _, _ in METRICAS), 0))
+        acumulado['solicitudes_total'] += 1
+        acumulado['consultas_total'] += medicion['consultas']
+        acumulado['consultas_repetidas_total'] += medicion['repetidas']
+        acumulado['segundos_bd_total'] += medicion['segundos_bd']
+        acumulado['segundos_render_total'] += medicion['segundos_render']
+        acumulado['segundos_total'] += medicion['segundos_total']
+        acumulado['bytes_respuesta_total'] += medicion['bytes']
+        acumulado['presupuesto_excedido_total'] += int(excedido)
+        acumulado['consultas_maximo'] = max(acumulado['consultas_maximo'], medicion['consultas'])
+
+
+def reiniciar():
+    with _lock:
+        _acumulados.clear()
+
+
+def instantanea():
+    with _lock:
+        return {vista: dict(valores) for vista, valores in _acumulados.items()}
+
+
+def exposicion_prometheus():
+    """Texto en formato de exposición de Prometheus (version 0.0.4)"""
+    acumulados = instantanea()
+    lineas = []
+    for nombre, tipo, ayuda in METRICAS:
+        metrica = f'http_vista_{nombre}'
+        lineas.append(f'# HELP {metrica} {ayuda}')
+        lineas.append(f'# TYPE {metrica} {tipo}')
+        for vista in sorted(acumulados):
+            etiqueta = vista.replace('\\', '\\\\').replace('"', '\\"')
+            valor = acumulados[vista][nombre]
+            valor = f'{valor:.6f}' if isinstance(valor, float) else valor
+            lineas.append(f'{metrica}{{vista="{etiqueta}"}} {valor}')
+    return '\n'.join(lineas) + '\n'
@@ -0,0 +1,157 @@
+# backend/instrumentacion/middleware.py
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack
+from django.db import connections
+from . import metricas
+
+logger = logging.getLogger(__name__)
+
+
+class _Medidor:
+    """execute_wrapper que cuenta y cronometra las consultas de una solicitud"""
+
+    def __init__(self):
+        self.consultas = 0
+        self.segundos_bd = 0.0
+        self.huellas = Counter()
+        self.inicio_render = None
+        self.segundos_render = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.segundos_bd += time.perf_counter() - inicio
+            self.consultas += 1
+            self.huellas[metricas.huella(sql)] += 1
+
+    def fin_render(self, response):
+        if self.inicio_render is not None:
+            self.segundos_render += time.perf_counter() - self.inicio_render
+            self.inicio_render = None
+        return response
+
+    @property
+    def repetidas(self):
+        return sum(veces - 1 for veces in self.huellas.values())
+
+    def medir_consultas(self, pila):
+        for conexion in connections.all():
+            pila.enter_context(conexion.execute_wrapper(self))
+
+
+class InstrumentacionMiddleware:
+    """
+    Mide por solicitud las consultas SQL (connection.execute_wrapper), el tiempo en la
+    base de datos, las consultas repetidas (misma huella: típico N+1), el render de la
+    respuesta y sus bytes. Agrega el encabezado Server-Timing (si está activado), acumula
+    las métricas por ruta (backend/instrumentacion/metricas.py) y compara las consultas con
+    el presupuesto de la ruta en settings.INSTRUMENTACION['PRESUPUESTOS'].
+
+    En respuestas streaming (exportaciones, media) el cuerpo se genera después de
+    retornar: el iterador se envuelve y la medición se registra al agotarlo o cerrarlo.
+    Server-Timing se envía antes del cuerpo, así que en ese caso es parcial.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        configuracion = metricas.obtener_configuracion()
+        if not configuracion['ACTIVA']:
+            return self.get_response(request)
+
+        medidor = _Medidor()
+        request._medidor_instrumentacion = medidor
+        inicio = time.perf_counter()
+        with ExitStack() as pila:
+            medidor.medir_consultas(pila)
+            response = self.get_response(request)
+
+        if configuracion['SERVER_TIMING']:
+            response['Server-Timing'] = self._server_timing(medidor, time.perf_counter() - inicio, response.streaming)
+
+        if not response.streaming:
+            self._registrar(configuracion, request, medidor, inicio, len(response.content))
+        elif response.is_async:
+            # Bajo ASGI las consultas del iterador corren en otros hilos: solo se cuentan los bytes
+            response.streaming_content = self._medir_flujo_async(
+                response.streaming_content, configuracion, request, medidor, inicio
+            )
+        else:
+            response.streaming_content = self._medir_flujo(
+                response.streaming_content, configuracion, request, medidor, inicio
+            )
+
+        return response
+
+    def _medir_flujo(self, contenido, configuracion, request, medidor, inicio):
+        """Sigue contando consultas y bytes mientras el servidor consume el cuerpo"""
+        tamanio = 0
+        try:
+            with ExitStack() as pila:
+                medidor.medir_consultas(pila)
+                for bloque in contenido:
+                    tamanio += len(bloque)
+                    yield bloque
+        finally:
+            self._registrar(configuracion, request, medidor, inicio, tamanio)
+
+    async def _medir_flujo_async(self, contenido, configuracion, request, medidor, inicio):
+        tamanio = 0
+        try:
+            async for bloque in contenido:
+                tamanio += len(bloque)
+                yield bloque
+        finally:
+            self._registrar(configuracion, request, medidor, inicio, tamanio)
+
+    @staticmethod
+    def _server_timing(medidor, segundos_total, parcial):
+        descripcion = f'{medidor.consultas} consultas, {medidor.repetidas} repetidas'
+        if parcial:
+            descripcion += ', sin el cuerpo streaming'
+        return ', '.join([
+            f'db;dur={medidor.segundos_bd * 1000:.2f};desc="{descripcion}"',
+            f'render;dur={medidor.segundos_render * 1000:.2f}',
+            f'total;dur={segundos_total * 1000:.2f}',
+        ])
+
+    def _registrar(self, configuracion, request, medidor, inicio, tamanio):
+        resolver_match = getattr(request, 'resolver_match', None)
+        ruta = resolver_match.route if resolver_match else 'sin_ruta'
+        nombre = resolver_match.view_name if resolver_match else None
+
+        medicion = {
+            'consultas': medidor.consultas,
+            'repetidas': medidor.repetidas,
+            'segundos_bd': medidor.segundos_bd,
+            'segundos_render': medidor.segundos_render,
+            'segundos_total': time.perf_counter() - inicio,
+            'bytes': tamanio,
+        }
+
+        limite = metricas.presupuesto(configuracion, nombre, ruta)
+        excedido = limite is not None and medidor.consultas > limite
+        metricas.registrar(ruta, medicion, excedido)
+
+        if excedido:
+            mensaje = (
+                f"{request.method} {request.path} ({nombre or ruta}): {medidor.consultas} consultas, "
+                f"presupuesto {limite}; más repetidas: "
+                + '; '.join(f'{veces}x {sql[:200]}' for sql, veces in medidor.huellas.most_common(3) if veces > 1)
+            )
+            if configuracion['ACCION_EXCESO'] == 'error':
+                raise metricas.PresupuestoConsultasExcedido(mensaje)
+            logger.warning(f"Presupuesto de consultas excedido: {mensaje}")
+
+    def process_template_response(self, request, response):
+        """Las respuestas de DRF se renderizan justo después de este hook"""
+        medidor = getattr(request, '_medidor_instrumentacion', None)
+        if medidor is not None:
+            medidor.inicio_render = time.perf_counter()
+            response.add_post_render_callback(medidor.fin_render)
+        return response
@@ -0,0 +1,21 @@
+# backend/instrumentacion/views.py
+import hmac
+from django.http import Http404, HttpResponse
+from . import metricas
+
+
+def metricas_prometheus(request):
+    """
+    Métricas por ruta en formato Prometheus
+    GET /api/metricas/  (Authorization: Bearer <INSTRUMENTACION['TOKEN_METRICAS']>)
+    """
+    token = metricas.obtener_configuracion()['TOKEN_METRICAS']
+    if not token:
+        raise Http404
+    autorizacion = request.META.get('HTTP_AUTHORIZATION', '')
+    if not hmac.compare_digest(autorizacion.encode(), f'Bearer {token}'.encode()):
+        return HttpResponse('No autorizado', status=401, content_type='text/plain')
+    return HttpResponse(
+        metricas.exposicion_prometheus(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
@@ -0,0 +1,60 @@
+# backend/pruebas.py
+"""Utilidades compartidas por los tests de las apps"""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class PlanConsultaMixin:
+    """Aserciones sobre el plan de ejecución (EXPLAIN) de un queryset"""
+
+    @staticmethod
+    def actualizar_estadisticas(*tablas):
+        """Actualiza las estadísticas del planificador tras cargar datos de prueba"""
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                for tabla in tablas:
+                    cursor.execute(f'ANALYZE {connection.ops.quote_name(tabla)}')
+            elif connection.vendor == 'sqlite':
+                cursor.execute('ANALYZE')
+
+    def assertUsaIndice(self, queryset, nombre_indice):
+        plan = queryset.explain()
+        self.assertIn(
+            nombre_indice, plan,
+            f'La consulta no usa el índice {nombre_indice}.\nSQL: {queryset.query}\nPlan:\n{plan}'
+        )
+
+
+class ConsultasConstantesMixin:
+    """
+    Aserciones sobre la cantidad de consultas de un listado: no debe crecer con las filas
+    (una consulta por fila en un serializador o en un bucle es un N+1)
+    """
+
+    def assertConsultasConstantes(self, solicitud, agregar_filas, contar_filas):
+        """
+        solicitud(): hace la petición y retorna la respuesta
+        agregar_filas(): agrega datos que el listado debe devolver
+        contar_filas(respuesta): cantidad de filas del listado
+        """
+        with CaptureQueriesContext(connection) as capturadas:
+            respuesta = solicitud()
+        antes = [consulta['sql'] for consulta in capturadas.captured_queries]
+        self.assertEqual(respuesta.status_code, 200, respuesta.content[:500])
+        filas_antes = contar_filas(respuesta)
+
+        agregar_filas()
+
+        with CaptureQueriesContext(connection) as capturadas:
+            respuesta = solicitud()
+        despues = [consulta['sql'] for consulta in capturadas.captured_queries]
+        self.assertEqual(respuesta.status_code, 200, respuesta.content[:500])
+        self.assertGreater(contar_filas(respuesta), filas_antes, 'El listado no devolvió las filas agregadas')
+
+        extra = '\n'.join(despues[len(antes):][:5])
+        self.assertEqual(
+            len(despues), len(antes),
+            f'Las consultas crecen con las filas: {len(antes)} con {filas_antes} filas y '
+            f'{len(despues)} con {contar_filas(respuesta)}.\nConsultas adicionales:\n{extra}'
+        )
+        return len(despues)
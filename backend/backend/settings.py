@@ -41,6 +41,7 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
+    'django.contrib.postgres',
     'django_filters',
     'rest_framework_simplejwt.token_blacklist',
     'django.contrib.staticfiles',
@@ -73,6 +74,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'backend.instrumentacion.middleware.InstrumentacionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -241,4 +243,105 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 FILE_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5MB
+# Derivados de imágenes de producto (archivo/derivados.py)
+IMAGENES_DERIVADAS = {
+    'ANCHOS': [160, 320, 640, 1280],
+    'FORMATOS': ['webp', 'jpeg'],
+    'CALIDAD': 80,
+    # 0 = procesar en el mismo proceso (útil en desarrollo y pruebas)
+    'PROCESOS': int(os.environ.get('IMAGENES_DERIVADAS_PROCESOS', 2)),
+}
+# Subidas reanudables por fragmentos (archivo/subidas.py)
+SUBIDAS_FRAGMENTADAS = {
+    'TAMANIO_FRAGMENTO': 5242880,  # igual a FILE_UPLOAD_MAX_MEMORY_SIZE
+    'TAMANIO_MAXIMO_ARCHIVO': 50 * 1024 * 1024,
+    'TAMANIO_MAXIMO_COMPROBANTE': 10 * 1024 * 1024,
+    'HORAS_VIGENCIA': 24,
+}
+# Ciclo de vida de suscripciones (suscripciones/ciclo_vida.py, comando ciclo_suscripciones)
+CICLO_SUSCRIPCIONES = {
+    'DIAS_GRACIA': 3,
+    'DIAS_RECORDATORIO': [7, 3, 1],
+    'LOTE': 500,
+}
+# Entrega de MEDIA (archivo/servir.py): 'django' | 'x-accel' (nginx) | 'x-sendfile' (Apache)
+SERVIR_MEDIA = {
+    'MODO': os.environ.get('SERVIR_MEDIA_MODO', 'django'),
+    # location interna de nginx con alias a MEDIA_ROOT
+    'PREFIJO_INTERNO': '/media-interna/',
+    'MAX_AGE': 24 * 60 * 60,
+    # Derivados y originales con nombre por hash de contenido
+    'MAX_AGE_INMUTABLE': 365 * 24 * 60 * 60,
+}
+# Estadísticas del listado de suscripciones (suscripciones/estadisticas.py)
+ESTADISTICAS_SUSCRIPCIONES = {
+    # Solo PostgreSQL: leer los agregados de la vista materializada suscripcion_estadisticas
+    'MATERIALIZADA': os.environ.get('ESTADISTICAS_SUSCRIPCIONES_MATERIALIZADA', 'False') == 'True',
+}
+# Hash de contraseñas: perfil y altas masivas (usuarios/contrasenas.py, usuarios/hashers.py)
+HASH_CONTRASENAS = {
+    # 'pbkdf2' | 'argon2' (requiere argon2-cffi)
+    'PERFIL': os.environ.get('HASH_CONTRASENAS_PERFIL', 'pbkdf2'),
+    # 0 = hashear en el mismo proceso
+    'PROCESOS': int(os.environ.get('HASH_CONTRASENAS_PROCESOS', 2)),
+    'MINIMO_PARALELO': 4,
+    # None = valor por defecto de Django; medir con: manage.py benchmark_contrasenas
+    'ITERACIONES_PBKDF2': None,
+    'ARGON2': {
+        'TIME_COST': int(os.environ.get('ARGON2_TIME_COST', 2)),
+        'MEMORY_COST': int(os.environ.get('ARGON2_MEMORY_COST', 19456)),  # KiB
+        'PARALLELISM': int(os.environ.get('ARGON2_PARALLELISM', 1)),
+    },
+}
+_HASHERS_PERFIL = {
+    'pbkdf2': 'usuarios.hashers.PBKDF2PerfilHasher',
+    'argon2': 'usuarios.hashers.Argon2PerfilHasher',
+}
+# El primero genera los hashes nuevos; el resto verifica los existentes (y los actualiza en el login)
+PASSWORD_HASHERS = [_HASHERS_PERFIL[HASH_CONTRASENAS['PERFIL']]] + [
+    hasher for perfil, hasher in _HASHERS_PERFIL.items() if perfil != HASH_CONTRASENAS['PERFIL']
+] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+# Kardex de inventario (producto/kardex.py); saldos con el comando saldos_inventario (p. ej. cada noche)
+KARDEX_INVENTARIO = {
+    # Minutos recientes que quedan fuera de cada corte de saldos
+    'MARGEN_MINUTOS': int(os.environ.get('KARDEX_MARGEN_MINUTOS', 5)),
+    'LOTE': 1000,
+}
+# Pronóstico de demanda y punto de reorden (producto/pronostico.py); el comando
+# actualizar_stock_minimo aplica las sugerencias (opcional, p. ej. cada noche)
+PRONOSTICO_DEMANDA = {
+    'DIAS_HISTORIA': 90,
+    'VENTANA_MOVIL': 28,
+    'ALFA': 0.1,
+    'PLAZO_REPOSICION_DIAS': int(os.environ.get('PRONOSTICO_PLAZO_REPOSICION_DIAS', 7)),
+    'NIVEL_SERVICIO': float(os.environ.get('PRONOSTICO_NIVEL_SERVICIO', 0.95)),
+    'MINIMO_DIAS_CON_VENTA': 3,
+}
+# Análisis ABC de productos (ventas/analitica.py); se guarda en el cache de Django
+# (configurar CACHES con un backend compartido cuando hay varios procesos)
+ANALITICA_VENTAS = {
+    'DIAS_POR_DEFECTO': 90,
+    'SEGUNDOS_CACHE': int(os.environ.get('ANALITICA_VENTAS_SEGUNDOS_CACHE', 60 * 60)),
+}
+# Segmentación RFM de clientes (cliente/segmentacion.py); comando segmentar_clientes
+# (p. ej. cada noche; --completo para descontar ventas eliminadas)
+SEGMENTACION_CLIENTES = {
+    'MARGEN_MINUTOS': 5,
+    'LOTE': 1000,
+}
+# Instrumentación por solicitud (backend/instrumentacion): Server-Timing, métricas en
+# /api/metricas/ y presupuesto de consultas por ruta ('nombre-de-la-ruta': máximo).
+# Server-Timing expone tiempos internos: activarlo solo en desarrollo
+INSTRUMENTACION = {
+    'ACTIVA': os.environ.get('INSTRUMENTACION_ACTIVA', 'True') == 'True',
+    'SERVER_TIMING': os.environ.get('INSTRUMENTACION_SERVER_TIMING', 'False') == 'True',
+    'PRESUPUESTOS': {},
+    'PRESUPUESTO_POR_DEFECTO': None,
+    'ACCION_EXCESO': os.environ.get('INSTRUMENTACION_ACCION_EXCESO', 'log'),
+    'TOKEN_METRICAS': os.environ.get('INSTRUMENTACION_TOKEN_METRICAS', ''),
+}
 FRONTEND_URL = 'http://localhost:3000' 
\ No newline at end of file
@@ -1,7 +1,8 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
-from django.conf.urls.static import static
+from archivo.views import ServirMediaView
+from backend.instrumentacion.views import metricas_prometheus
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
 
 urlpatterns = [
@@ -23,6 +24,7 @@ urlpatterns = [
     path('api/ventas/', include('ventas.urls')),
     path('api/compras/', include('compras.urls')),
     path('api/notificaciones/', include('relacion_notifica.urls')),
+    path('api/metricas/', metricas_prometheus, name='metricas-prometheus'),
     
     #ENDPOINTS DE DOCUMENTACIÓN
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
@@ -32,5 +34,7 @@ urlpatterns = [
     path('api/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+# Archivos subidos: permisos en Django, bytes por el proxy (X-Accel-Redirect / X-Sendfile)
+urlpatterns += [
+    re_path(rf'^{settings.MEDIA_URL.lstrip("/")}(?P<ruta>.+)$', ServirMediaView.as_view(), name='media'),
+]
\ No newline at end of file
@@ -0,0 +1,226 @@
+# cliente/alta_masiva.py
+import logging
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from backend.carga_masiva import CargaMasiva, ErrorCargaMasiva
+from .models import AuditoriaCliente, Cliente
+from .serializers import ClienteAltaMasivaSerializer
+
+logger = logging.getLogger(__name__)
+
+MAXIMO_CLIENTES = 500
+TAMANIO_LOTE = 500
+
+
+class AltaMasivaClientes(CargaMasiva):
+    """
+    Alta o vinculación de N clientes a la empresa de un vendedor / admin_empresa:
+    1. Validación en memoria de todas las filas (formato y duplicados dentro del lote)
+    2. Resolución contra la base de datos con una consulta cada una: NITs existentes
+       (in_bulk), emails registrados, relaciones 'tiene' con la empresa y rol cliente
+    3. Carga con bulk_create dentro de una transacción (usuarios, clientes, relaciones
+       y auditoría); las contraseñas se hashean en paralelo antes de abrirla
+
+    Con un NIT existente el cliente se vincula (o se reactiva la relación inactiva);
+    si ya está activo en la empresa la fila no cambia nada.
+    """
+
+    CAMPO_REFERENCIA = 'nit'
+
+    def __init__(self, usuario, empresa, filas, parcial=False, ip_address=None, user_agent=None):
+        super().__init__(filas, parcial)
+        self.usuario = usuario
+        self.empresa = empresa
+        self.ip_address = ip_address
+        self.user_agent = user_agent
+
+    # ---------- Etapa 1: validación en memoria ----------
+    def _validar_filas(self):
+        from usuarios.models import User
+
+        vistos = {'nit': {}, 'email': {}}
+
+        for numero, fila in enumerate(self.filas, start=1):
+            serializer = ClienteAltaMasivaSerializer(data=fila)
+            if not serializer.is_valid():
+                for campo, mensajes in serializer.errors.items():
+                    self._agregar_error(numero, campo, mensajes)
+                continue
+
+            datos = serializer.validated_data
+            datos['nit'] = datos['nit'].strip()
+            if datos.get('email'):
+                datos['email'] = User.objects.normalize_email(datos['email'])
+
+            for campo in ('nit', 'email'):
+                valor = datos.get(campo)
+                if not valor:
+                    continue
+                if valor in vistos[campo]:
+                    self._agregar_error(numero, campo, f'Duplicado en el lote (fila {vistos[campo][valor]})')
+                else:
+                    vistos[campo][valor] = numero
+
+            self.validas.append((numero, datos))
+
+    # ---------- Etapa 2: validación contra la base de datos ----------
+    def _resolver_referencias(self):
+        from relacion_tiene.models import Tiene
+        from roles.models import Rol
+        from usuarios.models import User
+
+        existentes = Cliente.objects.select_related('id_usuario').in_bulk(
+            {datos['nit'] for _, datos in self.validas}, field_name='nit'
+        )
+        nuevas = [(numero, datos) for numero, datos in self.validas if datos['nit'] not in existentes]
+
+        emails_registrados = set(User.objects.filter(
+            email__in={datos['email'] for _, datos in nuevas if datos.get('email')}
+        ).values_list('email', flat=True))
+
+        relaciones = {
+            relacion.id_cliente_id: relacion
+            for relacion in Tiene.objects.filter(
+                id_empresa=self.empresa,
+                id_cliente__in=[cliente.pk for cliente in existentes.values()]
+            )
+        }
+
+        rol_cliente = Rol.objects.filter(rol='cliente', estado='activo').first() if nuevas else None
+
+        for numero, datos in nuevas:
+            faltantes = [campo for campo in ('email', 'password', 'nombre_cliente') if not datos.get(campo)]
+            for campo in faltantes:
+                self._agregar_error(numero, campo, 'Obligatorio para registrar un cliente nuevo')
+            if datos.get('email') in emails_registrados:
+                self._agregar_error(numero, 'email', 'El email ya está registrado')
+            if rol_cliente is None:
+                self._agregar_error(numero, 'rol', "El rol 'cliente' no está configurado")
+
+        return existentes, relaciones, rol_cliente
+
+    # ---------- Etapa 3: carga ----------
+    def registrar(self):
+        """
+        Ejecuta las tres etapas y retorna (resultados, errores); resultados es una lista
+        de dicts (numero, cliente, accion) con accion 'creado', 'registrado', 'reactivado'
+        o 'sin_cambios'. Sin modo parcial, cualquier error en una fila cancela el alta.
+        """
+        if not self.filas:
+            raise ErrorCargaMasiva('No se recibieron clientes para registrar')
+        if len(self.filas) > MAXIMO_CLIENTES:
+            raise ErrorCargaMasiva(f'Máximo {MAXIMO_CLIENTES} clientes por solicitud')
+
+        self._validar_filas()
+        existentes, relaciones, rol_cliente = self._resolver_referencias()
+
+        filas_ok = [(numero, datos) for numero, datos in self.validas if numero not in self.errores]
+        if (self.errores and not self.parcial) or not filas_ok:
+            return [], self.errores
+
+        # Fuera de la transacción: el hash es lo más costoso y no toca la base de datos
+        from usuarios.contrasenas import hashear_contrasenas
+        hashes = iter(hashear_contrasenas(
+            datos['password'] for _, datos in filas_ok if datos['nit'] not in existentes
+        ))
+
+        try:
+            with transaction.atomic():
+                resultados = self._crear(filas_ok, existentes, relaciones, rol_cliente, hashes)
+        except IntegrityError as e:
+            # Otra solicitud registró el mismo NIT, email o relación entre la validación y la carga
+            logger.warning(f"Conflicto de unicidad en alta masiva de clientes: {str(e)}")
+            raise ErrorCargaMasiva('Un NIT o email del lote se registró simultáneamente; reintente la solicitud')
+
+        logger.info(
+            f"Alta masiva de clientes: {len(resultados)} filas procesadas en empresa "
+            f"{self.empresa.nombre} por {self.usuario.email}"
+        )
+        return resultados, self.errores
+
+    def _crear(self, filas_ok, existentes, relaciones, rol_cliente, hashes):
+        from relacion_tiene.models import Tiene
+        from usuarios.models import User
+
+        ahora = timezone.now()
+
+        nuevas = [(numero, datos) for numero, datos in filas_ok if datos['nit'] not in existentes]
+        usuarios = User.objects.bulk_create([
+            User(email=datos['email'], password=next(hashes), rol=rol_cliente, estado='activo')
+            for _, datos in nuevas
+        ], batch_size=TAMANIO_LOTE)
+        # bulk_create no emite post_save: la auditoría de creación se escribe abajo
+        creados = Cliente.objects.bulk_create([
+            Cliente(
+                id_usuario=usuario,
+                nit=datos['nit'],
+                nombre_cliente=datos['nombre_cliente'],
+                direccion_cliente=datos['direccion_cliente'],
+                telefono_cliente=datos['telefono_cliente']
+            )
+            for (_, datos), usuario in zip(nuevas, usuarios)
+        ], batch_size=TAMANIO_LOTE)
+        clientes = {cliente.nit: cliente for cliente in creados}
+        clientes.update(existentes)
+
+        resultados, crear_relaciones, reactivar = [], [], []
+        for numero, datos in filas_ok:
+            cliente = clientes[datos['nit']]
+            relacion = relaciones.get(cliente.pk)
+            if datos['nit'] not in existentes:
+                accion = 'creado'
+                crear_relaciones.append(Tiene(id_cliente=cliente, id_empresa=self.empresa, estado='activo'))
+            elif relacion is None:
+                accion = 'registrado'
+                crear_relaciones.append(Tiene(id_cliente=cliente, id_empresa=self.empresa, estado='activo'))
+            elif relacion.estado != 'activo':
+                accion = 'reactivado'
+                relacion.estado = 'activo'
+                relacion.fecha_registro = ahora
+                reactivar.append(relacion)
+            else:
+                accion = 'sin_cambios'
+            resultados.append({'numero': numero, 'cliente': cliente, 'accion': accion})
+
+        Tiene.objects.bulk_create(crear_relaciones, batch_size=TAMANIO_LOTE)
+        Tiene.objects.bulk_update(reactivar, ['estado', 'fecha_registro'], batch_size=TAMANIO_LOTE)
+
+        AuditoriaCliente.objects.bulk_create([
+            self._auditoria(resultado['cliente'], resultado['accion'])
+            for resultado in resultados
+            if resultado['accion'] != 'sin_cambios'
+        ], batch_size=TAMANIO_LOTE)
+
+        return resultados
+
+    def _auditoria(self, cliente, accion):
+        """Mismo contenido que la señal (creación) y que el registro individual por NIT"""
+        return AuditoriaCliente(
+            cliente_id=cliente.pk,
+            cliente_nombre=cliente.nombre_cliente,
+            cliente_nit=cliente.nit,
+            cliente_email=cliente.id_usuario.email,
+            accion='CREADO' if accion == 'creado' else 'ACTUALIZADO',
+            detalles={
+                'accion': accion,
+                'origen': 'alta_masiva',
+                'cliente': {
+                    'nombre': cliente.nombre_cliente,
+                    'nit': cliente.nit,
+                    'email': cliente.id_usuario.email,
+                    'direccion': cliente.direccion_cliente,
+                    'telefono': cliente.telefono_cliente
+                },
+                'empresa': {
+                    'id': self.empresa.id_empresa,
+                    'nombre': self.empresa.nombre
+                },
+                'registrado_por': {
+                    'email': self.usuario.email,
+                    'rol': self.usuario.rol.rol
+                }
+            },
+            usuario=self.usuario,
+            ip_address=self.ip_address or None,
+            user_agent=self.user_agent or ''
+        )
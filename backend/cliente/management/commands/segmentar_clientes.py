@@ -0,0 +1,20 @@
+# cliente/management/commands/segmentar_clientes.py
+from django.core.management.base import BaseCommand
+from cliente.segmentacion import actualizar_segmentos
+
+
+class Command(BaseCommand):
+    help = (
+        'Incorpora las ventas nuevas al resumen RFM por empresa y cliente (segmento_cliente) '
+        'y recalcula los segmentos de las empresas afectadas. Programar periódicamente; '
+        '--completo reconstruye la tabla (descuenta ventas eliminadas).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--completo', action='store_true', help='Reconstruye desde todas las ventas')
+
+    def handle(self, *args, **options):
+        hasta_id, empresas, cambiados = actualizar_segmentos(completo=options['completo'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Segmentos actualizados hasta la venta {hasta_id}: {empresas} empresas, {cambiados} clientes con cambios'
+        ))
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.4 on 2026-10-19 17:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cliente', '0001_initial'),
+        ('empresas', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadoSegmentacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ultimo_id_venta', models.IntegerField(default=0)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'estado_segmentacion',
+            },
+        ),
+        migrations.CreateModel(
+            name='SegmentoCliente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('compras', models.PositiveIntegerField(default=0)),
+                ('monto', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('primera_compra', models.DateTimeField()),
+                ('ultima_compra', models.DateTimeField()),
+                ('recencia', models.PositiveSmallIntegerField(default=0)),
+                ('frecuencia', models.PositiveSmallIntegerField(default=0)),
+                ('monetario', models.PositiveSmallIntegerField(default=0)),
+                ('segmento', models.CharField(blank=True, choices=[('campeones', 'Campeones'), ('leales', 'Leales'), ('potenciales', 'Potenciales'), ('nuevos', 'Nuevos'), ('en_riesgo', 'En riesgo'), ('hibernando', 'Hibernando'), ('perdidos', 'Perdidos')], default='', max_length=20)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('cliente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='segmentos', to='cliente.cliente')),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='segmentos_clientes', to='empresas.empresa')),
+            ],
+            options={
+                'db_table': 'segmento_cliente',
+                'indexes': [models.Index(fields=['empresa', 'segmento'], name='segmento_empresa_segmento_idx'), models.Index(fields=['empresa', 'monto'], name='segmento_empresa_monto_idx')],
+                'constraints': [models.UniqueConstraint(fields=('empresa', 'cliente'), name='segmento_cliente_empresa_cliente_unico')],
+            },
+        ),
+    ]
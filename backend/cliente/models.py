@@ -83,4 +83,58 @@ class AuditoriaCliente(models.Model):
             # El cliente fue eliminado, usamos los datos almacenados
             pass
         
-        return info
\ No newline at end of file
+        return info
+
+class SegmentoCliente(models.Model):
+    """
+    Resumen RFM (recencia, frecuencia, monto) de un cliente en una empresa.
+    Se actualiza por lotes desde las ventas nuevas (cliente/segmentacion.py), así los
+    listados de clientes filtran y ordenan por segmento sin recorrer las ventas.
+    """
+
+    SEGMENTOS = [
+        ('campeones', 'Campeones'),
+        ('leales', 'Leales'),
+        ('potenciales', 'Potenciales'),
+        ('nuevos', 'Nuevos'),
+        ('en_riesgo', 'En riesgo'),
+        ('hibernando', 'Hibernando'),
+        ('perdidos', 'Perdidos'),
+    ]
+
+    empresa = models.ForeignKey('empresas.Empresa', on_delete=models.CASCADE, related_name='segmentos_clientes')
+    cliente = models.ForeignKey(Cliente, on_delete=models.CASCADE, related_name='segmentos')
+    compras = models.PositiveIntegerField(default=0)
+    monto = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    primera_compra = models.DateTimeField()
+    ultima_compra = models.DateTimeField()
+    # Puntajes 1-5 dentro de la empresa (distribución acumulada): 5 = más reciente / más frecuente / mayor monto
+    recencia = models.PositiveSmallIntegerField(default=0)
+    frecuencia = models.PositiveSmallIntegerField(default=0)
+    monetario = models.PositiveSmallIntegerField(default=0)
+    segmento = models.CharField(max_length=20, choices=SEGMENTOS, blank=True, default='')
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "segmento_cliente"
+        constraints = [
+            models.UniqueConstraint(fields=['empresa', 'cliente'], name='segmento_cliente_empresa_cliente_unico'),
+        ]
+        indexes = [
+            models.Index(fields=['empresa', 'segmento'], name='segmento_empresa_segmento_idx'),
+            models.Index(fields=['empresa', 'monto'], name='segmento_empresa_monto_idx'),
+        ]
+
+    @property
+    def ticket_promedio(self):
+        return self.monto / self.compras if self.compras else 0
+
+
+class EstadoSegmentacion(models.Model):
+    """Fila única: última venta incorporada a SegmentoCliente"""
+
+    ultimo_id_venta = models.IntegerField(default=0)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "estado_segmentacion"
@@ -0,0 +1,211 @@
+# cliente/segmentacion.py
+"""
+Segmentación RFM de clientes por empresa (tabla segmento_cliente).
+
+1. Ventas nuevas: las ventas con id_venta posterior al último procesado se agrupan por
+   (empresa, cliente) en una consulta (compras, monto, primera y última compra) y se
+   suman a los resúmenes existentes. Solo se toman ventas de más de MARGEN_MINUTOS, así
+   una transacción sin confirmar con un id menor no queda detrás del último procesado.
+2. Puntajes: CUME_DIST por empresa sobre última compra, compras y monto (funciones de
+   ventana, una consulta para todas las empresas con ventas nuevas) llevado a 1-5, y
+   segmento según recencia y frecuencia. Valores iguales tienen el mismo puntaje y el
+   mayor valor de la empresa siempre tiene 5, aunque haya menos de 5 clientes.
+
+Las ventas eliminadas no se descuentan de forma incremental: se corrigen al recalcular
+todo (comando segmentar_clientes --completo).
+"""
+import logging
+import math
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Sum, Window
+from django.db.models.functions import CumeDist
+from django.utils import timezone
+from backend.configuracion import leer
+from .models import EstadoSegmentacion, SegmentoCliente
+
+logger = logging.getLogger(__name__)
+
+CONFIGURACION_POR_DEFECTO = {
+    'MARGEN_MINUTOS': 5,
+    'LOTE': 1000,
+}
+
+
+def obtener_configuracion():
+    return leer('SEGMENTACION_CLIENTES', CONFIGURACION_POR_DEFECTO)
+
+
+def clasificar(recencia, frecuencia):
+    """Segmento según los quintiles de recencia y frecuencia (1 a 5)"""
+    if recencia >= 4 and frecuencia >= 4:
+        return 'campeones'
+    if frecuencia >= 4:
+        return 'leales' if recencia >= 3 else 'en_riesgo'
+    if recencia >= 4 and frecuencia <= 1:
+        return 'nuevos'
+    if recencia >= 3:
+        return 'potenciales'
+    if frecuencia >= 3:
+        return 'en_riesgo'
+    return 'perdidos' if recencia <= 1 else 'hibernando'
+
+
+def _acumular_ventas(desde_id, hasta_id, configuracion, completo=False):
+    """Suma las ventas (desde_id, hasta_id] a los resúmenes; retorna las empresas afectadas"""
+    from ventas.models import Venta
+
+    grupos = Venta.objects.filter(
+        id_venta__gt=desde_id,
+        id_venta__lte=hasta_id
+    ).order_by().values('usuario_empresa__empresa', 'cliente').annotate(
+        compras=Count('id_venta'),
+        monto=Sum('precio_total'),
+        primera=Min('fecha_venta'),
+        ultima=Max('fecha_venta')
+    ).values_list('usuario_empresa__empresa', 'cliente', 'compras', 'monto', 'primera', 'ultima')
+
+    nuevos = {(empresa_id, cliente_id): (compras, monto, primera, ultima)
+              for empresa_id, cliente_id, compras, monto, primera, ultima in grupos}
+    if not nuevos:
+        return set()
+
+    empresas = {empresa_id for empresa_id, _ in nuevos}
+    existentes = {} if completo else {
+        (segmento.empresa_id, segmento.cliente_id): segmento
+        for segmento in SegmentoCliente.objects.filter(
+            empresa_id__in=empresas,
+            cliente_id__in={cliente_id for _, cliente_id in nuevos}
+        )
+        if (segmento.empresa_id, segmento.cliente_id) in nuevos
+    }
+
+    crear, actualizar = [], []
+    for (empresa_id, cliente_id), (compras, monto, primera, ultima) in nuevos.items():
+        segmento = existentes.get((empresa_id, cliente_id))
+        if segmento is None:
+            crear.append(SegmentoCliente(
+                empresa_id=empresa_id, cliente_id=cliente_id, compras=compras, monto=monto,
+                primera_compra=primera, ultima_compra=ultima
+            ))
+            continue
+        segmento.compras += compras
+        segmento.monto += monto
+        segmento.primera_compra = min(segmento.primera_compra, primera)
+        segmento.ultima_compra = max(segmento.ultima_compra, ultima)
+        actualizar.append(segmento)
+
+    SegmentoCliente.objects.bulk_create(crear, batch_size=configuracion['LOTE'])
+    SegmentoCliente.objects.bulk_update(
+        actualizar, ['compras', 'monto', 'primera_compra', 'ultima_compra'], batch_size=configuracion['LOTE']
+    )
+    return empresas
+
+
+def puntaje(distribucion):
+    """
+    Puntaje 1-5 a partir de la distribución acumulada (fracción de clientes de la empresa
+    con un valor menor o igual): 0-20 % -> 1, ..., 80-100 % -> 5
+    """
+    # round: 0.6 * 5 da 3.0000000000000004 en coma flotante
+    return max(1, math.ceil(round(distribucion * 5, 6)))
+
+
+def _puntuar(empresas, configuracion):
+    """Puntajes RFM (1 a 5) y segmento de los clientes de las empresas indicadas"""
+    def distribucion(campo):
+        # Sin desempate por cliente: valores iguales tienen la misma distribución
+        return Window(
+            expression=CumeDist(),
+            partition_by=[F('empresa_id')],
+            order_by=[F(campo).asc()]
+        )
+
+    cambios = []
+    for segmento in SegmentoCliente.objects.filter(empresa_id__in=empresas).annotate(
+        distribucion_r=distribucion('ultima_compra'),
+        distribucion_f=distribucion('compras'),
+        distribucion_m=distribucion('monto')
+    ).only('id', 'recencia', 'frecuencia', 'monetario', 'segmento').iterator(chunk_size=configuracion['LOTE']):
+        r, f, m = (puntaje(segmento.distribucion_r), puntaje(segmento.distribucion_f),
+                   puntaje(segmento.distribucion_m))
+        nombre = clasificar(r, f)
+        if (segmento.recencia, segmento.frecuencia, segmento.monetario, segmento.segmento) != (r, f, m, nombre):
+            segmento.recencia, segmento.frecuencia, segmento.monetario = r, f, m
+            segmento.segmento = nombre
+            cambios.append(segmento)
+
+    SegmentoCliente.objects.bulk_update(
+        cambios, ['recencia', 'frecuencia', 'monetario', 'segmento'], batch_size=configuracion['LOTE']
+    )
+    return len(cambios)
+
+
+def actualizar_segmentos(completo=False):
+    """
+    Incorpora las ventas nuevas y recalcula los puntajes de las empresas afectadas.
+    completo=True reconstruye la tabla desde todas las ventas.
+    Retorna (ventas_hasta_id, empresas_afectadas, segmentos_cambiados).
+    """
+    from ventas.models import Venta
+
+    configuracion = obtener_configuracion()
+    corte = timezone.now() - timedelta(minutes=configuracion['MARGEN_MINUTOS'])
+
+    with transaction.atomic():
+        # Bloquea la fila de estado: dos ejecuciones simultáneas no suman dos veces
+        estado, _ = EstadoSegmentacion.objects.select_for_update().get_or_create(pk=1)
+        if completo:
+            SegmentoCliente.objects.all().delete()
+            estado.ultimo_id_venta = 0
+
+        hasta_id = Venta.objects.filter(
+            id_venta__gt=estado.ultimo_id_venta,
+            fecha_venta__lt=corte
+        ).aggregate(ultimo=Max('id_venta'))['ultimo']
+        if hasta_id is None:
+            if completo:
+                estado.save(update_fields=['ultimo_id_venta', 'fecha_actualizacion'])
+            return estado.ultimo_id_venta, 0, 0
+
+        empresas = _acumular_ventas(estado.ultimo_id_venta, hasta_id, configuracion, completo)
+        cambiados = _puntuar(empresas, configuracion)
+
+        estado.ultimo_id_venta = hasta_id
+        estado.save(update_fields=['ultimo_id_venta', 'fecha_actualizacion'])
+
+    logger.info(f"Segmentación de clientes hasta la venta {hasta_id}: {len(empresas)} empresas, {cambiados} segmentos cambiados")
+    return hasta_id, len(empresas), cambiados
+
+
+# Parámetro `orden` de los listados de clientes -> anotación
+ORDENES_SEGMENTO = {
+    'valor': 'valor_cliente',
+    'compras': 'compras_cliente',
+    'ultima_compra': 'ultima_compra_cliente',
+}
+
+
+def anotar_segmento(queryset, empresa_id, cliente='pk', segmento=None, orden=None):
+    """
+    Anota segmento, valor_cliente, compras_cliente y ultima_compra_cliente de la empresa
+    (subconsulta sobre el índice único empresa + cliente). Filtra por `segmento` y ordena
+    por `orden` (clave de ORDENES_SEGMENTO, con '-' para descendente). Sin resumen: None.
+    """
+    from django.db.models import OuterRef, Subquery
+
+    resumen = SegmentoCliente.objects.filter(empresa_id=empresa_id, cliente_id=OuterRef(cliente))
+    queryset = queryset.annotate(
+        segmento=Subquery(resumen.values('segmento')[:1]),
+        valor_cliente=Subquery(resumen.values('monto')[:1]),
+        compras_cliente=Subquery(resumen.values('compras')[:1]),
+        ultima_compra_cliente=Subquery(resumen.values('ultima_compra')[:1]),
+    )
+    if segmento:
+        queryset = queryset.filter(segmento=segmento)
+    if orden and orden.lstrip('-') in ORDENES_SEGMENTO:
+        campo = F(ORDENES_SEGMENTO[orden.lstrip('-')])
+        queryset = queryset.order_by(
+            campo.desc(nulls_last=True) if orden.startswith('-') else campo.asc(nulls_last=True)
+        )
+    return queryset
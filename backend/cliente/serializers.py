@@ -10,10 +10,30 @@ from rest_framework import serializers
 from .models import AuditoriaCliente
 
 # cliente/serializers.py
+def anotar_empresa_activa(queryset):
+    """
+    Anota empresa_activa_id y empresa_activa_nombre (primera relación activa en 'tiene')
+    para que ClienteSerializer no consulte la relación por cada cliente del listado
+    """
+    from django.db.models import OuterRef, Subquery
+
+    activa = Tiene.objects.filter(
+        id_cliente=OuterRef('pk'),
+        estado='activo'
+    ).order_by('fecha_registro', 'id')
+    return queryset.annotate(
+        empresa_activa_id=Subquery(activa.values('id_empresa')[:1]),
+        empresa_activa_nombre=Subquery(activa.values('id_empresa__nombre')[:1])
+    )
+
+
 class ClienteSerializer(serializers.ModelSerializer):
     """Serializador para el modelo Cliente con información de empresa"""
     empresa_nombre = serializers.SerializerMethodField()
     empresa_id = serializers.SerializerMethodField()
+    # Anotados por cliente/segmentacion.anotar_segmento en los listados de la empresa
+    segmento = serializers.CharField(read_only=True, default=None)
+    valor_cliente = serializers.DecimalField(max_digits=15, decimal_places=2, read_only=True, default=None)
     
     class Meta:
         model = Cliente
@@ -25,38 +45,36 @@ class ClienteSerializer(serializers.ModelSerializer):
             'telefono_cliente',
             'fecha_registro',
             'empresa_nombre',
-            'empresa_id'
+            'empresa_id',
+            'segmento',
+            'valor_cliente'
         ]
         read_only_fields = ['id_usuario']
     
-    def get_empresa_nombre(self, obj):
-        """Obtener el nombre de la empresa a la que pertenece el cliente"""
+    def _empresa_activa(self, obj):
+        """(id, nombre) de la empresa activa; usa anotar_empresa_activa si el listado la aplicó"""
+        if hasattr(obj, 'empresa_activa_id'):
+            return obj.empresa_activa_id, obj.empresa_activa_nombre
         try:
             # Buscar la relación en la tabla Tiene
             tiene_relacion = Tiene.objects.filter(
                 id_cliente=obj,
                 estado='activo'
-            ).first()
+            ).select_related('id_empresa').order_by('fecha_registro', 'id').first()
             
             if tiene_relacion:
-                return tiene_relacion.id_empresa.nombre
-            return None
+                return tiene_relacion.id_empresa.id_empresa, tiene_relacion.id_empresa.nombre
+            return None, None
         except Exception:
-            return None
+            return None, None
+
+    def get_empresa_nombre(self, obj):
+        """Obtener el nombre de la empresa a la que pertenece el cliente"""
+        return self._empresa_activa(obj)[1]
     
     def get_empresa_id(self, obj):
         """Obtener el ID de la empresa a la que pertenece el cliente"""
-        try:
-            tiene_relacion = Tiene.objects.filter(
-                id_cliente=obj,
-                estado='activo'
-            ).first()
-            
-            if tiene_relacion:
-                return tiene_relacion.id_empresa.id_empresa
-            return None
-        except Exception:
-            return None
+        return self._empresa_activa(obj)[0]
 
 
 class RegistroClienteSerializer(serializers.Serializer):
@@ -334,4 +352,17 @@ class NITEmpresaSerializer(serializers.Serializer):
     def validate(self, data):
         """Validación adicional"""
         # Aquí puedes agregar más validaciones si es necesario
-        return data
\ No newline at end of file
+        return data
+
+class ClienteAltaMasivaSerializer(serializers.Serializer):
+    """
+    Fila del alta masiva de clientes. Con un NIT ya registrado solo se vincula el cliente
+    a la empresa; con un NIT nuevo email, password y nombre_cliente son obligatorios.
+    La unicidad de NIT y email se valida para todo el lote en cliente/alta_masiva.py
+    """
+    nit = serializers.CharField(max_length=20, required=True)
+    email = serializers.EmailField(required=False)
+    password = serializers.CharField(write_only=True, required=False, min_length=8)
+    nombre_cliente = serializers.CharField(max_length=100, required=False)
+    direccion_cliente = serializers.CharField(max_length=200, required=False, allow_blank=True, default='')
+    telefono_cliente = serializers.CharField(max_length=15, required=False, allow_blank=True, default='')
@@ -1,3 +1,257 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from backend.benchmarks.datos import generar_datos
+from backend.pruebas import ConsultasConstantesMixin
+from relacion_tiene.models import Tiene
+from roles.models import Rol
+from usuario_empresa.models import Usuario_Empresa
+from usuarios.models import User
+from ventas.models import Venta
+from .models import AuditoriaCliente, Cliente, SegmentoCliente
+from .segmentacion import actualizar_segmentos, clasificar, puntaje
 
-# Create your tests here.
+
+class ConsultasListaClientesTest(ConsultasConstantesMixin, TestCase):
+    """ListaTodosClientesView: la empresa activa de cada cliente no agrega consultas por fila"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = generar_datos(empresas=1, productos=1, clientes=3, ventas=0)
+
+    def _agregar_clientes(self):
+        rol_cliente = Rol.objects.get(rol='cliente')
+        usuarios = User.objects.bulk_create([
+            User(email=f'nuevo{i}@clientes.test', password='!', rol=rol_cliente, estado='activo')
+            for i in range(10)
+        ])
+        clientes = Cliente.objects.bulk_create([
+            Cliente(id_usuario=usuario, nit=f'NUEVO-{usuario.pk}', nombre_cliente=f'Nuevo {usuario.pk}',
+                    direccion_cliente='-', telefono_cliente='0')
+            for usuario in usuarios
+        ])
+        Tiene.objects.bulk_create([
+            Tiene(id_cliente=cliente, id_empresa=self.datos['empresa'], estado='activo')
+            for cliente in clientes
+        ])
+
+    def test_lista_todos_clientes(self):
+        cliente = APIClient()
+        cliente.force_authenticate(self.datos['vendedor'])
+
+        def contar(respuesta):
+            datos = respuesta.json()
+            return len(datos['results'] if isinstance(datos, dict) else datos)
+
+        self.assertConsultasConstantes(
+            lambda: cliente.get('/api/clientes/todos-clientes'),
+            self._agregar_clientes,
+            contar
+        )
+
+
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    HASH_CONTRASENAS={'PROCESOS': 0}
+)
+class AltaMasivaClientesTest(TestCase):
+    """POST /api/clientes/clientes/registrar-masivo/: alta, vinculación, modo parcial y duplicados del lote"""
+
+    URL = '/api/clientes/clientes/registrar-masivo/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = generar_datos(empresas=1, productos=1, clientes=1, ventas=0)
+        cls.empresa = cls.datos['empresa']
+        # Cliente registrado en el sistema pero sin relación con la empresa
+        usuario = User.objects.create_user(
+            email='externo@clientes.test', password='x', rol=Rol.objects.get(rol='cliente')
+        )
+        cls.externo = Cliente.objects.create(
+            id_usuario=usuario, nit='EXTERNO-1', nombre_cliente='Externo',
+            direccion_cliente='-', telefono_cliente='0'
+        )
+
+    def setUp(self):
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(self.datos['vendedor'])
+
+    def _nuevo(self, numero, **cambios):
+        fila = {
+            'nit': f'NUEVO-{numero}',
+            'email': f'nuevo{numero}@clientes.test',
+            'password': 'clave-segura',
+            'nombre_cliente': f'Nuevo {numero}',
+        }
+        fila.update(cambios)
+        return fila
+
+    def _registrar(self, filas, parcial=False):
+        return self.cliente.post(self.URL, {'clientes': filas, 'parcial': parcial}, format='json')
+
+    def _activos_en_empresa(self):
+        return set(Tiene.objects.filter(
+            id_empresa=self.empresa, estado='activo'
+        ).values_list('id_cliente__nit', flat=True))
+
+    def test_crea_vincula_y_omite(self):
+        respuesta = self._registrar([
+            self._nuevo(1),
+            {'nit': self.externo.nit},
+            {'nit': self.datos['cliente'].nit},
+        ])
+
+        self.assertEqual(respuesta.status_code, 201, respuesta.content)
+        datos = respuesta.json()
+        self.assertEqual(
+            [(fila['nit'], fila['accion']) for fila in datos['clientes']],
+            [('NUEVO-1', 'creado'), ('EXTERNO-1', 'registrado'), (self.datos['cliente'].nit, 'sin_cambios')]
+        )
+        self.assertEqual(datos['resumen']['procesadas'], 3)
+        self.assertEqual(
+            self._activos_en_empresa(), {'NUEVO-1', 'EXTERNO-1', self.datos['cliente'].nit}
+        )
+        nuevo = Cliente.objects.select_related('id_usuario__rol').get(nit='NUEVO-1')
+        self.assertEqual(nuevo.id_usuario.rol.rol, 'cliente')
+        self.assertTrue(nuevo.id_usuario.check_password('clave-segura'))
+        # sin_cambios no deja auditoría
+        self.assertEqual(
+            sorted(AuditoriaCliente.objects.filter(detalles__origen='alta_masiva').values_list('cliente_nit', flat=True)),
+            ['EXTERNO-1', 'NUEVO-1']
+        )
+
+    def test_un_error_cancela_el_lote(self):
+        respuesta = self._registrar([self._nuevo(1), self._nuevo(2, password=None, email=None)])
+
+        self.assertEqual(respuesta.status_code, 400)
+        datos = respuesta.json()
+        self.assertEqual(datos['resumen']['procesadas'], 0)
+        self.assertEqual([error['fila'] for error in datos['errores']], [2])
+        self.assertFalse(Cliente.objects.filter(nit__startswith='NUEVO-').exists())
+
+    def test_parcial_procesa_las_filas_validas(self):
+        respuesta = self._registrar([self._nuevo(1), {'nit': 'NUEVO-2'}], parcial=True)
+
+        self.assertEqual(respuesta.status_code, 201, respuesta.content)
+        datos = respuesta.json()
+        self.assertEqual(datos['resumen']['creado'], 1)
+        self.assertEqual(datos['resumen']['con_errores'], 1)
+        self.assertEqual(
+            set(datos['errores'][0]['errores']), {'email', 'password', 'nombre_cliente'}
+        )
+        self.assertEqual(
+            list(Cliente.objects.filter(nit__startswith='NUEVO-').values_list('nit', flat=True)), ['NUEVO-1']
+        )
+
+    def test_duplicados_en_el_lote(self):
+        respuesta = self._registrar([
+            self._nuevo(1),
+            self._nuevo(2, nit='NUEVO-1'),
+            self._nuevo(3, email='nuevo1@clientes.test'),
+        ], parcial=True)
+
+        self.assertEqual(respuesta.status_code, 201, respuesta.content)
+        errores = {error['fila']: error['errores'] for error in respuesta.json()['errores']}
+        self.assertEqual(errores, {
+            2: {'nit': 'Duplicado en el lote (fila 1)'},
+            3: {'email': 'Duplicado en el lote (fila 1)'},
+        })
+        self.assertEqual(
+            list(Cliente.objects.filter(nit__startswith='NUEVO-').values_list('nit', flat=True)), ['NUEVO-1']
+        )
+
+
+class SegmentacionClientesTest(TestCase):
+    """Segmentación RFM: puntajes con empates, empresas con pocos clientes y acumulación incremental"""
+
+    @classmethod
+    def setUpTestData(cls):
+        datos = generar_datos(empresas=1, productos=1, clientes=5, ventas=0)
+        cls.vendedor = Usuario_Empresa.objects.get(id_usuario=datos['vendedor'])
+        cls.clientes = list(Cliente.objects.order_by('pk'))
+
+    def setUp(self):
+        self.ahora = timezone.now()
+
+    def _venta(self, cliente, monto, dias):
+        venta = Venta.objects.create(usuario_empresa=self.vendedor, cliente=cliente, precio_total=Decimal(monto))
+        Venta.objects.filter(pk=venta.pk).update(fecha_venta=self.ahora - timedelta(days=dias))
+        return venta
+
+    def _puntajes(self):
+        return {
+            segmento.cliente_id: (segmento.recencia, segmento.frecuencia, segmento.monetario)
+            for segmento in SegmentoCliente.objects.all()
+        }
+
+    def test_clasificar(self):
+        casos = {
+            (5, 5): 'campeones', (4, 4): 'campeones',
+            (3, 5): 'leales', (2, 4): 'en_riesgo',
+            (5, 1): 'nuevos', (4, 2): 'potenciales', (3, 1): 'potenciales',
+            (2, 3): 'en_riesgo', (1, 2): 'perdidos', (2, 2): 'hibernando',
+        }
+        for (recencia, frecuencia), segmento in casos.items():
+            with self.subTest(recencia=recencia, frecuencia=frecuencia):
+                self.assertEqual(clasificar(recencia, frecuencia), segmento)
+
+    def test_puntaje(self):
+        self.assertEqual([puntaje(valor) for valor in (0.1, 0.2, 0.4, 0.6, 0.8, 0.81, 1.0)], [1, 1, 2, 3, 4, 5, 5])
+
+    def test_empates_tienen_el_mismo_puntaje(self):
+        # Compras: 1, 3, 3, 3 y 5; los tres con 3 compras (y el mismo monto) empatan
+        for cliente, compras in zip(self.clientes, (1, 3, 3, 3, 5)):
+            for _ in range(compras):
+                self._venta(cliente, '10.00', dias=30)
+
+        actualizar_segmentos()
+
+        puntajes = self._puntajes()
+        frecuencias = [puntajes[cliente.pk][1] for cliente in self.clientes]
+        self.assertEqual(frecuencias, [1, 4, 4, 4, 5])
+        self.assertEqual([puntajes[cliente.pk][2] for cliente in self.clientes], frecuencias)
+        # Misma última compra para todos: todos empatan en recencia
+        self.assertEqual({puntajes[cliente.pk][0] for cliente in self.clientes}, {5})
+
+    def test_pocos_clientes(self):
+        primero, segundo = self.clientes[:2]
+        self._venta(primero, '10.00', dias=40)
+        self._venta(segundo, '100.00', dias=10)
+
+        actualizar_segmentos()
+
+        self.assertEqual(self._puntajes(), {primero.pk: (3, 5, 3), segundo.pk: (5, 5, 5)})
+
+    def test_acumulacion_incremental(self):
+        primero, segundo = self.clientes[:2]
+        self._venta(primero, '10.00', dias=40)
+        self._venta(segundo, '20.00', dias=20)
+        primera_pasada = actualizar_segmentos()
+        self.assertEqual(primera_pasada[1:], (1, 2))
+
+        nueva = self._venta(primero, '50.00', dias=1)
+        # Dentro del margen (MARGEN_MINUTOS): todavía no se incorpora
+        reciente = Venta.objects.create(usuario_empresa=self.vendedor, cliente=segundo, precio_total=Decimal('5.00'))
+
+        hasta_id, empresas, _ = actualizar_segmentos()
+
+        self.assertEqual((hasta_id, empresas), (nueva.pk, 1))
+        resumen = SegmentoCliente.objects.get(cliente=primero)
+        self.assertEqual((resumen.compras, resumen.monto), (2, Decimal('60.00')))
+        self.assertEqual(resumen.ultima_compra, Venta.objects.get(pk=nueva.pk).fecha_venta)
+        self.assertEqual(resumen.primera_compra, Venta.objects.filter(cliente=primero).order_by('pk')[0].fecha_venta)
+        self.assertEqual(self._puntajes()[primero.pk], (5, 5, 5))
+        self.assertEqual(self._puntajes()[segundo.pk], (3, 3, 3))
+        self.assertLess(nueva.pk, reciente.pk)
+        self.assertEqual(SegmentoCliente.objects.get(cliente=segundo).compras, 1)
+
+        # Recalcular todo da el mismo resultado que la acumulación
+        incremental = list(SegmentoCliente.objects.order_by('cliente_id').values_list(
+            'cliente_id', 'compras', 'monto', 'recencia', 'frecuencia', 'monetario', 'segmento'
+        ))
+        actualizar_segmentos(completo=True)
+        self.assertEqual(list(SegmentoCliente.objects.order_by('cliente_id').values_list(
+            'cliente_id', 'compras', 'monto', 'recencia', 'frecuencia', 'monetario', 'segmento'
+        )), incremental)
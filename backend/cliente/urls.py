@@ -6,7 +6,9 @@ from .views import (
     DetalleAuditoriaClienteView,
     ListaTodosClientesView,
     ClientePorNITView,
-    RegistrarClienteExistenteNITView
+    RegistrarClienteExistenteNITView,
+    RegistrarClientesMasivoView,
+    SegmentosClientesView
 )
 
 urlpatterns = [
@@ -14,10 +16,12 @@ urlpatterns = [
     path('listar/', ListaClientesView.as_view(), name='lista-clientes'),
     path('<int:pk>/', DetalleClienteView.as_view(), name='detalle-cliente'),
     path('clientes/registrar-por-nit/', RegistrarClienteExistenteNITView.as_view(), name='registrar-cliente-nit'),
+    path('clientes/registrar-masivo/', RegistrarClientesMasivoView.as_view(), name='registrar-clientes-masivo'),
     #path('mis-empresas/', MisEmpresasView.as_view(), name='mis-empresas'),
     path('auditorias/', ListaAuditoriaClienteView.as_view(), name='auditorias-cliente'),
     path('auditorias/filtrar/', AuditoriaClienteFiltradaView.as_view(), name='auditorias-filtrar'),
     path('auditorias/<int:id>/', DetalleAuditoriaClienteView.as_view(), name='auditoria-detalle'),
     path('todos-clientes', ListaTodosClientesView.as_view(), name='auditoria-detalle'),
     path('clientes/por-nit/<str:nit>/', ClientePorNITView.as_view(), name='cliente-por-nit'),
+    path('segmentos/', SegmentosClientesView.as_view(), name='segmentos-clientes'),
 ]
\ No newline at end of file
@@ -17,9 +17,10 @@ from .serializers import (
 from .models import Cliente
 from empresas.models import Empresa
 from usuario_empresa.models import Usuario_Empresa
-from .serializers import RegistroClienteSerializer, ClienteSerializer, EmailEmpresaSerializer
+from .serializers import RegistroClienteSerializer, ClienteSerializer, EmailEmpresaSerializer, anotar_empresa_activa
 from .models import AuditoriaCliente
 from .serializers import AuditoriaClienteSerializer, FiltroAuditoriaSerializer, RegistroClienteConEmpresaSerializer, NITEmpresaSerializer
+from .segmentacion import anotar_segmento
 import logging
 
 logger = logging.getLogger(__name__)
@@ -265,7 +266,7 @@ class ListaClientesView(generics.ListAPIView):
         Solo admin_empresa puede ver clientes
         """
         if self.request.user.rol and self.request.user.rol.rol == 'admin_empresa':
-            return Cliente.objects.all()
+            return anotar_empresa_activa(Cliente.objects.all())
         return Cliente.objects.none()
 
 
@@ -504,6 +505,98 @@ class RegistrarClienteExistenteNITView(generics.CreateAPIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+
+class RegistrarClientesMasivoView(RegistrarClienteExistenteNITView):
+    """
+    Alta masiva de clientes en la empresa del vendedor / admin_empresa
+    POST /api/clientes/clientes/registrar-masivo/
+    {"clientes": [{"nit", "email", "password", "nombre_cliente",
+                   "direccion_cliente", "telefono_cliente"}],
+     "parcial": false}
+    Los NIT ya registrados solo se vinculan a la empresa (basta enviar el nit).
+    parcial=true procesa las filas válidas aunque otras tengan errores
+    """
+    serializer_class = None
+
+    def create(self, request, *args, **kwargs):
+        from backend.carga_masiva import ErrorCargaMasiva, opcion_activada
+        from .alta_masiva import AltaMasivaClientes
+
+        datos = request.data if hasattr(request.data, 'get') else {}
+        filas = datos.get('clientes')
+        if not isinstance(filas, list):
+            return Response({
+                'status': 'error',
+                'message': 'Formato no válido',
+                'detail': 'Envíe una lista JSON en "clientes"'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        parcial = opcion_activada(datos.get('parcial', False))
+
+        usuario_empresa = Usuario_Empresa.objects.select_related('empresa').filter(
+            id_usuario=request.user,
+            estado='activo'
+        ).first()
+        if not usuario_empresa or usuario_empresa.empresa.estado != 'activo':
+            return Response({
+                'status': 'error',
+                'message': 'Empresa no disponible',
+                'detail': 'No tienes una empresa activa asignada'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        empresa = usuario_empresa.empresa
+
+        try:
+            alta = AltaMasivaClientes(
+                request.user, empresa, filas, parcial=parcial,
+                ip_address=request.META.get('REMOTE_ADDR'),
+                user_agent=request.META.get('HTTP_USER_AGENT', '')
+            )
+            resultados, errores = alta.registrar()
+        except ErrorCargaMasiva as e:
+            return Response({
+                'status': 'error',
+                'message': 'No se pudo registrar',
+                'detail': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        reporte_errores = AltaMasivaClientes.formatear_errores(errores, filas)
+        acciones = {}
+        for resultado in resultados:
+            acciones[resultado['accion']] = acciones.get(resultado['accion'], 0) + 1
+        resumen = {
+            'total_filas': len(filas),
+            'procesadas': len(resultados),
+            'con_errores': len(reporte_errores),
+            **{accion: acciones.get(accion, 0) for accion in ('creado', 'registrado', 'reactivado', 'sin_cambios')}
+        }
+
+        if not resultados:
+            return Response({
+                'status': 'error',
+                'message': 'El lote tiene errores, no se registró ningún cliente',
+                'resumen': resumen,
+                'errores': reporte_errores
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'status': 'success',
+            'message': f'{len(resultados)} clientes procesados en {empresa.nombre}',
+            'resumen': resumen,
+            'clientes': [
+                {
+                    'fila': resultado['numero'],
+                    'id_usuario': resultado['cliente'].pk,
+                    'nit': resultado['cliente'].nit,
+                    'nombre_cliente': resultado['cliente'].nombre_cliente,
+                    'email': resultado['cliente'].id_usuario.email,
+                    'accion': resultado['accion']
+                }
+                for resultado in resultados
+            ],
+            'errores': reporte_errores
+        }, status=status.HTTP_201_CREATED)
+
+
 class ListaAuditoriaClienteView(generics.ListAPIView):
     """
     Vista para listar auditorías de clientes
@@ -690,6 +783,8 @@ class ListaTodosClientesView(generics.ListAPIView):
     Vista para listar TODOS los clientes del sistema
     Solo accesible por rol 'admin', 'vendedor', 'admin_empresa'
     Devuelve cliente con información de empresa
+    Para usuarios de una empresa: ?segmento= filtra y ?orden=valor|compras|ultima_compra
+    (con '-' descendente) ordena por el resumen RFM de esa empresa
     """
     serializer_class = ClienteSerializer  # Usa el nuevo serializer
     permission_classes = [IsAuthenticated]
@@ -706,7 +801,20 @@ class ListaTodosClientesView(generics.ListAPIView):
             return Cliente.objects.none()
         
         # Si es admin, retornar todos los clientes
-        return Cliente.objects.all().select_related('id_usuario')
+        queryset = anotar_empresa_activa(Cliente.objects.all().select_related('id_usuario'))
+
+        # Usuarios de empresa: segmento RFM de su empresa
+        empresa_id = Usuario_Empresa.objects.filter(
+            id_usuario=self.request.user
+        ).values_list('empresa_id', flat=True).first()
+        if empresa_id:
+            queryset = anotar_segmento(
+                queryset,
+                empresa_id,
+                segmento=self.request.query_params.get('segmento'),
+                orden=self.request.query_params.get('orden')
+            )
+        return queryset
     
     def list(self, request, *args, **kwargs):
         """
@@ -888,4 +996,53 @@ class ClientePorNITView(generics.RetrieveAPIView):
             return Response({
                 'error': 'Error interno del servidor',
                 'detail': str(e)
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class SegmentosClientesView(generics.GenericAPIView):
+    """
+    Resumen RFM de los clientes de la empresa por segmento (cliente/segmentacion.py)
+    GET /api/clientes/segmentos/
+    Solo para vendedor y admin_empresa
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        from django.db.models import Count, Sum
+        from .models import EstadoSegmentacion, SegmentoCliente
+
+        if not hasattr(request.user, 'rol') or request.user.rol.rol not in ['vendedor', 'admin_empresa']:
+            return Response(
+                {'error': 'Solo vendedores y administradores de empresa pueden ver los segmentos'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        try:
+            empresa_id = Usuario_Empresa.objects.values_list('empresa_id', flat=True).get(id_usuario=request.user)
+        except Usuario_Empresa.DoesNotExist:
+            return Response({'error': 'Usuario sin empresa asignada'}, status=status.HTTP_400_BAD_REQUEST)
+
+        grupos = SegmentoCliente.objects.filter(empresa_id=empresa_id).order_by().values('segmento').annotate(
+            clientes=Count('id'),
+            compras=Sum('compras'),
+            monto=Sum('monto')
+        )
+        por_segmento = {grupo['segmento']: grupo for grupo in grupos}
+        segmentos = []
+        for clave, nombre in SegmentoCliente.SEGMENTOS:
+            grupo = por_segmento.get(clave, {'clientes': 0, 'compras': 0, 'monto': 0})
+            segmentos.append({
+                'segmento': clave,
+                'nombre': nombre,
+                'clientes': grupo['clientes'],
+                'compras': grupo['compras'] or 0,
+                'monto': float(grupo['monto'] or 0),
+                'ticket_promedio': round(float(grupo['monto']) / grupo['compras'], 2) if grupo['compras'] else 0,
+            })
+
+        estado = EstadoSegmentacion.objects.filter(pk=1).values('ultimo_id_venta', 'fecha_actualizacion').first()
+        return Response({
+            'status': 'success',
+            'segmentos': segmentos,
+            'total_clientes': sum(s['clientes'] for s in segmentos),
+            'actualizado': estado['fecha_actualizacion'] if estado else None
+        })
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.4 on 2026-10-19 16:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compras', '0001_initial'),
+        ('usuario_empresa', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='compra',
+            index=models.Index(fields=['usuario_empresa', 'fecha'], name='compra_ue_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='compra',
+            index=models.Index(fields=['fecha'], name='compra_fecha_idx'),
+        ),
+    ]
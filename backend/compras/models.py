@@ -10,4 +10,8 @@ class Compra(models.Model):
     
     class Meta:
         db_table = "compra"
-        ordering = ["id_compra"]
\ No newline at end of file
+        ordering = ["id_compra"]
+        indexes = [
+            models.Index(fields=['usuario_empresa', 'fecha'], name='compra_ue_fecha_idx'),
+            models.Index(fields=['fecha'], name='compra_fecha_idx'),
+        ]
\ No newline at end of file
@@ -58,7 +58,8 @@ class CompraSerializer(serializers.ModelSerializer):
     def get_detalles_compra(self, obj):
         """Obtiene detalles de la compra con información del proveedor"""
         try:
-            detalles = DetalleCompra.objects.filter(id_compra=obj).select_related('id_producto', 'id_proveedor')
+            # Usa los detalles precargados por la vista (prefetch_related) si los hay
+            detalles = obj.detallecompra_set.all()
             return [
                 {
                     'id_producto': detalle.id_producto.id_producto,
@@ -119,11 +120,12 @@ class RealizarCompraStockSerializer(serializers.Serializer):
             # Verificar proveedor
             try:
                 proveedor = Proveedor.objects.get(
-                    id_proveedor=detalle['id_proveedor']
+                    id_proveedor=detalle['id_proveedor'],
+                    empresa=empresa  # Solo proveedores de la misma empresa
                 )
             except Proveedor.DoesNotExist:
                 raise serializers.ValidationError(
-                    f"Proveedor con ID {detalle['id_proveedor']} no encontrado"
+                    f"Proveedor con ID {detalle['id_proveedor']} no encontrado o no pertenece a tu empresa"
                 )
             
             # Validar que la cantidad sea positiva
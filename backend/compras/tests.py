@@ -1,3 +1,143 @@
+import csv
+import io
+from datetime import datetime, timedelta
+from decimal import Decimal
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from django.utils import timezone
+from backend.benchmarks.datos import generar_datos
+from backend.pruebas import ConsultasConstantesMixin, PlanConsultaMixin
+from roles.models import Rol
+from usuarios.models import User
+from empresas.models import Empresa
+from usuario_empresa.models import Usuario_Empresa
+from detalle_compra.models import DetalleCompra
+from producto.models import Producto
+from .models import Compra
 
-# Create your tests here.
+
+class IndicesCompraTest(PlanConsultaMixin, TestCase):
+    """Verifica con EXPLAIN que los filtros por fecha de compras usan índices"""
+    EMPRESAS = 20
+    COMPRAS_POR_USUARIO = 200
+
+    @classmethod
+    def setUpTestData(cls):
+        rol = Rol.objects.create(rol='admin_empresa', descripcion='Admin empresa')
+        empresas = Empresa.objects.bulk_create([
+            Empresa(nombre=f'Empresa {i}', nit=f'NIT-{i}', rubro='retail', direccion='-',
+                    telefono='0', email=f'empresa{i}@test.com', estado='activo')
+            for i in range(cls.EMPRESAS)
+        ])
+        usuarios = User.objects.bulk_create([
+            User(email=f'admin{i}@test.com', rol=rol, estado='activo', password='!')
+            for i in range(cls.EMPRESAS)
+        ])
+        usuarios_empresa = Usuario_Empresa.objects.bulk_create([
+            Usuario_Empresa(id_usuario=usuario, empresa=empresa, estado='activo')
+            for usuario, empresa in zip(usuarios, empresas)
+        ])
+
+        compras = Compra.objects.bulk_create([
+            Compra(usuario_empresa=usuario_empresa, precio_total=Decimal('50.00'))
+            for usuario_empresa in usuarios_empresa
+            for _ in range(cls.COMPRAS_POR_USUARIO)
+        ], batch_size=1000)
+
+        # fecha es auto_now_add: se reparte en un año para que el rango sea selectivo
+        ahora = timezone.now()
+        for indice, compra in enumerate(compras):
+            compra.fecha = ahora - timedelta(days=indice % 365)
+        Compra.objects.bulk_update(compras, ['fecha'], batch_size=1000)
+
+        cls.empresa = empresas[0]
+        cls.actualizar_estadisticas('compra', 'usuario_empresa')
+
+    def test_compras_por_rango_de_fechas(self):
+        hasta = timezone.now() - timedelta(days=100)
+        consulta = Compra.objects.filter(fecha__gte=hasta - timedelta(days=7), fecha__lt=hasta)
+        self.assertUsaIndice(consulta, 'compra_fecha_idx')
+
+    def test_compras_por_empresa_y_fecha(self):
+        desde = timezone.now() - timedelta(days=30)
+        consulta = Compra.objects.filter(
+            usuario_empresa__empresa=self.empresa,
+            fecha__gte=desde
+        ).order_by('-fecha')
+        self.assertUsaIndice(consulta, 'compra_ue_fecha_idx')
+
+
+class ConsultasListaComprasTest(ConsultasConstantesMixin, TestCase):
+    """ListaComprasVendedorView: las consultas no crecen con las compras ni sus detalles"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = generar_datos(empresas=1, productos=5, clientes=1, ventas=0)
+        cls._crear_compras(cls.datos, 2)
+
+    @staticmethod
+    def _crear_compras(datos, cantidad):
+        usuario_empresa = Usuario_Empresa.objects.get(id_usuario=datos['vendedor'])
+        productos = list(Producto.objects.filter(empresa=datos['empresa']))
+        compras = Compra.objects.bulk_create([
+            Compra(usuario_empresa=usuario_empresa, precio_total=Decimal('30.00'))
+            for _ in range(cantidad)
+        ])
+        DetalleCompra.objects.bulk_create([
+            DetalleCompra(id_compra=compra, id_producto=producto, id_proveedor=datos['proveedor'],
+                          cantidad=1, precio_unitario=Decimal('10.00'), subtotal=Decimal('10.00'))
+            for compra in compras
+            for producto in productos[:3]
+        ])
+
+    def test_lista_compras(self):
+        cliente = APIClient()
+        cliente.force_authenticate(self.datos['vendedor'])
+        self.assertConsultasConstantes(
+            lambda: cliente.get('/api/compras/listar/'),
+            lambda: self._crear_compras(self.datos, 10),
+            lambda respuesta: len(respuesta.json()['compras'])
+        )
+
+
+class ExportarComprasRangoTest(TestCase):
+    """ExportarComprasView: el rango de fechas es [inicio, fin + 1 día) en la zona local, sin castear la fecha"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = generar_datos(empresas=1, productos=1, clientes=1, ventas=0)
+        usuario_empresa = Usuario_Empresa.objects.get(id_usuario=cls.datos['vendedor'])
+        fechas = {
+            'antes': datetime(2026, 3, 9, 23, 59),
+            'inicio': datetime(2026, 3, 10, 0, 0),
+            'fin': datetime(2026, 3, 11, 23, 59),
+            'despues': datetime(2026, 3, 12, 0, 0),
+        }
+        cls.compras = {}
+        for nombre, fecha in fechas.items():
+            compra = Compra.objects.create(usuario_empresa=usuario_empresa, precio_total=Decimal('10.00'))
+            Compra.objects.filter(pk=compra.pk).update(fecha=timezone.make_aware(fecha))
+            DetalleCompra.objects.create(
+                id_compra=compra, id_producto=cls.datos['producto'], id_proveedor=cls.datos['proveedor'],
+                cantidad=1, precio_unitario=Decimal('10.00'), subtotal=Decimal('10.00')
+            )
+            cls.compras[nombre] = compra.pk
+
+    def test_rango_de_fechas(self):
+        cliente = APIClient()
+        cliente.force_authenticate(self.datos['vendedor'])
+
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = cliente.get('/api/compras/exportar/?formato=csv&fecha_inicio=2026-03-10&fecha_fin=2026-03-11')
+            cuerpo = b''.join(respuesta.streaming_content).decode('utf-8-sig')
+        respuesta.close()
+
+        self.assertEqual(respuesta.status_code, 200)
+        ids = {int(fila['id_compra']) for fila in csv.DictReader(io.StringIO(cuerpo))}
+        self.assertEqual(ids, {self.compras['inicio'], self.compras['fin']})
+        exportacion = [consulta['sql'] for consulta in consultas.captured_queries if 'detalle_compra' in consulta['sql']]
+        self.assertTrue(exportacion)
+        for sql in exportacion:
+            self.assertNotIn('cast_date', sql)
@@ -4,6 +4,7 @@ from . import views
 urlpatterns = [
     path('realizar/', views.RealizarCompraStockView.as_view(), name='realizar-compra-stock'),
     path('listar/', views.ListaComprasVendedorView.as_view(), name='lista-compras-vendedor'),
+    path('exportar/', views.ExportarComprasView.as_view(), name='exportar-compras'),
     path('<int:id_compra>/', views.DetalleCompraVendedorView.as_view(), name='detalle-compra'),
     path('<int:id_compra>/eliminar/', views.EliminarCompraView.as_view(), name='eliminar-compra'),
 ]
\ No newline at end of file
@@ -1,14 +1,20 @@
 from django.db import transaction
+from django.db.models import Count, Prefetch, Q, Sum
 from rest_framework import generics, status, permissions, filters
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
-from datetime import datetime
+from datetime import datetime, timedelta
+from decimal import Decimal
+from django.utils import timezone
 import logging
 
 from .models import Compra
 from detalle_compra.models import DetalleCompra
 from .serializers import CompraSerializer, RealizarCompraStockSerializer
+from backend.exportacion.streaming import respuesta_exportacion, FORMATOS
+from producto import kardex
+from producto.stock import comprar
 
 logger = logging.getLogger(__name__)
 
@@ -59,6 +65,7 @@ class RealizarCompraStockView(generics.CreateAPIView):
             
             # 2. Crear detalles de compra y actualizar stock
             detalles_compra = []
+            movimientos = []
             for info in productos_info:
                 producto = info['producto']
                 proveedor = info['proveedor']  # Obtener proveedor
@@ -66,14 +73,12 @@ class RealizarCompraStockView(generics.CreateAPIView):
                 precio_unitario = info['precio_unitario']
                 subtotal = info['subtotal']
                 
-                # Aumentar stock del producto
-                producto.stock_actual += cantidad
-                
-                # Actualizar estado si estaba agotado
-                if producto.estado == 'agotado' and producto.stock_actual > 0:
-                    producto.estado = 'activo'
-                
-                producto.save()
+                # Aumentar stock del producto (y reactivarlo si estaba agotado)
+                comprar(producto.id_producto, cantidad)
+                producto.refresh_from_db(fields=['stock_actual', 'estado'])
+                movimientos.append(kardex.movimiento(
+                    producto, 'compra', cantidad, usuario=request.user, referencia=f'compra:{compra.id_compra}'
+                ))
                 
                 # Crear detalle de compra con proveedor
                 detalle = DetalleCompra.objects.create(
@@ -96,6 +101,8 @@ class RealizarCompraStockView(generics.CreateAPIView):
                 
                 logger.info(f"Stock actualizado: {producto.nombre} +{cantidad} = {producto.stock_actual} (Proveedor: {proveedor.nombre})")
             
+            kardex.registrar(movimientos)
+            
             # 3. Crear notificación (opcional)
             self._notificar_compra_stock(request.user, compra, detalles_compra)
             
@@ -118,6 +125,8 @@ class RealizarCompraStockView(generics.CreateAPIView):
             
         except Exception as e:
             logger.error(f"Error al realizar compra de stock: {str(e)}", exc_info=True)
+            # La excepción no sale de create: deshacer compra, detalles y stock sumado
+            transaction.set_rollback(True)
             return Response({
                 'error': 'Error al procesar la compra de stock',
                 'detail': str(e),
@@ -256,16 +265,24 @@ class ListaComprasVendedorView(generics.ListAPIView):
                 'usuario_empresa',
                 'usuario_empresa__id_usuario',
                 'usuario_empresa__empresa'
+            ).prefetch_related(
+                Prefetch(
+                    'detallecompra_set',
+                    queryset=DetalleCompra.objects.select_related('id_producto', 'id_proveedor')
+                )
             )
             
             # Filtrar por fecha si se proporcionan
             fecha_inicio = self.request.query_params.get('fecha_inicio')
             fecha_fin = self.request.query_params.get('fecha_fin')
             
+            # Rango sobre la columna (no fecha__date) para poder usar los índices de fecha
             if fecha_inicio:
-                queryset = queryset.filter(fecha__date__gte=fecha_inicio)
+                fecha_inicio_dt = timezone.make_aware(datetime.strptime(fecha_inicio, '%Y-%m-%d'))
+                queryset = queryset.filter(fecha__gte=fecha_inicio_dt)
             if fecha_fin:
-                queryset = queryset.filter(fecha__date__lte=fecha_fin)
+                fecha_fin_dt = timezone.make_aware(datetime.strptime(fecha_fin, '%Y-%m-%d')) + timedelta(days=1)
+                queryset = queryset.filter(fecha__lt=fecha_fin_dt)
             
             return queryset
             
@@ -284,14 +301,18 @@ class ListaComprasVendedorView(generics.ListAPIView):
             # Obtener el queryset filtrado
             queryset = self.filter_queryset(self.get_queryset())
             
-            # Calcular estadísticas
-            total_compras = queryset.count()
-            total_invertido = sum(compra.precio_total for compra in queryset)
-            compras_hoy = queryset.filter(fecha__date=datetime.now().date()).count()
-            invertido_hoy = sum(
-                compra.precio_total 
-                for compra in queryset.filter(fecha__date=datetime.now().date())
+            # Calcular estadísticas en una consulta (sin cargar las compras)
+            hoy = Q(fecha__date=datetime.now().date())
+            estadisticas = queryset.order_by().aggregate(
+                total_compras=Count('id_compra'),
+                total_invertido=Sum('precio_total'),
+                compras_hoy=Count('id_compra', filter=hoy),
+                invertido_hoy=Sum('precio_total', filter=hoy)
             )
+            total_compras = estadisticas['total_compras']
+            total_invertido = estadisticas['total_invertido'] or Decimal('0')
+            compras_hoy = estadisticas['compras_hoy']
+            invertido_hoy = estadisticas['invertido_hoy'] or Decimal('0')
             
             # Paginación
             page = self.paginate_queryset(queryset)
@@ -536,4 +557,77 @@ class EliminarCompraView(generics.DestroyAPIView):
             logger.info(f"Notificación de eliminación creada para usuario {usuario.email}")
             
         except Exception as e:
-            logger.error(f"Error al crear notificación de eliminación: {str(e)}")
\ No newline at end of file
+            logger.error(f"Error al crear notificación de eliminación: {str(e)}")
+
+class ExportarComprasView(generics.GenericAPIView):
+    """
+    Vista para exportar las compras de stock de la empresa con su proveedor
+    GET /api/compras/exportar/?formato=csv|xlsx&fecha_inicio=YYYY-MM-DD&fecha_fin=YYYY-MM-DD
+    """
+    permission_classes = [IsAuthenticated, EsVendedorOAdminEmpresaPermission]
+
+    COLUMNAS = [
+        ('id_compra', 'id_compra_id'),
+        ('fecha', 'id_compra__fecha'),
+        ('usuario', 'id_compra__usuario_empresa__id_usuario__email'),
+        ('id_producto', 'id_producto_id'),
+        ('producto', 'id_producto__nombre'),
+        ('id_proveedor', 'id_proveedor_id'),
+        ('proveedor', 'id_proveedor__nombre'),
+        ('proveedor_telefono', 'id_proveedor__telefono'),
+        ('proveedor_email', 'id_proveedor__email'),
+        ('cantidad', 'cantidad'),
+        ('precio_unitario', 'precio_unitario'),
+        ('subtotal', 'subtotal'),
+        ('total_compra', 'id_compra__precio_total'),
+    ]
+
+    def get(self, request, *args, **kwargs):
+        formato = request.query_params.get('formato', 'csv').lower()
+        if formato not in FORMATOS:
+            return Response({
+                'error': 'Formato no soportado',
+                'detail': f'Formatos disponibles: {", ".join(FORMATOS)}',
+                'status': 'error'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            from usuario_empresa.models import Usuario_Empresa
+            usuario_empresa = Usuario_Empresa.objects.get(id_usuario=request.user)
+        except Usuario_Empresa.DoesNotExist:
+            return Response({
+                'error': 'Usuario sin empresa asignada',
+                'detail': 'No tienes una empresa asignada',
+                'status': 'error'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        detalles = DetalleCompra.objects.filter(
+            id_compra__usuario_empresa__empresa_id=usuario_empresa.empresa_id
+        )
+
+        fecha_inicio = request.query_params.get('fecha_inicio')
+        fecha_fin = request.query_params.get('fecha_fin')
+        try:
+            if fecha_inicio:
+                detalles = detalles.filter(
+                    id_compra__fecha__gte=timezone.make_aware(datetime.strptime(fecha_inicio, '%Y-%m-%d'))
+                )
+            if fecha_fin:
+                detalles = detalles.filter(
+                    id_compra__fecha__lt=timezone.make_aware(datetime.strptime(fecha_fin, '%Y-%m-%d')) + timedelta(days=1)
+                )
+        except ValueError:
+            return Response({
+                'error': 'Fecha inválida',
+                'detail': 'Use el formato YYYY-MM-DD',
+                'status': 'error'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        proveedor_id = request.query_params.get('proveedor_id')
+        if proveedor_id:
+            detalles = detalles.filter(id_proveedor_id=proveedor_id)
+
+        detalles = detalles.order_by('id_compra_id', 'id')
+
+        logger.info(f"Exportación de compras ({formato}) por {request.user.email} - empresa {usuario_empresa.empresa_id}")
+        return respuesta_exportacion(detalles, self.COLUMNAS, 'compras', formato)
@@ -0,0 +1,231 @@
+# empresas/alta_masiva.py
+import logging
+from datetime import timedelta
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from backend.carga_masiva import CargaMasiva, ErrorCargaMasiva
+from planes.limites import LimitePlanExcedido
+from .models import Empresa
+from .serializers import EmpresaAltaMasivaSerializer
+
+logger = logging.getLogger(__name__)
+
+MAXIMO_EMPRESAS = 200
+TAMANIO_LOTE = 500
+
+
+class AltaMasivaEmpresas(CargaMasiva):
+    """
+    Alta de N empresas con su plan y usuarios iniciales en tres etapas:
+    1. Validación en memoria de todas las filas (formato y duplicados dentro del lote)
+    2. Validación contra la base de datos: NIT, emails de empresa, emails de usuario,
+       planes y roles con una consulta cada uno
+    3. Carga con bulk_create dentro de una transacción (empresas, suscripciones,
+       usuarios, usuario_empresa y cuotas); las contraseñas se hashean en paralelo
+    """
+
+    CAMPO_REFERENCIA = 'nit'
+
+    def __init__(self, admin_sistema, filas, parcial=False):
+        super().__init__(filas, parcial)
+        self.admin_sistema = admin_sistema
+
+    # ---------- Etapa 1: validación en memoria ----------
+    def _validar_filas(self):
+        from usuarios.models import User
+
+        vistos = {'nit': {}, 'email': {}, 'usuarios': {}}
+
+        for numero, fila in enumerate(self.filas, start=1):
+            serializer = EmpresaAltaMasivaSerializer(data=fila)
+            if not serializer.is_valid():
+                for campo, mensajes in serializer.errors.items():
+                    self._agregar_error(numero, campo, mensajes)
+                continue
+
+            datos = serializer.validated_data
+            datos['email'] = User.objects.normalize_email(datos['email'])
+            for usuario in datos['usuarios']:
+                usuario['email'] = User.objects.normalize_email(usuario['email'])
+
+            for campo in ('nit', 'email'):
+                if datos[campo] in vistos[campo]:
+                    self._agregar_error(numero, campo, f'Duplicado en el lote (fila {vistos[campo][datos[campo]]})')
+                else:
+                    vistos[campo][datos[campo]] = numero
+
+            for usuario in datos['usuarios']:
+                if usuario['email'] in vistos['usuarios']:
+                    self._agregar_error(
+                        numero, 'usuarios',
+                        f'Email {usuario["email"]} duplicado en el lote (fila {vistos["usuarios"][usuario["email"]]})'
+                    )
+                else:
+                    vistos['usuarios'][usuario['email']] = numero
+
+            self.validas.append((numero, datos))
+
+    # ---------- Etapa 2: validación contra la base de datos ----------
+    def _resolver_referencias(self):
+        from planes.models import Plan
+        from roles.models import Rol
+        from usuarios.models import User
+
+        nits = {datos['nit'] for _, datos in self.validas}
+        emails = {datos['email'] for _, datos in self.validas}
+        emails_usuarios = {usuario['email'] for _, datos in self.validas for usuario in datos['usuarios']}
+
+        nits_existentes = set(Empresa.objects.filter(nit__in=nits).values_list('nit', flat=True))
+        emails_existentes = set(Empresa.objects.filter(email__in=emails).values_list('email', flat=True))
+        usuarios_existentes = set(User.objects.filter(email__in=emails_usuarios).values_list('email', flat=True))
+
+        planes = {}
+        # Si hay planes con el mismo nombre se usa el más antiguo
+        for plan in Plan.objects.filter(
+            nombre__in={datos['plan_nombre'] for _, datos in self.validas}
+        ).order_by('-id_plan'):
+            planes[plan.nombre] = plan
+
+        roles = {
+            rol.rol: rol
+            for rol in Rol.objects.filter(rol__in=['admin_empresa', 'vendedor'], estado='activo')
+        }
+
+        for numero, datos in self.validas:
+            if datos['nit'] in nits_existentes:
+                self._agregar_error(numero, 'nit', 'Este NIT ya está registrado')
+            if datos['email'] in emails_existentes:
+                self._agregar_error(numero, 'email', 'Este email de empresa ya está registrado')
+
+            registrados = [usuario['email'] for usuario in datos['usuarios'] if usuario['email'] in usuarios_existentes]
+            if registrados:
+                self._agregar_error(numero, 'usuarios', f'Emails ya registrados: {", ".join(sorted(registrados))}')
+            sin_rol = {usuario['rol_nombre'] for usuario in datos['usuarios']} - set(roles)
+            if sin_rol:
+                self._agregar_error(numero, 'usuarios', f'Rol no disponible: {", ".join(sorted(sin_rol))}')
+
+            plan = planes.get(datos['plan_nombre'])
+            if not plan:
+                self._agregar_error(numero, 'plan_nombre', f'Plan "{datos["plan_nombre"]}" no encontrado')
+            elif len(datos['usuarios']) > plan.limite_usuarios:
+                # Misma verificación que reservar_cupo, sobre una empresa nueva (0 usados)
+                self._agregar_error(
+                    numero, 'usuarios',
+                    LimitePlanExcedido('usuarios', plan.limite_usuarios, 0, len(datos['usuarios'])).mensaje
+                )
+
+        return planes, roles
+
+    # ---------- Etapa 3: carga ----------
+    def registrar(self):
+        """
+        Ejecuta las tres etapas y retorna (resultados, errores); resultados es una lista
+        de dicts (numero, empresa, suscripcion, usuarios) de las filas creadas.
+        Sin modo parcial, cualquier error en una fila cancela el alta.
+        """
+        if not self.filas:
+            raise ErrorCargaMasiva('No se recibieron empresas para registrar')
+        if len(self.filas) > MAXIMO_EMPRESAS:
+            raise ErrorCargaMasiva(f'Máximo {MAXIMO_EMPRESAS} empresas por solicitud')
+
+        self._validar_filas()
+        planes, roles = self._resolver_referencias()
+
+        filas_ok = [(numero, datos) for numero, datos in self.validas if numero not in self.errores]
+        if (self.errores and not self.parcial) or not filas_ok:
+            return [], self.errores
+
+        # Fuera de la transacción: el hash es lo más costoso y no toca la base de datos
+        from usuarios.contrasenas import hashear_contrasenas
+        hashes = iter(hashear_contrasenas(
+            usuario['password'] for _, datos in filas_ok for usuario in datos['usuarios']
+        ))
+
+        try:
+            with transaction.atomic():
+                resultados = self._crear(filas_ok, planes, roles, hashes)
+        except IntegrityError as e:
+            # Otra solicitud registró el mismo NIT o email entre la validación y la carga
+            logger.warning(f"Conflicto de unicidad en alta masiva de empresas: {str(e)}")
+            raise ErrorCargaMasiva('Un NIT o email del lote se registró simultáneamente; reintente la solicitud')
+
+        from suscripciones.estadisticas import programar_refresco
+        programar_refresco()
+
+        logger.info(
+            f"Alta masiva: {len(resultados)} empresas registradas por admin {self.admin_sistema.nombre_admin}"
+        )
+        return resultados, self.errores
+
+    def _crear(self, filas_ok, planes, roles, hashes):
+        from planes.models import CuotaEmpresa
+        from suscripciones.models import Suscripcion
+        from usuario_empresa.models import Usuario_Empresa
+        from usuarios.models import User
+
+        ahora = timezone.now()
+
+        empresas = Empresa.objects.bulk_create([
+            Empresa(
+                admin=self.admin_sistema,
+                nombre=datos['nombre'],
+                nit=datos['nit'],
+                direccion=datos['direccion'],
+                telefono=datos['telefono'],
+                email=datos['email'],
+                rubro=datos['rubro'],
+                estado='inactivo'
+            )
+            for _, datos in filas_ok
+        ], batch_size=TAMANIO_LOTE)
+
+        suscripciones = Suscripcion.objects.bulk_create([
+            Suscripcion(
+                plan=planes[datos['plan_nombre']],
+                empresa=empresa,
+                fecha_fin=ahora + timedelta(days=planes[datos['plan_nombre']].duracion_dias),
+                # Igual que el registro individual: plan gratuito 'inactivo', de pago 'pendiente'
+                estado='inactivo' if planes[datos['plan_nombre']].precio == 0 else 'pendiente'
+            )
+            for (_, datos), empresa in zip(filas_ok, empresas)
+        ], batch_size=TAMANIO_LOTE)
+
+        usuarios_por_fila = [
+            [
+                User(
+                    email=usuario['email'],
+                    password=next(hashes),
+                    rol=roles[usuario['rol_nombre']],
+                    estado='activo'
+                )
+                for usuario in datos['usuarios']
+            ]
+            for _, datos in filas_ok
+        ]
+        User.objects.bulk_create(
+            [usuario for usuarios in usuarios_por_fila for usuario in usuarios],
+            batch_size=TAMANIO_LOTE
+        )
+        Usuario_Empresa.objects.bulk_create([
+            Usuario_Empresa(id_usuario=usuario, empresa=empresa, estado='activo')
+            for usuarios, empresa in zip(usuarios_por_fila, empresas)
+            for usuario in usuarios
+        ], batch_size=TAMANIO_LOTE)
+
+        # Empresas nuevas: la cuota se crea ya contada, sin pasar por reservar_cupo
+        CuotaEmpresa.objects.bulk_create([
+            CuotaEmpresa(
+                empresa=empresa,
+                usuarios_usados=len(usuarios),
+                plan=planes[datos['plan_nombre']],
+                limite_productos=planes[datos['plan_nombre']].limite_productos,
+                limite_usuarios=planes[datos['plan_nombre']].limite_usuarios,
+                limites_vigentes=True
+            )
+            for (_, datos), empresa, usuarios in zip(filas_ok, empresas, usuarios_por_fila)
+        ], batch_size=TAMANIO_LOTE)
+
+        return [
+            {'numero': numero, 'empresa': empresa, 'suscripcion': suscripcion, 'usuarios': usuarios}
+            for (numero, _), empresa, suscripcion, usuarios in zip(filas_ok, empresas, suscripciones, usuarios_por_fila)
+        ]
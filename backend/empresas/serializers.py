@@ -86,4 +86,30 @@ class RegistroEmpresaSerializer(serializers.Serializer):
         """Validar que el email de empresa no esté registrado"""
         if Empresa.objects.filter(email=value).exists():
             raise serializers.ValidationError("Este email de empresa ya está registrado")
-        return value
\ No newline at end of file
+        return value
+
+class UsuarioAltaMasivaSerializer(serializers.Serializer):
+    """Usuario inicial de una empresa en el alta masiva (sin consultas: se validan en bloque)"""
+    email = serializers.EmailField(required=True)
+    password = serializers.CharField(write_only=True, required=True, min_length=8)
+    rol_nombre = serializers.ChoiceField(choices=['admin_empresa', 'vendedor'], required=True)
+
+
+class EmpresaAltaMasivaSerializer(serializers.Serializer):
+    """
+    Fila del alta masiva: empresa, plan y usuarios iniciales.
+    La unicidad de NIT y emails se valida para todo el lote en empresas/alta_masiva.py
+    """
+    nombre = serializers.CharField(max_length=100, required=True)
+    nit = serializers.CharField(max_length=20, required=True)
+    rubro = serializers.CharField(max_length=20, required=True)
+    direccion = serializers.CharField(max_length=200, required=True)
+    telefono = serializers.CharField(max_length=15, required=True)
+    email = serializers.EmailField(required=True)
+    plan_nombre = serializers.CharField(max_length=100, required=False, default='Free')
+    usuarios = UsuarioAltaMasivaSerializer(many=True, required=False, default=list)
+
+    def validate_usuarios(self, value):
+        if sum(1 for usuario in value if usuario['rol_nombre'] == 'admin_empresa') > 1:
+            raise serializers.ValidationError("Solo se permite un usuario admin_empresa por empresa")
+        return value
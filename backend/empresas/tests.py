@@ -1,3 +1,127 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from admins.models import Admin
+from planes.models import Plan
+from roles.models import Rol
+from suscripciones.models import Suscripcion
+from usuarios.models import User
+from .models import Empresa
 
-# Create your tests here.
+
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    HASH_CONTRASENAS={'PROCESOS': 0}
+)
+class AltaMasivaEmpresasTest(TestCase):
+    """POST /api/empresas/registrar-masivo/: alta completa, cancelación, modo parcial y duplicados del lote"""
+
+    URL = '/api/empresas/registrar-masivo/'
+
+    @classmethod
+    def setUpTestData(cls):
+        for nombre in ('admin', 'admin_empresa', 'vendedor'):
+            Rol.objects.get_or_create(rol=nombre, defaults={'descripcion': nombre, 'estado': 'activo'})
+        Plan.objects.create(
+            nombre='Free', descripcion='Plan gratuito', precio=0, duracion_dias=30,
+            limite_productos=10, limite_usuarios=3
+        )
+        cls.admin = User.objects.create_user(
+            email='admin@empresas.test', password='x', rol=Rol.objects.get(rol='admin')
+        )
+        Admin.objects.create(id_usuario=cls.admin, nombre_admin='admin', telefono_admin='0000000000')
+
+    def setUp(self):
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(self.admin)
+
+    def _fila(self, numero, **cambios):
+        fila = {
+            'nombre': f'Empresa {numero}',
+            'nit': f'NIT-{numero}',
+            'rubro': 'comercio',
+            'direccion': 'Calle 1',
+            'telefono': '70000000',
+            'email': f'empresa{numero}@empresas.test',
+            'usuarios': [
+                {'email': f'admin{numero}@empresas.test', 'password': 'clave-segura', 'rol_nombre': 'admin_empresa'},
+                {'email': f'vendedor{numero}@empresas.test', 'password': 'clave-segura', 'rol_nombre': 'vendedor'},
+            ]
+        }
+        fila.update(cambios)
+        return fila
+
+    def _registrar(self, filas, parcial=False):
+        return self.cliente.post(self.URL, {'empresas': filas, 'parcial': parcial}, format='json')
+
+    def test_registra_empresas_suscripciones_y_usuarios(self):
+        respuesta = self._registrar([self._fila(1), self._fila(2)])
+
+        self.assertEqual(respuesta.status_code, 201, respuesta.content)
+        datos = respuesta.json()
+        self.assertEqual(datos['resumen'], {'total_filas': 2, 'registradas': 2, 'con_errores': 0})
+        self.assertEqual([empresa['nit'] for empresa in datos['empresas']], ['NIT-1', 'NIT-2'])
+        self.assertEqual(Empresa.objects.count(), 2)
+        # Plan gratuito: la suscripción queda 'inactivo' como en el registro individual
+        self.assertEqual(
+            list(Suscripcion.objects.values_list('empresa__nit', 'plan__nombre', 'estado').order_by('empresa__nit')),
+            [('NIT-1', 'Free', 'inactivo'), ('NIT-2', 'Free', 'inactivo')]
+        )
+        vendedor = User.objects.get(email='vendedor2@empresas.test')
+        self.assertEqual(vendedor.rol.rol, 'vendedor')
+        self.assertEqual(vendedor.usuario_empresa.empresa.nit, 'NIT-2')
+        self.assertTrue(vendedor.check_password('clave-segura'))
+
+    def test_solo_admin(self):
+        vendedor = User.objects.create_user(
+            email='otro@empresas.test', password='x', rol=Rol.objects.get(rol='vendedor')
+        )
+        self.cliente.force_authenticate(vendedor)
+
+        self.assertEqual(self._registrar([self._fila(1)]).status_code, 403)
+        self.assertFalse(Empresa.objects.exists())
+
+    def test_un_error_cancela_el_lote(self):
+        respuesta = self._registrar([self._fila(1), self._fila(2, plan_nombre='Inexistente')])
+
+        self.assertEqual(respuesta.status_code, 400)
+        datos = respuesta.json()
+        self.assertEqual(datos['resumen'], {'total_filas': 2, 'registradas': 0, 'con_errores': 1})
+        self.assertEqual(datos['errores'][0]['fila'], 2)
+        self.assertEqual(datos['errores'][0]['nit'], 'NIT-2')
+        self.assertIn('plan_nombre', datos['errores'][0]['errores'])
+        self.assertFalse(Empresa.objects.exists())
+        self.assertFalse(User.objects.filter(email__endswith='@empresas.test').exclude(pk=self.admin.pk).exists())
+
+    def test_parcial_registra_las_filas_validas(self):
+        respuesta = self._registrar([self._fila(1), self._fila(2, plan_nombre='Inexistente')], parcial=True)
+
+        self.assertEqual(respuesta.status_code, 201, respuesta.content)
+        datos = respuesta.json()
+        self.assertEqual(datos['resumen'], {'total_filas': 2, 'registradas': 1, 'con_errores': 1})
+        self.assertEqual([empresa['nit'] for empresa in datos['empresas']], ['NIT-1'])
+        self.assertEqual([error['fila'] for error in datos['errores']], [2])
+        self.assertEqual(list(Empresa.objects.values_list('nit', flat=True)), ['NIT-1'])
+
+    def test_duplicados_en_el_lote(self):
+        respuesta = self._registrar([
+            self._fila(1),
+            self._fila(2, nit='NIT-1'),
+            self._fila(3, email='empresa1@empresas.test'),
+            self._fila(4, usuarios=[
+                {'email': 'vendedor1@empresas.test', 'password': 'clave-segura', 'rol_nombre': 'vendedor'}
+            ]),
+        ], parcial=True)
+
+        self.assertEqual(respuesta.status_code, 201, respuesta.content)
+        errores = {error['fila']: error['errores'] for error in respuesta.json()['errores']}
+        self.assertEqual(errores[2], {'nit': 'Duplicado en el lote (fila 1)'})
+        self.assertEqual(errores[3], {'email': 'Duplicado en el lote (fila 1)'})
+        self.assertEqual(errores[4], {'usuarios': 'Email vendedor1@empresas.test duplicado en el lote (fila 1)'})
+        self.assertEqual(list(Empresa.objects.values_list('nit', flat=True)), ['NIT-1'])
+
+    def test_nit_ya_registrado(self):
+        self.assertEqual(self._registrar([self._fila(1)]).status_code, 201)
+
+        respuesta = self._registrar([self._fila(1, email='nueva@empresas.test', usuarios=[])])
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(respuesta.json()['errores'][0]['errores'], {'nit': 'Este NIT ya está registrado'})
@@ -1,6 +1,7 @@
 from django.urls import path
 from .views import (
     RegistroEmpresaView, 
+    RegistroEmpresasMasivoView,
     ListaEmpresasView, 
     DetalleEmpresaView,
     CambiarEstadoEmpresaView,
@@ -14,6 +15,7 @@ from .views import (
 
 urlpatterns = [
     path('registrar/', RegistroEmpresaView.as_view(), name='registrar-empresa'),
+    path('registrar-masivo/', RegistroEmpresasMasivoView.as_view(), name='registrar-empresas-masivo'),
     path('listar/', ListaEmpresasView.as_view(), name='lista-empresas'),
     path('<int:pk>/', DetalleEmpresaView.as_view(), name='detalle-empresa'),
     path('<int:pk>/cambiar-estado/', CambiarEstadoEmpresaView.as_view(), name='cambiar-estado-empresa'),
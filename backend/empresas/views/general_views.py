@@ -199,6 +199,79 @@ class RegistroEmpresaView(generics.CreateAPIView):
         
 
 
+class RegistroEmpresasMasivoView(RegistroEmpresaView):
+    """
+    Alta masiva de empresas con su plan y usuarios iniciales (solo admin)
+    POST /api/empresas/registrar-masivo/
+    {"empresas": [{"nombre", "nit", "rubro", "direccion", "telefono", "email",
+                   "plan_nombre", "usuarios": [{"email", "password", "rol_nombre"}]}],
+     "parcial": false}
+    parcial=true registra las filas válidas aunque otras tengan errores
+    """
+    serializer_class = None
+
+    def create(self, request, *args, **kwargs):
+        from backend.carga_masiva import ErrorCargaMasiva, opcion_activada
+        from empresas.alta_masiva import AltaMasivaEmpresas
+
+        datos = request.data if hasattr(request.data, 'get') else {}
+        filas = datos.get('empresas')
+        if not isinstance(filas, list):
+            return Response({
+                'status': 'error',
+                'message': 'Formato no válido',
+                'detail': 'Envíe una lista JSON en "empresas"'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        parcial = opcion_activada(datos.get('parcial', False))
+
+        try:
+            alta = AltaMasivaEmpresas(self._obtener_admin_sistema(request.user), filas, parcial=parcial)
+            resultados, errores = alta.registrar()
+        except ErrorCargaMasiva as e:
+            return Response({
+                'status': 'error',
+                'message': 'No se pudo registrar',
+                'detail': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        reporte_errores = AltaMasivaEmpresas.formatear_errores(errores, filas)
+        resumen = {
+            'total_filas': len(filas),
+            'registradas': len(resultados),
+            'con_errores': len(reporte_errores)
+        }
+
+        if not resultados:
+            return Response({
+                'status': 'error',
+                'message': 'El lote tiene errores, no se registró ninguna empresa',
+                'resumen': resumen,
+                'errores': reporte_errores
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'status': 'success',
+            'message': f'{len(resultados)} empresas registradas exitosamente',
+            'resumen': resumen,
+            'empresas': [
+                {
+                    'fila': resultado['numero'],
+                    'id_empresa': resultado['empresa'].id_empresa,
+                    'nombre': resultado['empresa'].nombre,
+                    'nit': resultado['empresa'].nit,
+                    'suscripcion': self._serializar_suscripcion(resultado['suscripcion']),
+                    'usuarios': [
+                        {'id': usuario.id_usuario, 'email': usuario.email, 'rol': usuario.rol.rol}
+                        for usuario in resultado['usuarios']
+                    ]
+                }
+                for resultado in resultados
+            ],
+            'errores': reporte_errores
+        }, status=status.HTTP_201_CREATED)
+
+
 class ListaEmpresasView(generics.ListAPIView):
     """
     Vista PÚBLICA para listar empresas
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class PlanesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'planes'
+
+    def ready(self):
+        # Importar señales (contadores de cuota)
+        import planes.signals
@@ -0,0 +1,143 @@
+# planes/limites.py
+"""
+Límites del plan (limite_productos, limite_usuarios) con contadores por empresa.
+
+CuotaEmpresa guarda los productos y usuarios activos de cada empresa y los límites
+del plan vigente. reservar_cupo bloquea esa fila (SELECT ... FOR UPDATE), verifica e
+incrementa en la misma transacción que crea los registros: la verificación no depende
+de cuántos registros tenga la empresa y dos creaciones simultáneas no superan el límite.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+RECURSOS = ('productos', 'usuarios')
+
+
+class LimitePlanExcedido(Exception):
+    """La operación supera un límite del plan vigente"""
+
+    def __init__(self, recurso, limite, usados, solicitados):
+        self.recurso = recurso
+        self.limite = limite
+        self.usados = usados
+        self.solicitados = solicitados
+        self.mensaje = (
+            f'Se alcanzó el límite de {recurso} del plan '
+            f'({usados} actuales + {solicitados} nuevos > {limite})'
+        )
+        super().__init__(self.mensaje)
+
+    def detalle(self):
+        return {
+            'recurso': self.recurso,
+            'limite': self.limite,
+            'usados': self.usados,
+            'solicitados': self.solicitados
+        }
+
+
+def obtener_plan_vigente(empresa):
+    """
+    Retorna el Plan de la suscripción vigente de la empresa,
+    o None si la empresa no tiene plan asignado
+    """
+    from suscripciones.models import Suscripcion
+
+    suscripcion = Suscripcion.objects.filter(
+        empresa=empresa,
+        estado='activo'
+    ).select_related('plan').order_by('-fecha_solicitud').first()
+
+    if not suscripcion:
+        # Plan gratuito recién registrado (estado 'inactivo') o solicitud pendiente
+        suscripcion = Suscripcion.objects.filter(
+            empresa=empresa
+        ).exclude(
+            estado__in=['rechazado', 'vencido']
+        ).select_related('plan').order_by('-fecha_solicitud').first()
+
+    return suscripcion.plan if suscripcion else None
+
+
+def contar_uso(empresa_id):
+    """Conteo real (usado al crear el registro de cuota y al recalcular)"""
+    from producto.models import Producto
+    from usuario_empresa.models import Usuario_Empresa
+
+    return {
+        'productos_usados': Producto.objects.filter(empresa_id=empresa_id).count(),
+        'usuarios_usados': Usuario_Empresa.objects.filter(empresa_id=empresa_id, estado='activo').count(),
+    }
+
+
+def _obtener_cuota_bloqueada(empresa_id):
+    from .models import CuotaEmpresa
+
+    cuota = CuotaEmpresa.objects.select_for_update().filter(empresa_id=empresa_id).first()
+    if cuota:
+        return cuota
+
+    # Primera operación de la empresa: se cuenta una sola vez
+    try:
+        with transaction.atomic():
+            CuotaEmpresa.objects.create(empresa_id=empresa_id, **contar_uso(empresa_id))
+    except IntegrityError:
+        # Otra transacción la creó primero
+        pass
+    return CuotaEmpresa.objects.select_for_update().get(empresa_id=empresa_id)
+
+
+def _refrescar_limites(cuota):
+    plan = obtener_plan_vigente(cuota.empresa_id)
+    cuota.plan = plan
+    cuota.limite_productos = plan.limite_productos if plan else None
+    cuota.limite_usuarios = plan.limite_usuarios if plan else None
+    cuota.limites_vigentes = True
+
+
+def reservar_cupo(empresa, recurso, cantidad=1):
+    """
+    Verifica e incrementa el uso de 'productos' o 'usuarios'. Lanza LimitePlanExcedido.
+    Debe llamarse dentro de transaction.atomic(), en la misma transacción que crea
+    los registros, para que el incremento se deshaga si la creación falla.
+    """
+    if recurso not in RECURSOS:
+        raise ValueError(f'Recurso no válido: {recurso}')
+
+    cuota = _obtener_cuota_bloqueada(getattr(empresa, 'pk', empresa))
+    campos = [f'{recurso}_usados']
+    if not cuota.limites_vigentes:
+        _refrescar_limites(cuota)
+        campos += ['plan', 'limite_productos', 'limite_usuarios', 'limites_vigentes']
+
+    usados = getattr(cuota, f'{recurso}_usados')
+    limite = getattr(cuota, f'limite_{recurso}')
+    if limite is not None and usados + cantidad > limite:
+        raise LimitePlanExcedido(recurso, limite, usados, cantidad)
+
+    setattr(cuota, f'{recurso}_usados', usados + cantidad)
+    cuota.save(update_fields=campos + ['fecha_actualizacion'])
+    return cuota
+
+
+def liberar_cupo(empresa_id, recurso, cantidad=1):
+    """Descuenta uso (eliminación o desactivación); nunca baja de 0"""
+    from .models import CuotaEmpresa
+
+    campo = f'{recurso}_usados'
+    CuotaEmpresa.objects.filter(empresa_id=empresa_id).update(
+        **{campo: Greatest(F(campo) - cantidad, 0)}
+    )
+
+
+def invalidar_limites(empresa_ids=None, plan=None):
+    """Marca los límites en caché para recalcular (cambio de suscripción o de plan)"""
+    from .models import CuotaEmpresa
+
+    cuotas = CuotaEmpresa.objects.filter(limites_vigentes=True)
+    if empresa_ids is not None:
+        cuotas = cuotas.filter(empresa_id__in=empresa_ids)
+    if plan is not None:
+        cuotas = cuotas.filter(plan=plan)
+    return cuotas.update(limites_vigentes=False)
@@ -0,0 +1,32 @@
+# planes/management/commands/recalcular_cuotas.py
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from empresas.models import Empresa
+from planes.models import CuotaEmpresa
+from planes.limites import contar_uso
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula los contadores de productos y usuarios de cada empresa a partir de las '
+        'tablas y marca los límites del plan para recalcular. Útil tras cargas manuales.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--empresa', type=int, help='Solo la empresa indicada (id_empresa)')
+
+    def handle(self, *args, **options):
+        empresas = Empresa.objects.order_by('id_empresa')
+        if options['empresa']:
+            empresas = empresas.filter(id_empresa=options['empresa'])
+
+        corregidas = 0
+        for id_empresa in empresas.values_list('id_empresa', flat=True).iterator():
+            with transaction.atomic():
+                cuota, _ = CuotaEmpresa.objects.select_for_update().get_or_create(empresa_id=id_empresa)
+                uso = contar_uso(id_empresa)
+                if uso['productos_usados'] != cuota.productos_usados or uso['usuarios_usados'] != cuota.usuarios_usados:
+                    corregidas += 1
+                CuotaEmpresa.objects.filter(empresa_id=id_empresa).update(limites_vigentes=False, **uso)
+
+        self.stdout.write(self.style.SUCCESS(f'Cuotas recalculadas ({corregidas} con diferencias)'))
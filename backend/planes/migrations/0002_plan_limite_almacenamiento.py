@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-19 16:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='plan',
+            name='limite_almacenamiento_mb',
+            field=models.IntegerField(default=1024),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.4 on 2026-10-19 16:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresas', '0001_initial'),
+        ('planes', '0002_plan_limite_almacenamiento'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CuotaEmpresa',
+            fields=[
+                ('empresa', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='cuota', serialize=False, to='empresas.empresa')),
+                ('productos_usados', models.PositiveIntegerField(default=0)),
+                ('usuarios_usados', models.PositiveIntegerField(default=0)),
+                ('limite_productos', models.IntegerField(blank=True, null=True)),
+                ('limite_usuarios', models.IntegerField(blank=True, null=True)),
+                ('limites_vigentes', models.BooleanField(default=False)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('plan', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='planes.plan')),
+            ],
+            options={
+                'db_table': 'cuota_empresa',
+            },
+        ),
+    ]
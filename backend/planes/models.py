@@ -8,8 +8,36 @@ class Plan(models.Model):
     duracion_dias = models.IntegerField()
     limite_productos = models.IntegerField()
     limite_usuarios = models.IntegerField()
+    limite_almacenamiento_mb = models.IntegerField(default=1024)
     descripcion = models.CharField(max_length=300)
     
     class Meta:
         db_table = "plan"
         ordering = ["id_plan"]
+
+
+class CuotaEmpresa(models.Model):
+    """
+    Contadores de uso por empresa y límites del plan vigente en caché.
+    Se actualiza dentro de la misma transacción que crea o elimina productos
+    y usuarios (planes/limites.py), así la verificación no cuenta filas.
+    """
+
+    empresa = models.OneToOneField(
+        'empresas.Empresa',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='cuota'
+    )
+    productos_usados = models.PositiveIntegerField(default=0)
+    usuarios_usados = models.PositiveIntegerField(default=0)
+    # Límites del plan vigente (None = sin plan, sin límite)
+    plan = models.ForeignKey(Plan, on_delete=models.SET_NULL, null=True, blank=True)
+    limite_productos = models.IntegerField(null=True, blank=True)
+    limite_usuarios = models.IntegerField(null=True, blank=True)
+    # False cuando cambia la suscripción o el plan: se recalculan en el próximo uso
+    limites_vigentes = models.BooleanField(default=False)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "cuota_empresa"
@@ -15,6 +15,7 @@ class PlanSerializer(serializers.ModelSerializer):
             'duracion_dias',
             'limite_productos',
             'limite_usuarios',
+            'limite_almacenamiento_mb',
             'descripcion'
         ]
         read_only_fields = ['id_plan']
@@ -35,6 +36,7 @@ class PlanResumenSerializer(serializers.ModelSerializer):
             'duracion_dias',
             'limite_productos',
             'limite_usuarios',
+            'limite_almacenamiento_mb',
             'descripcion'
         ]
     
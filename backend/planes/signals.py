@@ -0,0 +1,28 @@
+# planes/signals.py
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .limites import liberar_cupo, invalidar_limites
+from .models import Plan
+
+
+@receiver(post_delete, sender='producto.Producto')
+def liberar_cupo_producto(sender, instance, **kwargs):
+    """Incluye eliminaciones en cascada (p. ej. al eliminar la empresa)"""
+    liberar_cupo(instance.empresa_id, 'productos')
+
+
+@receiver(post_delete, sender='usuario_empresa.Usuario_Empresa')
+def liberar_cupo_usuario(sender, instance, **kwargs):
+    if instance.estado == 'activo':
+        liberar_cupo(instance.empresa_id, 'usuarios')
+
+
+@receiver(post_save, sender='suscripciones.Suscripcion')
+def invalidar_limites_suscripcion(sender, instance, **kwargs):
+    invalidar_limites([instance.empresa_id])
+
+
+@receiver(post_save, sender=Plan)
+def invalidar_limites_plan(sender, instance, created, **kwargs):
+    if not created:
+        invalidar_limites(plan=instance)
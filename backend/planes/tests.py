@@ -1,3 +1,88 @@
+from io import StringIO
+from django.core.management import call_command
+from django.db import transaction
 from django.test import TestCase
+from rest_framework.test import APIClient
+from backend.benchmarks.datos import generar_datos
+from usuario_empresa.models import Usuario_Empresa
+from .limites import LimitePlanExcedido, contar_uso, reservar_cupo
+from .models import CuotaEmpresa, Plan
 
-# Create your tests here.
+
+class CuotaEmpresaTest(TestCase):
+    """Contadores de uso del plan: rechazo al superar el límite, liberación y recálculo"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # 1 producto y 2 usuarios (admin_empresa y vendedor) en la empresa
+        cls.datos = generar_datos(empresas=1, productos=1, clientes=1, ventas=0)
+        Plan.objects.filter(nombre='Benchmark').update(limite_productos=2, limite_usuarios=2)
+        cls.empresa = cls.datos['empresa']
+        cls.vendedor = Usuario_Empresa.objects.get(id_usuario=cls.datos['vendedor'])
+
+    def _cuota(self):
+        return CuotaEmpresa.objects.get(empresa=self.empresa)
+
+    def _inicializar_cuota(self):
+        # La primera reserva crea la cuota con el conteo real (datos cargados con bulk_create)
+        with transaction.atomic():
+            reservar_cupo(self.empresa, 'usuarios', 0)
+
+    def test_rechaza_sobre_el_limite(self):
+        with transaction.atomic():
+            reservar_cupo(self.empresa, 'productos')
+
+        with self.assertRaises(LimitePlanExcedido) as contexto, transaction.atomic():
+            reservar_cupo(self.empresa, 'productos')
+        self.assertEqual(contexto.exception.detalle(), {
+            'recurso': 'productos', 'limite': 2, 'usados': 2, 'solicitados': 1
+        })
+        self.assertEqual(self._cuota().productos_usados, 2)
+
+    def _cliente(self):
+        cliente = APIClient()
+        cliente.force_authenticate(self.datos['admin_empresa'])
+        return cliente
+
+    def test_desactivar_y_reactivar_usuario(self):
+        url = f'/api/usuarios-empresa/{self.vendedor.pk}/'
+        self._inicializar_cuota()
+        self.assertEqual(self._cuota().usuarios_usados, 2)
+
+        respuesta = self._cliente().patch(url, {'estado': 'inactivo'}, format='json')
+        self.assertEqual(respuesta.status_code, 200, respuesta.content)
+        self.assertEqual(self._cuota().usuarios_usados, 1)
+
+        # Otro usuario ocupa el cupo liberado: la reactivación supera el límite
+        with transaction.atomic():
+            reservar_cupo(self.empresa, 'usuarios')
+        respuesta = self._cliente().patch(url, {'estado': 'activo'}, format='json')
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(self._cuota().usuarios_usados, 2)
+        self.vendedor.refresh_from_db()
+        self.assertEqual(self.vendedor.estado, 'inactivo')
+
+    def test_eliminar_usuario_libera_cupo(self):
+        self._inicializar_cuota()
+
+        respuesta = self._cliente().delete(f'/api/usuarios-empresa/{self.vendedor.pk}/')
+        self.assertLess(respuesta.status_code, 300, respuesta.content)
+        self.assertEqual(self._cuota().usuarios_usados, 1)
+
+        # Eliminar un registro ya inactivo no descuenta de nuevo
+        self._cliente().delete(f'/api/usuarios-empresa/{self.vendedor.pk}/')
+        self.assertEqual(self._cuota().usuarios_usados, 1)
+
+    def test_recalcular_cuotas_corrige_diferencias(self):
+        CuotaEmpresa.objects.create(empresa=self.empresa, productos_usados=40, usuarios_usados=0,
+                                    limites_vigentes=True)
+
+        salida = StringIO()
+        call_command('recalcular_cuotas', stdout=salida)
+
+        cuota = self._cuota()
+        uso = contar_uso(self.empresa.pk)
+        self.assertEqual((cuota.productos_usados, cuota.usuarios_usados),
+                         (uso['productos_usados'], uso['usuarios_usados']))
+        self.assertFalse(cuota.limites_vigentes)
+        self.assertIn('1 con diferencias', salida.getvalue())
@@ -0,0 +1,135 @@
+# producto/busqueda.py
+import difflib
+import unicodedata
+from django.db import connection
+from django.db.models import F, Q
+
+# Configuración de texto de PostgreSQL usada por el trigger y las consultas
+CONFIGURACION_TEXTO = 'spanish'
+
+# Umbral mínimo de relevancia para el fallback en Python
+UMBRAL_FALLBACK = 0.3
+
+# Similitud mínima entre palabras para considerar un error de tipeo
+SIMILITUD_MINIMA = 0.75
+
+# Pesos del fallback: equivalentes a setweight A/B/C del trigger
+PESO_NOMBRE = 1.0
+PESO_CATEGORIA = 0.5
+PESO_DESCRIPCION = 0.3
+
+
+def usa_postgres():
+    """Indica si la conexión actual soporta tsvector y pg_trgm"""
+    return connection.vendor == 'postgresql'
+
+
+def normalizar_texto(texto):
+    """Minúsculas y sin tildes, para comparar en el fallback"""
+    texto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+
+
+def _tokens(texto):
+    return [t for t in ''.join(c if c.isalnum() else ' ' for c in normalizar_texto(texto)).split() if t]
+
+
+def filtrar_productos(queryset, texto):
+    """
+    Filtra (sin ordenar) los productos que coinciden con el texto.
+    En PostgreSQL usa el índice GIN del tsvector y el índice trigram de nombre;
+    el ILIKE también se resuelve con el índice trigram. El fallback aplica el mismo
+    criterio que buscar_productos (prefijos de palabras y errores de tipeo).
+    """
+    texto = (texto or '').strip()
+    if not texto:
+        return queryset
+
+    if usa_postgres():
+        from django.contrib.postgres.search import SearchQuery
+
+        consulta = SearchQuery(texto, config=CONFIGURACION_TEXTO, search_type='websearch')
+        return queryset.filter(
+            Q(busqueda=consulta) |
+            Q(nombre__trigram_similar=texto) |
+            Q(nombre__icontains=texto)
+        )
+
+    # Fallback: mismos tokens y umbral que la búsqueda por relevancia
+    return queryset.filter(pk__in=list(_puntajes_python(queryset, _tokens(texto))))
+
+
+def buscar_productos(queryset, texto, limite=20):
+    """
+    Búsqueda ordenada por relevancia.
+    Retorna una lista de tuplas (producto, relevancia) con máximo `limite` elementos.
+    """
+    texto = (texto or '').strip()
+    if not texto:
+        return []
+
+    if usa_postgres():
+        return _buscar_postgres(queryset, texto, limite)
+    return _buscar_python(queryset, texto, limite)
+
+
+def _buscar_postgres(queryset, texto, limite):
+    from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+
+    consulta = SearchQuery(texto, config=CONFIGURACION_TEXTO, search_type='websearch')
+    productos = queryset.annotate(
+        relevancia=SearchRank(F('busqueda'), consulta) + TrigramSimilarity('nombre', texto)
+    ).filter(
+        Q(busqueda=consulta) | Q(nombre__trigram_similar=texto)
+    ).order_by('-relevancia', 'nombre')[:limite]
+
+    return [(producto, round(float(producto.relevancia), 4)) for producto in productos]
+
+
+def _puntaje(tokens_consulta, nombre, categoria, descripcion):
+    """Relevancia entre 0 y 1 de un producto para el fallback"""
+    tokens_nombre = _tokens(nombre)
+    tokens_categoria = _tokens(categoria)
+    tokens_descripcion = set(_tokens(descripcion))
+
+    acumulado = 0.0
+    for token in tokens_consulta:
+        if any(t.startswith(token) for t in tokens_nombre):
+            acumulado += PESO_NOMBRE
+        elif any(t.startswith(token) for t in tokens_categoria):
+            acumulado += PESO_CATEGORIA
+        elif any(t.startswith(token) for t in tokens_descripcion):
+            acumulado += PESO_DESCRIPCION
+    por_palabras = acumulado / len(tokens_consulta)
+
+    # Tolerancia a errores de tipeo sobre las palabras del nombre (similar a pg_trgm)
+    similitud = max(
+        (difflib.SequenceMatcher(None, token, t).ratio() for token in tokens_consulta for t in tokens_nombre),
+        default=0.0
+    )
+    if similitud < SIMILITUD_MINIMA:
+        similitud = 0.0
+
+    return max(por_palabras, similitud * 0.9)
+
+
+def _puntajes_python(queryset, tokens_consulta):
+    """{pk: (relevancia, nombre)} de los productos que superan UMBRAL_FALLBACK"""
+    if not tokens_consulta:
+        return {}
+
+    candidatos = queryset.values_list('pk', 'nombre', 'categoria__nombre', 'descripcion')
+    puntajes = {}
+    for pk, nombre, categoria, descripcion in candidatos.iterator():
+        puntaje = _puntaje(tokens_consulta, nombre, categoria, descripcion)
+        if puntaje >= UMBRAL_FALLBACK:
+            puntajes[pk] = (puntaje, nombre)
+    return puntajes
+
+
+def _buscar_python(queryset, texto, limite):
+    """Fallback para bases sin PostgreSQL (por ejemplo SQLite en pruebas)"""
+    puntajes = _puntajes_python(queryset, _tokens(texto))
+    mejores = sorted(puntajes.items(), key=lambda item: (-item[1][0], item[1][1]))[:limite]
+    productos = queryset.in_bulk([pk for pk, _ in mejores])
+    return [(productos[pk], round(puntaje, 4)) for pk, (puntaje, _) in mejores if pk in productos]
@@ -0,0 +1,213 @@
+# producto/importacion.py
+import csv
+import io
+import logging
+from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from backend.carga_masiva import CargaMasiva, ErrorCargaMasiva
+from planes.limites import reservar_cupo, LimitePlanExcedido
+from .models import Producto
+from . import kardex
+
+logger = logging.getLogger(__name__)
+
+TAMANIO_LOTE = 1000
+
+ESTADOS_VALIDOS = {estado for estado, _ in Producto.ESTADOS}
+PRECIO_MAXIMO = Decimal('99999999.99')  # max_digits=10, decimal_places=2
+NOMBRE_MAX = Producto._meta.get_field('nombre').max_length
+
+
+def leer_filas_csv(archivo):
+    """Lee un archivo CSV subido y retorna una lista de diccionarios"""
+    texto = io.TextIOWrapper(archivo.file, encoding='utf-8-sig', newline='')
+    try:
+        lector = csv.DictReader(texto)
+        if not lector.fieldnames or 'nombre' not in [c.strip() for c in lector.fieldnames]:
+            raise ErrorCargaMasiva('El CSV debe tener una fila de encabezados con al menos la columna "nombre"')
+        return [
+            {(clave or '').strip(): (valor.strip() if isinstance(valor, str) else valor)
+             for clave, valor in fila.items()}
+            for fila in lector
+        ]
+    except UnicodeDecodeError:
+        raise ErrorCargaMasiva('El archivo debe estar codificado en UTF-8')
+    finally:
+        texto.detach()
+
+
+class ImportadorProductos(CargaMasiva):
+    """
+    Importación masiva de productos en tres etapas:
+    1. Validación en memoria de todas las filas
+    2. Resolución de categorías y proveedores (una consulta cada una)
+    3. Carga con bulk_create dentro de una transacción
+    """
+
+    CAMPO_REFERENCIA = 'nombre'
+
+    def __init__(self, empresa, filas, crear_categorias=False, parcial=False, usuario=None):
+        super().__init__(filas, parcial)
+        self.empresa = empresa
+        self.usuario = usuario
+        self.crear_categorias = crear_categorias
+
+    # ---------- Etapa 1: validación en memoria ----------
+    def _validar_filas(self):
+        nombres_vistos = {}
+
+        for numero, fila in enumerate(self.filas, start=1):
+            if not isinstance(fila, dict):
+                self._agregar_error(numero, 'fila', 'Cada fila debe ser un objeto')
+                continue
+
+            datos = {}
+
+            nombre = str(fila.get('nombre') or '').strip()
+            if not nombre:
+                self._agregar_error(numero, 'nombre', 'El nombre es obligatorio')
+            elif len(nombre) > NOMBRE_MAX:
+                self._agregar_error(numero, 'nombre', f'Máximo {NOMBRE_MAX} caracteres')
+            elif nombre in nombres_vistos:
+                self._agregar_error(numero, 'nombre', f'Nombre duplicado en el archivo (fila {nombres_vistos[nombre]})')
+            else:
+                nombres_vistos[nombre] = numero
+            datos['nombre'] = nombre
+
+            try:
+                precio = Decimal(str(fila.get('precio', '')).replace(',', '.'))
+                if not precio.is_finite() or precio <= 0:
+                    self._agregar_error(numero, 'precio', 'El precio debe ser mayor a 0')
+                elif precio > PRECIO_MAXIMO:
+                    self._agregar_error(numero, 'precio', f'El precio no puede superar {PRECIO_MAXIMO}')
+                datos['precio'] = precio.quantize(Decimal('0.01')) if precio.is_finite() else precio
+            except (InvalidOperation, ValueError):
+                self._agregar_error(numero, 'precio', 'Precio no válido')
+
+            for campo, por_defecto in (('stock_actual', 0), ('stock_minimo', 5)):
+                valor = fila.get(campo)
+                if valor in (None, ''):
+                    datos[campo] = por_defecto
+                    continue
+                try:
+                    entero = int(str(valor))
+                    if entero < 0:
+                        self._agregar_error(numero, campo, 'No puede ser negativo')
+                    datos[campo] = entero
+                except ValueError:
+                    self._agregar_error(numero, campo, 'Debe ser un número entero')
+
+            estado = str(fila.get('estado') or 'activo').strip().lower()
+            if estado not in ESTADOS_VALIDOS:
+                self._agregar_error(numero, 'estado', f'Estado no válido. Opciones: {", ".join(sorted(ESTADOS_VALIDOS))}')
+            datos['estado'] = estado
+
+            datos['descripcion'] = str(fila.get('descripcion') or '').strip() or None
+            datos['categoria'] = str(fila.get('categoria') or '').strip() or None
+            datos['proveedor'] = str(fila.get('proveedor') or '').strip() or None
+
+            self.validas.append((numero, datos))
+
+    # ---------- Etapa 2: resolución contra la base de datos ----------
+    def _resolver_referencias(self):
+        from categoria.models import Categoria
+        from proveedor.models import Proveedor
+
+        nombres = {datos['nombre'] for _, datos in self.validas if datos['nombre']}
+        existentes = set(
+            Producto.objects.filter(
+                empresa=self.empresa,
+                nombre__in=nombres
+            ).values_list('nombre', flat=True)
+        )
+
+        nombres_categorias = {datos['categoria'] for _, datos in self.validas if datos['categoria']}
+        categorias = {
+            categoria.nombre: categoria
+            for categoria in Categoria.objects.filter(
+                empresa=self.empresa,
+                nombre__in=nombres_categorias
+            )
+        }
+
+        faltantes = nombres_categorias - set(categorias)
+        if faltantes and self.crear_categorias:
+            Categoria.objects.bulk_create([
+                Categoria(nombre=nombre, empresa=self.empresa) for nombre in sorted(faltantes)
+            ], ignore_conflicts=True)
+            categorias = {
+                categoria.nombre: categoria
+                for categoria in Categoria.objects.filter(
+                    empresa=self.empresa,
+                    nombre__in=nombres_categorias
+                )
+            }
+
+        nombres_proveedores = {datos['proveedor'] for _, datos in self.validas if datos['proveedor']}
+        proveedores = {}
+        # Si hay proveedores con el mismo nombre se usa el más antiguo
+        for proveedor in Proveedor.objects.filter(
+            empresa=self.empresa,
+            nombre__in=nombres_proveedores
+        ).order_by('-id_proveedor'):
+            proveedores[proveedor.nombre] = proveedor
+
+        for numero, datos in self.validas:
+            if datos['nombre'] in existentes:
+                self._agregar_error(numero, 'nombre', 'Ya existe un producto con este nombre en su empresa')
+            if datos['categoria'] and datos['categoria'] not in categorias:
+                self._agregar_error(numero, 'categoria', f'Categoría "{datos["categoria"]}" no encontrada')
+            if datos['proveedor'] and datos['proveedor'] not in proveedores:
+                self._agregar_error(numero, 'proveedor', f'Proveedor "{datos["proveedor"]}" no encontrado')
+
+        return categorias, proveedores
+
+    # ---------- Etapa 3: carga ----------
+    def importar(self):
+        """
+        Ejecuta las tres etapas y retorna (productos_creados, errores).
+        Sin modo parcial, cualquier error en una fila cancela la importación.
+        """
+        if not self.filas:
+            raise ErrorCargaMasiva('No se recibieron filas para importar')
+
+        self._validar_filas()
+
+        with transaction.atomic():
+            categorias, proveedores = self._resolver_referencias()
+
+            filas_ok = [(numero, datos) for numero, datos in self.validas if numero not in self.errores]
+            if self.errores and not self.parcial:
+                transaction.set_rollback(True)
+                return [], self.errores
+
+            try:
+                reservar_cupo(self.empresa, 'productos', len(filas_ok))
+            except LimitePlanExcedido as e:
+                raise ErrorCargaMasiva(
+                    f'La importación supera el límite de productos del plan '
+                    f'({e.usados} actuales + {e.solicitados} nuevos > {e.limite})'
+                )
+
+            productos = [
+                Producto(
+                    nombre=datos['nombre'],
+                    descripcion=datos['descripcion'],
+                    precio=datos['precio'],
+                    stock_actual=datos['stock_actual'],
+                    stock_minimo=datos['stock_minimo'],
+                    estado=datos['estado'],
+                    categoria=categorias.get(datos['categoria']),
+                    proveedor=proveedores.get(datos['proveedor']),
+                    empresa=self.empresa
+                )
+                for _, datos in filas_ok
+            ]
+            creados = Producto.objects.bulk_create(productos, batch_size=TAMANIO_LOTE)
+            kardex.registrar([
+                kardex.movimiento(producto, 'importacion', producto.stock_actual, usuario=self.usuario)
+                for producto in creados
+            ])
+
+        logger.info(f"Importación masiva: {len(creados)} productos creados en empresa {self.empresa.nombre}")
+        return creados, self.errores
@@ -0,0 +1,142 @@
+# producto/kardex.py
+"""
+Kardex de inventario: movimientos de stock_actual y saldos periódicos.
+
+Cada cambio de stock registra sus movimientos con bulk_create en la misma transacción
+(si el cambio se deshace, el movimiento también). Los saldos (comando saldos_inventario)
+guardan el stock de cada producto al cierre de un corte, así el stock a una fecha se
+obtiene con el último saldo anterior más los movimientos posteriores, sin recorrer todo
+el historial.
+"""
+import logging
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.db import transaction
+from django.db.models import IntegerField, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from backend.configuracion import leer
+from .models import MovimientoInventario, SaldoInventario
+
+logger = logging.getLogger(__name__)
+
+CONFIGURACION_POR_DEFECTO = {
+    # Los movimientos más recientes que esto quedan fuera del saldo: una transacción
+    # que aún no confirmó no puede quedar antes de un corte ya calculado
+    'MARGEN_MINUTOS': 5,
+    'LOTE': 1000,
+}
+
+INICIO = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def obtener_configuracion():
+    return leer('KARDEX_INVENTARIO', CONFIGURACION_POR_DEFECTO)
+
+
+def movimiento(producto, tipo, cantidad, usuario=None, referencia=''):
+    """Movimiento sin guardar; se registran en bloque con registrar()"""
+    return MovimientoInventario(
+        producto_id=producto.pk,
+        empresa_id=producto.empresa_id,
+        tipo=tipo,
+        cantidad=cantidad,
+        usuario=usuario if usuario is not None and usuario.is_authenticated else None,
+        referencia=referencia
+    )
+
+
+def registrar(movimientos):
+    """Guarda los movimientos (los de cantidad 0 se omiten)"""
+    movimientos = [mov for mov in movimientos if mov.cantidad]
+    if not movimientos:
+        return []
+    return MovimientoInventario.objects.bulk_create(movimientos, batch_size=obtener_configuracion()['LOTE'])
+
+
+def anotar_stock_en_fecha(productos, fecha):
+    """
+    Anota `stock_en_fecha` (stock_actual al instante `fecha`) en un queryset de productos:
+    último saldo con fecha <= `fecha` más la suma de movimientos entre ese saldo y `fecha`.
+    """
+    saldo = SaldoInventario.objects.filter(
+        producto=OuterRef('pk'),
+        fecha__lte=fecha
+    ).order_by('-fecha')
+
+    movimientos = MovimientoInventario.objects.filter(
+        producto=OuterRef('pk'),
+        fecha__gt=Coalesce(OuterRef('saldo_fecha'), Value(INICIO)),
+        fecha__lte=fecha
+    ).order_by().values('producto').annotate(total=Sum('cantidad')).values('total')
+
+    return productos.annotate(
+        saldo_fecha=Subquery(saldo.values('fecha')[:1]),
+        saldo_stock=Subquery(saldo.values('stock')[:1], output_field=IntegerField()),
+    ).annotate(
+        stock_en_fecha=Coalesce('saldo_stock', Value(0)) + Coalesce(Subquery(movimientos, output_field=IntegerField()), Value(0))
+    )
+
+
+def stock_en_fecha(producto, fecha):
+    """Stock de un producto al instante `fecha`"""
+    from .models import Producto
+
+    return anotar_stock_en_fecha(
+        Producto.objects.filter(pk=producto.pk), fecha
+    ).values_list('stock_en_fecha', flat=True).get()
+
+
+def generar_saldos(corte=None):
+    """
+    Calcula el saldo al `corte` de los productos con movimientos desde el corte anterior.
+    Los productos sin movimientos conservan su último saldo (sigue siendo válido).
+    Retorna (corte, saldos_creados).
+    """
+    configuracion = obtener_configuracion()
+    corte = corte or timezone.now() - timedelta(minutes=configuracion['MARGEN_MINUTOS'])
+
+    with transaction.atomic():
+        anterior = SaldoInventario.objects.aggregate(ultimo=Max('fecha'))['ultimo']
+        if anterior and anterior >= corte:
+            return anterior, 0
+
+        movidos = MovimientoInventario.objects.filter(fecha__lte=corte)
+        if anterior:
+            movidos = movidos.filter(fecha__gt=anterior)
+        deltas = dict(
+            movidos.order_by().values('producto').annotate(total=Sum('cantidad')).values_list('producto', 'total')
+        )
+        if not deltas:
+            return corte, 0
+
+        # Último saldo de cada producto movido (a lo sumo el del corte anterior)
+        previos = {}
+        if anterior:
+            ultimo = SaldoInventario.objects.filter(producto=OuterRef('producto')).order_by('-fecha')
+            previos = dict(
+                SaldoInventario.objects.filter(
+                    producto_id__in=list(deltas),
+                    pk=Subquery(ultimo.values('pk')[:1])
+                ).values_list('producto_id', 'stock')
+            )
+
+        creados = SaldoInventario.objects.bulk_create([
+            SaldoInventario(producto_id=producto_id, fecha=corte, stock=previos.get(producto_id, 0) + total)
+            for producto_id, total in deltas.items()
+        ], batch_size=configuracion['LOTE'])
+
+    logger.info(f"Saldos de inventario al {corte.isoformat()}: {len(creados)} productos")
+    return corte, len(creados)
+
+
+def kardex(producto, desde=None, hasta=None):
+    """(saldo_inicial, movimientos) de un producto en el rango [desde, hasta]"""
+    movimientos = MovimientoInventario.objects.filter(producto=producto).select_related('usuario')
+    saldo_inicial = 0
+    if desde:
+        # Saldo justo antes de `desde`
+        saldo_inicial = stock_en_fecha(producto, desde - timedelta(microseconds=1))
+        movimientos = movimientos.filter(fecha__gte=desde)
+    if hasta:
+        movimientos = movimientos.filter(fecha__lte=hasta)
+    return saldo_inicial, movimientos.order_by('fecha', 'id_movimiento')
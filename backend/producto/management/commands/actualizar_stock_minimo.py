@@ -0,0 +1,31 @@
+# producto/management/commands/actualizar_stock_minimo.py
+from django.core.management.base import BaseCommand
+from empresas.models import Empresa
+from producto.pronostico import actualizar_stock_minimo
+
+
+class Command(BaseCommand):
+    help = (
+        'Reemplaza stock_minimo por el punto de reorden calculado con el historial de ventas '
+        '(PRONOSTICO_DEMANDA). Solo cambia productos con historial suficiente. Opcional, '
+        'para programar p. ej. cada noche.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--empresa', type=int, help='Solo la empresa indicada (id_empresa)')
+        parser.add_argument('--simular', action='store_true', help='Informa los cambios sin guardarlos')
+
+    def handle(self, *args, **options):
+        empresas = Empresa.objects.filter(estado='activo').order_by('id_empresa')
+        if options['empresa']:
+            empresas = Empresa.objects.filter(id_empresa=options['empresa'])
+
+        total = 0
+        for empresa in empresas.iterator():
+            cambios = actualizar_stock_minimo(empresa, simular=options['simular'])
+            if cambios:
+                self.stdout.write(f'{empresa.nombre}: {cambios} productos')
+            total += cambios
+
+        accion = 'a actualizar (simulación)' if options['simular'] else 'actualizados'
+        self.stdout.write(self.style.SUCCESS(f'stock_minimo: {total} productos {accion}'))
@@ -0,0 +1,33 @@
+# producto/management/commands/saldos_inventario.py
+from django.core.management.base import BaseCommand
+from django.db.models import F
+from django.utils import timezone
+from producto.kardex import anotar_stock_en_fecha, generar_saldos
+from producto.models import Producto
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera los saldos del kardex de inventario al corte actual (menos MARGEN_MINUTOS) '
+        'para los productos con movimientos desde el corte anterior. Programar periódicamente '
+        '(p. ej. cada noche) para que las consultas históricas no recorran todo el historial.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verificar', action='store_true',
+                            help='Compara el stock reconstruido desde el kardex con stock_actual')
+
+    def handle(self, *args, **options):
+        corte, creados = generar_saldos()
+        self.stdout.write(self.style.SUCCESS(f'Saldos al {corte.isoformat()}: {creados} productos'))
+
+        if options['verificar']:
+            diferencias = anotar_stock_en_fecha(Producto.objects.all(), timezone.now()).exclude(
+                stock_en_fecha=F('stock_actual')
+            ).values_list('id_producto', 'stock_actual', 'stock_en_fecha')
+            diferencias = list(diferencias)
+            for id_producto, actual, kardex in diferencias:
+                self.stdout.write(self.style.WARNING(
+                    f'Producto {id_producto}: stock_actual={actual}, kardex={kardex}'
+                ))
+            self.stdout.write(f'{len(diferencias)} productos con diferencias')
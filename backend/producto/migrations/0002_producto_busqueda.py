@@ -0,0 +1,89 @@
+# Generated by Django 5.1.4 on 2026-10-19 16:25
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# Solo PostgreSQL: en SQLite (pruebas) la búsqueda usa el fallback de producto/busqueda.py
+SQL_CREAR = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    CREATE OR REPLACE FUNCTION producto_busqueda_actualizar() RETURNS trigger AS $$
+    BEGIN
+        NEW.busqueda :=
+            setweight(to_tsvector('spanish', coalesce(NEW.nombre, '')), 'A') ||
+            setweight(to_tsvector('spanish', coalesce(
+                (SELECT nombre FROM categoria WHERE id_categoria = NEW.categoria_id), ''
+            )), 'B') ||
+            setweight(to_tsvector('spanish', coalesce(NEW.descripcion, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER producto_busqueda_trigger
+    BEFORE INSERT OR UPDATE OF nombre, descripcion, categoria_id ON producto
+    FOR EACH ROW EXECUTE FUNCTION producto_busqueda_actualizar()
+    """,
+    # Al renombrar una categoría se recalcula el vector de sus productos
+    """
+    CREATE OR REPLACE FUNCTION categoria_busqueda_propagar() RETURNS trigger AS $$
+    BEGIN
+        IF NEW.nombre IS DISTINCT FROM OLD.nombre THEN
+            UPDATE producto SET categoria_id = categoria_id
+            WHERE categoria_id = NEW.id_categoria;
+        END IF;
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER categoria_busqueda_trigger
+    AFTER UPDATE OF nombre ON categoria
+    FOR EACH ROW EXECUTE FUNCTION categoria_busqueda_propagar()
+    """,
+    "CREATE INDEX IF NOT EXISTS producto_busqueda_gin ON producto USING gin (busqueda)",
+    "CREATE INDEX IF NOT EXISTS producto_nombre_trgm ON producto USING gin (nombre gin_trgm_ops)",
+    # Poblar el vector de los productos existentes (dispara el trigger)
+    "UPDATE producto SET nombre = nombre",
+]
+
+SQL_ELIMINAR = [
+    "DROP INDEX IF EXISTS producto_nombre_trgm",
+    "DROP INDEX IF EXISTS producto_busqueda_gin",
+    "DROP TRIGGER IF EXISTS categoria_busqueda_trigger ON categoria",
+    "DROP FUNCTION IF EXISTS categoria_busqueda_propagar()",
+    "DROP TRIGGER IF EXISTS producto_busqueda_trigger ON producto",
+    "DROP FUNCTION IF EXISTS producto_busqueda_actualizar()",
+]
+
+
+def crear_busqueda(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for sql in SQL_CREAR:
+        schema_editor.execute(sql)
+
+
+def eliminar_busqueda(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for sql in SQL_ELIMINAR:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categoria', '0001_initial'),
+        ('producto', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='producto',
+            name='busqueda',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(crear_busqueda, eliminar_busqueda),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.4 on 2026-10-19 16:57
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Least
+
+
+def calcular_reservado(apps, schema_editor):
+    """Las reservas pendientes existentes no habían descontado stock: se apartan ahora"""
+    Producto = apps.get_model('producto', 'Producto')
+    Reserva = apps.get_model('reservas', 'Reserva')
+
+    pendiente = Reserva.objects.filter(
+        id_producto=OuterRef('pk'),
+        estado='pendiente'
+    ).order_by().values('id_producto').annotate(total=Sum('cantidad')).values('total')
+    Producto.objects.filter(
+        id_producto__in=Reserva.objects.filter(estado='pendiente').values('id_producto')
+    ).update(
+        stock_reservado=Least(Coalesce(Subquery(pendiente), Value(0)), 'stock_actual')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('producto', '0002_producto_busqueda'),
+        ('reservas', '0003_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='producto',
+            name='stock_reservado',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(calcular_reservado, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.1.4 on 2026-10-19 17:01
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def registrar_stock_inicial(apps, schema_editor):
+    """El historial empieza aquí: un movimiento 'inicial' con el stock vigente de cada producto"""
+    Producto = apps.get_model('producto', 'Producto')
+    MovimientoInventario = apps.get_model('producto', 'MovimientoInventario')
+
+    ahora = django.utils.timezone.now()
+    lote = []
+    for id_producto, empresa_id, stock in Producto.objects.filter(stock_actual__gt=0).values_list(
+        'id_producto', 'empresa_id', 'stock_actual'
+    ).iterator(chunk_size=1000):
+        lote.append(MovimientoInventario(
+            producto_id=id_producto, empresa_id=empresa_id, tipo='inicial',
+            cantidad=stock, fecha=ahora, referencia='migracion'
+        ))
+        if len(lote) >= 1000:
+            MovimientoInventario.objects.bulk_create(lote)
+            lote = []
+    MovimientoInventario.objects.bulk_create(lote)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresas', '0001_initial'),
+        ('producto', '0003_producto_stock_reservado'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovimientoInventario',
+            fields=[
+                ('id_movimiento', models.BigAutoField(primary_key=True, serialize=False)),
+                ('tipo', models.CharField(choices=[('inicial', 'Stock inicial'), ('venta', 'Venta'), ('compra', 'Compra'), ('ajuste', 'Ajuste manual'), ('ajuste_masivo', 'Ajuste masivo'), ('importacion', 'Importación')], max_length=20)),
+                ('cantidad', models.IntegerField()),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now)),
+                ('referencia', models.CharField(blank=True, default='', max_length=50)),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movimientos_inventario', to='empresas.empresa')),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movimientos', to='producto.producto')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'movimiento_inventario',
+                'ordering': ['fecha', 'id_movimiento'],
+                'indexes': [models.Index(fields=['producto', 'fecha'], name='movimiento_producto_fecha_idx'), models.Index(fields=['empresa', 'fecha'], name='movimiento_empresa_fecha_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SaldoInventario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateTimeField()),
+                ('stock', models.IntegerField()),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saldos', to='producto.producto')),
+            ],
+            options={
+                'db_table': 'saldo_inventario',
+                'constraints': [models.UniqueConstraint(fields=('producto', 'fecha'), name='saldo_inventario_producto_fecha_unico')],
+            },
+        ),
+        migrations.RunPython(registrar_stock_inicial, migrations.RunPython.noop),
+    ]
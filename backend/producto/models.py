@@ -1,5 +1,7 @@
 from django.db import models
 from django.core.validators import MinValueValidator
+from django.utils import timezone
+from django.contrib.postgres.search import SearchVectorField
 from empresas.models import Empresa
 from categoria.models import Categoria
 from proveedor.models import Proveedor
@@ -23,9 +25,13 @@ class Producto(models.Model):
     )
     stock_actual = models.IntegerField(default=0, validators=[MinValueValidator(0)])
     stock_minimo = models.IntegerField(default=5, validators=[MinValueValidator(0)])
+    # Unidades apartadas por reservas pendientes (producto/stock.py); disponible = actual - reservado
+    stock_reservado = models.PositiveIntegerField(default=0, editable=False)
     estado = models.CharField(max_length=20, choices=ESTADOS, default='activo')
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     fecha_modificacion = models.DateTimeField(auto_now=True)
+    # Mantenido por trigger en PostgreSQL (nombre, descripcion y nombre de categoría)
+    busqueda = SearchVectorField(null=True, blank=True, editable=False)
     
     # Relaciones
     categoria = models.ForeignKey(
@@ -71,4 +77,75 @@ class Producto(models.Model):
     @property
     def agotado(self):
         """Indica si el producto está agotado"""
-        return self.stock_actual <= 0
\ No newline at end of file
+        return self.stock_actual <= 0
+
+    @property
+    def stock_disponible(self):
+        """Stock que se puede vender o reservar (descontadas las reservas pendientes)"""
+        return self.stock_actual - self.stock_reservado
+
+
+# Misma cuenta que Producto.stock_disponible, para filtrar y anotar en consultas
+STOCK_DISPONIBLE = models.F('stock_actual') - models.F('stock_reservado')
+
+class MovimientoInventario(models.Model):
+    """
+    Kardex: una fila por cada cambio de stock_actual (solo se agregan, nunca se modifican).
+    Se escribe en la misma transacción que el cambio de stock (producto/kardex.py).
+    """
+    TIPOS = [
+        ('inicial', 'Stock inicial'),
+        ('venta', 'Venta'),
+        ('compra', 'Compra'),
+        ('ajuste', 'Ajuste manual'),
+        ('ajuste_masivo', 'Ajuste masivo'),
+        ('importacion', 'Importación'),
+    ]
+
+    id_movimiento = models.BigAutoField(primary_key=True)
+    producto = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name='movimientos')
+    # Desnormalizada para reportes por empresa sin join
+    empresa = models.ForeignKey(Empresa, on_delete=models.CASCADE, related_name='movimientos_inventario')
+    tipo = models.CharField(max_length=20, choices=TIPOS)
+    # Con signo: positivo entra, negativo sale
+    cantidad = models.IntegerField()
+    fecha = models.DateTimeField(default=timezone.now)
+    usuario = models.ForeignKey(
+        'usuarios.User',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    # Documento de origen, p. ej. 'venta:15' o 'compra:8'
+    referencia = models.CharField(max_length=50, blank=True, default='')
+
+    class Meta:
+        db_table = "movimiento_inventario"
+        ordering = ['fecha', 'id_movimiento']
+        indexes = [
+            # Kardex de un producto y stock a una fecha (saldo + movimientos posteriores)
+            models.Index(fields=['producto', 'fecha'], name='movimiento_producto_fecha_idx'),
+            models.Index(fields=['empresa', 'fecha'], name='movimiento_empresa_fecha_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Los movimientos de inventario no se modifican')
+        super().save(*args, **kwargs)
+
+
+class SaldoInventario(models.Model):
+    """
+    Stock de un producto al cierre de `fecha` (comando saldos_inventario). Acota la
+    reconstrucción: stock a una fecha = último saldo anterior + movimientos posteriores.
+    """
+    producto = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name='saldos')
+    fecha = models.DateTimeField()
+    stock = models.IntegerField()
+
+    class Meta:
+        db_table = "saldo_inventario"
+        constraints = [
+            models.UniqueConstraint(fields=['producto', 'fecha'], name='saldo_inventario_producto_fecha_unico'),
+        ]
@@ -0,0 +1,61 @@
+# producto/notificaciones.py
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Máximo de productos listados en el mensaje de la notificación agrupada
+MAX_PRODUCTOS_MENSAJE = 20
+
+
+def notificar_stock_bajo_agrupado(empresa, productos, titulo):
+    """
+    Crea UNA sola notificación de stock bajo para un conjunto de productos
+    y la asigna a admin_empresa y vendedores activos de la empresa.
+    Retorna la cantidad de usuarios notificados.
+    """
+    productos = list(productos)
+    if not productos:
+        return 0
+
+    try:
+        from notificaciones.models import Notificacion
+        from relacion_notifica.models import Notifica
+        from usuario_empresa.models import Usuario_Empresa
+
+        lineas = [
+            f'• {producto.nombre}: stock {producto.stock_actual} (mínimo {producto.stock_minimo})'
+            for producto in productos[:MAX_PRODUCTOS_MENSAJE]
+        ]
+        if len(productos) > MAX_PRODUCTOS_MENSAJE:
+            lineas.append(f'... y {len(productos) - MAX_PRODUCTOS_MENSAJE} productos más')
+
+        notificacion = Notificacion.objects.create(
+            titulo=titulo,
+            mensaje=(
+                f'{len(productos)} producto(s) con stock igual o menor al mínimo. '
+                f'Se recomienda reponer stock.\n' + '\n'.join(lineas)
+            ),
+            tipo='warning'
+        )
+
+        # Destinatarios en una sola consulta, relaciones en un solo INSERT
+        destinatarios = Usuario_Empresa.objects.filter(
+            empresa=empresa,
+            id_usuario__rol__rol__in=['admin_empresa', 'vendedor'],
+            estado='activo'
+        ).values_list('id_usuario_id', flat=True)
+
+        relaciones = Notifica.objects.bulk_create([
+            Notifica(id_usuario_id=id_usuario, id_notificacion=notificacion)
+            for id_usuario in destinatarios
+        ])
+
+        logger.info(
+            f"Notificación agrupada de stock bajo ({len(productos)} productos) "
+            f"creada para {len(relaciones)} usuarios en empresa {empresa.nombre}"
+        )
+        return len(relaciones)
+
+    except Exception as e:
+        logger.error(f"Error al crear notificación agrupada de stock bajo: {str(e)}")
+        return 0
@@ -0,0 +1,144 @@
+# producto/pronostico.py
+"""
+Pronóstico de demanda y punto de reorden sugerido para stock_minimo.
+
+Una consulta por empresa agrupa detalle_venta por (producto, día) en la base de datos;
+luego una sola pasada sobre esas filas acumula, por producto, las sumas que necesitan
+todos los indicadores (total, ventana móvil, suavizado exponencial y suma de cuadrados).
+Los pesos del suavizado se precalculan por antigüedad del día, así el costo es lineal
+en las filas (producto, día con ventas) y no hay un bucle por producto ni por día.
+
+Por producto, con d = demanda diaria de los últimos DIAS_HISTORIA días (0 si no vendió):
+- media_movil:        promedio de los últimos VENTANA_MOVIL días
+- demanda_diaria:     suavizado exponencial (ALFA) normalizado sobre la historia
+- desviacion:         desviación estándar de d
+- stock_seguridad:    z(NIVEL_SERVICIO) * desviacion * sqrt(PLAZO_REPOSICION_DIAS)
+- punto_reorden:      ceil(demanda_diaria * PLAZO_REPOSICION_DIAS + stock_seguridad)
+
+Los productos con menos de MINIMO_DIAS_CON_VENTA días con ventas no reciben sugerencia
+(conservan el stock_minimo cargado a mano).
+"""
+import logging
+import math
+from datetime import datetime, timedelta
+from statistics import NormalDist
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from backend.configuracion import leer
+
+logger = logging.getLogger(__name__)
+
+CONFIGURACION_POR_DEFECTO = {
+    'DIAS_HISTORIA': 90,
+    'VENTANA_MOVIL': 28,
+    'ALFA': 0.1,
+    'PLAZO_REPOSICION_DIAS': 7,
+    'NIVEL_SERVICIO': 0.95,
+    'MINIMO_DIAS_CON_VENTA': 3,
+    'LOTE': 1000,
+}
+
+
+def obtener_configuracion(**parametros):
+    """Configuración de settings.PRONOSTICO_DEMANDA; `parametros` reemplaza valores puntuales"""
+    configuracion = leer('PRONOSTICO_DEMANDA', CONFIGURACION_POR_DEFECTO)
+    configuracion.update({clave: valor for clave, valor in parametros.items() if valor is not None})
+    return configuracion
+
+
+def _demanda_diaria(empresa, inicio):
+    """Filas (id_producto, día, unidades) de la empresa desde `inicio`, en una consulta"""
+    from detalle_venta.models import DetalleVenta
+
+    return DetalleVenta.objects.filter(
+        id_producto__empresa=empresa,
+        id_venta__fecha_venta__gte=inicio
+    ).annotate(
+        dia=TruncDate('id_venta__fecha_venta')
+    ).order_by().values('id_producto', 'dia').annotate(
+        unidades=Sum('cantidad')
+    ).values_list('id_producto', 'dia', 'unidades')
+
+
+def calcular_pronosticos(empresa, **parametros):
+    """
+    {id_producto: {...indicadores...}} para los productos de la empresa con historial
+    suficiente. `parametros` permite reemplazar PLAZO_REPOSICION_DIAS, NIVEL_SERVICIO, etc.
+    """
+    configuracion = obtener_configuracion(**parametros)
+    dias = configuracion['DIAS_HISTORIA']
+    ventana = min(configuracion['VENTANA_MOVIL'], dias)
+    alfa = configuracion['ALFA']
+    plazo = configuracion['PLAZO_REPOSICION_DIAS']
+    z = NormalDist().inv_cdf(configuracion['NIVEL_SERVICIO'])
+
+    hoy = timezone.localdate()
+    # La historia incluye hoy: días 0 (hoy) .. dias - 1
+    inicio = timezone.make_aware(datetime.combine(hoy - timedelta(days=dias - 1), datetime.min.time()))
+
+    # Peso del suavizado exponencial por antigüedad, normalizado sobre toda la historia
+    pesos = [alfa * (1 - alfa) ** antiguedad for antiguedad in range(dias)]
+    total_pesos = sum(pesos)
+    pesos = [peso / total_pesos for peso in pesos]
+
+    # [total, total_ventana, suavizado, suma_cuadrados, dias_con_venta]
+    acumulados = {}
+    for id_producto, dia, unidades in _demanda_diaria(empresa, inicio).iterator(chunk_size=configuracion['LOTE']):
+        antiguedad = (hoy - dia).days
+        if not 0 <= antiguedad < dias:
+            continue
+        acumulado = acumulados.get(id_producto)
+        if acumulado is None:
+            acumulado = acumulados[id_producto] = [0, 0, 0.0, 0, 0]
+        acumulado[0] += unidades
+        if antiguedad < ventana:
+            acumulado[1] += unidades
+        acumulado[2] += pesos[antiguedad] * unidades
+        acumulado[3] += unidades * unidades
+        acumulado[4] += 1
+
+    raiz_plazo = math.sqrt(plazo)
+    pronosticos = {}
+    for id_producto, (total, total_ventana, suavizado, suma_cuadrados, dias_con_venta) in acumulados.items():
+        if dias_con_venta < configuracion['MINIMO_DIAS_CON_VENTA']:
+            continue
+        media = total / dias
+        desviacion = math.sqrt(max(suma_cuadrados / dias - media * media, 0))
+        stock_seguridad = z * desviacion * raiz_plazo
+        pronosticos[id_producto] = {
+            'media_movil': round(total_ventana / ventana, 3),
+            'demanda_diaria': round(suavizado, 3),
+            'desviacion': round(desviacion, 3),
+            'stock_seguridad': math.ceil(stock_seguridad),
+            'punto_reorden': math.ceil(suavizado * plazo + stock_seguridad),
+            'dias_con_venta': dias_con_venta,
+            'unidades_vendidas': total,
+        }
+
+    logger.info(f"Pronóstico de demanda: {len(pronosticos)} productos con sugerencia en empresa {empresa.id_empresa}")
+    return pronosticos
+
+
+def actualizar_stock_minimo(empresa, simular=False, **parametros):
+    """
+    Reemplaza stock_minimo por el punto de reorden sugerido en los productos con
+    pronóstico. Retorna la cantidad de productos cuyo valor cambia.
+    """
+    from .models import Producto
+
+    configuracion = obtener_configuracion(**parametros)
+    pronosticos = calcular_pronosticos(empresa, **parametros)
+    if not pronosticos:
+        return 0
+
+    cambios = [
+        Producto(id_producto=id_producto, stock_minimo=pronosticos[id_producto]['punto_reorden'])
+        for id_producto, stock_minimo in Producto.objects.filter(empresa=empresa).values_list(
+            'id_producto', 'stock_minimo'
+        ).iterator(chunk_size=configuracion['LOTE'])
+        if id_producto in pronosticos and stock_minimo != pronosticos[id_producto]['punto_reorden']
+    ]
+    if not simular:
+        Producto.objects.bulk_update(cambios, ['stock_minimo'], batch_size=configuracion['LOTE'])
+    return len(cambios)
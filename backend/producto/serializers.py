@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from django.core.validators import MinValueValidator
-from .models import Producto
+from .models import Producto, MovimientoInventario
 
 class ProductoSerializer(serializers.ModelSerializer):
     """Serializador para Producto"""
@@ -12,13 +12,14 @@ class ProductoSerializer(serializers.ModelSerializer):
         model = Producto
         fields = [
             'id_producto', 'nombre', 'descripcion', 'precio', 
-            'stock_actual', 'stock_minimo', 'estado', 'fecha_creacion',
+            'stock_actual', 'stock_minimo', 'stock_reservado', 'stock_disponible',
+            'estado', 'fecha_creacion',
             'categoria', 'categoria_nombre', 'proveedor', 'proveedor_nombre',
             'empresa', 'empresa_nombre', 'necesita_reponer', 'agotado'
         ]
         read_only_fields = [
             'id_producto', 'fecha_creacion', 'necesita_reponer', 
-            'agotado', 'empresa', 'empresa_nombre'
+            'agotado', 'empresa', 'empresa_nombre', 'stock_reservado', 'stock_disponible'
         ]
     
     def validate_precio(self, value):
@@ -36,6 +37,17 @@ class ProductoSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("El stock mínimo no puede ser negativo")
         return value
 
+    def validate(self, data):
+        # Las unidades apartadas por reservas pendientes no pueden desaparecer del stock
+        if self.instance and data.get('stock_actual', self.instance.stock_actual) < self.instance.stock_reservado:
+            raise serializers.ValidationError({
+                'stock_actual': f'Hay {self.instance.stock_reservado} unidades reservadas; el stock no puede ser menor'
+            })
+        proveedor = data.get('proveedor')
+        if self.instance and proveedor and proveedor.empresa_id != self.instance.empresa_id:
+            raise serializers.ValidationError({'proveedor': 'El proveedor no pertenece a su empresa'})
+        return data
+
 class ProductoCreateSerializer(serializers.ModelSerializer):
     """Serializador para creación de producto - Versión simplificada"""
     
@@ -80,7 +92,54 @@ class ProductoPublicSerializer(serializers.ModelSerializer):
         model = Producto
         fields = [
             'id_producto', 'nombre', 'descripcion', 'precio',
-            'stock_actual', 'estado', 'categoria', 'proveedor',
+            'stock_actual', 'stock_disponible', 'estado', 'categoria', 'proveedor',
             'empresa', 'fecha_creacion'
         ]
-        read_only_fields = fields
\ No newline at end of file
+        read_only_fields = fields
+
+class AjustePrecioSerializer(serializers.Serializer):
+    """Cambio de precio: porcentaje (10 = +10%) o monto fijo sumado al precio"""
+    tipo = serializers.ChoiceField(choices=['porcentaje', 'monto'])
+    valor = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+    def validate(self, data):
+        if data['valor'] == 0:
+            raise serializers.ValidationError("El valor del ajuste no puede ser 0")
+        if data['tipo'] == 'porcentaje' and data['valor'] <= -100:
+            raise serializers.ValidationError("El porcentaje debe ser mayor a -100")
+        return data
+
+
+class AjusteMasivoSerializer(serializers.Serializer):
+    """Serializador para ajuste masivo de precio y/o stock de productos"""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        allow_empty=False
+    )
+    categoria_id = serializers.IntegerField(required=False)
+    proveedor_id = serializers.IntegerField(required=False)
+    estado = serializers.ChoiceField(choices=Producto.ESTADOS, required=False)
+    todos = serializers.BooleanField(default=False)
+    precio = AjustePrecioSerializer(required=False)
+    stock_delta = serializers.IntegerField(required=False)
+
+    def validate(self, data):
+        filtros = ['ids', 'categoria_id', 'proveedor_id', 'estado']
+        if not data.get('todos') and not any(campo in data for campo in filtros):
+            raise serializers.ValidationError(
+                "Debe indicar al menos un filtro (ids, categoria_id, proveedor_id, estado) o todos=true"
+            )
+        if 'precio' not in data and not data.get('stock_delta'):
+            raise serializers.ValidationError("Debe indicar un ajuste de precio y/o stock_delta")
+        return data
+
+
+class MovimientoInventarioSerializer(serializers.ModelSerializer):
+    """Movimiento del kardex con el saldo resultante (calculado en la vista)"""
+    usuario_email = serializers.CharField(source='usuario.email', read_only=True, default=None)
+    saldo = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = MovimientoInventario
+        fields = ['id_movimiento', 'fecha', 'tipo', 'cantidad', 'saldo', 'referencia', 'usuario_email']
@@ -0,0 +1,85 @@
+# producto/stock.py
+"""
+Stock disponible para vender (available-to-promise).
+
+Producto.stock_reservado acumula las unidades de reservas pendientes; el disponible es
+stock_actual - stock_reservado. Cada operación es un UPDATE condicional con F(): la
+verificación y el cambio ocurren en la misma sentencia, sin leer el producto antes ni
+bloquearlo, y dos operaciones simultáneas nunca dejan el disponible en negativo.
+
+- reservar:          reservado += n   si disponible >= n
+- liberar_reserva:   reservado -= n   (cancelación, expiración, eliminación)
+- vender:            actual -= n y reservado -= lo reservado por quien vende,
+                     si el disponible más esa reserva alcanza para n
+- comprar:           actual += n (un producto agotado vuelve a 'activo')
+
+Los cambios de stock_actual se registran en el kardex (producto/kardex.py) en la
+misma transacción.
+"""
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Greatest
+from .models import Producto
+
+
+class StockInsuficiente(Exception):
+    """No hay stock disponible para la operación"""
+
+    def __init__(self, producto_id, solicitado):
+        self.producto_id = producto_id
+        self.solicitado = solicitado
+        super().__init__(f'Stock insuficiente para el producto {producto_id} (solicitado: {solicitado})')
+
+
+def reservar(producto_id, cantidad):
+    """Aparta unidades de un producto activo; lanza StockInsuficiente"""
+    actualizados = Producto.objects.filter(
+        id_producto=producto_id,
+        estado='activo',
+        stock_actual__gte=F('stock_reservado') + cantidad
+    ).update(stock_reservado=F('stock_reservado') + cantidad)
+    if not actualizados:
+        raise StockInsuficiente(producto_id, cantidad)
+
+
+def liberar_reserva(producto_id, cantidad):
+    """Devuelve al disponible las unidades de una reserva; nunca baja de 0"""
+    Producto.objects.filter(id_producto=producto_id).update(
+        stock_reservado=Greatest(F('stock_reservado') - cantidad, 0)
+    )
+
+
+def liberar_reservas(cantidades):
+    """liberar_reserva en bloque: {producto_id: cantidad}"""
+    for producto_id, cantidad in cantidades.items():
+        liberar_reserva(producto_id, cantidad)
+
+
+def vender(producto_id, cantidad, reservado=0):
+    """
+    Descuenta la venta de stock_actual consumiendo la reserva de quien vende
+    (reservado). Marca 'agotado' si no quedan unidades. Lanza StockInsuficiente.
+    """
+    actualizados = Producto.objects.filter(
+        id_producto=producto_id,
+        stock_actual__gte=F('stock_reservado') - reservado + cantidad
+    ).update(
+        stock_actual=F('stock_actual') - cantidad,
+        stock_reservado=Greatest(F('stock_reservado') - reservado, 0),
+        estado=Case(
+            When(stock_actual__lte=cantidad, then=Value('agotado')),
+            default=F('estado')
+        )
+    )
+    if not actualizados:
+        raise StockInsuficiente(producto_id, cantidad)
+
+
+def comprar(producto_id, cantidad):
+    """Suma a stock_actual el ingreso de una compra"""
+    Producto.objects.filter(id_producto=producto_id).update(
+        stock_actual=F('stock_actual') + cantidad,
+        estado=Case(
+            When(estado='agotado', then=Value('activo')),
+            default=F('estado')
+        )
+    )
@@ -1,3 +1,497 @@
+import csv
+import io
+import math
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+from django.db.models import F
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
+from django.utils import timezone
+from openpyxl import load_workbook
+from rest_framework.test import APIClient
+from archivo.models import Archivo
+from backend.benchmarks.datos import generar_datos
+from backend.pruebas import ConsultasConstantesMixin
+from categoria.models import Categoria
+from cliente.models import Cliente
+from detalle_venta.models import DetalleVenta
+from roles.models import Rol
+from usuario_empresa.models import Usuario_Empresa
+from usuarios.models import User
+from ventas.models import Venta
+from . import pronostico
+from .busqueda import buscar_productos, filtrar_productos
+from .models import MovimientoInventario, Producto
+from .views import ExportarInventarioView, ProductoUpdateDeleteView
 
-# Create your tests here.
+
+class ConsultasProductosDetallesTest(ConsultasConstantesMixin, TestCase):
+    """ProductosPorEmpresaConDetallesView: los archivos se precargan en una consulta para todos"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = generar_datos(empresas=1, productos=3, clientes=1, ventas=0)
+        cls._agregar_archivos(Producto.objects.filter(empresa=cls.datos['empresa']))
+
+    @staticmethod
+    def _agregar_archivos(productos):
+        Archivo.objects.bulk_create([
+            Archivo(producto=producto, nombre=f'foto {orden}', archivo=f'productos/{producto.pk}-{orden}.jpg',
+                    tipo_archivo='imagen', orden=orden)
+            for producto in productos
+            for orden in range(7)
+        ])
+
+    def _agregar_productos(self):
+        base = self.datos['producto']
+        productos = Producto.objects.bulk_create([
+            Producto(nombre=f'Nuevo {i}', precio=base.precio, stock_actual=5, stock_minimo=1,
+                     categoria=base.categoria, proveedor=base.proveedor, empresa=base.empresa)
+            for i in range(10)
+        ])
+        self._agregar_archivos(productos)
+
+    def test_productos_con_detalles(self):
+        url = f"/api/productos/empresa/{self.datos['empresa'].pk}/detalles/"
+        respuesta = self.client.get(url)
+        self.assertTrue(all(p['cantidad_archivos'] == 5 for p in respuesta.json()['productos']))
+
+        self.assertConsultasConstantes(
+            lambda: APIClient().get(url),
+            self._agregar_productos,
+            lambda respuesta: len(respuesta.json()['productos'])
+        )
+
+
+class PermisosInventarioTest(TestCase):
+    """Kardex, inventario histórico y reorden: solo admin_empresa, también en lectura"""
+    URLS = (
+        '/api/productos/{producto}/kardex/',
+        '/api/productos/inventario-historico/?fecha=2024-01-01',
+        '/api/productos/reorden/',
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = generar_datos(empresas=1, productos=1, clientes=1, ventas=0)
+        cls.cliente = Cliente.objects.select_related('id_usuario').first().id_usuario
+
+    def _get(self, usuario, url):
+        cliente = APIClient()
+        cliente.force_authenticate(usuario)
+        return cliente.get(url.format(producto=self.datos['producto'].pk))
+
+    def test_solo_admin_empresa(self):
+        for url in self.URLS:
+            with self.subTest(url=url):
+                self.assertEqual(self._get(self.datos['admin_empresa'], url).status_code, 200)
+                self.assertEqual(self._get(self.datos['vendedor'], url).status_code, 403)
+                self.assertEqual(self._get(self.cliente, url).status_code, 403)
+
+
+class EdicionProductoConcurrenteTest(TestCase):
+    """La edición guarda sobre la fila bloqueada: no pisa reservas ni ventas posteriores a get_object()"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = generar_datos(empresas=1, productos=1, clientes=1, ventas=0)
+
+    def setUp(self):
+        self.producto = self.datos['producto']
+        Producto.objects.filter(pk=self.producto.pk).update(stock_actual=20, stock_reservado=0)
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(self.datos['admin_empresa'])
+
+    def _patch(self, datos):
+        get_object = ProductoUpdateDeleteView.get_object
+
+        def get_object_y_venta(vista):
+            instancia = get_object(vista)
+            # Otra solicitud reserva 3 y vende 2 entre la carga y el guardado
+            Producto.objects.filter(pk=instancia.pk).update(
+                stock_reservado=F('stock_reservado') + 3, stock_actual=F('stock_actual') - 2
+            )
+            return instancia
+
+        with mock.patch.object(ProductoUpdateDeleteView, 'get_object', get_object_y_venta):
+            return self.cliente.patch(f'/api/productos/{self.producto.pk}/gestion/', datos, format='json')
+
+    def test_patch_sin_stock_conserva_stock_vigente(self):
+        respuesta = self._patch({'nombre': 'Renombrado'})
+
+        self.assertEqual(respuesta.status_code, 200, respuesta.content)
+        producto = Producto.objects.get(pk=self.producto.pk)
+        self.assertEqual(producto.nombre, 'Renombrado')
+        self.assertEqual((producto.stock_actual, producto.stock_reservado), (18, 3))
+
+    def test_patch_con_stock_conserva_reservas(self):
+        respuesta = self._patch({'stock_actual': 25})
+
+        self.assertEqual(respuesta.status_code, 200, respuesta.content)
+        producto = Producto.objects.get(pk=self.producto.pk)
+        self.assertEqual((producto.stock_actual, producto.stock_reservado), (25, 3))
+
+    def test_kardex_registra_solo_la_edicion(self):
+        self._patch({'nombre': 'Renombrado'})
+        self.assertFalse(MovimientoInventario.objects.filter(producto=self.producto, tipo='ajuste').exists())
+
+        self._patch({'stock_actual': 25})
+        ajustes = list(MovimientoInventario.objects.filter(
+            producto=self.producto, tipo='ajuste'
+        ).values_list('cantidad', flat=True))
+        # 16 vigentes (dos ventas de 2 simuladas) -> 25
+        self.assertEqual(ajustes, [9])
+
+
+class ImportarProductosTest(TestCase):
+    """POST /api/productos/importar/: todo o nada salvo parcial=true, con errores por fila"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = generar_datos(empresas=1, productos=1, clientes=1, ventas=0)
+
+    def setUp(self):
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(self.datos['admin_empresa'])
+
+    def _importar(self, productos, **opciones):
+        return self.cliente.post('/api/productos/importar/', {'productos': productos, **opciones}, format='json')
+
+    def _nombres(self):
+        return set(Producto.objects.filter(empresa=self.datos['empresa']).values_list('nombre', flat=True))
+
+    def test_importa_json(self):
+        respuesta = self._importar([
+            {'nombre': 'Arroz', 'precio': '12,50', 'stock_actual': 40, 'categoria': 'Granos'},
+            {'nombre': 'Fideos', 'precio': '8', 'proveedor': self.datos['proveedor'].nombre},
+        ], crear_categorias=True)
+
+        self.assertEqual(respuesta.status_code, 201, respuesta.content)
+        self.assertEqual(respuesta.json()['resumen']['importados'], 2)
+        arroz = Producto.objects.get(empresa=self.datos['empresa'], nombre='Arroz')
+        self.assertEqual((arroz.precio, arroz.stock_actual, arroz.categoria.nombre), (Decimal('12.50'), 40, 'Granos'))
+        self.assertTrue(MovimientoInventario.objects.filter(producto=arroz, tipo='importacion', cantidad=40).exists())
+
+    def test_importa_csv(self):
+        archivo = SimpleUploadedFile(
+            'productos.csv', 'nombre,precio,stock_actual\nAceite,20.00,3\n'.encode('utf-8'), content_type='text/csv'
+        )
+        respuesta = self.cliente.post('/api/productos/importar/', {'archivo': archivo}, format='multipart')
+
+        self.assertEqual(respuesta.status_code, 201, respuesta.content)
+        self.assertIn('Aceite', self._nombres())
+
+    def test_errores_cancelan_la_importacion(self):
+        antes = self._nombres()
+        respuesta = self._importar([
+            {'nombre': 'Arroz', 'precio': '12'},
+            {'nombre': 'Sal', 'precio': '-1'},
+            {'nombre': 'Azúcar', 'precio': '5', 'categoria': 'Inexistente'},
+        ])
+
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(
+            [(error['fila'], error['nombre'], list(error['errores'])) for error in respuesta.json()['errores']],
+            [(2, 'Sal', ['precio']), (3, 'Azúcar', ['categoria'])]
+        )
+        self.assertEqual(self._nombres(), antes)
+        self.assertFalse(Categoria.objects.filter(nombre='Inexistente').exists())
+
+    def test_parcial_importa_las_filas_validas(self):
+        respuesta = self._importar([
+            {'nombre': 'Arroz', 'precio': '12'},
+            {'nombre': 'Sal', 'precio': 'abc'},
+        ], parcial='true')
+
+        self.assertEqual(respuesta.status_code, 201, respuesta.content)
+        self.assertEqual(respuesta.json()['resumen'], {
+            'total_filas': 2, 'importados': 1, 'con_errores': 1, 'stock_bajo': 1
+        })
+        self.assertIn('Arroz', self._nombres())
+        self.assertNotIn('Sal', self._nombres())
+
+    def test_nombres_duplicados(self):
+        respuesta = self._importar([
+            {'nombre': 'Arroz', 'precio': '12'},
+            {'nombre': 'Arroz', 'precio': '13'},
+            {'nombre': self.datos['producto'].nombre, 'precio': '1'},
+        ], parcial=True)
+
+        self.assertEqual(respuesta.status_code, 201, respuesta.content)
+        errores = {error['fila']: error['errores']['nombre'] for error in respuesta.json()['errores']}
+        self.assertEqual(sorted(errores), [2, 3])
+        self.assertIn('fila 1', errores[2])
+        self.assertEqual(Producto.objects.filter(nombre='Arroz').count(), 1)
+
+
+class AjusteMasivoTest(TestCase):
+    """POST /api/productos/ajuste-masivo/: un UPDATE para el conjunto, todo o nada"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = generar_datos(empresas=1, productos=3, clientes=1, ventas=0)
+
+    def setUp(self):
+        self.productos = list(Producto.objects.filter(empresa=self.datos['empresa']).order_by('pk'))
+        Producto.objects.filter(pk__in=[p.pk for p in self.productos]).update(
+            precio=Decimal('10.00'), stock_actual=10, stock_minimo=2, stock_reservado=0, estado='activo'
+        )
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(self.datos['admin_empresa'])
+
+    def _ajustar(self, **datos):
+        return self.cliente.post('/api/productos/ajuste-masivo/', datos, format='json')
+
+    def _valores(self):
+        return list(Producto.objects.filter(pk__in=[p.pk for p in self.productos]).order_by('pk').values_list(
+            'precio', 'stock_actual'
+        ))
+
+    def test_ajusta_precio_y_stock(self):
+        ids = [p.pk for p in self.productos[:2]]
+        respuesta = self._ajustar(ids=ids, precio={'tipo': 'porcentaje', 'valor': 10}, stock_delta=-3)
+
+        self.assertEqual(respuesta.status_code, 200, respuesta.content)
+        self.assertEqual(self._valores(), [(Decimal('11.00'), 7), (Decimal('11.00'), 7), (Decimal('10.00'), 10)])
+        self.assertEqual(MovimientoInventario.objects.filter(tipo='ajuste_masivo', cantidad=-3).count(), 2)
+
+    def test_un_producto_invalido_cancela_todo(self):
+        Producto.objects.filter(pk=self.productos[0].pk).update(stock_reservado=9)
+
+        respuesta = self._ajustar(todos=True, precio={'tipo': 'monto', 'valor': '1'}, stock_delta=-2)
+
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual([p['id_producto'] for p in respuesta.json()['productos']], [self.productos[0].pk])
+        self.assertEqual(self._valores(), [(Decimal('10.00'), 10)] * 3)
+        self.assertFalse(MovimientoInventario.objects.filter(tipo='ajuste_masivo').exists())
+
+    def test_ids_duplicados_se_ajustan_una_vez(self):
+        producto = self.productos[0]
+        respuesta = self._ajustar(ids=[producto.pk, producto.pk], stock_delta=5)
+
+        self.assertEqual(respuesta.status_code, 200, respuesta.content)
+        self.assertEqual(self._valores()[0], (Decimal('10.00'), 15))
+        self.assertEqual(MovimientoInventario.objects.filter(producto=producto, tipo='ajuste_masivo').count(), 1)
+
+
+class PronosticoDemandaTest(TestCase):
+    """calcular_pronosticos / actualizar_stock_minimo sobre una serie diaria fija"""
+
+    AHORA = timezone.make_aware(datetime(2024, 3, 10, 12, 0))
+    # 10 días de historia, ventana de 4, alfa 0.5, plazo de 4 días y z(0.95)
+    PARAMETROS = {
+        'DIAS_HISTORIA': 10, 'VENTANA_MOVIL': 4, 'ALFA': 0.5,
+        'PLAZO_REPOSICION_DIAS': 4, 'NIVEL_SERVICIO': 0.95,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        datos = generar_datos(empresas=1, productos=1, clientes=1, ventas=0)
+        cls.empresa = datos['empresa']
+        vendedor = Usuario_Empresa.objects.get(id_usuario=datos['vendedor'])
+        cls.producto, cls.ocasional = (
+            Producto.objects.create(nombre=nombre, precio=Decimal('1.00'), stock_actual=0, stock_minimo=5, empresa=cls.empresa)
+            for nombre in ('Serie', 'Ocasional')
+        )
+
+        # Unidades por antigüedad en días (0 = hoy); la de 10 días queda fuera de la historia
+        for antiguedad, lineas in (
+            (0, [(cls.producto, 4)]),
+            (1, [(cls.producto, 2), (cls.ocasional, 1)]),
+            (2, [(cls.producto, 6)]),
+            (5, [(cls.producto, 8), (cls.ocasional, 1)]),
+            (10, [(cls.producto, 50)]),
+        ):
+            venta = Venta.objects.create(usuario_empresa=vendedor, cliente=datos['cliente'], precio_total=Decimal('1.00'))
+            Venta.objects.filter(pk=venta.pk).update(fecha_venta=cls.AHORA - timedelta(days=antiguedad))
+            DetalleVenta.objects.bulk_create([
+                DetalleVenta(id_venta=venta, id_producto=producto, cantidad=cantidad,
+                             precio_unitario=Decimal('1.00'), subtotal=Decimal(cantidad))
+                for producto, cantidad in lineas
+            ])
+
+    def setUp(self):
+        reloj = mock.patch.object(pronostico.timezone, 'now', return_value=self.AHORA)
+        reloj.start()
+        self.addCleanup(reloj.stop)
+
+    def test_indicadores(self):
+        resultado = pronostico.calcular_pronosticos(self.empresa, **self.PARAMETROS)
+
+        # El ocasional vendió 2 días (< MINIMO_DIAS_CON_VENTA): sin sugerencia
+        self.assertEqual(list(resultado), [self.producto.pk])
+        indicadores = resultado[self.producto.pk]
+        self.assertEqual((indicadores['unidades_vendidas'], indicadores['dias_con_venta']), (20, 4))
+        # Ventana de 4 días: (4 + 2 + 6) / 4
+        self.assertEqual(indicadores['media_movil'], 3.0)
+        # Suavizado: (0.5*4 + 0.25*2 + 0.125*6 + 0.5**6*8) / (1 - 0.5**10)
+        self.assertAlmostEqual(indicadores['demanda_diaria'], 3.375 / (1 - 0.5 ** 10), places=3)
+        # Media 20/10 = 2; varianza 120/10 - 2² = 8
+        self.assertAlmostEqual(indicadores['desviacion'], math.sqrt(8), places=3)
+        # 1.645 * 2.828 * sqrt(4) = 9.30 -> 10
+        self.assertEqual(indicadores['stock_seguridad'], 10)
+        # 3.378 * 4 + 9.30 = 22.82 -> 23
+        self.assertEqual(indicadores['punto_reorden'], 23)
+
+    def test_actualizar_stock_minimo(self):
+        self.assertEqual(pronostico.actualizar_stock_minimo(self.empresa, simular=True, **self.PARAMETROS), 1)
+        self.producto.refresh_from_db()
+        self.assertEqual(self.producto.stock_minimo, 5)
+
+        self.assertEqual(pronostico.actualizar_stock_minimo(self.empresa, **self.PARAMETROS), 1)
+        self.assertEqual(
+            dict(Producto.objects.filter(pk__in=[self.producto.pk, self.ocasional.pk]).values_list('nombre', 'stock_minimo')),
+            {'Serie': 23, 'Ocasional': 5}
+        )
+        # Sin cambios en una segunda pasada
+        self.assertEqual(pronostico.actualizar_stock_minimo(self.empresa, **self.PARAMETROS), 0)
+
+
+class BusquedaProductosTest(TestCase):
+    """buscar_productos / filtrar_productos con el fallback (SQLite): relevancia, tipeo y límite"""
+
+    @classmethod
+    def setUpTestData(cls):
+        datos = generar_datos(empresas=1, productos=1, clientes=1, ventas=0)
+        cls.empresa = datos['empresa']
+        Producto.objects.filter(empresa=cls.empresa).update(estado='inactivo')
+        bebidas = Categoria.objects.create(nombre='Bebidas', empresa=cls.empresa)
+        cocina = Categoria.objects.create(nombre='Cocina', empresa=cls.empresa)
+        for nombre, categoria, descripcion in (
+            ('Café molido', bebidas, 'Tostado medio'),
+            ('Cafetera italiana', cocina, 'Acero inoxidable'),
+            ('Té verde', bebidas, 'Sin cafeína'),
+            ('Galletas', None, 'Con chispas de chocolate'),
+        ):
+            Producto.objects.create(
+                nombre=nombre, categoria=categoria, descripcion=descripcion,
+                precio=Decimal('1.00'), stock_actual=1, stock_minimo=0, empresa=cls.empresa
+            )
+
+    def _productos(self):
+        return Producto.objects.filter(empresa=self.empresa, estado='activo')
+
+    def _buscar(self, texto, **parametros):
+        return APIClient().get(f'/api/productos/empresa/{self.empresa.pk}/buscar/', {'q': texto, **parametros})
+
+    def test_orden_por_relevancia(self):
+        resultados = buscar_productos(self._productos(), 'cafe')
+
+        # Nombre (1.0) antes que descripción (0.3); sin tildes
+        self.assertEqual(
+            {producto.nombre: relevancia for producto, relevancia in resultados},
+            {'Café molido': 1.0, 'Cafetera italiana': 1.0, 'Té verde': 0.3}
+        )
+        self.assertEqual(resultados[-1][0].nombre, 'Té verde')
+        # Promedio por palabra: 'molido' solo coincide con el primero
+        self.assertEqual(
+            [(producto.nombre, relevancia) for producto, relevancia in buscar_productos(self._productos(), 'cafe molido')],
+            [('Café molido', 1.0), ('Cafetera italiana', 0.5)]
+        )
+        # Categoría: 0.5
+        self.assertEqual(
+            [(producto.nombre, relevancia) for producto, relevancia in buscar_productos(self._productos(), 'bebidas')],
+            [('Café molido', 0.5), ('Té verde', 0.5)]
+        )
+
+    def test_tolerancia_a_errores_de_tipeo(self):
+        resultados = buscar_productos(self._productos(), 'galetas')
+
+        self.assertEqual([producto.nombre for producto, _ in resultados], ['Galletas'])
+        self.assertAlmostEqual(resultados[0][1], 0.9 * 14 / 15, places=4)
+        self.assertEqual(buscar_productos(self._productos(), 'xyz'), [])
+
+    def test_filtrar_usa_los_mismos_tokens(self):
+        for texto, esperados in (
+            ('cafe', {'Café molido', 'Cafetera italiana', 'Té verde'}),
+            ('molido cafe', {'Café molido', 'Cafetera italiana'}),
+            ('galetas', {'Galletas'}),
+            ('xyz', set()),
+        ):
+            with self.subTest(texto=texto):
+                filtrados = filtrar_productos(self._productos(), texto)
+                self.assertEqual(set(filtrados.values_list('nombre', flat=True)), esperados)
+                self.assertEqual({producto.nombre for producto, _ in buscar_productos(self._productos(), texto)}, esperados)
+
+    def test_listado_filtra_por_nombre(self):
+        respuesta = APIClient().get(f'/api/productos/empresa/{self.empresa.pk}/', {'nombre': 'cafe'})
+
+        self.assertEqual(respuesta.status_code, 200, respuesta.content)
+        self.assertEqual(
+            {producto['nombre'] for producto in respuesta.json()['productos']},
+            {'Café molido', 'Cafetera italiana', 'Té verde'}
+        )
+
+    def test_limite(self):
+        Producto.objects.bulk_create([
+            Producto(nombre=f'Repuesto {numero:03}', precio=Decimal('1.00'), stock_actual=1,
+                     stock_minimo=0, empresa=self.empresa)
+            for numero in range(105)
+        ])
+
+        for limite, cantidad in (('2', 2), ('0', 1), ('-5', 1), ('500', 100), ('abc', 20)):
+            with self.subTest(limite=limite):
+                respuesta = self._buscar('repuesto', limite=limite)
+                self.assertEqual(respuesta.status_code, 200, respuesta.content)
+                self.assertEqual(respuesta.json()['cantidad_resultados'], cantidad)
+        self.assertEqual(len(buscar_productos(self._productos(), 'repuesto', limite=3)), 3)
+
+    def test_texto_corto(self):
+        respuesta = self._buscar('c')
+
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(respuesta.json()['status'], 'error')
+
+
+class ExportarInventarioTest(TestCase):
+    """ExportarInventarioView: encabezados, filas de la empresa y filtros en CSV y XLSX"""
+
+    URL = '/api/productos/exportar/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = generar_datos(empresas=2, productos=3, clientes=1, ventas=0)
+        cls.empresa = cls.datos['empresa']
+        cls.inactivo = Producto.objects.filter(empresa=cls.empresa).order_by('pk').first()
+        Producto.objects.filter(pk=cls.inactivo.pk).update(estado='inactivo')
+
+    def setUp(self):
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(self.datos['admin_empresa'])
+
+    def _exportar(self, **parametros):
+        respuesta = self.cliente.get(self.URL, parametros)
+        self.assertEqual(respuesta.status_code, 200, getattr(respuesta, 'content', None))
+        cuerpo = b''.join(respuesta.streaming_content)
+        respuesta.close()
+        if parametros.get('formato') == 'xlsx':
+            hoja = load_workbook(io.BytesIO(cuerpo), read_only=True).active
+            return [list(fila) for fila in hoja.iter_rows(values_only=True)]
+        return list(csv.reader(io.StringIO(cuerpo.decode('utf-8-sig'))))
+
+    def test_csv_y_xlsx(self):
+        encabezados = [encabezado for encabezado, _ in ExportarInventarioView.COLUMNAS]
+        nombres = list(Producto.objects.filter(empresa=self.empresa).order_by('nombre').values_list('nombre', flat=True))
+        for formato in ('csv', 'xlsx'):
+            with self.subTest(formato=formato):
+                filas = self._exportar(formato=formato)
+
+                self.assertEqual(filas[0], encabezados)
+                self.assertEqual([fila[1] for fila in filas[1:]], nombres)
+
+    def test_filtro_por_estado(self):
+        for formato in ('csv', 'xlsx'):
+            with self.subTest(formato=formato):
+                filas = self._exportar(formato=formato, estado='inactivo')
+                self.assertEqual([int(fila[0]) for fila in filas[1:]], [self.inactivo.pk])
+                self.assertEqual(len(self._exportar(formato=formato, estado='activo')), 1 + 2)
+
+    def test_permisos_y_formato(self):
+        self.cliente.force_authenticate(self.datos['vendedor'])
+        self.assertEqual(len(self._exportar(formato='csv')), 1 + 3)
+        self.assertEqual(self.cliente.get(self.URL, {'formato': 'pdf'}).status_code, 400)
+
+        cliente = User.objects.create_user(email='cliente@inventario.test', password='x', rol=Rol.objects.get(rol='cliente'))
+        self.cliente.force_authenticate(cliente)
+        self.assertEqual(self.cliente.get(self.URL).status_code, 403)
@@ -3,17 +3,27 @@ from .views import (
     ProductoCreateView, ProductoListView, 
     ProductoDetailView, ProductoUpdateDeleteView,
     ProductoStatsView, ProductosPorEmpresaView,
-    ProductosPorEmpresaAdminView, ProductosPorEmpresaConDetallesView
+    ProductosPorEmpresaAdminView, ProductosPorEmpresaConDetallesView,
+    ExportarInventarioView, ProductoImportarView,
+    ProductoAjusteMasivoView, BusquedaProductosEmpresaView,
+    KardexProductoView, InventarioHistoricoView, RecomendacionesReordenView
 )
 
 urlpatterns = [
     path('crear/', ProductoCreateView.as_view(), name='producto_create'),
+    path('importar/', ProductoImportarView.as_view(), name='producto_import'),
+    path('ajuste-masivo/', ProductoAjusteMasivoView.as_view(), name='producto_ajuste_masivo'),
     path('listar/', ProductoListView.as_view(), name='producto_list'),
     path('<int:pk>/', ProductoDetailView.as_view(), name='producto_detail'),
     path('<int:pk>/gestion/', ProductoUpdateDeleteView.as_view(), name='producto_manage'),
+    path('<int:pk>/kardex/', KardexProductoView.as_view(), name='producto_kardex'),
+    path('inventario-historico/', InventarioHistoricoView.as_view(), name='producto_inventario_historico'),
+    path('reorden/', RecomendacionesReordenView.as_view(), name='producto_reorden'),
     path('estadisticas/', ProductoStatsView.as_view(), name='producto_stats'),
     path('empresa/<int:id_empresa>/', ProductosPorEmpresaView.as_view(), name='productos_por_empresa'),
+    path('empresa/<int:id_empresa>/buscar/', BusquedaProductosEmpresaView.as_view(), name='productos_buscar'),
     path('empresa/', ProductosPorEmpresaView.as_view(), name='productos_por_empresa_param'),
+    path('exportar/', ExportarInventarioView.as_view(), name='producto_exportar'),
     path('mi-empresa/', ProductosPorEmpresaAdminView.as_view(), name='productos_mi_empresa'),
     path('empresa/<int:id_empresa>/detalles/', ProductosPorEmpresaConDetallesView.as_view(), name='productos_por_empresa_detalles'),
 ]
\ No newline at end of file
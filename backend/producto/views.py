@@ -2,16 +2,29 @@ from rest_framework import generics, permissions, status, filters
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.viewsets import ModelViewSet
+from rest_framework.parsers import JSONParser, MultiPartParser, FormParser
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db import models
-from .models import Producto
-from .serializers import ProductoSerializer, ProductoCreateSerializer, ProductoPublicSerializer
+from django.db import models, transaction
+from django.db.models.functions import Round
+from django.utils import timezone
+from datetime import datetime, timedelta
+from decimal import Decimal
+from .models import Producto, MovimientoInventario, STOCK_DISPONIBLE
+from .serializers import ProductoSerializer, ProductoCreateSerializer, ProductoPublicSerializer, AjusteMasivoSerializer, MovimientoInventarioSerializer
 from categoria.views import IsAdminEmpresa
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from empresas.models import Empresa
 from .models import Producto
 from .serializers import ProductoPublicSerializer, ProductoSerializer
+from backend.exportacion.streaming import respuesta_exportacion, FORMATOS
+from .importacion import ImportadorProductos, leer_filas_csv, PRECIO_MAXIMO
+from backend.carga_masiva import ErrorCargaMasiva, opcion_activada
+from .notificaciones import notificar_stock_bajo_agrupado
+from .busqueda import buscar_productos, filtrar_productos
+from planes.limites import reservar_cupo, LimitePlanExcedido
+from . import kardex
+from .pronostico import calcular_pronosticos
 import logging
 
 logger = logging.getLogger(__name__)
@@ -46,6 +59,21 @@ class IsAdminEmpresaOrReadOnly(permissions.BasePermission):
         empresa_usuario = request.user.usuario_empresa.empresa
         return obj.empresa == empresa_usuario
 
+class EsAdminEmpresa(permissions.BasePermission):
+    """
+    Solo admin_empresa con empresa asignada, también para lectura (kardex, valorización,
+    reorden: IsAdminEmpresa deja pasar cualquier GET)
+    """
+    message = 'Solo el administrador de la empresa puede consultar esta información'
+
+    def has_permission(self, request, view):
+        usuario = request.user
+        return bool(
+            usuario and usuario.is_authenticated
+            and getattr(usuario, 'rol', None) and usuario.rol.rol == 'admin_empresa'
+            and hasattr(usuario, 'usuario_empresa')
+        )
+
 class ProductoCreateView(generics.CreateAPIView):
     """
     Vista para crear producto (solo admin_empresa)
@@ -82,7 +110,7 @@ class ProductoCreateView(generics.CreateAPIView):
         if proveedor_id:
             try:
                 from proveedor.models import Proveedor
-                proveedor = Proveedor.objects.get(id_proveedor=proveedor_id)
+                proveedor = Proveedor.objects.get(id_proveedor=proveedor_id, empresa=empresa)
             except Proveedor.DoesNotExist:
                 return Response({
                     'status': 'error',
@@ -90,7 +118,18 @@ class ProductoCreateView(generics.CreateAPIView):
                 }, status=status.HTTP_400_BAD_REQUEST)
         
         
-        producto = serializer.save(empresa=empresa)
+        try:
+            with transaction.atomic():
+                # Verifica e incrementa el contador de productos de la empresa
+                reservar_cupo(empresa, 'productos')
+                producto = serializer.save(empresa=empresa)
+                kardex.registrar([kardex.movimiento(producto, 'inicial', producto.stock_actual, usuario=request.user)])
+        except LimitePlanExcedido as e:
+            return Response({
+                'status': 'error',
+                'message': 'Límite de productos del plan alcanzado',
+                'detail': e.detalle()
+            }, status=status.HTTP_403_FORBIDDEN)
 
         if producto.stock_actual <= producto.stock_minimo:
             self._crear_notificacion_stock_bajo(producto)
@@ -202,13 +241,17 @@ class ProductoUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
         return Producto.objects.filter(empresa=empresa).select_related('categoria', 'proveedor')
     
     def perform_update(self, serializer):
-        # Obtener instancia actual para comparar stock
-        instance = self.get_object()
-        stock_anterior = instance.stock_actual
-        
         # Mantener la empresa original
         empresa = self.request.user.usuario_empresa.empresa
+
+        # La instancia es la fila bloqueada (update): su stock es el vigente y la diferencia
+        # que se registra en el kardex es solo la de esta edición
+        stock_anterior = serializer.instance.stock_actual
         producto_actualizado = serializer.save(empresa=empresa)
+        kardex.registrar([kardex.movimiento(
+            producto_actualizado, 'ajuste', producto_actualizado.stock_actual - stock_anterior,
+            usuario=self.request.user, referencia='edicion'
+        )])
 
         if (producto_actualizado.stock_actual <= producto_actualizado.stock_minimo and 
             stock_anterior > producto_actualizado.stock_minimo):
@@ -218,9 +261,14 @@ class ProductoUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
     def update(self, request, *args, **kwargs):
         partial = kwargs.pop('partial', False)
         instance = self.get_object()
-        serializer = self.get_serializer(instance, data=request.data, partial=partial)
-        serializer.is_valid(raise_exception=True)
-        self.perform_update(serializer)
+
+        with transaction.atomic():
+            # Se valida y guarda sobre la fila recargada con bloqueo: save() escribe todas las
+            # columnas y una instancia previa pisaría reservas y ventas (F()) concurrentes
+            instance = self.get_queryset().select_for_update(of=('self',)).get(pk=instance.pk)
+            serializer = self.get_serializer(instance, data=request.data, partial=partial)
+            serializer.is_valid(raise_exception=True)
+            self.perform_update(serializer)
         
         return Response({
             'status': 'success',
@@ -383,7 +431,7 @@ class ProductosPorEmpresaView(generics.ListAPIView):
             
             nombre = request.query_params.get('nombre', '')
             if nombre:
-                productos = productos.filter(nombre__icontains=nombre)
+                productos = filtrar_productos(productos, nombre)
             
             # Filtros de precio
             precio_min = request.query_params.get('precio_min')
@@ -397,7 +445,7 @@ class ProductosPorEmpresaView(generics.ListAPIView):
             # Filtro de stock
             solo_disponibles = request.query_params.get('solo_disponibles', '').lower() == 'true'
             if solo_disponibles:
-                productos = productos.filter(stock_actual__gt=0)
+                productos = productos.alias(disponible=STOCK_DISPONIBLE).filter(disponible__gt=0)
             
             # Ordenamiento
             orden = request.query_params.get('orden', 'nombre')
@@ -423,7 +471,7 @@ class ProductosPorEmpresaView(generics.ListAPIView):
                 'estadisticas': {
                     'productos_activos': productos.count(),
                     'productos_agotados': productos.filter(stock_actual__lte=0).count(),
-                    'productos_disponibles': productos.filter(stock_actual__gt=0).count(),
+                    'productos_disponibles': productos.alias(disponible=STOCK_DISPONIBLE).filter(disponible__gt=0).count(),
                     'precio_promedio': productos.aggregate(
                         avg=models.Avg('precio')
                     )['avg'] or 0
@@ -445,6 +493,63 @@ class ProductosPorEmpresaView(generics.ListAPIView):
                 'detail': str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+class BusquedaProductosEmpresaView(generics.GenericAPIView):
+    """
+    Búsqueda de productos ordenada por relevancia dentro de una empresa
+    GET /api/productos/empresa/<id_empresa>/buscar/?q=texto&limite=20&categoria_id=
+    Para cualquiera - Solo productos activos de empresas activas
+    """
+    serializer_class = ProductoPublicSerializer
+    permission_classes = [permissions.AllowAny]
+
+    LIMITE_POR_DEFECTO = 20
+    LIMITE_MAXIMO = 100
+
+    def get(self, request, id_empresa, *args, **kwargs):
+        texto = request.query_params.get('q', '').strip()
+        if len(texto) < 2:
+            return Response({
+                'status': 'error',
+                'message': 'Texto de búsqueda no válido',
+                'detail': 'El parámetro q debe tener al menos 2 caracteres'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limite = int(request.query_params.get('limite', self.LIMITE_POR_DEFECTO))
+        except ValueError:
+            limite = self.LIMITE_POR_DEFECTO
+        limite = max(1, min(limite, self.LIMITE_MAXIMO))
+
+        empresa = get_object_or_404(Empresa, id_empresa=id_empresa, estado='activo')
+
+        productos = Producto.objects.filter(
+            empresa=empresa,
+            estado='activo'
+        ).select_related('categoria', 'proveedor', 'empresa')
+
+        categoria_id = request.query_params.get('categoria_id')
+        if categoria_id:
+            productos = productos.filter(categoria_id=categoria_id)
+
+        resultados = buscar_productos(productos, texto, limite)
+
+        datos = []
+        for producto, relevancia in resultados:
+            item = self.get_serializer(producto).data
+            item['relevancia'] = relevancia
+            datos.append(item)
+
+        return Response({
+            'status': 'success',
+            'empresa': {
+                'id_empresa': empresa.id_empresa,
+                'nombre': empresa.nombre
+            },
+            'consulta': texto,
+            'cantidad_resultados': len(datos),
+            'productos': datos
+        })
+
 class ProductosPorEmpresaAdminView(generics.ListAPIView):
     """
     Vista para obtener productos de la empresa del admin_empresa y vendedor
@@ -496,7 +601,7 @@ class ProductosPorEmpresaAdminView(generics.ListAPIView):
             
             nombre = request.query_params.get('nombre', '')
             if nombre:
-                productos = productos.filter(nombre__icontains=nombre)
+                productos = filtrar_productos(productos, nombre)
             
             # Filtros especiales para admin
             necesita_reponer = request.query_params.get('necesita_reponer', '').lower() == 'true'
@@ -578,24 +683,27 @@ class ProductosPorEmpresaConDetallesView(generics.GenericAPIView):
             )
             
             # Obtener productos activos de la empresa
+            from archivo.models import Archivo
             productos = Producto.objects.filter(
                 empresa=empresa,
                 estado='activo'
-            ).select_related('categoria', 'proveedor', 'empresa')
+            ).select_related('categoria', 'proveedor', 'empresa').prefetch_related(
+                # Límite de 5 archivos por producto, aplicado en la misma consulta para todos
+                models.Prefetch(
+                    'archivos',
+                    queryset=Archivo.objects.order_by('orden', 'fecha_creacion')[:5],
+                    to_attr='archivos_listado'
+                )
+            )
             
             # Preparar respuesta con detalles
             productos_con_detalles = []
             
             for producto in productos:
-                # Obtener archivos del producto
+                # Archivos del producto (precargados)
                 try:
-                    from archivo.models import Archivo
-                    archivos = Archivo.objects.filter(
-                        producto=producto
-                    ).order_by('orden')[:5]  # Límite de 5 archivos por producto
-                    
                     archivos_data = []
-                    for archivo in archivos:
+                    for archivo in producto.archivos_listado:
                         archivos_data.append({
                             'id_archivo': archivo.id_archivo,
                             'nombre': archivo.nombre,
@@ -611,6 +719,7 @@ class ProductosPorEmpresaConDetallesView(generics.GenericAPIView):
                     'descripcion': producto.descripcion,
                     'precio': float(producto.precio),
                     'stock_actual': producto.stock_actual,
+                    'stock_disponible': producto.stock_disponible,
                     'stock_minimo': producto.stock_minimo,
                     'estado': producto.estado,
                     'fecha_creacion': producto.fecha_creacion,
@@ -643,7 +752,7 @@ class ProductosPorEmpresaConDetallesView(generics.GenericAPIView):
                 'productos': productos_con_detalles,
                 'totales': {
                     'productos_activos': productos.count(),
-                    'productos_disponibles': productos.filter(stock_actual__gt=0).count(),
+                    'productos_disponibles': productos.alias(disponible=STOCK_DISPONIBLE).filter(disponible__gt=0).count(),
                     'productos_agotados': productos.filter(stock_actual__lte=0).count(),
                     'valor_inventario': sum(p.precio * p.stock_actual for p in productos)
                 }
@@ -661,4 +770,456 @@ class ProductosPorEmpresaConDetallesView(generics.GenericAPIView):
                 'status': 'error',
                 'message': 'Error al obtener productos',
                 'detail': str(e)
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class ExportarInventarioView(generics.GenericAPIView):
+    """
+    Vista para exportar el inventario de productos de la empresa
+    GET /api/productos/exportar/?formato=csv|xlsx&estado=activo
+    Solo para admin_empresa y vendedor
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    COLUMNAS = [
+        ('id_producto', 'id_producto'),
+        ('nombre', 'nombre'),
+        ('descripcion', 'descripcion'),
+        ('categoria', 'categoria__nombre'),
+        ('proveedor', 'proveedor__nombre'),
+        ('precio', 'precio'),
+        ('stock_actual', 'stock_actual'),
+        ('stock_minimo', 'stock_minimo'),
+        ('estado', 'estado'),
+        ('fecha_creacion', 'fecha_creacion'),
+        ('fecha_modificacion', 'fecha_modificacion'),
+    ]
+
+    def get(self, request, *args, **kwargs):
+        if not hasattr(request.user, 'rol') or request.user.rol.rol not in ['admin_empresa', 'vendedor']:
+            return Response({
+                'status': 'error',
+                'message': 'Permiso denegado',
+                'detail': 'Solo los usuarios de empresa pueden exportar el inventario'
+            }, status=status.HTTP_403_FORBIDDEN)
+
+        if not hasattr(request.user, 'usuario_empresa'):
+            return Response({
+                'status': 'error',
+                'message': 'Usuario sin empresa asignada',
+                'detail': 'El usuario no está asociado a ninguna empresa'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        formato = request.query_params.get('formato', 'csv').lower()
+        if formato not in FORMATOS:
+            return Response({
+                'status': 'error',
+                'message': 'Formato no soportado',
+                'detail': f'Formatos disponibles: {", ".join(FORMATOS)}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        productos = Producto.objects.filter(empresa_id=request.user.usuario_empresa.empresa_id)
+
+        estado = request.query_params.get('estado', '')
+        if estado:
+            productos = productos.filter(estado=estado)
+
+        categoria_id = request.query_params.get('categoria_id')
+        if categoria_id:
+            productos = productos.filter(categoria_id=categoria_id)
+
+        productos = productos.order_by('nombre')
+
+        logger.info(f"Exportación de inventario ({formato}) por {request.user.email}")
+        return respuesta_exportacion(productos, self.COLUMNAS, 'inventario', formato)
+
+
+class ProductoImportarView(generics.GenericAPIView):
+    """
+    Vista para importar productos de forma masiva (solo admin_empresa)
+    POST /api/productos/importar/
+    - CSV: multipart con el campo 'archivo' (encabezados: nombre, descripcion, precio,
+      stock_actual, stock_minimo, estado, categoria, proveedor)
+    - JSON: {"productos": [{...}, ...]}
+    Opciones: parcial=true importa las filas válidas aunque otras tengan errores,
+    crear_categorias=true crea las categorías que no existan
+    """
+    permission_classes = [permissions.IsAuthenticated, IsAdminEmpresa]
+    parser_classes = [JSONParser, MultiPartParser, FormParser]
+
+    def post(self, request, *args, **kwargs):
+        empresa = request.user.usuario_empresa.empresa
+        datos = request.data if hasattr(request.data, 'get') else {}
+
+        def opcion(nombre):
+            return opcion_activada(datos.get(nombre, request.query_params.get(nombre, False)))
+
+        try:
+            archivo = request.FILES.get('archivo')
+            if archivo:
+                filas = leer_filas_csv(archivo)
+            else:
+                filas = datos.get('productos') if datos else request.data
+                if not isinstance(filas, list):
+                    return Response({
+                        'status': 'error',
+                        'message': 'Formato no válido',
+                        'detail': 'Envíe un archivo CSV en "archivo" o una lista JSON en "productos"'
+                    }, status=status.HTTP_400_BAD_REQUEST)
+
+            importador = ImportadorProductos(
+                empresa,
+                filas,
+                crear_categorias=opcion('crear_categorias'),
+                parcial=opcion('parcial'),
+                usuario=request.user
+            )
+            creados, errores = importador.importar()
+
+        except ErrorCargaMasiva as e:
+            return Response({
+                'status': 'error',
+                'message': 'No se pudo importar',
+                'detail': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        reporte_errores = ImportadorProductos.formatear_errores(errores, filas)
+
+        if not creados and errores:
+            return Response({
+                'status': 'error',
+                'message': 'La importación tiene errores, no se creó ningún producto',
+                'resumen': {
+                    'total_filas': len(filas),
+                    'importados': 0,
+                    'con_errores': len(reporte_errores)
+                },
+                'errores': reporte_errores
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        # Una sola notificación para todos los productos creados con stock bajo
+        stock_bajo = [p for p in creados if p.stock_actual <= p.stock_minimo]
+        notificar_stock_bajo_agrupado(
+            empresa,
+            stock_bajo,
+            titulo=f'Stock bajo en {len(stock_bajo)} producto(s) importado(s)'
+        )
+
+        return Response({
+            'status': 'success',
+            'message': f'{len(creados)} productos importados exitosamente',
+            'resumen': {
+                'total_filas': len(filas),
+                'importados': len(creados),
+                'con_errores': len(reporte_errores),
+                'stock_bajo': len(stock_bajo)
+            },
+            'productos_creados': [p.id_producto for p in creados],
+            'errores': reporte_errores
+        }, status=status.HTTP_201_CREATED)
+
+
+class ProductoAjusteMasivoView(generics.GenericAPIView):
+    """
+    Vista para ajustar precio y/o stock de un conjunto de productos (solo admin_empresa)
+    POST /api/productos/ajuste-masivo/
+    {
+        "categoria_id": 3,                                  # filtros: ids, categoria_id,
+        "precio": {"tipo": "porcentaje", "valor": 10},      # proveedor_id, estado o todos
+        "stock_delta": -2
+    }
+    Se aplica con un único UPDATE basado en expresiones F()
+    """
+    serializer_class = AjusteMasivoSerializer
+    permission_classes = [permissions.IsAuthenticated, IsAdminEmpresa]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        empresa = request.user.usuario_empresa.empresa
+
+        # 1. Conjunto de productos a ajustar
+        productos = Producto.objects.filter(empresa=empresa)
+        if 'ids' in data:
+            productos = productos.filter(id_producto__in=data['ids'])
+        if 'categoria_id' in data:
+            productos = productos.filter(categoria_id=data['categoria_id'])
+        if 'proveedor_id' in data:
+            productos = productos.filter(proveedor_id=data['proveedor_id'])
+        if 'estado' in data:
+            productos = productos.filter(estado=data['estado'])
+
+        # 2. Expresiones del nuevo precio y stock
+        cambios = {}
+        nuevo_precio = None
+        ajuste_precio = data.get('precio')
+        if ajuste_precio:
+            if ajuste_precio['tipo'] == 'porcentaje':
+                factor = Decimal('1') + ajuste_precio['valor'] / Decimal('100')
+                nuevo_precio = Round(
+                    models.F('precio') * models.Value(factor, output_field=models.DecimalField()),
+                    2,
+                    output_field=models.DecimalField(max_digits=12, decimal_places=2)
+                )
+            else:
+                nuevo_precio = models.ExpressionWrapper(
+                    models.F('precio') + models.Value(ajuste_precio['valor'], output_field=models.DecimalField()),
+                    output_field=models.DecimalField(max_digits=12, decimal_places=2)
+                )
+            cambios['precio'] = nuevo_precio
+
+        delta = data.get('stock_delta') or 0
+        if delta:
+            nuevo_stock = models.F('stock_actual') + delta
+            cambios['stock_actual'] = nuevo_stock
+            # Agotado <-> activo según el stock resultante
+            cambios['estado'] = models.Case(
+                models.When(
+                    models.Q(estado='activo', stock_actual__lte=-delta),
+                    then=models.Value('agotado')
+                ),
+                models.When(
+                    models.Q(estado='agotado', stock_actual__gt=-delta),
+                    then=models.Value('activo')
+                ),
+                default=models.F('estado'),
+                output_field=models.CharField()
+            )
+        cambios['fecha_modificacion'] = timezone.now()
+
+        with transaction.atomic():
+            # 3. Bloquear las filas y guardar el stock previo (una consulta)
+            previos = list(
+                productos.select_for_update().order_by('id_producto').values_list(
+                    'id_producto', 'nombre', 'stock_actual', 'stock_minimo'
+                )
+            )
+            if not previos:
+                return Response({
+                    'status': 'error',
+                    'message': 'Ningún producto coincide con los filtros'
+                }, status=status.HTTP_404_NOT_FOUND)
+
+            ids = [id_producto for id_producto, _, _, _ in previos]
+            afectados = Producto.objects.filter(id_producto__in=ids)
+
+            # 4. Validar que ningún producto quede con valores no permitidos
+            # Las unidades reservadas tampoco se pueden descontar
+            sin_stock = afectados.filter(stock_actual__lt=models.F('stock_reservado') - delta)
+            if delta < 0 and sin_stock.exists():
+                return Response({
+                    'status': 'error',
+                    'message': 'El ajuste dejaría productos con stock negativo o menor a lo reservado',
+                    'productos': list(sin_stock.values('id_producto', 'nombre', 'stock_actual', 'stock_reservado'))
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            if nuevo_precio is not None:
+                fuera_de_rango = afectados.annotate(nuevo_precio=nuevo_precio).filter(
+                    models.Q(nuevo_precio__lte=0) | models.Q(nuevo_precio__gt=PRECIO_MAXIMO)
+                )
+                if fuera_de_rango.exists():
+                    return Response({
+                        'status': 'error',
+                        'message': f'El ajuste dejaría productos con precio fuera de rango (0, {PRECIO_MAXIMO}]',
+                        'productos': list(fuera_de_rango.values('id_producto', 'nombre', 'precio'))
+                    }, status=status.HTTP_400_BAD_REQUEST)
+
+            # 5. Un único UPDATE para todo el conjunto
+            actualizados = afectados.update(**cambios)
+
+            if delta:
+                kardex.registrar([
+                    MovimientoInventario(
+                        producto_id=id_producto, empresa=empresa, tipo='ajuste_masivo',
+                        cantidad=delta, usuario=request.user, referencia='ajuste-masivo'
+                    )
+                    for id_producto in ids
+                ])
+
+        # 6. Notificación única para los productos que cruzaron el stock mínimo
+        cruzaron_minimo = [
+            Producto(id_producto=id_producto, nombre=nombre, stock_actual=stock + delta, stock_minimo=minimo)
+            for id_producto, nombre, stock, minimo in previos
+            if stock > minimo and stock + delta <= minimo
+        ]
+        notificar_stock_bajo_agrupado(
+            empresa,
+            cruzaron_minimo,
+            titulo=f'Stock bajo tras ajuste masivo: {len(cruzaron_minimo)} producto(s)'
+        )
+
+        logger.info(f"Ajuste masivo por {request.user.email}: {actualizados} productos en empresa {empresa.nombre}")
+
+        return Response({
+            'status': 'success',
+            'message': f'{actualizados} productos actualizados exitosamente',
+            'total_afectados': actualizados,
+            'productos_afectados': ids,
+            'productos_stock_bajo': [p.id_producto for p in cruzaron_minimo],
+            'ajustes': {
+                'precio': {
+                    'tipo': ajuste_precio['tipo'],
+                    'valor': ajuste_precio['valor']
+                } if ajuste_precio else None,
+                'stock_delta': delta or None
+            }
+        })
+
+
+class KardexProductoView(generics.GenericAPIView):
+    """
+    Kardex de un producto: saldo inicial, movimientos con saldo acumulado y saldo final
+    GET /api/productos/<id>/kardex/?fecha_inicio=YYYY-MM-DD&fecha_fin=YYYY-MM-DD
+    Solo para admin_empresa
+    """
+    serializer_class = MovimientoInventarioSerializer
+    permission_classes = [permissions.IsAuthenticated, EsAdminEmpresa]
+
+    def get(self, request, pk):
+        empresa = request.user.usuario_empresa.empresa
+        producto = get_object_or_404(Producto, pk=pk, empresa=empresa)
+
+        fecha_inicio = request.query_params.get('fecha_inicio')
+        fecha_fin = request.query_params.get('fecha_fin')
+        try:
+            desde = timezone.make_aware(datetime.strptime(fecha_inicio, '%Y-%m-%d')) if fecha_inicio else None
+            hasta = (
+                timezone.make_aware(datetime.strptime(fecha_fin, '%Y-%m-%d')) + timedelta(days=1, microseconds=-1)
+                if fecha_fin else None
+            )
+        except ValueError:
+            return Response({
+                'status': 'error',
+                'message': 'Formato de fecha inválido, use YYYY-MM-DD'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        saldo_inicial, movimientos = kardex.kardex(producto, desde, hasta)
+
+        saldo = saldo_inicial
+        movimientos = list(movimientos)
+        for mov in movimientos:
+            saldo += mov.cantidad
+            mov.saldo = saldo
+
+        return Response({
+            'status': 'success',
+            'producto': {
+                'id_producto': producto.id_producto,
+                'nombre': producto.nombre,
+                'stock_actual': producto.stock_actual
+            },
+            'saldo_inicial': saldo_inicial,
+            'saldo_final': saldo,
+            'movimientos': self.get_serializer(movimientos, many=True).data
+        })
+
+
+class InventarioHistoricoView(generics.GenericAPIView):
+    """
+    Stock de cada producto de la empresa al cierre de una fecha (último saldo + movimientos)
+    GET /api/productos/inventario-historico/?fecha=YYYY-MM-DD
+    Solo para admin_empresa
+    """
+    permission_classes = [permissions.IsAuthenticated, EsAdminEmpresa]
+
+    def get(self, request):
+        empresa = request.user.usuario_empresa.empresa
+        fecha = request.query_params.get('fecha')
+        if not fecha:
+            return Response({
+                'status': 'error',
+                'message': 'El parámetro fecha es requerido (YYYY-MM-DD)'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            cierre = timezone.make_aware(datetime.strptime(fecha, '%Y-%m-%d')) + timedelta(days=1, microseconds=-1)
+        except ValueError:
+            return Response({
+                'status': 'error',
+                'message': 'Formato de fecha inválido, use YYYY-MM-DD'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        productos = kardex.anotar_stock_en_fecha(
+            Producto.objects.filter(empresa=empresa, fecha_creacion__lte=cierre),
+            cierre
+        ).order_by('nombre').values('id_producto', 'nombre', 'precio', 'stock_en_fecha')
+
+        resultado = [
+            {
+                'id_producto': p['id_producto'],
+                'nombre': p['nombre'],
+                'stock': p['stock_en_fecha'],
+                'valor': float(p['precio'] * p['stock_en_fecha'])
+            }
+            for p in productos
+        ]
+
+        return Response({
+            'status': 'success',
+            'fecha': fecha,
+            'productos': resultado,
+            'totales': {
+                'productos': len(resultado),
+                'unidades': sum(p['stock'] for p in resultado),
+                'valor_inventario': round(sum(p['valor'] for p in resultado), 2)
+            }
+        })
+
+
+class RecomendacionesReordenView(generics.GenericAPIView):
+    """
+    Punto de reorden sugerido por producto según el historial de ventas (producto/pronostico.py)
+    GET /api/productos/reorden/?plazo=7&nivel_servicio=0.95&limite=100&solo_reponer=true
+    Ordenado por urgencia (punto de reorden menos stock disponible). Solo para admin_empresa
+    """
+    permission_classes = [permissions.IsAuthenticated, EsAdminEmpresa]
+    LIMITE_MAXIMO = 1000
+
+    def get(self, request):
+        empresa = request.user.usuario_empresa.empresa
+        try:
+            plazo = request.query_params.get('plazo')
+            nivel_servicio = request.query_params.get('nivel_servicio')
+            plazo = int(plazo) if plazo else None
+            nivel_servicio = float(nivel_servicio) if nivel_servicio else None
+            limite = min(int(request.query_params.get('limite', 100)), self.LIMITE_MAXIMO)
+            if (plazo is not None and plazo < 1) or (nivel_servicio is not None and not 0.5 <= nivel_servicio < 1) or limite < 1:
+                raise ValueError
+        except ValueError:
+            return Response({
+                'status': 'error',
+                'message': 'Parámetros inválidos',
+                'detail': 'plazo y limite deben ser enteros positivos; nivel_servicio entre 0.5 y 1 (sin incluir)'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        solo_reponer = request.query_params.get('solo_reponer', '').lower() == 'true'
+
+        pronosticos = calcular_pronosticos(
+            empresa, PLAZO_REPOSICION_DIAS=plazo, NIVEL_SERVICIO=nivel_servicio
+        )
+
+        recomendaciones = []
+        for id_producto, nombre, stock_actual, stock_reservado, stock_minimo in Producto.objects.filter(
+            empresa=empresa
+        ).values_list('id_producto', 'nombre', 'stock_actual', 'stock_reservado', 'stock_minimo').iterator():
+            pronostico = pronosticos.get(id_producto)
+            if pronostico is None:
+                continue
+            disponible = stock_actual - stock_reservado
+            reponer = disponible <= pronostico['punto_reorden']
+            if solo_reponer and not reponer:
+                continue
+            recomendaciones.append({
+                'id_producto': id_producto,
+                'nombre': nombre,
+                'stock_disponible': disponible,
+                'stock_minimo_actual': stock_minimo,
+                **pronostico,
+                'reponer': reponer,
+            })
+        recomendaciones.sort(key=lambda r: r['punto_reorden'] - r['stock_disponible'], reverse=True)
+
+        return Response({
+            'status': 'success',
+            'total_con_pronostico': len(pronosticos),
+            'total_reponer': sum(1 for r in recomendaciones if r['reponer']),
+            'recomendaciones': recomendaciones[:limite]
+        })
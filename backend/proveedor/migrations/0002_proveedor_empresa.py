@@ -0,0 +1,97 @@
+# Generated by Django 5.1.4 on 2026-10-19 17:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def asignar_empresa(apps, schema_editor):
+    """
+    Dueño de cada proveedor según los productos y compras que lo usan. Un proveedor
+    usado por varias empresas se copia para cada una y sus referencias pasan a la copia.
+    Los proveedores sin uso quedan sin empresa.
+    """
+    Proveedor = apps.get_model('proveedor', 'Proveedor')
+    Producto = apps.get_model('producto', 'Producto')
+    DetalleCompra = apps.get_model('detalle_compra', 'DetalleCompra')
+
+    usos = {}
+    for proveedor_id, empresa_id in Producto.objects.filter(proveedor__isnull=False).values_list(
+        'proveedor_id', 'empresa_id'
+    ).distinct():
+        usos.setdefault(proveedor_id, set()).add(empresa_id)
+    for proveedor_id, empresa_id in DetalleCompra.objects.values_list(
+        'id_proveedor_id', 'id_compra__usuario_empresa__empresa_id'
+    ).distinct():
+        usos.setdefault(proveedor_id, set()).add(empresa_id)
+
+    for proveedor in Proveedor.objects.filter(id_proveedor__in=list(usos)):
+        empresas = sorted(usos[proveedor.id_proveedor])
+        Proveedor.objects.filter(id_proveedor=proveedor.id_proveedor).update(empresa_id=empresas[0])
+        for empresa_id in empresas[1:]:
+            copia = Proveedor.objects.create(
+                nombre=proveedor.nombre,
+                telefono=proveedor.telefono,
+                email=proveedor.email,
+                direccion=proveedor.direccion,
+                empresa_id=empresa_id
+            )
+            Producto.objects.filter(
+                proveedor_id=proveedor.id_proveedor, empresa_id=empresa_id
+            ).update(proveedor_id=copia.id_proveedor)
+            DetalleCompra.objects.filter(
+                id_proveedor_id=proveedor.id_proveedor,
+                id_compra__usuario_empresa__empresa_id=empresa_id
+            ).update(id_proveedor_id=copia.id_proveedor)
+
+
+# Solo PostgreSQL: búsquedas icontains (ILIKE '%...%') por nombre y email
+SQL_CREAR = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS proveedor_nombre_trgm ON proveedor USING gin (nombre gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS proveedor_email_trgm ON proveedor USING gin (email gin_trgm_ops)",
+]
+
+SQL_ELIMINAR = [
+    "DROP INDEX IF EXISTS proveedor_email_trgm",
+    "DROP INDEX IF EXISTS proveedor_nombre_trgm",
+]
+
+
+def crear_indices_trigram(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for sql in SQL_CREAR:
+        schema_editor.execute(sql)
+
+
+def eliminar_indices_trigram(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for sql in SQL_ELIMINAR:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresas', '0001_initial'),
+        ('proveedor', '0001_initial'),
+        ('producto', '0004_kardex_inventario'),
+        ('detalle_compra', '0001_initial'),
+        ('compras', '0002_indices_consultas'),
+        ('usuario_empresa', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='proveedor',
+            name='empresa',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='proveedores', to='empresas.empresa'),
+        ),
+        migrations.AddIndex(
+            model_name='proveedor',
+            index=models.Index(fields=['empresa', 'nombre'], name='proveedor_empresa_nombre_idx'),
+        ),
+        migrations.RunPython(asignar_empresa, migrations.RunPython.noop),
+        migrations.RunPython(crear_indices_trigram, eliminar_indices_trigram),
+    ]
@@ -7,6 +7,14 @@ class Proveedor(models.Model):
     telefono = models.CharField(max_length=20)
     email = models.EmailField(max_length=100)
     direccion = models.CharField(max_length=255)
+    # Cada empresa administra sus proveedores (None: sin empresa, solo visible para admin)
+    empresa = models.ForeignKey(
+        'empresas.Empresa',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='proveedores'
+    )
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     fecha_modificacion = models.DateTimeField(auto_now=True)
 
@@ -15,6 +23,11 @@ class Proveedor(models.Model):
         ordering = ['nombre']
         verbose_name = "Proveedor"
         verbose_name_plural = "Proveedores"
+        indexes = [
+            # Listado y búsqueda por nombre dentro de la empresa; en PostgreSQL además
+            # índices trigram sobre nombre y email (migración 0002)
+            models.Index(fields=['empresa', 'nombre'], name='proveedor_empresa_nombre_idx'),
+        ]
 
     def __str__(self):
         return self.nombre
\ No newline at end of file
@@ -1,22 +1,37 @@
 from rest_framework import serializers
 from .models import Proveedor
 
+
+def validar_email_en_empresa(serializer, value):
+    """El email no se repite entre los proveedores de la misma empresa"""
+    empresa_id = serializer.instance.empresa_id if serializer.instance else serializer.context.get('empresa_id')
+    repetidos = Proveedor.objects.filter(email=value, empresa_id=empresa_id)
+    if serializer.instance:
+        repetidos = repetidos.exclude(pk=serializer.instance.pk)
+    if repetidos.exists():
+        raise serializers.ValidationError("Ya existe un proveedor con este email")
+    return value
+
+
 class ProveedorSerializer(serializers.ModelSerializer):
     """Serializador para Proveedor"""
+    # Totales de compras anotados en el listado (una consulta agregada)
+    compras_realizadas = serializers.IntegerField(read_only=True, default=None)
+    total_comprado = serializers.DecimalField(max_digits=15, decimal_places=2, read_only=True, default=None)
+    ultima_compra = serializers.DateTimeField(read_only=True, default=None)
     
     class Meta:
         model = Proveedor
         fields = [
             'id_proveedor', 'nombre', 'telefono', 'email', 
-            'direccion', 'fecha_creacion'
+            'direccion', 'empresa', 'fecha_creacion',
+            'compras_realizadas', 'total_comprado', 'ultima_compra'
         ]
-        read_only_fields = ['id_proveedor', 'fecha_creacion']
+        read_only_fields = ['id_proveedor', 'empresa', 'fecha_creacion']
     
     def validate_email(self, value):
-        """Validar que el email sea único"""
-        if Proveedor.objects.filter(email=value).exists():
-            raise serializers.ValidationError("Ya existe un proveedor con este email")
-        return value
+        """Validar que el email sea único en la empresa"""
+        return validar_email_en_empresa(self, value)
 
 class ProveedorCreateSerializer(serializers.ModelSerializer):
     """Serializador para creación de proveedor público"""
@@ -26,7 +41,5 @@ class ProveedorCreateSerializer(serializers.ModelSerializer):
         fields = ['nombre', 'telefono', 'email', 'direccion']
     
     def validate_email(self, value):
-        """Validar que el email sea único"""
-        if Proveedor.objects.filter(email=value).exists():
-            raise serializers.ValidationError("Ya existe un proveedor con este email")
-        return value
\ No newline at end of file
+        """Validar que el email sea único en la empresa"""
+        return validar_email_en_empresa(self, value)
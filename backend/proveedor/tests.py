@@ -1,3 +1,162 @@
+import importlib
+from datetime import timedelta
+from decimal import Decimal
+from django.apps import apps
 from django.test import TestCase
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.test import APIClient
+from backend.benchmarks.datos import generar_datos
+from compras.models import Compra
+from detalle_compra.models import DetalleCompra
+from empresas.models import Empresa
+from producto.models import Producto
+from roles.models import Rol
+from usuario_empresa.models import Usuario_Empresa
+from usuarios.models import User
+from .models import Proveedor
 
-# Create your tests here.
+
+class CrearProveedorAdminTest(TestCase):
+    """ProveedorCreateView: la empresa que indica el admin de la plataforma debe existir"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = generar_datos(empresas=1, productos=1, clientes=1, ventas=0)
+        cls.admin = User.objects.create_user(
+            email='admin@proveedores.test', password='x', rol=Rol.objects.get(rol='admin')
+        )
+
+    def setUp(self):
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(self.admin)
+
+    def _crear(self, **datos):
+        return self.cliente.post('/api/proveedores/crear/', {
+            'nombre': 'Proveedor Admin', 'telefono': '70000000',
+            'email': 'proveedor@proveedores.test', 'direccion': 'Calle 1', **datos
+        }, format='json')
+
+    def test_empresa_existente(self):
+        respuesta = self._crear(empresa=self.datos['empresa'].pk)
+
+        self.assertEqual(respuesta.status_code, 201, respuesta.content)
+        self.assertEqual(respuesta.json()['data']['empresa'], self.datos['empresa'].pk)
+
+    def test_empresa_inexistente_o_invalida(self):
+        antes = Proveedor.objects.count()
+        for empresa in (999999, 'abc'):
+            with self.subTest(empresa=empresa):
+                respuesta = self._crear(empresa=empresa)
+                self.assertEqual(respuesta.status_code, 400)
+                self.assertEqual(respuesta.json()['message'], 'Empresa no encontrada')
+        self.assertEqual(Proveedor.objects.count(), antes)
+
+
+class ProveedoresPorEmpresaTest(TestCase):
+    """proveedores_visibles: cada empresa lista y actualiza solo sus proveedores; totales de compras"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = generar_datos(empresas=2, productos=2, clientes=1, ventas=0)
+        cls.empresa = cls.datos['empresa']
+        cls.otra = Empresa.objects.exclude(pk=cls.empresa.pk).get()
+        cls.vendedor = cls.datos['vendedor']
+        cls.propio = Proveedor.objects.filter(empresa=cls.empresa).order_by('pk').first()
+        cls.ajeno = Proveedor.objects.filter(empresa=cls.otra).order_by('pk').first()
+        cls.admin = User.objects.create_user(
+            email='admin@proveedores.test', password='x', rol=Rol.objects.get(rol='admin')
+        )
+
+    def setUp(self):
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(self.vendedor)
+
+    def test_lista_solo_los_de_su_empresa(self):
+        respuesta = self.cliente.get('/api/proveedores/listar/')
+
+        self.assertEqual(respuesta.status_code, 200, respuesta.content)
+        self.assertEqual(
+            sorted(proveedor['id_proveedor'] for proveedor in respuesta.json()['proveedores']),
+            sorted(Proveedor.objects.filter(empresa=self.empresa).values_list('pk', flat=True))
+        )
+        self.assertEqual({proveedor['empresa'] for proveedor in respuesta.json()['proveedores']}, {self.empresa.pk})
+
+        self.cliente.force_authenticate(self.admin)
+        self.assertEqual(self.cliente.get('/api/proveedores/listar/').json()['cantidad_proveedores'], 6)
+
+    def test_detalle_y_actualizacion_de_otra_empresa(self):
+        self.assertEqual(self.cliente.get(f'/api/proveedores/{self.ajeno.pk}/').status_code, 404)
+        respuesta = self.cliente.patch(f'/api/proveedores/{self.ajeno.pk}/actualizar/', {'telefono': '1'}, format='json')
+        self.assertEqual(respuesta.status_code, 404)
+        self.ajeno.refresh_from_db()
+        self.assertEqual(self.ajeno.telefono, '0')
+
+        respuesta = self.cliente.patch(f'/api/proveedores/{self.propio.pk}/actualizar/', {'telefono': '1'}, format='json')
+        self.assertEqual(respuesta.status_code, 200, respuesta.content)
+        self.propio.refresh_from_db()
+        self.assertEqual(self.propio.telefono, '1')
+
+    def test_totales_de_compras(self):
+        vendedor = Usuario_Empresa.objects.get(id_usuario=self.vendedor)
+        productos = list(Producto.objects.filter(empresa=self.empresa).order_by('pk'))
+        fechas = []
+        for dias, lineas in ((10, [(productos[0], '100.00'), (productos[1], '50.00')]), (2, [(productos[0], '30.00')])):
+            compra = Compra.objects.create(usuario_empresa=vendedor, precio_total=Decimal('0'))
+            fechas.append(timezone.now() - timedelta(days=dias))
+            Compra.objects.filter(pk=compra.pk).update(fecha=fechas[-1])
+            DetalleCompra.objects.bulk_create([
+                DetalleCompra(id_compra=compra, id_producto=producto, id_proveedor=self.propio,
+                              cantidad=1, precio_unitario=Decimal(subtotal), subtotal=Decimal(subtotal))
+                for producto, subtotal in lineas
+            ])
+
+        respuesta = self.cliente.get('/api/proveedores/listar/')
+        proveedores = {proveedor['id_proveedor']: proveedor for proveedor in respuesta.json()['proveedores']}
+
+        # Dos compras (no tres líneas), 180 en total, la última hace 2 días
+        propio = proveedores[self.propio.pk]
+        self.assertEqual((propio['compras_realizadas'], propio['total_comprado']), (2, '180.00'))
+        self.assertEqual(parse_datetime(propio['ultima_compra']), fechas[1])
+        sin_compras = next(proveedor for pk, proveedor in proveedores.items() if pk != self.propio.pk)
+        self.assertEqual(
+            (sin_compras['compras_realizadas'], sin_compras['total_comprado'], sin_compras['ultima_compra']),
+            (0, None, None)
+        )
+
+
+class MigracionProveedorEmpresaTest(TestCase):
+    """proveedor/migrations/0002: un proveedor usado por varias empresas se copia para cada una"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = generar_datos(empresas=2, productos=1, clientes=1, ventas=0)
+        cls.empresas = list(Empresa.objects.order_by('pk'))
+
+    def test_asignar_empresa(self):
+        migracion = importlib.import_module('proveedor.migrations.0002_proveedor_empresa')
+        compartido = Proveedor.objects.create(nombre='Compartido', telefono='1', email='c@proveedores.test', direccion='-')
+        sin_uso = Proveedor.objects.create(nombre='Sin uso', telefono='2', email='s@proveedores.test', direccion='-')
+        primera, segunda = self.empresas
+        producto_primera = Producto.objects.filter(empresa=primera).first()
+        producto_segunda = Producto.objects.filter(empresa=segunda).first()
+        Producto.objects.filter(pk=producto_primera.pk).update(proveedor=compartido)
+        # La segunda empresa solo lo usa en una compra
+        vendedor_segunda = Usuario_Empresa.objects.filter(empresa=segunda, id_usuario__rol__rol='vendedor').get()
+        compra = Compra.objects.create(usuario_empresa=vendedor_segunda, precio_total=Decimal('5.00'))
+        detalle = DetalleCompra.objects.create(
+            id_compra=compra, id_producto=producto_segunda, id_proveedor=compartido,
+            cantidad=1, precio_unitario=Decimal('5.00'), subtotal=Decimal('5.00')
+        )
+
+        migracion.asignar_empresa(apps, None)
+
+        compartido.refresh_from_db()
+        self.assertEqual(compartido.empresa, primera)
+        copia = Proveedor.objects.get(nombre='Compartido', empresa=segunda)
+        self.assertEqual((copia.telefono, copia.email), ('1', 'c@proveedores.test'))
+        detalle.refresh_from_db()
+        self.assertEqual(detalle.id_proveedor, copia)
+        self.assertEqual(Producto.objects.get(pk=producto_primera.pk).proveedor, compartido)
+        sin_uso.refresh_from_db()
+        self.assertIsNone(sin_uso.empresa)
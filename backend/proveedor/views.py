@@ -3,12 +3,30 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import PermissionDenied
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db.models import Count, Max, Sum
+from django.http import Http404
 from .models import Proveedor
 from .serializers import ProveedorSerializer, ProveedorCreateSerializer
+from usuario_empresa.models import Usuario_Empresa
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+def empresa_del_usuario(user):
+    """id de la empresa del usuario (None para el admin de la plataforma)"""
+    return Usuario_Empresa.objects.filter(id_usuario=user).values_list('empresa_id', flat=True).first()
+
+
+def proveedores_visibles(user):
+    """El admin de la plataforma ve todos; el resto, solo los de su empresa"""
+    if user.rol.rol == 'admin':
+        return Proveedor.objects.all()
+    empresa_id = empresa_del_usuario(user)
+    if empresa_id is None:
+        return Proveedor.objects.none()
+    return Proveedor.objects.filter(empresa_id=empresa_id)
+
 # Permiso personalizado para admin_empresa y admin
 class AdminEmpresaAdminPermission(permissions.BasePermission):
     """
@@ -35,6 +53,30 @@ class ProveedorCreateView(generics.CreateAPIView):
     serializer_class = ProveedorCreateSerializer
     permission_classes = [IsAuthenticated, AdminEmpresaAdminPermission]
     
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['empresa_id'] = self._empresa_id()
+        return context
+    
+    def _empresa_id(self):
+        # El admin de la plataforma indica la empresa (opcional, validada en create)
+        if self.request.user.rol.rol == 'admin':
+            empresa = self.request.data.get('empresa')
+            return int(empresa) if empresa not in (None, '') else None
+        return empresa_del_usuario(self.request.user)
+
+    def _empresa_indicada_valida(self):
+        """La empresa que indica el admin (si indica una) existe"""
+        from empresas.models import Empresa
+
+        empresa = self.request.data.get('empresa')
+        if empresa in (None, ''):
+            return True
+        try:
+            return Empresa.objects.filter(pk=int(empresa)).exists()
+        except (TypeError, ValueError):
+            return False
+    
     def create(self, request, *args, **kwargs):
         try:
             logger.info(f"Intento de crear proveedor por usuario: {request.user.email}")
@@ -46,9 +88,23 @@ class ProveedorCreateView(generics.CreateAPIView):
                 'rol': request.user.rol.rol
             }
             
+            if request.user.rol.rol == 'admin' and not self._empresa_indicada_valida():
+                return Response({
+                    'status': 'error',
+                    'message': 'Empresa no encontrada',
+                    'detail': f'No existe una empresa con id {request.data.get("empresa")}'
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            empresa_id = self._empresa_id()
+            if empresa_id is None and request.user.rol.rol != 'admin':
+                return Response({
+                    'status': 'error',
+                    'message': 'El usuario no tiene empresa asignada'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
             serializer = self.get_serializer(data=request.data)
             serializer.is_valid(raise_exception=True)
-            proveedor = serializer.save()
+            proveedor = serializer.save(empresa_id=empresa_id)
             
             logger.info(f"Proveedor creado exitosamente: {proveedor.nombre} por {request.user.email}")
             
@@ -61,6 +117,7 @@ class ProveedorCreateView(generics.CreateAPIView):
                     'telefono': proveedor.telefono,
                     'email': proveedor.email,
                     'direccion': proveedor.direccion,
+                    'empresa': proveedor.empresa_id,
                     'fecha_creacion': proveedor.fecha_creacion
                 },
                 'creado_por': usuario_creador
@@ -78,6 +135,7 @@ class ProveedorCreateView(generics.CreateAPIView):
 class ProveedorListView(generics.ListAPIView):
     """
     Vista para listar proveedores (solo admin_empresa, admin y vendedor)
+    Cada empresa ve solo sus proveedores; nombre y email usan índices trigram en PostgreSQL
     """
     serializer_class = ProveedorSerializer
     permission_classes = [IsAuthenticated, AdminEmpresaAdminPermission]
@@ -86,7 +144,12 @@ class ProveedorListView(generics.ListAPIView):
     ordering_fields = ['nombre', 'fecha_creacion']
     
     def get_queryset(self):
-        queryset = Proveedor.objects.all()
+        # Solo los proveedores de la empresa, con los totales de sus compras (un JOIN agregado)
+        queryset = proveedores_visibles(self.request.user).annotate(
+            compras_realizadas=Count('detallecompra__id_compra', distinct=True),
+            total_comprado=Sum('detallecompra__subtotal'),
+            ultima_compra=Max('detallecompra__id_compra__fecha')
+        )
         
         # Aplicar filtros manuales
         nombre = self.request.query_params.get('nombre', '')
@@ -146,9 +209,11 @@ class ProveedorDetailView(generics.RetrieveAPIView):
     """
     serializer_class = ProveedorSerializer
     permission_classes = [IsAuthenticated, AdminEmpresaAdminPermission]
-    queryset = Proveedor.objects.all()
     lookup_field = 'id_proveedor'
     
+    def get_queryset(self):
+        return proveedores_visibles(self.request.user)
+    
     def retrieve(self, request, *args, **kwargs):
         try:
             logger.info(f"Consultando detalle de proveedor por usuario: {request.user.email}")
@@ -168,7 +233,7 @@ class ProveedorDetailView(generics.RetrieveAPIView):
                 'proveedor': serializer.data
             })
             
-        except Proveedor.DoesNotExist:
+        except (Proveedor.DoesNotExist, Http404):
             return Response({
                 'status': 'error',
                 'message': 'Proveedor no encontrado'
@@ -187,9 +252,11 @@ class ProveedorUpdateView(generics.UpdateAPIView):
     """
     serializer_class = ProveedorSerializer
     permission_classes = [IsAuthenticated, AdminEmpresaAdminPermission]
-    queryset = Proveedor.objects.all()
     lookup_field = 'id_proveedor'
     
+    def get_queryset(self):
+        return proveedores_visibles(self.request.user)
+    
     def update(self, request, *args, **kwargs):
         try:
             logger.info(f"Actualizando proveedor por usuario: {request.user.email}")
@@ -225,6 +292,11 @@ class ProveedorUpdateView(generics.UpdateAPIView):
                 'datos_nuevos': serializer.data
             })
             
+        except Http404:
+            return Response({
+                'status': 'error',
+                'message': 'Proveedor no encontrado'
+            }, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             logger.error(f"Error al actualizar proveedor: {str(e)}")
             return Response({
@@ -239,9 +311,11 @@ class ProveedorDeleteView(generics.DestroyAPIView):
     """
     serializer_class = ProveedorSerializer
     permission_classes = [IsAuthenticated, AdminEmpresaAdminPermission]
-    queryset = Proveedor.objects.all()
     lookup_field = 'id_proveedor'
     
+    def get_queryset(self):
+        return proveedores_visibles(self.request.user)
+    
     def destroy(self, request, *args, **kwargs):
         try:
             logger.info(f"Eliminando proveedor por usuario: {request.user.email}")
@@ -275,6 +349,11 @@ class ProveedorDeleteView(generics.DestroyAPIView):
                 'proveedor_eliminado': datos_eliminados
             }, status=status.HTTP_200_OK)
             
+        except Http404:
+            return Response({
+                'status': 'error',
+                'message': 'Proveedor no encontrado'
+            }, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             logger.error(f"Error al eliminar proveedor: {str(e)}")
             return Response({
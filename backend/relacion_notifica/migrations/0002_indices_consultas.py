@@ -0,0 +1,24 @@
+# Generated by Django 5.1.4 on 2026-10-19 16:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notificaciones', '0001_initial'),
+        ('relacion_notifica', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notifica',
+            index=models.Index(condition=models.Q(('eliminado', False)), fields=['id_usuario', 'leido'], name='notifica_bandeja_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notifica',
+            index=models.Index(condition=models.Q(('eliminado', False), ('leido', False)), fields=['id_usuario'], include=('id_notificacion',), name='notifica_no_leidas_idx'),
+        ),
+    ]
@@ -12,4 +12,19 @@ class Notifica(models.Model):
     
     class Meta:
         db_table = "notifica"
-        unique_together = ('id_usuario', 'id_notificacion')
\ No newline at end of file
+        unique_together = ('id_usuario', 'id_notificacion')
+        indexes = [
+            # Bandeja del usuario (excluye eliminadas), filtrable por leido
+            models.Index(
+                fields=['id_usuario', 'leido'],
+                condition=models.Q(eliminado=False),
+                name='notifica_bandeja_idx'
+            ),
+            # Bandeja de no leídas: índice parcial que cubre id_notificacion para el JOIN
+            models.Index(
+                fields=['id_usuario'],
+                include=['id_notificacion'],
+                condition=models.Q(leido=False, eliminado=False),
+                name='notifica_no_leidas_idx'
+            ),
+        ]
\ No newline at end of file
@@ -1,3 +1,91 @@
+from django.db.models import Count
 from django.test import TestCase
+from rest_framework.test import APIClient
+from backend.benchmarks.datos import generar_datos
+from backend.pruebas import ConsultasConstantesMixin, PlanConsultaMixin
+from roles.models import Rol
+from usuarios.models import User
+from notificaciones.models import Notificacion
+from .models import Notifica
 
-# Create your tests here.
+
+class IndicesNotificaTest(PlanConsultaMixin, TestCase):
+    """Verifica con EXPLAIN que la bandeja de notificaciones usa los índices de notifica"""
+    USUARIOS = 50
+    NOTIFICACIONES = 100
+
+    @classmethod
+    def setUpTestData(cls):
+        rol = Rol.objects.create(rol='vendedor', descripcion='Vendedor')
+        usuarios = User.objects.bulk_create([
+            User(email=f'usuario{i}@test.com', rol=rol, estado='activo', password='!')
+            for i in range(cls.USUARIOS)
+        ])
+        notificaciones = Notificacion.objects.bulk_create([
+            Notificacion(titulo=f'Aviso {i}', mensaje='-', tipo='info')
+            for i in range(cls.NOTIFICACIONES)
+        ])
+
+        # La mayoría de las notificaciones ya fueron leídas
+        Notifica.objects.bulk_create([
+            Notifica(
+                id_usuario=usuario,
+                id_notificacion=notificacion,
+                leido=indice % 10 != 0,
+                eliminado=indice % 25 == 0
+            )
+            for usuario in usuarios
+            for indice, notificacion in enumerate(notificaciones)
+        ], batch_size=1000)
+
+        cls.usuario = usuarios[0]
+        cls.actualizar_estadisticas('notifica', 'notificacion')
+
+    def test_no_leidas_usa_indice_parcial(self):
+        consulta = Notifica.objects.filter(id_usuario=self.usuario, leido=False, eliminado=False)
+        self.assertUsaIndice(consulta.values('id_notificacion'), 'notifica_no_leidas_idx')
+
+    def test_conteo_bandeja_usa_indice_parcial(self):
+        # Forma de las estadísticas de la bandeja (conteos por leido)
+        consulta = Notifica.objects.filter(
+            id_usuario=self.usuario,
+            eliminado=False
+        ).values('leido').annotate(total=Count('id')).order_by()
+        self.assertUsaIndice(consulta, 'notifica_bandeja_idx')
+
+
+class ConsultasListaNotificacionesTest(ConsultasConstantesMixin, TestCase):
+    """ListarNotificacionesView: la bandeja y sus estadísticas no crecen con las notificaciones"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = generar_datos(empresas=1, productos=1, clientes=1, ventas=0)
+
+    def _agregar_notificaciones(self):
+        notificaciones = Notificacion.objects.bulk_create([
+            Notificacion(titulo=f'Nueva {i}', mensaje='-', tipo='venta') for i in range(10)
+        ])
+        Notifica.objects.bulk_create([
+            Notifica(id_usuario=self.datos['vendedor'], id_notificacion=notificacion, leido=i % 2 == 0)
+            for i, notificacion in enumerate(notificaciones)
+        ])
+
+    def test_mis_notificaciones(self):
+        cliente = APIClient()
+        cliente.force_authenticate(self.datos['vendedor'])
+        self.assertConsultasConstantes(
+            lambda: cliente.get('/api/notificaciones/mis-notificaciones/'),
+            self._agregar_notificaciones,
+            lambda respuesta: len(respuesta.json()['notificaciones'])
+        )
+
+    def test_limite_con_estadisticas(self):
+        cliente = APIClient()
+        cliente.force_authenticate(self.datos['vendedor'])
+        respuesta = cliente.get('/api/notificaciones/mis-notificaciones/?limit=3')
+
+        self.assertEqual(respuesta.status_code, 200)
+        datos = respuesta.json()
+        self.assertEqual(len(datos['notificaciones']), 3)
+        self.assertEqual(datos['total'], 3)
+        self.assertEqual(datos['leidas'] + datos['no_leidas'], 3)
@@ -58,12 +58,14 @@ class ListarNotificacionesView(generics.ListAPIView):
     
     def list(self, request, *args, **kwargs):
         """Respuesta personalizada con estadísticas"""
-        queryset = self.filter_queryset(self.get_queryset())
+        # Una sola consulta: las estadísticas salen de las filas ya cargadas (con ?limit el
+        # queryset está recortado y no admite más filtros)
+        notificaciones = list(self.filter_queryset(self.get_queryset()))
         
         # Obtener estadísticas
-        total = queryset.count()
-        no_leidas = queryset.filter(leido=False).count()
-        leidas = queryset.filter(leido=True).count()
+        total = len(notificaciones)
+        no_leidas = sum(1 for notifica in notificaciones if not notifica.leido)
+        leidas = total - no_leidas
         
         # Contar eliminadas (aunque no se muestren)
         eliminadas = Notifica.objects.filter(
@@ -72,7 +74,7 @@ class ListarNotificacionesView(generics.ListAPIView):
         ).count()
         
         # Serializar datos
-        serializer = self.get_serializer(queryset, many=True)
+        serializer = self.get_serializer(notificaciones, many=True)
         
         response_data = {
             'notificaciones': serializer.data,
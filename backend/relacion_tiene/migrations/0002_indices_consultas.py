@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-19 16:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cliente', '0001_initial'),
+        ('empresas', '0001_initial'),
+        ('relacion_tiene', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tiene',
+            index=models.Index(fields=['id_empresa', 'estado'], name='tiene_empresa_estado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tiene',
+            index=models.Index(fields=['id_cliente', 'estado'], name='tiene_cliente_estado_idx'),
+        ),
+    ]
@@ -19,6 +19,10 @@ class Tiene(models.Model):
         db_table = "tiene"
         ordering = ["fecha_registro"]
         unique_together = ('id_cliente', 'id_empresa')  # Clave primaria compuesta
+        indexes = [
+            models.Index(fields=['id_empresa', 'estado'], name='tiene_empresa_estado_idx'),
+            models.Index(fields=['id_cliente', 'estado'], name='tiene_cliente_estado_idx'),
+        ]
     
     def __str__(self):
         return f"{self.id_cliente.nombre_cliente} - {self.id_empresa.nombre}"
\ No newline at end of file
@@ -6,8 +6,16 @@ from cliente.serializers import ClienteSerializer
 
 class TieneSerializer(serializers.ModelSerializer):
     cliente = ClienteSerializer(source='id_cliente', read_only=True)
+    # Anotados por cliente/segmentacion.anotar_segmento (EmpresaClientesView)
+    segmento = serializers.CharField(read_only=True, default=None)
+    valor_cliente = serializers.DecimalField(max_digits=15, decimal_places=2, read_only=True, default=None)
+    compras_cliente = serializers.IntegerField(read_only=True, default=None)
+    ultima_compra_cliente = serializers.DateTimeField(read_only=True, default=None)
     
     class Meta:
         model = Tiene
-        fields = ['id_cliente', 'id_empresa', 'fecha_registro', 'estado', 'cliente']
+        fields = [
+            'id_cliente', 'id_empresa', 'fecha_registro', 'estado', 'cliente',
+            'segmento', 'valor_cliente', 'compras_cliente', 'ultima_compra_cliente'
+        ]
         read_only_fields = ['fecha_registro']
\ No newline at end of file
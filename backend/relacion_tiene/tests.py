@@ -1,3 +1,50 @@
 from django.test import TestCase
+from backend.pruebas import PlanConsultaMixin
+from roles.models import Rol
+from usuarios.models import User
+from empresas.models import Empresa
+from cliente.models import Cliente
+from .models import Tiene
 
-# Create your tests here.
+
+class IndicesTieneTest(PlanConsultaMixin, TestCase):
+    """Verifica con EXPLAIN que las relaciones cliente-empresa filtran por estado con índice"""
+    EMPRESAS = 20
+    CLIENTES = 100
+
+    @classmethod
+    def setUpTestData(cls):
+        rol = Rol.objects.create(rol='cliente', descripcion='Cliente')
+        empresas = Empresa.objects.bulk_create([
+            Empresa(nombre=f'Empresa {i}', nit=f'NIT-{i}', rubro='retail', direccion='-',
+                    telefono='0', email=f'empresa{i}@test.com', estado='activo')
+            for i in range(cls.EMPRESAS)
+        ])
+        usuarios = User.objects.bulk_create([
+            User(email=f'cliente{i}@test.com', rol=rol, estado='activo', password='!')
+            for i in range(cls.CLIENTES)
+        ])
+        clientes = Cliente.objects.bulk_create([
+            Cliente(id_usuario=usuario, nit=f'C-{i}', nombre_cliente=f'Cliente {i}',
+                    direccion_cliente='-', telefono_cliente='0')
+            for i, usuario in enumerate(usuarios)
+        ])
+
+        estados = ['activo', 'activo', 'activo', 'inactivo', 'pendiente', 'bloqueado']
+        Tiene.objects.bulk_create([
+            Tiene(id_cliente=cliente, id_empresa=empresa, estado=estados[(i + j) % len(estados)])
+            for i, cliente in enumerate(clientes)
+            for j, empresa in enumerate(empresas)
+        ], batch_size=1000)
+
+        cls.empresa = empresas[0]
+        cls.cliente = clientes[0]
+        cls.actualizar_estadisticas('tiene')
+
+    def test_clientes_activos_de_empresa(self):
+        consulta = Tiene.objects.filter(id_empresa=self.empresa, estado='activo')
+        self.assertUsaIndice(consulta.values('id_cliente'), 'tiene_empresa_estado_idx')
+
+    def test_empresas_activas_de_cliente(self):
+        consulta = Tiene.objects.filter(id_cliente=self.cliente, estado='activo')
+        self.assertUsaIndice(consulta.values('id_empresa'), 'tiene_cliente_estado_idx')
@@ -13,6 +13,8 @@ class EmpresaClientesView(generics.ListAPIView):
     """
     Vista para listar clientes de una empresa específica
     Solo admin_empresa puede ver sus propios clientes
+    ?segmento=campeones|leales|... filtra y ?orden=valor|compras|ultima_compra (con '-'
+    descendente) ordena por el resumen RFM de la empresa (cliente/segmentacion.py)
     """
     serializer_class = TieneSerializer
     permission_classes = [IsAuthenticated]
@@ -23,10 +25,17 @@ class EmpresaClientesView(generics.ListAPIView):
         
         try:
             from usuario_empresa.models import Usuario_Empresa
+            from cliente.segmentacion import anotar_segmento
             usuario_empresa = Usuario_Empresa.objects.get(id_usuario=self.request.user)
             empresa = usuario_empresa.empresa_id
             
-            return Tiene.objects.filter(id_empresa=empresa)
+            return anotar_segmento(
+                Tiene.objects.filter(id_empresa=empresa).select_related('id_cliente'),
+                empresa,
+                cliente='id_cliente',
+                segmento=self.request.query_params.get('segmento'),
+                orden=self.request.query_params.get('orden')
+            )
         except Exception:
             return Tiene.objects.none()
 
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.4 on 2026-10-19 16:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('producto', '0002_producto_busqueda'),
+        ('reservas', '0001_initial'),
+        ('usuario_empresa', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['estado', 'fecha_expiracion'], name='reserva_estado_expira_idx'),
+        ),
+    ]
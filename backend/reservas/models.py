@@ -21,4 +21,8 @@ class Reserva(models.Model):
     class Meta:
         db_table = "reserva"
         unique_together = ('id_usuario', 'id_producto')  # Cambiado
-        ordering = ["-fecha_reserva"]
\ No newline at end of file
+        ordering = ["-fecha_reserva"]
+        indexes = [
+            # Barrido de expiración: estado='pendiente' AND fecha_expiracion < ahora
+            models.Index(fields=['estado', 'fecha_expiracion'], name='reserva_estado_expira_idx'),
+        ]
\ No newline at end of file
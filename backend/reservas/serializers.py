@@ -98,10 +98,10 @@ class CrearReservaSerializer(serializers.Serializer):
         except Producto.DoesNotExist:
             raise serializers.ValidationError("Producto no disponible para reserva")
         
-        # 4. Verificar stock suficiente
-        if producto.stock_actual < data['cantidad']:
+        # 4. Verificar stock disponible (la vista lo aparta con un UPDATE condicional)
+        if producto.stock_disponible < data['cantidad']:
             raise serializers.ValidationError(
-                f"Stock insuficiente. Disponible: {producto.stock_actual}"
+                f"Stock insuficiente. Disponible: {producto.stock_disponible}"
             )
         
         # 5. Verificar si ya existe una reserva activa para este usuario-producto
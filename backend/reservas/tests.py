@@ -1,3 +1,187 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from backend.benchmarks.datos import generar_datos
+from backend.pruebas import PlanConsultaMixin
+from roles.models import Rol
+from usuarios.models import User
+from empresas.models import Empresa
+from usuario_empresa.models import Usuario_Empresa
+from producto.models import Producto
+from producto.stock import reservar
+from .models import Reserva
+from .serializers import CrearReservaSerializer
 
-# Create your tests here.
+
+class IndicesReservaTest(PlanConsultaMixin, TestCase):
+    """Verifica con EXPLAIN que el barrido de expiración usa los índices de reserva"""
+    USUARIOS = 40
+    PRODUCTOS = 100
+
+    @classmethod
+    def setUpTestData(cls):
+        rol = Rol.objects.create(rol='vendedor', descripcion='Vendedor')
+        empresa = Empresa.objects.create(
+            nombre='Empresa', nit='NIT-1', rubro='retail', direccion='-',
+            telefono='0', email='empresa@test.com', estado='activo'
+        )
+        usuarios = User.objects.bulk_create([
+            User(email=f'vendedor{i}@test.com', rol=rol, estado='activo', password='!')
+            for i in range(cls.USUARIOS)
+        ])
+        usuarios_empresa = Usuario_Empresa.objects.bulk_create([
+            Usuario_Empresa(id_usuario=usuario, empresa=empresa, estado='activo')
+            for usuario in usuarios
+        ])
+        productos = Producto.objects.bulk_create([
+            Producto(nombre=f'Producto {i}', precio=Decimal('10.00'), stock_actual=100, empresa=empresa)
+            for i in range(cls.PRODUCTOS)
+        ])
+
+        # Historial mayoritariamente cerrado; pocas reservas pendientes
+        estados = ['completada', 'cancelada', 'expirada', 'completada', 'confirmada',
+                   'completada', 'cancelada', 'expirada', 'completada', 'pendiente']
+        ahora = timezone.now()
+        Reserva.objects.bulk_create([
+            Reserva(
+                id_usuario=usuario_empresa,
+                id_producto=producto,
+                cantidad=1,
+                estado=estados[indice % len(estados)],
+                fecha_expiracion=ahora + timedelta(hours=72 - indice % 500)
+            )
+            for indice, (usuario_empresa, producto) in enumerate(
+                (ue, p) for ue in usuarios_empresa for p in productos
+            )
+        ], batch_size=1000)
+
+        cls.actualizar_estadisticas('reserva')
+
+    def test_barrido_de_pendientes_vencidas(self):
+        consulta = Reserva.objects.filter(estado='pendiente', fecha_expiracion__lt=timezone.now())
+        self.assertUsaIndice(consulta, 'reserva_estado_expira_idx')
+
+    def test_filtro_por_estado_y_expiracion(self):
+        consulta = Reserva.objects.filter(
+            estado='confirmada',
+            fecha_expiracion__lt=timezone.now()
+        )
+        self.assertUsaIndice(consulta, 'reserva_estado_expira_idx')
+
+
+class StockReservadoTest(TestCase):
+    """Reservas y ventas sobre stock_reservado: disponible = stock_actual - stock_reservado"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = generar_datos(empresas=1, productos=1, clientes=1, ventas=0)
+        cls.producto = cls.datos['producto']
+
+    def setUp(self):
+        Producto.objects.filter(pk=self.producto.pk).update(stock_actual=10, stock_reservado=0)
+
+    def _cliente(self, usuario):
+        cliente = APIClient()
+        cliente.force_authenticate(usuario)
+        return cliente
+
+    def _reservar(self, usuario, cantidad):
+        return self._cliente(usuario).post(
+            '/api/reservas/crear/', {'id_producto': self.producto.pk, 'cantidad': cantidad}, format='json'
+        )
+
+    def _vender(self, usuario, cantidad):
+        return self._cliente(usuario).post('/api/ventas/realizar-compra/', {
+            'cliente_id': self.datos['cliente'].id_usuario_id,
+            'detalles': [{'id_producto': self.producto.pk, 'cantidad': cantidad, 'precio_unitario': '1.00'}]
+        }, format='json')
+
+    def _cancelar(self, usuario):
+        return self._cliente(usuario).put('/api/reservas/cancelar/', {'id_producto': self.producto.pk}, format='json')
+
+    def _stock(self):
+        return tuple(Producto.objects.filter(pk=self.producto.pk).values_list(
+            'stock_actual', 'stock_reservado'
+        ).get())
+
+    def test_reservar_mas_que_el_disponible(self):
+        self.assertEqual(self._reservar(self.datos['admin_empresa'], 7).status_code, 201)
+
+        respuesta = self._reservar(self.datos['vendedor'], 4)
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(self._stock(), (10, 7))
+
+    def test_reserva_concurrente_responde_409(self):
+        validate = CrearReservaSerializer.validate
+
+        def validar_y_reservar_otro(serializer, data):
+            data = validate(serializer, data)
+            # Otra reserva toma el disponible entre la validación y el UPDATE condicional
+            reservar(self.producto.pk, 8)
+            return data
+
+        with mock.patch.object(CrearReservaSerializer, 'validate', validar_y_reservar_otro):
+            respuesta = self._reservar(self.datos['vendedor'], 4)
+
+        self.assertEqual(respuesta.status_code, 409)
+        self.assertEqual(self._stock(), (10, 8))
+        self.assertFalse(Reserva.objects.exists())
+
+    def test_cancelar_libera_una_sola_vez(self):
+        self._reservar(self.datos['admin_empresa'], 3)
+        self._reservar(self.datos['vendedor'], 4)
+
+        self.assertEqual(self._cancelar(self.datos['vendedor']).status_code, 200)
+        self.assertEqual(self._cancelar(self.datos['vendedor']).status_code, 400)
+        self.assertEqual(self._stock(), (10, 3))
+
+    def test_expirar_libera_una_sola_vez(self):
+        self._reservar(self.datos['admin_empresa'], 3)
+        self._reservar(self.datos['vendedor'], 4)
+        Reserva.objects.filter(id_usuario__id_usuario=self.datos['vendedor']).update(
+            fecha_expiracion=timezone.now() - timedelta(minutes=1)
+        )
+
+        self.assertEqual(self.client.get('/api/reservas/verificar-expiradas/').json()['total'], 1)
+        self.assertEqual(self.client.get('/api/reservas/verificar-expiradas/').json()['total'], 0)
+        self.assertEqual(self._cancelar(self.datos['vendedor']).status_code, 400)
+        self.assertEqual(self._stock(), (10, 3))
+
+    def test_venta_consume_solo_la_reserva_propia(self):
+        self._reservar(self.datos['vendedor'], 4)
+        self._reservar(self.datos['admin_empresa'], 3)
+
+        respuesta = self._vender(self.datos['vendedor'], 4)
+        self.assertEqual(respuesta.status_code, 201, respuesta.content)
+        self.assertEqual(self._stock(), (6, 3))
+        self.assertFalse(Reserva.objects.filter(id_usuario__id_usuario=self.datos['vendedor']).exists())
+
+        # Sin reserva solo quedan 3 disponibles: las 3 reservadas por otro no se venden
+        self.assertEqual(self._vender(self.datos['vendedor'], 4).status_code, 400)
+        self.assertEqual(self._stock(), (6, 3))
+        self.assertEqual(self._vender(self.datos['vendedor'], 3).status_code, 201)
+        self.assertEqual(self._stock(), (3, 3))
+
+    def _vender_lineas(self, usuario, *cantidades):
+        return self._cliente(usuario).post('/api/ventas/realizar-compra/', {
+            'cliente_id': self.datos['cliente'].id_usuario_id,
+            'detalles': [
+                {'id_producto': self.producto.pk, 'cantidad': cantidad, 'precio_unitario': '1.00'}
+                for cantidad in cantidades
+            ]
+        }, format='json')
+
+    def test_producto_repetido_no_toma_reservas_ajenas(self):
+        self._reservar(self.datos['vendedor'], 4)
+        self._reservar(self.datos['admin_empresa'], 3)
+
+        # Con la reserva pasada a las dos líneas, la segunda tomaba las 3 del otro vendedor
+        respuesta = self._vender_lineas(self.datos['vendedor'], 4, 4)
+
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn('aparece más de una vez', str(respuesta.json()))
+        self.assertEqual(self._stock(), (10, 7))
+        self.assertTrue(Reserva.objects.filter(id_usuario__id_usuario=self.datos['vendedor']).exists())
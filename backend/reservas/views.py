@@ -3,6 +3,7 @@ from rest_framework import generics, status, permissions
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
+from django.db import transaction
 from django.utils import timezone
 from rest_framework.permissions import AllowAny
 from datetime import timedelta
@@ -15,6 +16,7 @@ from .serializers import (
     CancelarReservaSerializer
 )
 from producto.models import Producto
+from producto.stock import reservar, liberar_reserva, liberar_reservas, StockInsuficiente
 
 logger = logging.getLogger(__name__)
 
@@ -50,17 +52,27 @@ class CrearReservaView(generics.CreateAPIView):
             cantidad = validated_data['cantidad']
             fecha_expiracion = validated_data['fecha_expiracion']
             
-            # 1. Reducir el stock del producto
-            
-            
-            # 2. Crear la reserva
-            reserva = Reserva.objects.create(
-                id_usuario=usuario_empresa,  # Cambiado
-                id_producto=producto,
-                cantidad=cantidad,
-                estado='pendiente',
-                fecha_expiracion=fecha_expiracion
-            )
+            with transaction.atomic():
+                # 1. Apartar el stock del producto (falla si otra operación tomó el disponible)
+                try:
+                    reservar(producto.id_producto, cantidad)
+                except StockInsuficiente:
+                    producto.refresh_from_db(fields=['stock_actual', 'stock_reservado'])
+                    return Response({
+                        'error': 'Stock insuficiente',
+                        'detail': f'Disponible: {producto.stock_disponible}',
+                        'status': 'error'
+                    }, status=status.HTTP_409_CONFLICT)
+
+                # 2. Crear la reserva
+                reserva = Reserva.objects.create(
+                    id_usuario=usuario_empresa,  # Cambiado
+                    id_producto=producto,
+                    cantidad=cantidad,
+                    estado='pendiente',
+                    fecha_expiracion=fecha_expiracion
+                )
+            producto.refresh_from_db(fields=['stock_actual', 'stock_reservado'])
             
             logger.info(f"Reserva creada exitosamente ID: {reserva.id_usuario}-{reserva.id_producto}")  # Cambiado
             
@@ -108,8 +120,8 @@ class CrearReservaView(generics.CreateAPIView):
                 mensaje=(
                     f'El usuario {reserva.id_usuario.id_usuario.email} ha reservado '  # Cambiado
                     f'{reserva.cantidad} unidades de "{reserva.id_producto.nombre}". '
-                    f'Stock reducido de {reserva.id_producto.stock_actual + reserva.cantidad} '
-                    f'a {reserva.id_producto.stock_actual}. '
+                    f'Stock disponible reducido de {reserva.id_producto.stock_disponible + reserva.cantidad} '
+                    f'a {reserva.id_producto.stock_disponible}. '
                     f'La reserva expira: {reserva.fecha_expiracion.strftime("%d/%m/%Y %H:%M")}'
                 ),
                 tipo='info'
@@ -164,19 +176,23 @@ class CancelarReservaView(generics.UpdateAPIView):
             reserva = validated_data['reserva']
             producto = reserva.id_producto
             
-            # 1. Devolver stock al producto
-            producto.stock_actual += reserva.cantidad
-            
-            # Actualizar estado si es necesario
-            if producto.stock_actual > 0 and producto.estado == 'agotado':
-                producto.estado = 'activo'
-            
-            producto.save()
-            logger.info(f"Stock devuelto para {producto.nombre}: {producto.stock_actual}")
-            
-            # 2. Actualizar estado de la reserva
+            with transaction.atomic():
+                # Solo una cancelación (o expiración) libera la reserva
+                cancelada = Reserva.objects.filter(
+                    pk=reserva.pk,
+                    estado='pendiente'
+                ).update(estado='cancelada')
+                if not cancelada:
+                    return Response({
+                        'error': 'Reserva no encontrada o no está pendiente',
+                        'status': 'error'
+                    }, status=status.HTTP_409_CONFLICT)
+
+                # 1. Devolver las unidades al stock disponible
+                liberar_reserva(producto.id_producto, reserva.cantidad)
             reserva.estado = 'cancelada'
-            reserva.save()
+            producto.refresh_from_db(fields=['stock_actual', 'stock_reservado'])
+            logger.info(f"Stock disponible devuelto para {producto.nombre}: {producto.stock_disponible}")
             
             logger.info(f"Reserva cancelada ID: {reserva.id_usuario}-{reserva.id_producto}")  # Cambiado
 
@@ -187,7 +203,8 @@ class CancelarReservaView(generics.UpdateAPIView):
                 'detalles': {
                     'producto': producto.nombre,
                     'cantidad_devuelta': reserva.cantidad,
-                    'stock_actual': producto.stock_actual
+                    'stock_actual': producto.stock_actual,
+                    'stock_disponible': producto.stock_disponible
                 },
                 'status': 'success'
             }, status=status.HTTP_200_OK)
@@ -219,7 +236,7 @@ class CancelarReservaView(generics.UpdateAPIView):
                 mensaje=(
                     f'El usuario {reserva.id_usuario.id_usuario.email} ha cancelado su reserva '  # Cambiado
                     f'de {reserva.cantidad} unidades de "{producto.nombre}". '
-                    f'Stock restaurado a {producto.stock_actual}.'
+                    f'Stock disponible restaurado a {producto.stock_disponible}.'
                 ),
                 tipo='warning'
             )
@@ -307,28 +324,33 @@ class VerificarReservasExpiradasView(APIView):
         """
         try:
             ahora = timezone.now()
-            reservas_a_expiar = Reserva.objects.filter(
-                estado='pendiente',
-                fecha_expiracion__lt=ahora
-            )
-            
-            reservas_expiradas = []
-            for reserva in reservas_a_expiar:
-                # Devolver stock
-                producto = reserva.id_producto
-                producto.stock_actual += reserva.cantidad
-                producto.save()
-                
-                # Actualizar estado de reserva
-                reserva.estado = 'expirada'
-                reserva.save()
-                
-                reservas_expiradas.append({
+            with transaction.atomic():
+                # skip_locked: dos llamadas simultáneas no expiran (ni liberan) la misma reserva
+                reservas_a_expirar = list(
+                    Reserva.objects.select_for_update(skip_locked=True, of=('self',)).filter(
+                        estado='pendiente',
+                        fecha_expiracion__lt=ahora
+                    ).select_related('id_usuario__id_usuario', 'id_producto')
+                )
+                Reserva.objects.filter(
+                    pk__in=[reserva.pk for reserva in reservas_a_expirar]
+                ).update(estado='expirada')
+
+                # Devolver las unidades al stock disponible, una actualización por producto
+                cantidades = {}
+                for reserva in reservas_a_expirar:
+                    cantidades[reserva.id_producto_id] = cantidades.get(reserva.id_producto_id, 0) + reserva.cantidad
+                liberar_reservas(cantidades)
+
+            reservas_expiradas = [
+                {
                     'id_reserva': f"{reserva.id_usuario.id_usuario}-{reserva.id_producto.id_producto}",  # Cambiado
                     'usuario': reserva.id_usuario.id_usuario.email,  # Cambiado
                     'producto': reserva.id_producto.nombre,
                     'cantidad': reserva.cantidad
-                })
+                }
+                for reserva in reservas_a_expirar
+            ]
             
             logger.info(f"Reservas expiradas automáticamente: {len(reservas_expiradas)}")
             
@@ -376,8 +398,11 @@ class EliminarReservaSinValidacionView(generics.DestroyAPIView):
                 'fecha_reserva': reserva.fecha_reserva
             }
             
-            # Eliminar la reserva
-            reserva.delete()
+            # Eliminar la reserva (si estaba pendiente, sus unidades vuelven al disponible)
+            with transaction.atomic():
+                reserva.delete()
+                if reserva.estado == 'pendiente':
+                    liberar_reserva(reserva.id_producto_id, reserva.cantidad)
             
             logger.info(f"Reserva eliminada sin validación: Usuario {id_usuario} - Producto {id_producto}")
             
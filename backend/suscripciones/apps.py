@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class SuscripcionesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'suscripciones'
+
+    def ready(self):
+        # Importar señales
+        import suscripciones.signals
@@ -0,0 +1,250 @@
+# suscripciones/ciclo_vida.py
+"""
+Ciclo de vida de las suscripciones, ejecutado periódicamente (comando ciclo_suscripciones).
+
+- Recordatorios de renovación a los admin_empresa cuando faltan DIAS_RECORDATORIO días
+  para fecha_fin (uno por umbral, registrado en Suscripcion.dias_ultimo_recordatorio).
+- Vencimiento: una suscripción 'activo' pasa a 'vencido' cuando fecha_fin + DIAS_GRACIA
+  ya pasó. Durante la gracia sigue activa y se notifica.
+- Empresas: si la empresa queda sin suscripción activa pasa de 'activo' a 'inactivo'.
+
+Todo se procesa por lotes con consultas de rango sobre el índice (estado, fecha_fin) y
+es idempotente. En PostgreSQL un advisory lock evita que dos nodos lo ejecuten a la vez.
+"""
+import logging
+from contextlib import contextmanager
+from datetime import timedelta
+from django.db import connection, transaction
+from django.utils import timezone
+from backend.configuracion import leer
+from .models import Suscripcion
+from .estadisticas import refrescar_vista_materializada
+
+logger = logging.getLogger(__name__)
+
+CONFIGURACION_POR_DEFECTO = {
+    'DIAS_GRACIA': 3,
+    'DIAS_RECORDATORIO': [7, 3, 1],
+    'LOTE': 500,
+}
+
+# Clave del advisory lock (constante arbitraria, única en la base de datos)
+CLAVE_BLOQUEO = 804_260_036
+
+
+def obtener_configuracion():
+    return leer('CICLO_SUSCRIPCIONES', CONFIGURACION_POR_DEFECTO)
+
+
+@contextmanager
+def bloqueo_exclusivo():
+    """
+    Retorna True si este proceso obtuvo el advisory lock (o si la base de datos no lo
+    soporta); False si otro nodo está ejecutando el ciclo.
+    """
+    if connection.vendor != 'postgresql':
+        yield True
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_try_advisory_lock(%s)', [CLAVE_BLOQUEO])
+        obtenido = cursor.fetchone()[0]
+    try:
+        yield obtenido
+    finally:
+        if obtenido:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_unlock(%s)', [CLAVE_BLOQUEO])
+
+
+def _admins_por_empresa(empresa_ids):
+    """{empresa_id: [id_usuario, ...]} de los admin_empresa activos"""
+    from usuario_empresa.models import Usuario_Empresa
+
+    admins = {}
+    for empresa_id, id_usuario in Usuario_Empresa.objects.filter(
+        empresa_id__in=empresa_ids,
+        id_usuario__rol__rol='admin_empresa',
+        id_usuario__estado='activo'
+    ).values_list('empresa_id', 'id_usuario_id'):
+        admins.setdefault(empresa_id, []).append(id_usuario)
+    return admins
+
+
+def notificar_empresas(mensajes):
+    """
+    Crea las notificaciones en bloque.
+    mensajes: [(empresa_id, titulo, mensaje, tipo)]; cada una se asigna a los admin_empresa.
+    """
+    from notificaciones.models import Notificacion
+    from relacion_notifica.models import Notifica
+
+    if not mensajes:
+        return 0
+    admins = _admins_por_empresa({empresa_id for empresa_id, _, _, _ in mensajes})
+    notificaciones = Notificacion.objects.bulk_create([
+        Notificacion(titulo=titulo, mensaje=mensaje, tipo=tipo)
+        for _, titulo, mensaje, tipo in mensajes
+    ])
+    Notifica.objects.bulk_create([
+        Notifica(id_usuario_id=id_usuario, id_notificacion=notificacion)
+        for (empresa_id, _, _, _), notificacion in zip(mensajes, notificaciones)
+        for id_usuario in admins.get(empresa_id, [])
+    ])
+    return len(notificaciones)
+
+
+def enviar_recordatorios(ahora, configuracion):
+    """Un recordatorio por umbral de días; el más cercano que aún no se envió"""
+    enviados = 0
+    # De menor a mayor: una suscripción recibe solo el umbral más cercano a su fecha_fin
+    for dias in sorted(configuracion['DIAS_RECORDATORIO']):
+        while True:
+            with transaction.atomic():
+                lote = list(
+                    Suscripcion.objects.select_for_update(skip_locked=True, of=('self',)).filter(
+                        estado='activo',
+                        fecha_fin__gt=ahora,
+                        fecha_fin__lte=ahora + timedelta(days=dias)
+                    ).exclude(
+                        dias_ultimo_recordatorio__lte=dias
+                    ).select_related('plan').only(
+                        'id_suscripcion', 'empresa_id', 'fecha_fin', 'plan__nombre'
+                    ).order_by('fecha_fin')[:configuracion['LOTE']]
+                )
+                if not lote:
+                    break
+
+                Suscripcion.objects.filter(
+                    id_suscripcion__in=[suscripcion.id_suscripcion for suscripcion in lote]
+                ).update(dias_ultimo_recordatorio=dias)
+
+                enviados += notificar_empresas([
+                    (
+                        suscripcion.empresa_id,
+                        f'Tu suscripción vence en {max((suscripcion.fecha_fin - ahora).days, 0) + 1} día(s)',
+                        f'La suscripción #{suscripcion.id_suscripcion} al plan {suscripcion.plan.nombre} '
+                        f'vence el {timezone.localtime(suscripcion.fecha_fin).strftime("%d/%m/%Y")}. '
+                        f'Renueva tu plan para no perder el acceso.',
+                        'warning'
+                    )
+                    for suscripcion in lote
+                ])
+    return enviados
+
+
+def notificar_periodo_gracia(ahora, configuracion):
+    """Aviso único a las suscripciones cuya fecha_fin pasó y están en periodo de gracia"""
+    avisadas = 0
+    while True:
+        with transaction.atomic():
+            lote = list(
+                Suscripcion.objects.select_for_update(skip_locked=True).filter(
+                    estado='activo',
+                    fecha_fin__lte=ahora,
+                    fecha_fin__gt=ahora - timedelta(days=configuracion['DIAS_GRACIA'])
+                ).exclude(
+                    dias_ultimo_recordatorio=0
+                ).only('id_suscripcion', 'empresa_id', 'fecha_fin').order_by('fecha_fin')[:configuracion['LOTE']]
+            )
+            if not lote:
+                return avisadas
+
+            Suscripcion.objects.filter(
+                id_suscripcion__in=[suscripcion.id_suscripcion for suscripcion in lote]
+            ).update(dias_ultimo_recordatorio=0)
+
+            fin_gracia = timedelta(days=configuracion['DIAS_GRACIA'])
+            avisadas += notificar_empresas([
+                (
+                    suscripcion.empresa_id,
+                    f'Suscripción #{suscripcion.id_suscripcion} vencida: periodo de gracia',
+                    f'Tu suscripción venció. Conservas el acceso hasta el '
+                    f'{timezone.localtime(suscripcion.fecha_fin + fin_gracia).strftime("%d/%m/%Y %H:%M")}.',
+                    'warning'
+                )
+                for suscripcion in lote
+            ])
+
+
+def vencer_suscripciones(ahora, configuracion):
+    """
+    Pasa a 'vencido' las suscripciones activas cuyo periodo de gracia terminó y
+    desactiva las empresas que quedan sin suscripción activa.
+    Retorna (suscripciones_vencidas, empresas_desactivadas).
+    """
+    from empresas.models import Empresa
+    from planes.limites import invalidar_limites
+
+    limite = ahora - timedelta(days=configuracion['DIAS_GRACIA'])
+    vencidas = 0
+    desactivadas = 0
+    while True:
+        with transaction.atomic():
+            lote = list(
+                Suscripcion.objects.select_for_update(skip_locked=True).filter(
+                    estado='activo',
+                    fecha_fin__lte=limite
+                ).values_list('id_suscripcion', 'empresa_id').order_by('fecha_fin')[:configuracion['LOTE']]
+            )
+            if not lote:
+                return vencidas, desactivadas
+
+            vencidas += Suscripcion.objects.filter(
+                id_suscripcion__in=[id_suscripcion for id_suscripcion, _ in lote],
+                estado='activo'
+            ).update(estado='vencido')
+
+            empresa_ids = {empresa_id for _, empresa_id in lote}
+            # Los límites del plan en caché dejan de ser válidos
+            invalidar_limites(empresa_ids)
+            con_activa = set(
+                Suscripcion.objects.filter(
+                    empresa_id__in=empresa_ids,
+                    estado='activo'
+                ).values_list('empresa_id', flat=True)
+            )
+            sin_activa = empresa_ids - con_activa
+            # Solo empresas activas: 'bloqueado' lo decide un administrador
+            desactivadas += Empresa.objects.filter(
+                id_empresa__in=sin_activa,
+                estado='activo'
+            ).update(estado='inactivo', fecha_actualizacion=ahora)
+
+            notificar_empresas([
+                (
+                    empresa_id,
+                    'Suscripción vencida',
+                    'Tu suscripción venció y terminó el periodo de gracia. '
+                    'Solicita una nueva suscripción para reactivar tu empresa.',
+                    'error'
+                )
+                for empresa_id in sin_activa
+            ])
+
+
+def ejecutar_ciclo(ahora=None):
+    """
+    Ejecuta una pasada completa. Retorna un resumen, o None si otro nodo la está ejecutando.
+    """
+    ahora = ahora or timezone.now()
+    configuracion = obtener_configuracion()
+
+    with bloqueo_exclusivo() as obtenido:
+        if not obtenido:
+            logger.info("Ciclo de suscripciones en ejecución en otro nodo; se omite")
+            return None
+
+        vencidas, empresas_desactivadas = vencer_suscripciones(ahora, configuracion)
+        resumen = {
+            'suscripciones_vencidas': vencidas,
+            'empresas_desactivadas': empresas_desactivadas,
+            'avisos_gracia': notificar_periodo_gracia(ahora, configuracion),
+            'recordatorios': enviar_recordatorios(ahora, configuracion),
+        }
+        # Los vencimientos se aplican con update(): no pasan por post_save
+        if vencidas:
+            refrescar_vista_materializada()
+
+    logger.info(f"Ciclo de suscripciones: {resumen}")
+    return resumen
@@ -0,0 +1,119 @@
+# suscripciones/estadisticas.py
+"""
+Estadísticas de suscripciones para el panel del administrador de la plataforma.
+
+Una sola consulta agrupada por (estado, plan) alimenta los conteos y los ingresos;
+los ingresos se suman como numeric/Decimal (Plan.precio es FloatField).
+
+Opcional (PostgreSQL, ESTADISTICAS_SUSCRIPCIONES['MATERIALIZADA'] = True): sin filtros,
+los grupos se leen de la vista materializada suscripcion_estadisticas, que se
+refresca al confirmar cambios en suscripciones y en cada pasada del ciclo de vida.
+"""
+import logging
+from decimal import Decimal
+from django.db import connection, transaction
+from django.db.models import Count, DecimalField, Q, Sum
+from django.db.models.functions import Cast
+from django.utils import timezone
+from backend.configuracion import leer
+
+logger = logging.getLogger(__name__)
+
+CONFIGURACION_POR_DEFECTO = {
+    'MATERIALIZADA': False,
+}
+
+VISTA_MATERIALIZADA = 'suscripcion_estadisticas'
+CENTAVOS = Decimal('0.01')
+
+
+def obtener_configuracion():
+    return leer('ESTADISTICAS_SUSCRIPCIONES', CONFIGURACION_POR_DEFECTO)
+
+
+def usa_vista_materializada():
+    return connection.vendor == 'postgresql' and obtener_configuracion()['MATERIALIZADA']
+
+
+def _grupos_consulta(queryset, inicio_hoy):
+    """[(estado, plan_nombre, total, ingresos, hoy)] en una consulta"""
+    return [
+        (fila['estado'], fila['plan__nombre'], fila['total'], fila['ingresos'], fila['hoy'])
+        for fila in queryset.order_by().values('estado', 'plan__nombre').annotate(
+            total=Count('id_suscripcion'),
+            ingresos=Sum(Cast('plan__precio', DecimalField(max_digits=14, decimal_places=2))),
+            hoy=Count('id_suscripcion', filter=Q(fecha_solicitud__gte=inicio_hoy))
+        )
+    ]
+
+
+def _grupos_vista_materializada(inicio_hoy):
+    from .models import Suscripcion
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT estado, plan_nombre, total, ingresos FROM {VISTA_MATERIALIZADA}')
+        grupos = cursor.fetchall()
+    # Depende de la hora: no se materializa (rango sobre fecha_solicitud)
+    hoy = Suscripcion.objects.filter(fecha_solicitud__gte=inicio_hoy).count()
+    return [(estado, plan, total, ingresos, 0) for estado, plan, total, ingresos in grupos], hoy
+
+
+def obtener_estadisticas(queryset):
+    """Conteos por estado y plan, ingresos y solicitudes de hoy"""
+    inicio_hoy = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+
+    if usa_vista_materializada() and not queryset.query.where:
+        grupos, suscripciones_hoy = _grupos_vista_materializada(inicio_hoy)
+    else:
+        grupos = _grupos_consulta(queryset, inicio_hoy)
+        suscripciones_hoy = sum(hoy for _, _, _, _, hoy in grupos)
+
+    total = 0
+    por_estado = {}
+    por_plan = {}
+    ingresos_por_estado = {}
+    for estado, plan_nombre, cantidad, ingresos, _ in grupos:
+        total += cantidad
+        por_estado[estado] = por_estado.get(estado, 0) + cantidad
+        por_plan[plan_nombre] = por_plan.get(plan_nombre, 0) + cantidad
+        ingresos_por_estado[estado] = ingresos_por_estado.get(estado, Decimal('0')) + Decimal(ingresos or 0)
+
+    ingresos_pendientes = ingresos_por_estado.get('pendiente', Decimal('0')).quantize(CENTAVOS)
+    ingresos_activos = ingresos_por_estado.get('activo', Decimal('0')).quantize(CENTAVOS)
+
+    return {
+        'total_suscripciones': total,
+        'por_estado': por_estado,
+        'por_plan': por_plan,
+        # Sumas exactas en Decimal; se entregan como número igual que antes
+        'ingresos': {
+            'pendientes': float(ingresos_pendientes),
+            'activos': float(ingresos_activos),
+            'total_potencial': float(ingresos_pendientes + ingresos_activos)
+        },
+        'suscripciones_hoy': suscripciones_hoy
+    }
+
+
+def refrescar_vista_materializada():
+    """REFRESH CONCURRENTLY: las lecturas no se bloquean mientras se recalcula"""
+    if not usa_vista_materializada():
+        return
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'REFRESH MATERIALIZED VIEW CONCURRENTLY {VISTA_MATERIALIZADA}')
+    except Exception as e:
+        logger.error(f"Error refrescando {VISTA_MATERIALIZADA}: {str(e)}")
+
+
+def programar_refresco():
+    """
+    Un solo refresco por transacción, al confirmarla. Se deduplica contra los callbacks
+    pendientes de la conexión: Django los descarta si la transacción (o el savepoint que
+    los registró) se revierte, así un rollback no impide programar el siguiente
+    """
+    if not usa_vista_materializada():
+        return
+    if any(funcion is refrescar_vista_materializada for _, funcion, *_ in connection.run_on_commit):
+        return
+    transaction.on_commit(refrescar_vista_materializada)
@@ -0,0 +1,34 @@
+# suscripciones/management/commands/ciclo_suscripciones.py
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from suscripciones.ciclo_vida import ejecutar_ciclo
+
+
+class Command(BaseCommand):
+    help = (
+        'Vence las suscripciones cuyo periodo de gracia terminó, desactiva las empresas sin '
+        'suscripción activa y envía recordatorios de renovación. Seguro de ejecutar desde '
+        'varios nodos (cron) o como proceso continuo con --continuo.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--continuo', action='store_true', help='Repetir indefinidamente')
+        parser.add_argument('--intervalo', type=int, default=300, help='Segundos entre ejecuciones (por defecto 300)')
+
+    def handle(self, *args, **options):
+        while True:
+            resumen = ejecutar_ciclo()
+            if resumen is None:
+                self.stdout.write('Otro nodo está ejecutando el ciclo; se omite esta pasada')
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Vencidas: {resumen['suscripciones_vencidas']}, "
+                    f"empresas desactivadas: {resumen['empresas_desactivadas']}, "
+                    f"avisos de gracia: {resumen['avisos_gracia']}, "
+                    f"recordatorios: {resumen['recordatorios']}"
+                ))
+            if not options['continuo']:
+                return
+            close_old_connections()
+            time.sleep(options['intervalo'])
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.4 on 2026-10-19 16:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def desactivar_duplicadas(apps, schema_editor):
+    """Deja solo la suscripción activa más reciente de cada empresa antes de crear el índice"""
+    Suscripcion = apps.get_model('suscripciones', 'Suscripcion')
+    duplicadas = Suscripcion.objects.filter(estado='activo').values('empresa_id').annotate(
+        total=models.Count('id_suscripcion')
+    ).filter(total__gt=1)
+    for grupo in duplicadas:
+        activas = Suscripcion.objects.filter(
+            empresa_id=grupo['empresa_id'], estado='activo'
+        ).order_by('-fecha_aprobacion', '-fecha_solicitud', '-id_suscripcion')
+        vigente = activas.values_list('id_suscripcion', flat=True).first()
+        activas.exclude(id_suscripcion=vigente).update(estado='inactivo')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresas', '0001_initial'),
+        ('planes', '0002_plan_limite_almacenamiento'),
+        ('suscripciones', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(desactivar_duplicadas, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='suscripcion',
+            constraint=models.UniqueConstraint(condition=models.Q(('estado', 'activo')), fields=('empresa',), name='suscripcion_activa_unica_empresa'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.4 on 2026-10-19 16:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresas', '0001_initial'),
+        ('planes', '0002_plan_limite_almacenamiento'),
+        ('suscripciones', '0002_suscripcion_activa_unica'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='suscripcion',
+            name='dias_ultimo_recordatorio',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='suscripcion',
+            index=models.Index(fields=['estado', 'fecha_fin'], name='suscripcion_estado_fin_idx'),
+        ),
+    ]
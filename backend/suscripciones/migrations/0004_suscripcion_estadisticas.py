@@ -0,0 +1,49 @@
+# Generated by Django 5.1.4 on 2026-10-19 17:20
+
+from django.db import migrations
+
+# Agregados por (estado, plan) para el panel de suscripciones.
+# El índice único permite REFRESH MATERIALIZED VIEW CONCURRENTLY.
+SQL_CREAR = [
+    """
+    CREATE MATERIALIZED VIEW IF NOT EXISTS suscripcion_estadisticas AS
+    SELECT s.estado,
+           p.nombre AS plan_nombre,
+           COUNT(*) AS total,
+           COALESCE(SUM(p.precio::numeric(14, 2)), 0) AS ingresos
+    FROM suscripcion s
+    INNER JOIN plan p ON p.id_plan = s.plan_id
+    GROUP BY s.estado, p.nombre
+    """,
+    "CREATE UNIQUE INDEX IF NOT EXISTS suscripcion_estadisticas_uidx "
+    "ON suscripcion_estadisticas (estado, plan_nombre)",
+]
+
+SQL_ELIMINAR = [
+    "DROP MATERIALIZED VIEW IF EXISTS suscripcion_estadisticas",
+]
+
+
+def crear_vista(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for sentencia in SQL_CREAR:
+        schema_editor.execute(sentencia)
+
+
+def eliminar_vista(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for sentencia in SQL_ELIMINAR:
+        schema_editor.execute(sentencia)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('suscripciones', '0003_ciclo_vida'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_vista, eliminar_vista),
+    ]
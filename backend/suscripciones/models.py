@@ -28,68 +28,87 @@ class Suscripcion(models.Model):
     )
     fecha_aprobacion = models.DateTimeField(null=True, blank=True)
     observaciones = models.TextField(blank=True, null=True)
+    # Último recordatorio de vencimiento enviado (días antes de fecha_fin; 0 = aviso de gracia)
+    dias_ultimo_recordatorio = models.PositiveSmallIntegerField(null=True, blank=True, editable=False)
     
     class Meta:
         db_table = "suscripcion"
         ordering = ["-fecha_solicitud"]
         verbose_name = "Suscripción"
         verbose_name_plural = "Suscripciones"
+        indexes = [
+            # Ciclo de vida: rangos de fecha_fin por estado (vencimientos y recordatorios)
+            models.Index(fields=['estado', 'fecha_fin'], name='suscripcion_estado_fin_idx'),
+        ]
+        constraints = [
+            # Como máximo una suscripción activa por empresa
+            models.UniqueConstraint(
+                fields=['empresa'],
+                condition=models.Q(estado='activo'),
+                name='suscripcion_activa_unica_empresa'
+            ),
+        ]
     
     def __str__(self):
         return f"Suscripción {self.id_suscripcion} - {self.empresa.nombre} ({self.estado})"
 
 
-    # En tu archivo suscripciones/models.py, dentro de la clase Suscripcion:
     def activar_suscripcion(self, admin_aprobador=None):
         """
-        Activa esta suscripción y desactiva otras de la misma empresa
+        Activa esta suscripción y desactiva otras de la misma empresa.
+        Todo ocurre en una transacción con la fila de la empresa bloqueada, de modo que
+        dos activaciones simultáneas de la misma empresa se ejecutan una tras otra.
         """
+        from django.db import transaction
         from django.utils import timezone
-        
-        # 1. Verificar que no esté ya activa
-        if self.estado == 'activo':
-            return {
-                'success': False,
-                'message': f'La suscripción #{self.id_suscripcion} ya está activa'
-            }
-        
-        # 2. Verificar que no esté vencida o rechazada
-        if self.estado in ['vencido', 'rechazado']:
-            return {
-                'success': False,
-                'message': f'No se puede activar una suscripción {self.estado}'
-            }
-        
-        # 3. Obtener todas las suscripciones de la misma empresa
-        suscripciones_empresa = Suscripcion.objects.filter(
-            empresa=self.empresa
-        ).exclude(id_suscripcion=self.id_suscripcion)
-        
-        # 4. Desactivar suscripciones más antiguas
-        suscripciones_desactivadas = []
-        for suscripcion in suscripciones_empresa:
-            if suscripcion.estado == 'activo' or suscripcion.estado == 'pendiente':
-                estado_anterior = suscripcion.estado
-                suscripcion.estado = 'inactivo'
-                suscripcion.save()
-                suscripciones_desactivadas.append({
-                    'id': suscripcion.id_suscripcion,
+
+        with transaction.atomic():
+            # 1. Bloquear la empresa (serializa las activaciones de la empresa)
+            empresa = Empresa.objects.select_for_update().get(id_empresa=self.empresa_id)
+
+            # Estado actual: otra activación pudo confirmarse mientras se esperaba el bloqueo
+            self.estado = Suscripcion.objects.filter(
+                id_suscripcion=self.id_suscripcion
+            ).values_list('estado', flat=True).get()
+
+            # 2. Verificar que no esté ya activa
+            if self.estado == 'activo':
+                return {
+                    'success': False,
+                    'message': f'La suscripción #{self.id_suscripcion} ya está activa'
+                }
+
+            # 3. Verificar que no esté vencida o rechazada
+            if self.estado in ['vencido', 'rechazado']:
+                return {
+                    'success': False,
+                    'message': f'No se puede activar una suscripción {self.estado}'
+                }
+
+            # 4. Desactivar las demás suscripciones activas o pendientes (un solo UPDATE)
+            suscripciones_desactivadas = [
+                {
+                    'id': id_suscripcion,
                     'estado_anterior': estado_anterior,
                     'estado_nuevo': 'inactivo'
-                })
-        
-        # 5. Activar esta suscripción
-        estado_anterior = self.estado
-        self.estado = 'activo'
-        self.fecha_aprobacion = timezone.now()
-        self.admin = admin_aprobador
-        self.save()
-        
-        # 6. Actualizar estado de la empresa a 'activo'
-        if self.empresa.estado == 'pendiente':
-            self.empresa.estado = 'activo'
-            self.empresa.save()
-        
+                }
+                for id_suscripcion, estado_anterior in self._desactivar_otras()
+            ]
+
+            # 5. Activar esta suscripción
+            estado_anterior = self.estado
+            self.estado = 'activo'
+            self.fecha_aprobacion = timezone.now()
+            self.admin = admin_aprobador
+            self.dias_ultimo_recordatorio = None
+            self.save(update_fields=['estado', 'fecha_aprobacion', 'admin', 'fecha_fin', 'dias_ultimo_recordatorio'])
+
+            # 6. Actualizar estado de la empresa a 'activo'
+            if empresa.estado == 'pendiente':
+                empresa.estado = 'activo'
+                empresa.save(update_fields=['estado', 'fecha_actualizacion'])
+            self.empresa = empresa
+
         return {
             'success': True,
             'message': f'Suscripción #{self.id_suscripcion} activada exitosamente',
@@ -104,4 +123,40 @@ class Suscripcion(models.Model):
             },
             'suscripciones_desactivadas': suscripciones_desactivadas,
             'total_desactivadas': len(suscripciones_desactivadas)
-        }
\ No newline at end of file
+        }
+
+    def _desactivar_otras(self):
+        """
+        Pasa a 'inactivo' las otras suscripciones activas o pendientes de la empresa.
+        Retorna [(id_suscripcion, estado_anterior)]. Requiere la empresa bloqueada.
+        """
+        from django.db import connection
+
+        if connection.vendor == 'postgresql':
+            # UPDATE ... RETURNING: el estado anterior se toma de la misma fila antes del cambio
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    """
+                    UPDATE suscripcion AS s
+                    SET estado = 'inactivo'
+                    FROM suscripcion AS anterior
+                    WHERE anterior.id_suscripcion = s.id_suscripcion
+                      AND s.empresa_id = %s
+                      AND s.id_suscripcion <> %s
+                      AND s.estado IN ('activo', 'pendiente')
+                    RETURNING s.id_suscripcion, anterior.estado
+                    """,
+                    [self.empresa_id, self.id_suscripcion]
+                )
+                return sorted(cursor.fetchall())
+
+        otras = Suscripcion.objects.filter(
+            empresa_id=self.empresa_id,
+            estado__in=['activo', 'pendiente']
+        ).exclude(id_suscripcion=self.id_suscripcion)
+        desactivadas = sorted(otras.values_list('id_suscripcion', 'estado'))
+        if desactivadas:
+            Suscripcion.objects.filter(
+                id_suscripcion__in=[id_suscripcion for id_suscripcion, _ in desactivadas]
+            ).update(estado='inactivo')
+        return desactivadas
@@ -34,7 +34,9 @@ class SolicitudSuscripcionSerializer(serializers.Serializer):
     Serializador para solicitar una nueva suscripción
     """
     plan_nombre = serializers.CharField(max_length=100, required=True)
-    comprobante_pago = ComprobantePagoField(required=True)
+    comprobante_pago = ComprobantePagoField(required=False)
+    # Alternativa para comprobantes grandes: subida por fragmentos ya completada (/api/archivos/subidas/)
+    id_subida = serializers.UUIDField(required=False)
     observaciones = serializers.CharField(required=False, allow_blank=True, max_length=500)
     
     def validate_plan_nombre(self, value):
@@ -95,6 +97,25 @@ class SolicitudSuscripcionSerializer(serializers.Serializer):
             
             # Guardar la empresa en el contexto
             self.context['empresa'] = empresa
+
+            # Comprobante: archivo adjunto o subida por fragmentos, exactamente uno
+            if bool(data.get('comprobante_pago')) == bool(data.get('id_subida')):
+                raise serializers.ValidationError({
+                    'comprobante_pago': 'Debe adjuntar un comprobante de pago o indicar id_subida'
+                })
+            if data.get('id_subida'):
+                from archivo.models import SubidaFragmentada
+                subida = SubidaFragmentada.objects.filter(
+                    id_subida=data['id_subida'],
+                    usuario=user,
+                    destino='comprobante',
+                    estado='completada'
+                ).first()
+                if not subida:
+                    raise serializers.ValidationError({
+                        'id_subida': 'No existe una subida de comprobante completada con ese id'
+                    })
+                data['subida'] = subida
             
         except Usuario_Empresa.DoesNotExist:
             raise serializers.ValidationError({
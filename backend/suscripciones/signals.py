@@ -0,0 +1,20 @@
+# suscripciones/signals.py
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from planes.models import Plan
+from .models import Suscripcion
+from .estadisticas import programar_refresco
+
+
+@receiver(post_save, sender=Suscripcion)
+@receiver(post_delete, sender=Suscripcion)
+def refrescar_estadisticas_suscripcion(sender, instance, **kwargs):
+    """La vista materializada de estadísticas se recalcula al confirmar la transacción"""
+    programar_refresco()
+
+
+@receiver(post_save, sender=Plan)
+def refrescar_estadisticas_plan(sender, instance, created, **kwargs):
+    # Nombre o precio del plan cambian los agregados
+    if not created:
+        programar_refresco()
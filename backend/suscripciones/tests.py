@@ -1,3 +1,251 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
 from django.test import TestCase
+from django.utils import timezone
+from backend.benchmarks.datos import generar_datos
+from backend.pruebas import ConsultasConstantesMixin
+from empresas.models import Empresa
+from planes.models import Plan
+from relacion_notifica.models import Notifica
+from . import ciclo_vida
+from .estadisticas import programar_refresco
+from .models import Suscripcion
 
-# Create your tests here.
+
+class ConsultasListaSuscripcionesTest(ConsultasConstantesMixin, TestCase):
+    """ListaSuscripcionesView: plan y empresa se cargan con la lista, las estadísticas en un agregado"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = generar_datos(empresas=2, productos=1, clientes=1, ventas=0)
+
+    def _agregar_suscripciones(self):
+        plan = Plan.objects.get(nombre='Benchmark')
+        empresas = Empresa.objects.bulk_create([
+            Empresa(nombre=f'Nueva {i}', nit=f'NUEVA-{i}', rubro='retail', direccion='-',
+                    telefono='0', email=f'nueva{i}@suscripciones.test', estado='activo')
+            for i in range(10)
+        ])
+        Suscripcion.objects.bulk_create([
+            Suscripcion(plan=plan, empresa=empresa, estado='pendiente',
+                        fecha_fin=timezone.now() + timedelta(days=30))
+            for empresa in empresas
+        ])
+
+    def test_lista_suscripciones(self):
+        self.assertConsultasConstantes(
+            lambda: self.client.get('/api/suscripciones/todas/'),
+            self._agregar_suscripciones,
+            lambda respuesta: len(respuesta.json()['suscripciones'])
+        )
+
+
+@mock.patch('suscripciones.estadisticas.usa_vista_materializada', return_value=True)
+@mock.patch('suscripciones.estadisticas.refrescar_vista_materializada')
+class ProgramarRefrescoTest(TestCase):
+    """Un refresco por transacción confirmada; un rollback no deja el refresco bloqueado"""
+
+    def test_un_refresco_por_transaccion(self, refrescar, _):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                programar_refresco()
+                programar_refresco()
+
+        self.assertEqual(len(callbacks), 1)
+        refrescar.assert_called_once()
+
+    def test_rollback_no_bloquea_el_siguiente(self, refrescar, _):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                programar_refresco()
+                raise RuntimeError('rollback')
+            with transaction.atomic():
+                programar_refresco()
+
+        self.assertEqual(len(callbacks), 1)
+        refrescar.assert_called_once()
+
+
+class ActivarSuscripcionTest(TestCase):
+    """activar_suscripcion: una sola suscripción activa por empresa y la empresa queda activa"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.plan = Plan.objects.create(
+            nombre='Básico', precio=0, duracion_dias=30, limite_productos=10,
+            limite_usuarios=5, descripcion='-'
+        )
+        cls.empresa = Empresa.objects.create(
+            nombre='Activación', nit='ACT-1', rubro='retail', direccion='-',
+            telefono='0', email='activacion@suscripciones.test', estado='pendiente'
+        )
+
+    def _suscripcion(self, estado='pendiente'):
+        return Suscripcion.objects.create(
+            plan=self.plan, empresa=self.empresa, estado=estado,
+            fecha_fin=timezone.now() + timedelta(days=30)
+        )
+
+    def _activas(self):
+        return list(Suscripcion.objects.filter(empresa=self.empresa, estado='activo').values_list('pk', flat=True))
+
+    def test_activa_y_desactiva_la_anterior(self):
+        anterior = self._suscripcion('activo')
+        pendiente = self._suscripcion()
+        nueva = self._suscripcion()
+
+        resultado = nueva.activar_suscripcion()
+
+        self.assertTrue(resultado['success'])
+        self.assertEqual(resultado['suscripcion']['estado_anterior'], 'pendiente')
+        self.assertEqual(resultado['suscripciones_desactivadas'], [
+            {'id': anterior.pk, 'estado_anterior': 'activo', 'estado_nuevo': 'inactivo'},
+            {'id': pendiente.pk, 'estado_anterior': 'pendiente', 'estado_nuevo': 'inactivo'},
+        ])
+        self.assertEqual(self._activas(), [nueva.pk])
+        anterior.refresh_from_db()
+        self.assertEqual(anterior.estado, 'inactivo')
+
+    def test_una_sola_activa(self):
+        primera = self._suscripcion()
+        segunda = self._suscripcion()
+
+        self.assertTrue(primera.activar_suscripcion()['success'])
+        self.assertTrue(segunda.activar_suscripcion()['success'])
+        self.assertEqual(self._activas(), [segunda.pk])
+
+        # Reactivar la misma no cambia nada; una segunda activa directa viola la restricción
+        self.assertFalse(segunda.activar_suscripcion()['success'])
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self._suscripcion('activo')
+        self.assertEqual(self._activas(), [segunda.pk])
+
+    def test_no_activa_rechazadas_ni_vencidas(self):
+        activa = self._suscripcion('activo')
+        for estado in ('rechazado', 'vencido'):
+            with self.subTest(estado=estado):
+                resultado = self._suscripcion(estado).activar_suscripcion()
+                self.assertFalse(resultado['success'])
+        self.assertEqual(self._activas(), [activa.pk])
+
+    def test_estado_de_la_empresa(self):
+        self._suscripcion().activar_suscripcion()
+        self.empresa.refresh_from_db()
+        self.assertEqual(self.empresa.estado, 'activo')
+
+    def test_empresa_inactiva_no_se_reactiva(self):
+        Empresa.objects.filter(pk=self.empresa.pk).update(estado='inactivo')
+        self._suscripcion().activar_suscripcion()
+        self.empresa.refresh_from_db()
+        self.assertEqual(self.empresa.estado, 'inactivo')
+
+
+class CicloSuscripcionesTest(TestCase):
+    """ciclo_suscripciones: recordatorio, aviso de gracia, vencimiento y desactivación, idempotente"""
+
+    AHORA = timezone.make_aware(datetime(2026, 6, 15, 12, 0))
+
+    @classmethod
+    def setUpTestData(cls):
+        generar_datos(empresas=4, productos=1, clientes=1, ventas=0)
+        # Solo las notificaciones del ciclo
+        Notifica.objects.all().delete()
+        cls.por_vencer, cls.en_gracia, cls.vencida, cls.vigente = Empresa.objects.order_by('pk')
+        # DIAS_GRACIA = 3 y DIAS_RECORDATORIO = [7, 3, 1] (valores por defecto)
+        for empresa, fecha_fin in (
+            (cls.por_vencer, cls.AHORA + timedelta(days=2)),
+            (cls.en_gracia, cls.AHORA - timedelta(days=1)),
+            (cls.vencida, cls.AHORA - timedelta(days=5)),
+            (cls.vigente, cls.AHORA + timedelta(days=60)),
+        ):
+            Suscripcion.objects.filter(empresa=empresa).update(fecha_fin=fecha_fin)
+
+    def _notificaciones(self, empresa):
+        return list(Notifica.objects.filter(
+            id_usuario__usuario_empresa__empresa=empresa
+        ).order_by('pk').values_list('id_notificacion__titulo', flat=True))
+
+    def _suscripcion(self, empresa):
+        return Suscripcion.objects.get(empresa=empresa)
+
+    def _ejecutar_comando(self, ahora):
+        salida = StringIO()
+        with mock.patch.object(ciclo_vida.timezone, 'now', return_value=ahora):
+            call_command('ciclo_suscripciones', stdout=salida)
+        return salida.getvalue()
+
+    def test_primera_pasada(self):
+        resumen = ciclo_vida.ejecutar_ciclo(self.AHORA)
+
+        self.assertEqual(resumen, {
+            'suscripciones_vencidas': 1,
+            'empresas_desactivadas': 1,
+            'avisos_gracia': 1,
+            'recordatorios': 1,
+        })
+
+        por_vencer = self._suscripcion(self.por_vencer)
+        self.assertEqual((por_vencer.estado, por_vencer.dias_ultimo_recordatorio), ('activo', 3))
+        self.assertEqual(self._notificaciones(self.por_vencer), ['Tu suscripción vence en 3 día(s)'])
+
+        en_gracia = self._suscripcion(self.en_gracia)
+        self.assertEqual((en_gracia.estado, en_gracia.dias_ultimo_recordatorio), ('activo', 0))
+        self.assertEqual(
+            self._notificaciones(self.en_gracia), [f'Suscripción #{en_gracia.pk} vencida: periodo de gracia']
+        )
+
+        self.assertEqual(self._suscripcion(self.vencida).estado, 'vencido')
+        self.assertEqual(self._notificaciones(self.vencida), ['Suscripción vencida'])
+
+        self.assertEqual(self._suscripcion(self.vigente).dias_ultimo_recordatorio, None)
+        self.assertEqual(self._notificaciones(self.vigente), [])
+
+        self.assertEqual(
+            dict(Empresa.objects.values_list('pk', 'estado')),
+            {self.por_vencer.pk: 'activo', self.en_gracia.pk: 'activo',
+             self.vencida.pk: 'inactivo', self.vigente.pk: 'activo'}
+        )
+
+    def test_segunda_pasada_no_cambia_nada(self):
+        self._ejecutar_comando(self.AHORA)
+        notificaciones = Notifica.objects.count()
+        estados = list(Suscripcion.objects.order_by('pk').values_list('estado', 'dias_ultimo_recordatorio'))
+        empresas = list(Empresa.objects.order_by('pk').values_list('estado', flat=True))
+
+        salida = self._ejecutar_comando(self.AHORA + timedelta(minutes=5))
+
+        self.assertIn('Vencidas: 0, empresas desactivadas: 0, avisos de gracia: 0, recordatorios: 0', salida)
+        self.assertEqual(Notifica.objects.count(), notificaciones)
+        self.assertEqual(
+            list(Suscripcion.objects.order_by('pk').values_list('estado', 'dias_ultimo_recordatorio')), estados
+        )
+        self.assertEqual(list(Empresa.objects.order_by('pk').values_list('estado', flat=True)), empresas)
+
+    def test_umbral_mas_cercano(self):
+        ciclo_vida.ejecutar_ciclo(self.AHORA)
+        # A menos de un día de fecha_fin corresponde el recordatorio de 1 día
+        resumen = ciclo_vida.ejecutar_ciclo(self.AHORA + timedelta(days=1, hours=12))
+
+        self.assertEqual(resumen['recordatorios'], 1)
+        self.assertEqual(self._suscripcion(self.por_vencer).dias_ultimo_recordatorio, 1)
+        self.assertEqual(
+            self._notificaciones(self.por_vencer),
+            ['Tu suscripción vence en 3 día(s)', 'Tu suscripción vence en 1 día(s)']
+        )
+
+    def test_otro_nodo_tiene_el_bloqueo(self):
+        @contextmanager
+        def bloqueo_ocupado():
+            yield False
+
+        with mock.patch.object(ciclo_vida, 'bloqueo_exclusivo', bloqueo_ocupado):
+            self.assertIsNone(ciclo_vida.ejecutar_ciclo(self.AHORA))
+            salida = self._ejecutar_comando(self.AHORA)
+
+        self.assertIn('Otro nodo está ejecutando el ciclo', salida)
+        self.assertFalse(Notifica.objects.exists())
+        self.assertFalse(Suscripcion.objects.filter(estado='vencido').exists())
@@ -42,6 +42,7 @@ class SolicitarSuscripcionView(generics.GenericAPIView):
             admin_empresa_user = request.user
             plan = serializer.validated_data['plan_nombre']
             comprobante_pago = serializer.validated_data.get('comprobante_pago')
+            subida = serializer.validated_data.get('subida')
             observaciones = serializer.validated_data.get('observaciones', '')
             
             # 1. Obtener empresa del contexto del serializer
@@ -61,16 +62,26 @@ class SolicitarSuscripcionView(generics.GenericAPIView):
             fecha_fin = fecha_inicio + timedelta(days=plan.duracion_dias)
             
             # 3. Crear suscripción en estado 'pendiente'
-            suscripcion = Suscripcion.objects.create(
-                plan=plan,  # Cambiado de plan_id
-                empresa=empresa,
-                fecha_inicio=fecha_inicio,
-                fecha_fin=fecha_fin,
-                estado='pendiente',
-                comprobante_pago=comprobante_pago,
-                observaciones=observaciones,
-                fecha_solicitud=fecha_inicio
-            )
+            with transaction.atomic():
+                if subida:
+                    # El comprobante ya está en el storage: se referencia sin copiarlo
+                    subida = type(subida).objects.select_for_update().get(pk=subida.pk)
+                    if subida.estado != 'completada':
+                        raise ValidationError({'id_subida': 'La subida ya fue utilizada'})
+                    comprobante_pago = subida.ruta
+                    subida.estado = 'utilizada'
+                    subida.save(update_fields=['estado', 'fecha_modificacion'])
+
+                suscripcion = Suscripcion.objects.create(
+                    plan=plan,  # Cambiado de plan_id
+                    empresa=empresa,
+                    fecha_inicio=fecha_inicio,
+                    fecha_fin=fecha_fin,
+                    estado='pendiente',
+                    comprobante_pago=comprobante_pago,
+                    observaciones=observaciones,
+                    fecha_solicitud=fecha_inicio
+                )
 
             self._crear_notificacion_suscripcion_admins(
                 suscripcion=suscripcion,
@@ -97,7 +108,7 @@ class SolicitarSuscripcionView(generics.GenericAPIView):
                     'fecha_inicio': fecha_inicio.isoformat(),
                     'fecha_fin': fecha_fin.isoformat(),
                     'estado': 'pendiente',
-                    'comprobante': comprobante_pago.name if comprobante_pago else None
+                    'comprobante': suscripcion.comprobante_pago.name or None
                 },
                 'empresa_actualizada': {
                     'id': empresa.id_empresa,
@@ -329,41 +340,9 @@ class ListaSuscripcionesView(generics.ListAPIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
     def _obtener_estadisticas(self, queryset):
-        """Genera estadísticas de suscripciones"""
-        total = queryset.count()
-        
-        # Por estado
-        por_estado = {}
-        for suscripcion in queryset:
-            estado = suscripcion.estado
-            por_estado[estado] = por_estado.get(estado, 0) + 1
-        
-        # Por plan
-        por_plan = {}
-        ingresos_pendientes = 0
-        ingresos_activos = 0
-        
-        for suscripcion in queryset:
-            plan_nombre = suscripcion.plan.nombre  # Cambiado
-            por_plan[plan_nombre] = por_plan.get(plan_nombre, 0) + 1
-            
-            # Calcular ingresos
-            if suscripcion.estado == 'pendiente':
-                ingresos_pendientes += suscripcion.plan.precio  # Cambiado
-            elif suscripcion.estado == 'activo':
-                ingresos_activos += suscripcion.plan.precio  # Cambiado
-        
-        return {
-            'total_suscripciones': total,
-            'por_estado': por_estado,
-            'por_plan': por_plan,
-            'ingresos': {
-                'pendientes': round(ingresos_pendientes, 2),
-                'activos': round(ingresos_activos, 2),
-                'total_potencial': round(ingresos_pendientes + ingresos_activos, 2)
-            },
-            'suscripciones_hoy': queryset.filter(fecha_solicitud__date=timezone.now().date()).count()
-        }
+        """Genera estadísticas de suscripciones (consulta agregada, ver estadisticas.py)"""
+        from .estadisticas import obtener_estadisticas
+        return obtener_estadisticas(queryset)
 
 
 class DetalleSuscripcionView(generics.RetrieveAPIView):
@@ -3,12 +3,15 @@ from django.utils import timezone
 from rest_framework import generics, status, permissions
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from django.db import transaction
 from usuarios.models import User
 from roles.models import Rol
 from empresas.models import Empresa
 from admins.models import Admin
 from .models import Usuario_Empresa
 from .serializers import RegistroUsuarioEmpresaSerializer, UsuarioEmpresaSerializer
+from planes.limites import reservar_cupo, liberar_cupo, LimitePlanExcedido
 import logging
 
 logger = logging.getLogger(__name__)
@@ -115,24 +118,38 @@ class RegistroUsuarioEmpresaView(generics.CreateAPIView):
                         status=status.HTTP_400_BAD_REQUEST
                     )
             
-            # 3. Crear usuario
-            nuevo_usuario = User.objects.create_user(
-                email=validated_data['email'],
-                password=validated_data['password'],
-                rol=rol_obj,
-                estado='activo'
-            )
-            
-            logger.info(f"Usuario creado: {nuevo_usuario.email} con rol {rol_solicitado}")
-            
-            # 4. NO crear registro en tabla Admin - SOLO usuario_empresa
-            
-            # 5. Crear registro en Usuario_Empresa
-            usuario_empresa = Usuario_Empresa.objects.create(
-                id_usuario=nuevo_usuario,
-                empresa=empresa,  # Pasar el objeto Empresa, no el ID
-                estado='activo'
-            )
+            with transaction.atomic():
+                # Verifica e incrementa el contador de usuarios de la empresa
+                try:
+                    reservar_cupo(empresa, 'usuarios')
+                except LimitePlanExcedido as e:
+                    return Response(
+                        {
+                            'error': 'Límite de usuarios del plan alcanzado',
+                            'detail': e.mensaje,
+                            'status': 'error'
+                        },
+                        status=status.HTTP_403_FORBIDDEN
+                    )
+
+                # 3. Crear usuario
+                nuevo_usuario = User.objects.create_user(
+                    email=validated_data['email'],
+                    password=validated_data['password'],
+                    rol=rol_obj,
+                    estado='activo'
+                )
+                
+                logger.info(f"Usuario creado: {nuevo_usuario.email} con rol {rol_solicitado}")
+                
+                # 4. NO crear registro en tabla Admin - SOLO usuario_empresa
+                
+                # 5. Crear registro en Usuario_Empresa
+                usuario_empresa = Usuario_Empresa.objects.create(
+                    id_usuario=nuevo_usuario,
+                    empresa=empresa,  # Pasar el objeto Empresa, no el ID
+                    estado='activo'
+                )
             
             logger.info(f"Usuario_Empresa creado: {nuevo_usuario.email} para empresa {empresa.nombre}")
             
@@ -292,8 +309,26 @@ class DetalleUsuarioEmpresaView(generics.RetrieveUpdateDestroyAPIView):
             code=status.HTTP_403_FORBIDDEN
         )
     
+    def perform_update(self, serializer):
+        """Mantiene el contador de usuarios activos al cambiar el estado"""
+        instance = serializer.instance
+        activo_antes = instance.estado == 'activo'
+        activo_despues = serializer.validated_data.get('estado', instance.estado) == 'activo'
+
+        with transaction.atomic():
+            if activo_despues and not activo_antes:
+                try:
+                    reservar_cupo(instance.empresa_id, 'usuarios')
+                except LimitePlanExcedido as e:
+                    raise ValidationError({'estado': e.mensaje})
+            elif activo_antes and not activo_despues:
+                liberar_cupo(instance.empresa_id, 'usuarios')
+            serializer.save()
+
     def perform_destroy(self, instance):
         """Sobrescribir eliminación para cambiar estado en lugar de borrar"""
+        if instance.estado == 'activo':
+            liberar_cupo(instance.empresa_id, 'usuarios')
         instance.estado = 'inactivo'
         instance.save()
         
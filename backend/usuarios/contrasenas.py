@@ -0,0 +1,89 @@
+# usuarios/contrasenas.py
+"""
+Hash de contraseñas para altas masivas y perfil de hash.
+
+make_password es CPU pura (PBKDF2 con cientos de miles de iteraciones): en lotes
+se reparte en un pool de procesos en lugar de bloquear el worker. Los lotes pequeños
+se procesan en el mismo proceso (arrancar el pool cuesta más que hashearlos).
+
+PERFIL elige el hasher principal de PASSWORD_HASHERS en settings ('pbkdf2' o
+'argon2', este último requiere argon2-cffi); sus parámetros se leen de esta misma
+configuración (usuarios/hashers.py) y se miden con el comando benchmark_contrasenas.
+"""
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from django.contrib.auth.hashers import make_password
+from backend.configuracion import leer
+
+logger = logging.getLogger(__name__)
+
+CONFIGURACION_POR_DEFECTO = {
+    'PERFIL': 'pbkdf2',
+    # 0 = siempre en el mismo proceso
+    'PROCESOS': 2,
+    'MINIMO_PARALELO': 4,
+    # None = valor por defecto de Django
+    'ITERACIONES_PBKDF2': None,
+    # Mínimo recomendado por OWASP para Argon2id: 19 MiB, 2 pasadas, 1 hilo
+    'ARGON2': {
+        'TIME_COST': 2,
+        'MEMORY_COST': 19456,
+        'PARALLELISM': 1,
+    },
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def obtener_configuracion():
+    return leer('HASH_CONTRASENAS', CONFIGURACION_POR_DEFECTO)
+
+
+def _inicializar_proceso():
+    """El proceso hijo (spawn) carga la configuración de Django para usar PASSWORD_HASHERS"""
+    import django
+    django.setup()
+
+
+def _obtener_executor(procesos):
+    """Pool de procesos por worker, creado en el primer uso"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn: el hijo no hereda conexiones a la base de datos ni hilos del servidor
+            _executor = ProcessPoolExecutor(
+                max_workers=procesos,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_inicializar_proceso
+            )
+        return _executor
+
+
+def _descartar_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def hashear_contrasenas(contrasenas):
+    """Retorna los hashes en el mismo orden que las contraseñas recibidas"""
+    contrasenas = list(contrasenas)
+    configuracion = obtener_configuracion()
+    procesos = configuracion['PROCESOS']
+
+    if procesos and len(contrasenas) >= configuracion['MINIMO_PARALELO']:
+        try:
+            executor = _obtener_executor(procesos)
+            bloque = max(1, len(contrasenas) // (procesos * 4))
+            return list(executor.map(make_password, contrasenas, chunksize=bloque))
+        except Exception as e:
+            # Pool roto (proceso hijo terminado): se reintenta en el proceso actual
+            logger.error(f"Error en el pool de hash de contraseñas: {str(e)}")
+            _descartar_executor()
+
+    return [make_password(contrasena) for contrasena in contrasenas]
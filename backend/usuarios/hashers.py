@@ -0,0 +1,38 @@
+# usuarios/hashers.py
+"""
+Hashers con parámetros ajustables desde settings.HASH_CONTRASENAS (perfil de hash).
+
+Conservan el nombre de algoritmo de Django, así los hashes existentes se siguen
+verificando y se regeneran con los parámetros nuevos en el siguiente login
+(must_update). Los parámetros se miden con: python manage.py benchmark_contrasenas
+"""
+from django.contrib.auth.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher
+
+
+def _configuracion():
+    from .contrasenas import obtener_configuracion
+    return obtener_configuracion()
+
+
+class PBKDF2PerfilHasher(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256; ITERACIONES_PBKDF2 = None usa el valor por defecto de Django"""
+
+    @property
+    def iterations(self):
+        return _configuracion()['ITERACIONES_PBKDF2'] or PBKDF2PasswordHasher.iterations
+
+
+class Argon2PerfilHasher(Argon2PasswordHasher):
+    """Argon2id (requiere argon2-cffi); memory_cost en KiB"""
+
+    @property
+    def time_cost(self):
+        return _configuracion()['ARGON2']['TIME_COST']
+
+    @property
+    def memory_cost(self):
+        return _configuracion()['ARGON2']['MEMORY_COST']
+
+    @property
+    def parallelism(self):
+        return _configuracion()['ARGON2']['PARALLELISM']
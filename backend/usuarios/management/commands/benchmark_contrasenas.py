@@ -0,0 +1,101 @@
+# usuarios/management/commands/benchmark_contrasenas.py
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.core.management.base import BaseCommand, CommandError
+from usuarios.contrasenas import _inicializar_proceso, obtener_configuracion
+
+ALGORITMOS = {'pbkdf2': 'pbkdf2_sha256', 'argon2': 'argon2'}
+
+
+def hashear(algoritmo, contrasena):
+    """Se ejecuta en el proceso hijo"""
+    return make_password(contrasena, hasher=algoritmo)
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide hashes por segundo de los perfiles de hash de contraseñas (PASSWORD_HASHERS) '
+        'en un proceso y en el pool de procesos, y con --objetivo-ms sugiere parámetros '
+        'para HASH_CONTRASENAS que tarden ese tiempo por hash en esta máquina.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--perfil', choices=['pbkdf2', 'argon2', 'todos'], default='todos')
+        parser.add_argument('--cantidad', type=int, default=32, help='Hashes por medición (por defecto 32)')
+        parser.add_argument('--procesos', type=int, default=os.cpu_count() or 1,
+                            help='Procesos del pool (por defecto, núcleos disponibles)')
+        parser.add_argument('--objetivo-ms', type=float, help='Tiempo objetivo por hash para calibrar parámetros')
+
+    def handle(self, *args, **options):
+        if options['cantidad'] < 1 or options['procesos'] < 1:
+            raise CommandError('--cantidad y --procesos deben ser mayores a 0')
+
+        perfiles = ['pbkdf2', 'argon2'] if options['perfil'] == 'todos' else [options['perfil']]
+        configuracion = obtener_configuracion()
+        self.stdout.write(f"Perfil activo: {configuracion['PERFIL']} ({os.cpu_count()} núcleos)")
+
+        for perfil in perfiles:
+            algoritmo = ALGORITMOS[perfil]
+            try:
+                hasher = get_hasher(algoritmo)
+                if hasher.library:
+                    hasher._load_library()
+            except ValueError as e:
+                self.stdout.write(self.style.WARNING(f'{perfil}: no disponible ({e})'))
+                continue
+
+            contrasenas = [f'benchmark-{indice:04d}' for indice in range(options['cantidad'])]
+            por_segundo, ms_por_hash = self._medir_serie(algoritmo, contrasenas)
+            paralelo = self._medir_pool(algoritmo, contrasenas, options['procesos'])
+            nucleos = min(options['procesos'], os.cpu_count() or 1)
+
+            self.stdout.write(self.style.SUCCESS(
+                f'{perfil} [{self._parametros(perfil, configuracion)}]\n'
+                f'  1 proceso:  {por_segundo:8.1f} hashes/s ({ms_por_hash:.1f} ms por hash)\n'
+                f'  {options["procesos"]} procesos: {paralelo:8.1f} hashes/s '
+                f'({paralelo / nucleos:.1f} por núcleo, x{paralelo / por_segundo:.2f})'
+            ))
+
+            if options['objetivo_ms']:
+                self.stdout.write(f'  Sugerido para {options["objetivo_ms"]:.0f} ms por hash: '
+                                  f'{self._calibrar(perfil, configuracion, ms_por_hash, options["objetivo_ms"])}')
+
+    def _medir_serie(self, algoritmo, contrasenas):
+        # Primer hash fuera de la medición (carga de la librería)
+        make_password(contrasenas[0], hasher=algoritmo)
+        inicio = time.perf_counter()
+        for contrasena in contrasenas:
+            make_password(contrasena, hasher=algoritmo)
+        duracion = time.perf_counter() - inicio
+        return len(contrasenas) / duracion, duracion * 1000 / len(contrasenas)
+
+    def _medir_pool(self, algoritmo, contrasenas, procesos):
+        with ProcessPoolExecutor(
+            max_workers=procesos,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_inicializar_proceso
+        ) as executor:
+            # Arranque de los procesos fuera de la medición
+            list(executor.map(hashear, [algoritmo] * procesos, contrasenas[:1] * procesos))
+            inicio = time.perf_counter()
+            list(executor.map(hashear, [algoritmo] * len(contrasenas), contrasenas))
+            return len(contrasenas) / (time.perf_counter() - inicio)
+
+    def _parametros(self, perfil, configuracion):
+        if perfil == 'pbkdf2':
+            return f'iteraciones={get_hasher("pbkdf2_sha256").iterations}'
+        argon2 = configuracion['ARGON2']
+        return f"time_cost={argon2['TIME_COST']}, memory_cost={argon2['MEMORY_COST']} KiB, parallelism={argon2['PARALLELISM']}"
+
+    def _calibrar(self, perfil, configuracion, ms_por_hash, objetivo_ms):
+        """El costo crece linealmente con las iteraciones (PBKDF2) y con time_cost (Argon2)"""
+        factor = objetivo_ms / ms_por_hash
+        if perfil == 'pbkdf2':
+            iteraciones = get_hasher('pbkdf2_sha256').iterations
+            return f"'ITERACIONES_PBKDF2': {max(1000, int(round(iteraciones * factor, -3)))}"
+        argon2 = configuracion['ARGON2']
+        return f"'ARGON2': {{'TIME_COST': {max(1, round(argon2['TIME_COST'] * factor))}, " \
+               f"'MEMORY_COST': {argon2['MEMORY_COST']}, 'PARALLELISM': {argon2['PARALLELISM']}}}"
@@ -0,0 +1,82 @@
+# usuarios/management/commands/benchmark_endpoints.py
+import json
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from backend.benchmarks.datos import generar_datos
+from backend.benchmarks.escenarios import comparar, ejecutar
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide consultas, latencia p50/p95 y memoria de los endpoints más usados sobre datos '
+        'sintéticos en una base de datos de pruebas temporal (nunca sobre la base real). '
+        'Con --guardar escribe la línea base; con --comparar falla si hay regresiones.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--empresas', type=int, default=2)
+        parser.add_argument('--productos', type=int, default=200, help='Productos por empresa')
+        parser.add_argument('--clientes', type=int, default=50, help='Clientes por empresa')
+        parser.add_argument('--ventas', type=int, default=1000, help='Ventas históricas por empresa')
+        parser.add_argument('--semilla', type=int, default=1)
+        parser.add_argument('--iteraciones', type=int, default=30, help='Solicitudes medidas por escenario')
+        parser.add_argument('--escenario', action='append', help='Ejecuta solo estos escenarios (repetible)')
+        parser.add_argument('--guardar', help='Archivo JSON donde guardar el resultado como línea base')
+        parser.add_argument('--comparar', help='Archivo JSON de línea base contra el que comparar')
+        parser.add_argument('--tolerancia', type=float, default=25,
+                            help='Aumento permitido en %% de p95 y memoria (por defecto 25)')
+        parser.add_argument('--sin-latencia', action='store_true',
+                            help='Compara solo consultas y memoria (línea base de otra máquina)')
+        parser.add_argument('--noinput', action='store_false', dest='interactive')
+
+    def handle(self, *args, **options):
+        if min(options['empresas'], options['productos'], options['clientes'], options['iteraciones']) < 1:
+            raise CommandError('--empresas, --productos, --clientes e --iteraciones deben ser mayores a 0')
+
+        base = None
+        if options['comparar']:
+            try:
+                with open(options['comparar'], encoding='utf-8') as archivo:
+                    base = json.load(archivo)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"No se pudo leer la línea base {options['comparar']}: {e}")
+
+        parametros = {clave: options[clave] for clave in ('empresas', 'productos', 'clientes', 'ventas', 'semilla')}
+
+        # Misma preparación que el runner de tests: DEBUG=False, email en memoria y base temporal
+        setup_test_environment(debug=False)
+        nombre_original = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=not options['interactive'], serialize=False)
+        try:
+            self.stdout.write(f'Generando datos: {parametros}')
+            datos = generar_datos(**parametros)
+            resultados = ejecutar(datos, iteraciones=options['iteraciones'], solo=options['escenario'])
+        finally:
+            connection.creation.destroy_test_db(nombre_original, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(f"{'escenario':<28}{'status':>7}{'consultas':>11}{'p50 ms':>10}{'p95 ms':>10}{'memoria KB':>12}")
+        for nombre, medicion in resultados.items():
+            self.stdout.write(
+                f"{nombre:<28}{medicion['status']:>7}{medicion['consultas']:>11}"
+                f"{medicion['p50_ms']:>10.2f}{medicion['p95_ms']:>10.2f}{medicion['memoria_kb']:>12.1f}"
+            )
+
+        if options['guardar']:
+            with open(options['guardar'], 'w', encoding='utf-8') as archivo:
+                json.dump({'parametros': parametros, 'escenarios': resultados}, archivo, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Línea base guardada en {options['guardar']}"))
+
+        if base is not None:
+            if base.get('parametros') != parametros:
+                self.stdout.write(self.style.WARNING(
+                    f"Los parámetros difieren de la línea base ({base.get('parametros')}): la comparación no es exacta"
+                ))
+            regresiones = comparar(
+                resultados, base.get('escenarios', {}),
+                tolerancia=options['tolerancia'], latencia=not options['sin_latencia']
+            )
+            if regresiones:
+                raise CommandError('Regresiones respecto de la línea base:\n  ' + '\n  '.join(regresiones))
+            self.stdout.write(self.style.SUCCESS('Sin regresiones respecto de la línea base'))
@@ -151,6 +151,38 @@ class CambioPasswordSerializer(serializers.Serializer):
 
 
 # usuarios/serializers.py
+def empresas_nombres_por_usuario(usuarios):
+    """
+    {id_usuario: [nombres de empresas]} para un listado, con una consulta por tipo de
+    relación (mismo criterio que UserSerializer.get_empresas). Se pasa al serializador en
+    el contexto 'empresas_nombres' para no consultar por cada usuario.
+    """
+    from empresas.models import Empresa
+    from relacion_tiene.models import Tiene
+    from usuario_empresa.models import Usuario_Empresa
+
+    por_rol = {}
+    for usuario in usuarios:
+        por_rol.setdefault(usuario.rol.rol if usuario.rol else None, []).append(usuario.id_usuario)
+
+    nombres = {}
+    if por_rol.get('admin'):
+        for admin_id, nombre in Empresa.objects.filter(admin_id__in=por_rol['admin']).values_list('admin_id', 'nombre'):
+            nombres.setdefault(admin_id, []).append(nombre)
+    if por_rol.get('cliente'):
+        for cliente_id, nombre in Tiene.objects.filter(
+            id_cliente__in=por_rol['cliente']
+        ).order_by('fecha_registro', 'id').values_list('id_cliente', 'id_empresa__nombre'):
+            nombres.setdefault(cliente_id, []).append(nombre)
+    personal = por_rol.get('admin_empresa', []) + por_rol.get('vendedor', [])
+    if personal:
+        for id_usuario, nombre in Usuario_Empresa.objects.filter(
+            id_usuario__in=personal
+        ).values_list('id_usuario', 'empresa__nombre'):
+            nombres[id_usuario] = [nombre]
+    return nombres
+
+
 class UserSerializer(serializers.ModelSerializer):
     rol = serializers.CharField(source='rol.rol', read_only=True)
     rol_id = serializers.IntegerField(source='rol.id_rol', read_only=True)
@@ -167,6 +199,9 @@ class UserSerializer(serializers.ModelSerializer):
         """
         Retorna solo los nombres de las empresas
         """
+        precargados = self.context.get('empresas_nombres')
+        if precargados is not None:
+            return precargados.get(obj.id_usuario, [])
         empresas = self.get_empresas(obj)
         return [empresa['nombre'] for empresa in empresas] if empresas else []
     
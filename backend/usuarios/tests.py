@@ -1,3 +1,170 @@
-from django.test import TestCase
+from unittest import mock, skipUnless
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, check_password, identify_hasher, make_password
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from backend.benchmarks.datos import generar_datos
+from backend.benchmarks.escenarios import comparar, ejecutar
+from backend.pruebas import ConsultasConstantesMixin
+from roles.models import Rol
+from usuario_empresa.models import Usuario_Empresa
+from . import contrasenas
+from .contrasenas import hashear_contrasenas
+from .hashers import Argon2PerfilHasher, PBKDF2PerfilHasher
+from .models import User
 
-# Create your tests here.
+try:
+    import argon2
+except ImportError:
+    argon2 = None
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class BenchmarkEndpointsTest(TestCase):
+    """El comando benchmark_endpoints genera datos válidos y todos sus escenarios responden"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = generar_datos(empresas=2, productos=5, clientes=3, ventas=4)
+
+    def test_escenarios_responden(self):
+        resultados = ejecutar(self.datos, iteraciones=2)
+
+        self.assertEqual(len(resultados), 7)
+        for nombre, medicion in resultados.items():
+            self.assertLess(medicion['status'], 300, nombre)
+            self.assertGreater(medicion['consultas'], 0, nombre)
+            self.assertLessEqual(medicion['p50_ms'], medicion['p95_ms'], nombre)
+
+    def test_comparar_detecta_regresiones(self):
+        base = {'listar_ventas': {'consultas': 5, 'p95_ms': 10.0, 'memoria_kb': 100.0}}
+
+        self.assertEqual(comparar({'listar_ventas': {'consultas': 5, 'p95_ms': 12.0, 'memoria_kb': 100.0}}, base), [])
+        self.assertEqual(len(comparar({'listar_ventas': {'consultas': 6, 'p95_ms': 10.0, 'memoria_kb': 100.0}}, base)), 1)
+        self.assertEqual(len(comparar({'listar_ventas': {'consultas': 5, 'p95_ms': 20.0, 'memoria_kb': 100.0}}, base)), 1)
+        self.assertEqual(
+            comparar({'listar_ventas': {'consultas': 5, 'p95_ms': 20.0, 'memoria_kb': 100.0}}, base, latencia=False), []
+        )
+
+
+class ConsultasListaUsuariosTest(ConsultasConstantesMixin, TestCase):
+    """ListaUsuariosView: empresas y estadísticas salen de los usuarios ya cargados"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = generar_datos(empresas=1, productos=1, clientes=2, ventas=0)
+        rol_admin = Rol.objects.get(rol='admin')
+        cls.admin = User.objects.create_user(email='admin@usuarios.test', password='x', rol=rol_admin)
+
+    def _agregar_usuarios(self):
+        personal = User.objects.bulk_create([
+            User(email=f'personal{i}@usuarios.test', password='!', rol=self.datos['vendedor'].rol, estado='activo')
+            for i in range(10)
+        ])
+        Usuario_Empresa.objects.bulk_create([
+            Usuario_Empresa(id_usuario=usuario, empresa=self.datos['empresa'], estado='activo')
+            for usuario in personal
+        ])
+
+    def test_lista_usuarios(self):
+        cliente = APIClient()
+        cliente.force_authenticate(self.admin)
+
+        def contar(respuesta):
+            datos = respuesta.json()
+            return len(datos['results']['usuarios'] if 'results' in datos else datos['usuarios'])
+
+        self.assertConsultasConstantes(
+            lambda: cliente.get('/api/usuarios/todos/'),
+            self._agregar_usuarios,
+            contar
+        )
+
+
+class HashersPerfilTest(TestCase):
+    """usuarios/hashers.py: los hashers leen sus parámetros de settings.HASH_CONTRASENAS"""
+
+    @override_settings(HASH_CONTRASENAS={'ITERACIONES_PBKDF2': 1000})
+    def test_pbkdf2_iteraciones_de_settings(self):
+        hasher = PBKDF2PerfilHasher()
+        codificado = hasher.encode('clave-segura', hasher.salt())
+
+        self.assertEqual(hasher.iterations, 1000)
+        self.assertTrue(codificado.startswith('pbkdf2_sha256$1000$'))
+        self.assertTrue(hasher.verify('clave-segura', codificado))
+        self.assertFalse(hasher.verify('otra-clave', codificado))
+        with override_settings(HASH_CONTRASENAS={'ITERACIONES_PBKDF2': 2000}):
+            self.assertTrue(hasher.must_update(codificado))
+
+    @override_settings(HASH_CONTRASENAS={'ITERACIONES_PBKDF2': None})
+    def test_pbkdf2_valor_por_defecto_de_django(self):
+        self.assertEqual(PBKDF2PerfilHasher().iterations, PBKDF2PasswordHasher.iterations)
+
+    @override_settings(HASH_CONTRASENAS={'ARGON2': {'MEMORY_COST': 8192}})
+    def test_argon2_parametros_de_settings(self):
+        hasher = Argon2PerfilHasher()
+
+        # Las claves no indicadas conservan el valor por defecto
+        self.assertEqual((hasher.time_cost, hasher.memory_cost, hasher.parallelism), (2, 8192, 1))
+
+    @skipUnless(argon2, 'requiere argon2-cffi')
+    @override_settings(HASH_CONTRASENAS={'ARGON2': {'TIME_COST': 1, 'MEMORY_COST': 8192, 'PARALLELISM': 1}})
+    def test_argon2_verifica_sus_hashes(self):
+        hasher = Argon2PerfilHasher()
+        codificado = hasher.encode('clave-segura', hasher.salt())
+
+        self.assertIn('$m=8192,t=1,p=1$', codificado)
+        self.assertTrue(hasher.verify('clave-segura', codificado))
+        self.assertFalse(hasher.verify('otra-clave', codificado))
+        with override_settings(HASH_CONTRASENAS={'ARGON2': {'TIME_COST': 2}}):
+            self.assertTrue(hasher.must_update(codificado))
+
+
+class HashearContrasenasTest(TestCase):
+    """hashear_contrasenas: mismo resultado que make_password, en línea y en el pool de procesos"""
+
+    CONTRASENAS = [f'clave-{numero}' for numero in range(5)]
+
+    def _verificar(self, hashes):
+        self.assertEqual(len(hashes), len(self.CONTRASENAS))
+        algoritmo = identify_hasher(make_password('referencia'))
+        for contrasena, codificado in zip(self.CONTRASENAS, hashes):
+            self.assertEqual(identify_hasher(codificado).algorithm, algoritmo.algorithm)
+            self.assertTrue(check_password(contrasena, codificado))
+        # El orden se conserva
+        self.assertFalse(check_password(self.CONTRASENAS[0], hashes[1]))
+
+    @override_settings(
+        PASSWORD_HASHERS=['usuarios.hashers.PBKDF2PerfilHasher'],
+        HASH_CONTRASENAS={'PROCESOS': 0, 'ITERACIONES_PBKDF2': 1000}
+    )
+    def test_en_linea(self):
+        hashes = hashear_contrasenas(self.CONTRASENAS)
+
+        self._verificar(hashes)
+        self.assertTrue(all(codificado.startswith('pbkdf2_sha256$1000$') for codificado in hashes))
+
+    @override_settings(HASH_CONTRASENAS={'PROCESOS': 2, 'MINIMO_PARALELO': 2})
+    def test_pool_de_procesos(self):
+        # El hijo (spawn) carga los settings del proyecto, no los de override_settings
+        self.addCleanup(contrasenas._descartar_executor)
+
+        self._verificar(hashear_contrasenas(self.CONTRASENAS))
+        self.assertIsNotNone(contrasenas._executor)
+
+    @override_settings(
+        PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+        HASH_CONTRASENAS={'PROCESOS': 2, 'MINIMO_PARALELO': 2}
+    )
+    def test_pool_roto_hashea_en_linea(self):
+        with mock.patch.object(contrasenas, '_obtener_executor', side_effect=RuntimeError('pool roto')), \
+                self.assertLogs('usuarios.contrasenas', 'ERROR'):
+            self._verificar(hashear_contrasenas(self.CONTRASENAS))
+
+    @override_settings(
+        PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+        HASH_CONTRASENAS={'PROCESOS': 2, 'MINIMO_PARALELO': 10}
+    )
+    def test_lote_pequeno_no_usa_el_pool(self):
+        with mock.patch.object(contrasenas, '_obtener_executor') as obtener:
+            self._verificar(hashear_contrasenas(self.CONTRASENAS))
+        obtener.assert_not_called()
@@ -6,7 +6,7 @@ from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models.deletion import ProtectedError
 from .models import User
-from .serializers import UserSerializer, PerfilUsuarioSerializer
+from .serializers import UserSerializer, PerfilUsuarioSerializer, empresas_nombres_por_usuario
 from roles.models import Rol
 import logging
 
@@ -52,23 +52,27 @@ class ListaUsuariosView(generics.ListAPIView):
         """
         try:
             queryset = self.filter_queryset(self.get_queryset())
+            # Una sola lectura de los usuarios y de sus empresas para el listado y las estadísticas
+            usuarios = list(queryset)
+            empresas_nombres = empresas_nombres_por_usuario(usuarios)
+            contexto = {**self.get_serializer_context(), 'empresas_nombres': empresas_nombres}
             
             # Paginación opcional
-            page = self.paginate_queryset(queryset)
+            page = self.paginate_queryset(usuarios)
             if page is not None:
-                serializer = self.get_serializer(page, many=True)
+                serializer = UserSerializer(page, many=True, context=contexto)
                 return self.get_paginated_response({
                     'usuarios': serializer.data,
-                    'estadisticas': self._obtener_estadisticas(queryset),
+                    'estadisticas': self._obtener_estadisticas(usuarios, empresas_nombres),
                     'status': 'success'
                 })
             
-            serializer = self.get_serializer(queryset, many=True)
+            serializer = UserSerializer(usuarios, many=True, context=contexto)
             
             return Response({
                 'usuarios': serializer.data,
-                'estadisticas': self._obtener_estadisticas(queryset),
-                'total': queryset.count(),
+                'estadisticas': self._obtener_estadisticas(usuarios, empresas_nombres),
+                'total': len(usuarios),
                 'status': 'success'
             })
             
@@ -83,29 +87,27 @@ class ListaUsuariosView(generics.ListAPIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
-    def _obtener_estadisticas(self, queryset):
+    def _obtener_estadisticas(self, usuarios, empresas_nombres):
         """
-        Obtiene estadísticas de usuarios
+        Obtiene estadísticas de usuarios (sin consultas: sobre los usuarios ya cargados)
         """
-        total = queryset.count()
+        total = len(usuarios)
         
         # Contar por rol
         usuarios_por_rol = {}
         usuarios_con_empresa_por_rol = {}
         
-        for user in queryset:
+        for user in usuarios:
             rol_nombre = user.rol.rol if user.rol else 'sin_rol'
             usuarios_por_rol[rol_nombre] = usuarios_por_rol.get(rol_nombre, 0) + 1
             
             # Contar usuarios con empresa por rol
-            serializer = self.get_serializer(user)
-            empresas = serializer.data.get('empresas', [])
-            if empresas:
+            if empresas_nombres.get(user.id_usuario):
                 usuarios_con_empresa_por_rol[rol_nombre] = usuarios_con_empresa_por_rol.get(rol_nombre, 0) + 1
         
         # Contar por estado
         usuarios_por_estado = {}
-        for user in queryset:
+        for user in usuarios:
             estado = user.estado
             usuarios_por_estado[estado] = usuarios_por_estado.get(estado, 0) + 1
         
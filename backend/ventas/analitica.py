@@ -0,0 +1,220 @@
+# ventas/analitica.py
+"""
+Análisis de desempeño de productos (ABC / Pareto) de una empresa en un rango de fechas.
+
+- Ventas: una consulta agrupada de detalle_venta por producto (ingresos, unidades, ventas)
+- Costo: costo unitario promedio ponderado de detalle_compra hasta el fin del rango
+  (una consulta agrupada); margen = ingresos - unidades * costo
+- Rotación: unidades vendidas / inventario promedio, con el stock al inicio y al fin
+  del rango reconstruido desde el kardex (producto/kardex.py); dias_rotacion = días del
+  rango / rotación
+- Clase ABC por participación acumulada en los ingresos: A hasta UMBRAL_A, B hasta UMBRAL_B
+
+El resultado se guarda en el cache de Django por (empresa, rango). La clave incluye una
+versión por empresa que se incrementa al confirmar ventas o compras (ventas/signals.py),
+así ningún resultado anterior a un cambio se vuelve a servir. Si la clave de versión se
+pierde (desalojo o reinicio del cache) se siembra con un timestamp, nunca con un valor
+ya usado. Con varios procesos, CACHES debe apuntar a un backend compartido (p. ej.
+Redis); el de memoria local es por proceso.
+"""
+import logging
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from django.core.cache import cache
+from django.db.models import Count, Sum
+from django.utils import timezone
+from backend.configuracion import leer
+
+logger = logging.getLogger(__name__)
+
+CONFIGURACION_POR_DEFECTO = {
+    'UMBRAL_A': Decimal('0.80'),
+    'UMBRAL_B': Decimal('0.95'),
+    'DIAS_POR_DEFECTO': 90,
+    'SEGUNDOS_CACHE': 60 * 60,
+}
+
+CENTAVOS = Decimal('0.01')
+
+
+def obtener_configuracion():
+    return leer('ANALITICA_VENTAS', CONFIGURACION_POR_DEFECTO)
+
+
+def _clave_version(empresa_id):
+    return f'analitica_ventas:version:{empresa_id}'
+
+
+def _version_nueva():
+    """Valor inicial de la versión que no repite uno anterior aunque la clave se haya desalojado"""
+    return time.time_ns()
+
+
+def _version(empresa_id):
+    """Versión actual de los análisis de la empresa; la siembra si la clave no existe"""
+    clave = _clave_version(empresa_id)
+    version = cache.get(clave)
+    if version is None:
+        version = _version_nueva()
+        if not cache.add(clave, version, None):
+            # Otro proceso la sembró primero
+            version = cache.get(clave, version)
+    return version
+
+
+def invalidar(empresa_id):
+    """Descarta los análisis en cache de la empresa (nueva versión de la clave)"""
+    clave = _clave_version(empresa_id)
+    try:
+        cache.incr(clave)
+    except ValueError:
+        cache.set(clave, _version_nueva(), None)
+
+
+def rango_fechas(fecha_inicio=None, fecha_fin=None):
+    """(desde, hasta) aware a partir de 'YYYY-MM-DD'; hasta es exclusivo. Lanza ValueError"""
+    configuracion = obtener_configuracion()
+    fin = datetime.strptime(fecha_fin, '%Y-%m-%d').date() if fecha_fin else timezone.localdate()
+    inicio = (
+        datetime.strptime(fecha_inicio, '%Y-%m-%d').date() if fecha_inicio
+        else fin - timedelta(days=configuracion['DIAS_POR_DEFECTO'] - 1)
+    )
+    if inicio > fin:
+        raise ValueError('fecha_inicio posterior a fecha_fin')
+    desde = timezone.make_aware(datetime.combine(inicio, datetime.min.time()))
+    hasta = timezone.make_aware(datetime.combine(fin + timedelta(days=1), datetime.min.time()))
+    return desde, hasta
+
+
+def analisis_productos(empresa, desde, hasta):
+    """Análisis del rango [desde, hasta), desde el cache si la versión de la empresa no cambió"""
+    configuracion = obtener_configuracion()
+    version = _version(empresa.id_empresa)
+    clave = f'analitica_ventas:{empresa.id_empresa}:{version}:{desde.isoformat()}:{hasta.isoformat()}'
+
+    resultado = cache.get(clave)
+    if resultado is None:
+        resultado = calcular_analisis(empresa, desde, hasta)
+        cache.set(clave, resultado, configuracion['SEGUNDOS_CACHE'])
+    return resultado
+
+
+def _costos_promedio(empresa, hasta):
+    """{id_producto: costo unitario promedio ponderado de las compras anteriores a `hasta`}"""
+    from detalle_compra.models import DetalleCompra
+
+    return {
+        id_producto: (total / unidades).quantize(CENTAVOS)
+        for id_producto, total, unidades in DetalleCompra.objects.filter(
+            id_producto__empresa=empresa,
+            id_compra__fecha__lt=hasta
+        ).order_by().values('id_producto').annotate(
+            total=Sum('subtotal'),
+            unidades=Sum('cantidad')
+        ).values_list('id_producto', 'total', 'unidades')
+        if unidades
+    }
+
+
+def _stock_en_fecha(empresa, fecha, ids):
+    from producto.kardex import anotar_stock_en_fecha
+    from producto.models import Producto
+
+    return dict(
+        anotar_stock_en_fecha(
+            Producto.objects.filter(empresa=empresa, id_producto__in=ids), fecha
+        ).values_list('id_producto', 'stock_en_fecha')
+    )
+
+
+def calcular_analisis(empresa, desde, hasta):
+    from detalle_venta.models import DetalleVenta
+    from producto.models import Producto
+
+    configuracion = obtener_configuracion()
+    dias = max((hasta - desde).days, 1)
+
+    ventas = list(
+        DetalleVenta.objects.filter(
+            id_producto__empresa=empresa,
+            id_venta__fecha_venta__gte=desde,
+            id_venta__fecha_venta__lt=hasta
+        ).order_by().values('id_producto', 'id_producto__nombre').annotate(
+            ingresos=Sum('subtotal'),
+            unidades=Sum('cantidad'),
+            # Ventas, no líneas de detalle
+            ventas=Count('id_venta', distinct=True)
+        ).order_by('-ingresos', 'id_producto')
+    )
+    total_productos = Producto.objects.filter(empresa=empresa).count()
+    if not ventas:
+        return {'productos': [], 'resumen': _resumen([], Decimal('0'), total_productos)}
+
+    ids = [fila['id_producto'] for fila in ventas]
+    costos = _costos_promedio(empresa, hasta)
+    stock_inicio = _stock_en_fecha(empresa, desde, ids)
+    stock_fin = _stock_en_fecha(empresa, min(hasta, timezone.now()), ids)
+
+    ingresos_totales = sum(fila['ingresos'] for fila in ventas)
+    acumulado = Decimal('0')
+    productos = []
+    for posicion, fila in enumerate(ventas, start=1):
+        id_producto = fila['id_producto']
+        ingresos = fila['ingresos']
+        unidades = fila['unidades']
+
+        # La clase depende de la participación acumulada antes del producto: el primero siempre es A
+        participacion_previa = acumulado / ingresos_totales if ingresos_totales else Decimal('0')
+        if participacion_previa < configuracion['UMBRAL_A']:
+            clase = 'A'
+        elif participacion_previa < configuracion['UMBRAL_B']:
+            clase = 'B'
+        else:
+            clase = 'C'
+        acumulado += ingresos
+
+        costo = costos.get(id_producto)
+        margen = (ingresos - costo * unidades).quantize(CENTAVOS) if costo is not None else None
+
+        inventario_promedio = (stock_inicio.get(id_producto, 0) + stock_fin.get(id_producto, 0)) / 2
+        rotacion = unidades / inventario_promedio if inventario_promedio > 0 else None
+
+        productos.append({
+            'posicion': posicion,
+            'id_producto': id_producto,
+            'nombre': fila['id_producto__nombre'],
+            'clase': clase,
+            'ingresos': float(ingresos),
+            'unidades': unidades,
+            'ventas': fila['ventas'],
+            'participacion': round(float(ingresos / ingresos_totales), 4) if ingresos_totales else 0,
+            'participacion_acumulada': round(float(acumulado / ingresos_totales), 4) if ingresos_totales else 0,
+            'costo_unitario': float(costo) if costo is not None else None,
+            'margen': float(margen) if margen is not None else None,
+            'margen_porcentaje': round(float(margen / ingresos * 100), 2) if margen is not None and ingresos else None,
+            'inventario_promedio': inventario_promedio,
+            'rotacion': round(rotacion, 3) if rotacion else None,
+            'dias_rotacion': round(dias / rotacion, 1) if rotacion else None,
+        })
+
+    return {'productos': productos, 'resumen': _resumen(productos, ingresos_totales, total_productos)}
+
+
+def _resumen(productos, ingresos_totales, total_productos):
+    clases = {}
+    for clase in ('A', 'B', 'C'):
+        de_clase = [p for p in productos if p['clase'] == clase]
+        clases[clase] = {
+            'productos': len(de_clase),
+            'ingresos': round(sum(p['ingresos'] for p in de_clase), 2),
+        }
+    margenes = [p['margen'] for p in productos if p['margen'] is not None]
+    return {
+        'ingresos_totales': float(ingresos_totales),
+        'unidades_totales': sum(p['unidades'] for p in productos),
+        'margen_total': round(sum(margenes), 2) if margenes else None,
+        'productos_con_ventas': len(productos),
+        'productos_sin_ventas': total_productos - len(productos),
+        'clases': clases,
+    }
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-19 16:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cliente', '0001_initial'),
+        ('usuario_empresa', '0001_initial'),
+        ('ventas', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='venta',
+            index=models.Index(fields=['usuario_empresa', 'fecha_venta'], name='venta_ue_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='venta',
+            index=models.Index(fields=['fecha_venta'], name='venta_fecha_idx'),
+        ),
+    ]
@@ -11,4 +11,9 @@ class Venta(models.Model):
     
     class Meta:
         db_table = "venta"
-        ordering = ["id_venta"]
\ No newline at end of file
+        ordering = ["id_venta"]
+        indexes = [
+            # Listados y reportes por empresa/vendedor en un rango de fechas
+            models.Index(fields=['usuario_empresa', 'fecha_venta'], name='venta_ue_fecha_idx'),
+            models.Index(fields=['fecha_venta'], name='venta_fecha_idx'),
+        ]
\ No newline at end of file
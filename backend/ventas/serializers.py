@@ -57,7 +57,8 @@ class VentaSerializer(serializers.ModelSerializer):
     def get_detalles_venta(self, obj):
         """Obtiene detalles de la venta con información de productos"""
         try:
-            detalles = DetalleVenta.objects.filter(id_venta=obj).select_related('id_producto')
+            # Usa los detalles precargados por la vista (prefetch_related) si los hay
+            detalles = obj.detalleventa_set.all()
             
             detalles_data = []
             for detalle in detalles:
@@ -118,8 +119,19 @@ class RealizarCompraSerializer(serializers.Serializer):
         except Cliente.DoesNotExist:
             raise serializers.ValidationError("Cliente no encontrado")
         
+        # Una línea por producto (detalle_venta es único por venta y producto)
+        vistos = set()
+        for detalle in data['detalles']:
+            if detalle['id_producto'] in vistos:
+                raise serializers.ValidationError(
+                    f"El producto con ID {detalle['id_producto']} aparece más de una vez; "
+                    f"indique la cantidad total en una sola línea"
+                )
+            vistos.add(detalle['id_producto'])
+
         # Validar cada detalle de venta
         productos_info = []
+        reservas_pendientes = []
         precio_total = 0
         
         for detalle in data['detalles']:
@@ -135,11 +147,15 @@ class RealizarCompraSerializer(serializers.Serializer):
                     f"Producto con ID {detalle['id_producto']} no disponible"
                 )
             
-            # Verificar stock
-            if producto.stock_actual < detalle['cantidad']:
+            # Reserva pendiente del vendedor para este producto (sus unidades ya están apartadas)
+            reserva = self._verificar_reserva(user, producto, detalle['cantidad'])
+            reservado = reserva.cantidad if reserva else 0
+
+            # Verificar stock disponible (las reservas de otros no se pueden vender)
+            if producto.stock_disponible + reservado < detalle['cantidad']:
                 raise serializers.ValidationError(
                     f"Stock insuficiente para {producto.nombre}. "
-                    f"Disponible: {producto.stock_actual}, Solicitado: {detalle['cantidad']}"
+                    f"Disponible: {producto.stock_disponible + reservado}, Solicitado: {detalle['cantidad']}"
                 )
             
             # Calcular subtotal
@@ -153,11 +169,6 @@ class RealizarCompraSerializer(serializers.Serializer):
                 'precio_unitario': detalle['precio_unitario'],
                 'subtotal': subtotal
             })
-        
-        # Verificar si el vendedor tiene reservas pendientes para estos productos
-        reservas_pendientes = []
-        for info in productos_info:
-            reserva = self._verificar_reserva(user, info['producto'], info['cantidad'])
             if reserva:
                 reservas_pendientes.append(reserva)
         
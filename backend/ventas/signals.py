@@ -0,0 +1,18 @@
+# ventas/signals.py
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from compras.models import Compra
+from .models import Venta
+from .analitica import invalidar
+
+
+@receiver(post_save, sender=Venta)
+@receiver(post_delete, sender=Venta)
+@receiver(post_save, sender=Compra)
+@receiver(post_delete, sender=Compra)
+def invalidar_analitica(sender, instance, **kwargs):
+    """Ventas y compras (costos) cambian el análisis de productos de la empresa"""
+    empresa_id = instance.usuario_empresa.empresa_id
+    # Al confirmar: los detalles se crean después de la venta o compra
+    transaction.on_commit(lambda: invalidar(empresa_id))
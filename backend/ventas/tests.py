@@ -1,3 +1,366 @@
+import csv
+import io
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from django.utils import timezone
+from openpyxl import load_workbook
+from backend.benchmarks.datos import generar_datos
+from backend.instrumentacion import metricas
+from backend.pruebas import ConsultasConstantesMixin, PlanConsultaMixin
+from roles.models import Rol
+from usuarios.models import User
+from empresas.models import Empresa
+from usuario_empresa.models import Usuario_Empresa
+from cliente.models import Cliente
+from detalle_venta.models import DetalleVenta
+from producto.models import MovimientoInventario, Producto
+from compras.models import Compra
+from detalle_compra.models import DetalleCompra
+from .models import Venta
+from .views import ExportarVentasView
 
-# Create your tests here.
+
+class IndicesVentaTest(PlanConsultaMixin, TestCase):
+    """Verifica con EXPLAIN que las consultas de ventas usan los índices compuestos"""
+    EMPRESAS = 20
+    VENTAS_POR_VENDEDOR = 200
+
+    @classmethod
+    def setUpTestData(cls):
+        rol = Rol.objects.create(rol='vendedor', descripcion='Vendedor')
+        rol_cliente = Rol.objects.create(rol='cliente', descripcion='Cliente')
+
+        empresas = Empresa.objects.bulk_create([
+            Empresa(nombre=f'Empresa {i}', nit=f'NIT-{i}', rubro='retail', direccion='-',
+                    telefono='0', email=f'empresa{i}@test.com', estado='activo')
+            for i in range(cls.EMPRESAS)
+        ])
+        usuarios = User.objects.bulk_create([
+            User(email=f'vendedor{i}@test.com', rol=rol, estado='activo', password='!')
+            for i in range(cls.EMPRESAS)
+        ])
+        vendedores = Usuario_Empresa.objects.bulk_create([
+            Usuario_Empresa(id_usuario=usuario, empresa=empresa, estado='activo')
+            for usuario, empresa in zip(usuarios, empresas)
+        ])
+        usuario_cliente = User.objects.create(email='cliente@test.com', rol=rol_cliente, password='!')
+        cliente = Cliente.objects.create(
+            id_usuario=usuario_cliente, nit='C-1', nombre_cliente='Cliente',
+            direccion_cliente='-', telefono_cliente='0'
+        )
+
+        ventas = Venta.objects.bulk_create([
+            Venta(usuario_empresa=vendedor, cliente=cliente, precio_total=Decimal('10.00'))
+            for vendedor in vendedores
+            for _ in range(cls.VENTAS_POR_VENDEDOR)
+        ], batch_size=1000)
+
+        # fecha_venta es auto_now_add: se reparte en un año para que el rango sea selectivo
+        ahora = timezone.now()
+        for indice, venta in enumerate(ventas):
+            venta.fecha_venta = ahora - timedelta(days=indice % 365)
+        Venta.objects.bulk_update(ventas, ['fecha_venta'], batch_size=1000)
+
+        cls.empresa = empresas[0]
+        cls.vendedor = vendedores[0]
+        cls.actualizar_estadisticas('venta', 'usuario_empresa')
+
+    def test_ventas_por_vendedor_y_fecha(self):
+        desde = timezone.now() - timedelta(days=30)
+        consulta = Venta.objects.filter(
+            usuario_empresa=self.vendedor,
+            fecha_venta__gte=desde
+        ).order_by('-fecha_venta')
+        self.assertUsaIndice(consulta, 'venta_ue_fecha_idx')
+
+    def test_ventas_por_empresa_y_fecha(self):
+        desde = timezone.now() - timedelta(days=30)
+        consulta = Venta.objects.filter(
+            usuario_empresa__empresa=self.empresa,
+            fecha_venta__gte=desde
+        ).order_by('-fecha_venta')
+        self.assertUsaIndice(consulta, 'venta_ue_fecha_idx')
+
+
+class ConsultasListaVentasTest(ConsultasConstantesMixin, TestCase):
+    """ListaVentasVendedorView: las consultas no crecen con las ventas ni sus detalles"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = generar_datos(empresas=1, productos=5, clientes=3, ventas=2)
+
+    def _agregar_ventas(self):
+        usuario_empresa = Usuario_Empresa.objects.get(id_usuario=self.datos['vendedor'])
+        productos = list(Producto.objects.filter(empresa=self.datos['empresa']))
+        cliente = Cliente.objects.filter(tiene__id_empresa=self.datos['empresa']).first()
+        ventas = Venta.objects.bulk_create([
+            Venta(usuario_empresa=usuario_empresa, cliente=cliente, precio_total=Decimal('30.00'))
+            for _ in range(10)
+        ])
+        DetalleVenta.objects.bulk_create([
+            DetalleVenta(id_venta=venta, id_producto=producto, cantidad=1,
+                         precio_unitario=Decimal('10.00'), subtotal=Decimal('10.00'))
+            for venta in ventas
+            for producto in productos[:3]
+        ])
+
+    def test_lista_ventas_vendedor(self):
+        cliente = APIClient()
+        cliente.force_authenticate(self.datos['vendedor'])
+        self.assertConsultasConstantes(
+            lambda: cliente.get('/api/ventas/listar-ventas/'),
+            self._agregar_ventas,
+            lambda respuesta: len(respuesta.json()['ventas'])
+        )
+
+
+class InstrumentacionExportacionTest(TestCase):
+    """InstrumentacionMiddleware: en la exportación streaming se mide hasta agotar el cuerpo"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = generar_datos(empresas=1, productos=2, clientes=1, ventas=3)
+
+    def setUp(self):
+        metricas.reiniciar()
+        self.addCleanup(metricas.reiniciar)
+
+    def test_consultas_y_bytes_del_cuerpo(self):
+        cliente = APIClient()
+        cliente.force_authenticate(self.datos['vendedor'])
+
+        respuesta = cliente.get('/api/ventas/exportar/?formato=csv')
+        self.assertTrue(respuesta.streaming)
+        self.assertNotIn('Server-Timing', respuesta)
+        # La medición se registra recién al consumir el cuerpo
+        self.assertEqual(metricas.instantanea(), {})
+
+        with CaptureQueriesContext(connection) as consultas_cuerpo:
+            cuerpo = b''.join(respuesta.streaming_content)
+        respuesta.close()
+
+        acumulado = metricas.instantanea()['api/ventas/exportar/']
+        self.assertEqual(acumulado['solicitudes_total'], 1)
+        self.assertEqual(acumulado['bytes_respuesta_total'], len(cuerpo))
+        self.assertGreater(len(consultas_cuerpo), 0)
+        self.assertGreaterEqual(acumulado['consultas_total'], len(consultas_cuerpo))
+
+
+class CacheAnaliticaTest(TestCase):
+    """analisis_productos no sirve un análisis anterior cuando la clave de versión se desaloja"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.empresa = generar_datos(empresas=1, productos=1, clientes=1, ventas=0)['empresa']
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_version_desalojada(self):
+        from . import analitica
+
+        desde, hasta = analitica.rango_fechas('2026-01-01', '2026-01-31')
+        with mock.patch.object(analitica, 'calcular_analisis', side_effect=[{'calculo': 1}, {'calculo': 2}]):
+            self.assertEqual(analitica.analisis_productos(self.empresa, desde, hasta), {'calculo': 1})
+            self.assertEqual(analitica.analisis_productos(self.empresa, desde, hasta), {'calculo': 1})
+
+            analitica.invalidar(self.empresa.id_empresa)
+            cache.delete(analitica._clave_version(self.empresa.id_empresa))
+
+            self.assertEqual(analitica.analisis_productos(self.empresa, desde, hasta), {'calculo': 2})
+
+
+class AnalisisProductosTest(TestCase):
+    """calcular_analisis: clases ABC, margen con costo promedio ponderado y rotación desde el kardex"""
+
+    @classmethod
+    def setUpTestData(cls):
+        from . import analitica
+
+        datos = generar_datos(empresas=1, productos=1, clientes=1, ventas=0)
+        cls.empresa = datos['empresa']
+        vendedor = Usuario_Empresa.objects.get(id_usuario=datos['vendedor'])
+        # Rango de 10 días: [2024-01-01, 2024-01-11)
+        cls.desde, cls.hasta = analitica.rango_fechas('2024-01-01', '2024-01-10')
+
+        def fecha(dia, mes=1, anio=2024):
+            return timezone.make_aware(datetime(anio, mes, dia, 12, 0))
+
+        cls.productos = {
+            nombre: Producto.objects.create(
+                nombre=nombre, precio=Decimal('1.00'), stock_actual=0, stock_minimo=0, empresa=cls.empresa
+            )
+            for nombre in ('P1', 'P2', 'P3', 'P4')
+        }
+        p1, p2, p3, p4 = cls.productos.values()
+
+        # Ingresos: P1 700 (2 ventas), P2 200, P3 60, P4 40 = 1000
+        for dia, lineas in (
+            (3, [(p1, 5, '100.00')]),
+            (5, [(p1, 2, '100.00'), (p2, 4, '50.00')]),
+            (7, [(p3, 3, '20.00'), (p4, 2, '20.00')]),
+            (20, [(p1, 9, '100.00')]),  # Fuera del rango
+        ):
+            venta = Venta.objects.create(
+                usuario_empresa=vendedor, cliente=datos['cliente'],
+                precio_total=sum(cantidad * Decimal(precio) for _, cantidad, precio in lineas)
+            )
+            Venta.objects.filter(pk=venta.pk).update(fecha_venta=fecha(dia))
+            DetalleVenta.objects.bulk_create([
+                DetalleVenta(id_venta=venta, id_producto=producto, cantidad=cantidad,
+                             precio_unitario=Decimal(precio), subtotal=cantidad * Decimal(precio))
+                for producto, cantidad, precio in lineas
+            ])
+
+        # Costo de P1: 10 a 60 y 10 a 40 = 50 promedio; la compra de P2 es posterior al rango
+        for fecha_compra, producto, cantidad, precio in (
+            (fecha(1, 12, 2023), p1, 10, '60.00'),
+            (fecha(2), p1, 10, '40.00'),
+            (fecha(1, 2), p2, 10, '10.00'),
+        ):
+            compra = Compra.objects.create(usuario_empresa=vendedor, precio_total=cantidad * Decimal(precio))
+            Compra.objects.filter(pk=compra.pk).update(fecha=fecha_compra)
+            DetalleCompra.objects.create(
+                id_compra=compra, id_producto=producto, id_proveedor=datos['proveedor'],
+                cantidad=cantidad, precio_unitario=Decimal(precio), subtotal=cantidad * Decimal(precio)
+            )
+
+        # Kardex de P1: 20 al inicio del rango, 13 al final
+        MovimientoInventario.objects.bulk_create([
+            MovimientoInventario(producto=p1, empresa=cls.empresa, tipo=tipo, cantidad=cantidad, fecha=fecha(dia, mes, anio))
+            for tipo, cantidad, (dia, mes, anio) in (
+                ('inicial', 20, (1, 12, 2023)),
+                ('venta', -5, (3, 1, 2024)),
+                ('venta', -2, (5, 1, 2024)),
+                ('venta', -9, (20, 1, 2024)),
+            )
+        ])
+
+    def setUp(self):
+        from . import analitica
+
+        self.resultado = analitica.calcular_analisis(self.empresa, self.desde, self.hasta)
+        self.por_nombre = {producto['nombre']: producto for producto in self.resultado['productos']}
+
+    def test_clases_abc(self):
+        self.assertEqual(
+            [(p['nombre'], p['clase'], p['ingresos']) for p in self.resultado['productos']],
+            [('P1', 'A', 700.0), ('P2', 'A', 200.0), ('P3', 'B', 60.0), ('P4', 'C', 40.0)]
+        )
+        self.assertEqual(self.por_nombre['P3']['participacion_acumulada'], 0.96)
+        resumen = self.resultado['resumen']
+        self.assertEqual(resumen['ingresos_totales'], 1000.0)
+        self.assertEqual({clase: datos['productos'] for clase, datos in resumen['clases'].items()},
+                         {'A': 2, 'B': 1, 'C': 1})
+        # El producto de generar_datos no vendió en el rango
+        self.assertEqual(resumen['productos_sin_ventas'], 1)
+
+    def test_ventas_cuenta_ventas(self):
+        self.assertEqual(
+            {nombre: (p['ventas'], p['unidades']) for nombre, p in self.por_nombre.items()},
+            {'P1': (2, 7), 'P2': (1, 4), 'P3': (1, 3), 'P4': (1, 2)}
+        )
+
+    def test_margen(self):
+        p1 = self.por_nombre['P1']
+        self.assertEqual((p1['costo_unitario'], p1['margen'], p1['margen_porcentaje']), (50.0, 350.0, 50.0))
+        # Sin compras anteriores al fin del rango no hay costo
+        self.assertIsNone(self.por_nombre['P2']['margen'])
+        self.assertEqual(self.resultado['resumen']['margen_total'], 350.0)
+
+    def test_rotacion(self):
+        p1 = self.por_nombre['P1']
+        # 7 unidades / inventario promedio (20 + 13) / 2; 10 días / rotación
+        self.assertEqual((p1['inventario_promedio'], p1['rotacion'], p1['dias_rotacion']), (16.5, 0.424, 23.6))
+        # Sin kardex el inventario promedio es 0 y no hay rotación
+        self.assertIsNone(self.por_nombre['P2']['rotacion'])
+
+
+class ExportarVentasTest(TestCase):
+    """ExportarVentasView: encabezados, una fila por línea de detalle y rango [inicio, fin + 1 día) en CSV y XLSX"""
+
+    URL = '/api/ventas/exportar/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = generar_datos(empresas=2, productos=2, clientes=1, ventas=0)
+        empresa = cls.datos['empresa']
+        vendedor = Usuario_Empresa.objects.get(id_usuario=cls.datos['vendedor'])
+        otra = Usuario_Empresa.objects.exclude(empresa=empresa).filter(id_usuario__rol__rol='vendedor').get()
+        productos = list(Producto.objects.filter(empresa=empresa).order_by('pk'))
+        cls.ventas = {}
+        for nombre, usuario_empresa, fecha, lineas in (
+            ('antes', vendedor, datetime(2026, 3, 9, 23, 59), 1),
+            ('inicio', vendedor, datetime(2026, 3, 10, 0, 0), 2),
+            ('fin', vendedor, datetime(2026, 3, 11, 23, 59), 1),
+            ('despues', vendedor, datetime(2026, 3, 12, 0, 0), 1),
+            ('otra_empresa', otra, datetime(2026, 3, 10, 12, 0), 1),
+        ):
+            venta = Venta.objects.create(
+                usuario_empresa=usuario_empresa, cliente=cls.datos['cliente'], precio_total=Decimal('10.00') * lineas
+            )
+            Venta.objects.filter(pk=venta.pk).update(fecha_venta=timezone.make_aware(fecha))
+            DetalleVenta.objects.bulk_create([
+                DetalleVenta(id_venta=venta, id_producto=producto, cantidad=1,
+                             precio_unitario=Decimal('10.00'), subtotal=Decimal('10.00'))
+                for producto in productos[:lineas]
+            ])
+            cls.ventas[nombre] = venta.pk
+
+    def setUp(self):
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(self.datos['vendedor'])
+
+    def _exportar(self, **parametros):
+        respuesta = self.cliente.get(self.URL, parametros)
+        self.assertEqual(respuesta.status_code, 200, getattr(respuesta, 'content', None))
+        cuerpo = b''.join(respuesta.streaming_content)
+        respuesta.close()
+        if parametros.get('formato') == 'xlsx':
+            hoja = load_workbook(io.BytesIO(cuerpo), read_only=True).active
+            return [list(fila) for fila in hoja.iter_rows(values_only=True)]
+        return list(csv.reader(io.StringIO(cuerpo.decode('utf-8-sig'))))
+
+    def test_csv_y_xlsx(self):
+        encabezados = [encabezado for encabezado, _ in ExportarVentasView.COLUMNAS]
+        for formato in ('csv', 'xlsx'):
+            with self.subTest(formato=formato):
+                filas = self._exportar(formato=formato, fecha_inicio='2026-03-10', fecha_fin='2026-03-11')
+
+                self.assertEqual(filas[0], encabezados)
+                # Una fila por línea: la venta de inicio tiene dos
+                self.assertEqual(len(filas), 1 + 3)
+                self.assertEqual(
+                    [int(fila[0]) for fila in filas[1:]],
+                    [self.ventas['inicio'], self.ventas['inicio'], self.ventas['fin']]
+                )
+
+    def test_sin_rango_solo_su_empresa(self):
+        filas = self._exportar(formato='csv')
+
+        self.assertEqual(len(filas), 1 + 5)
+        self.assertNotIn(str(self.ventas['otra_empresa']), {fila[0] for fila in filas[1:]})
+
+    def test_fecha_en_xlsx_en_hora_local(self):
+        filas = self._exportar(formato='xlsx', fecha_inicio='2026-03-11', fecha_fin='2026-03-11')
+
+        self.assertEqual([fila[1] for fila in filas[1:]], [datetime(2026, 3, 11, 23, 59)])
+
+    def test_permisos_y_parametros(self):
+        self.cliente.force_authenticate(self.datos['admin_empresa'])
+        self.assertEqual(len(self._exportar(formato='csv', fecha_inicio='2026-03-12')), 1 + 1)
+
+        for parametros in ({'formato': 'pdf'}, {'fecha_inicio': '10/03/2026'}):
+            with self.subTest(parametros=parametros):
+                self.assertEqual(self.cliente.get(self.URL, parametros).status_code, 400)
+
+        cliente = User.objects.create_user(email='cliente@exportar.test', password='x', rol=Rol.objects.get(rol='cliente'))
+        self.cliente.force_authenticate(cliente)
+        self.assertEqual(self.cliente.get(self.URL).status_code, 403)
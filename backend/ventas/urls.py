@@ -6,5 +6,7 @@ urlpatterns = [
     path('realizar-compra/', views.RealizarCompraView.as_view(), name='realizar-compra'),
     path('mis-compras/', views.HistorialComprasClienteView.as_view(), name='mis-compras'),
     path('listar-ventas/', views.ListaVentasVendedorView.as_view(), name='mis-compras'),
+    path('exportar/', views.ExportarVentasView.as_view(), name='exportar-ventas'),
+    path('analitica/productos/', views.AnalisisProductosView.as_view(), name='analitica-productos'),
     path('<int:id_venta>/eliminar/', views.EliminarVentaView.as_view(), name='eliminar-venta'),
 ]
\ No newline at end of file
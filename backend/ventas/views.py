@@ -1,10 +1,12 @@
 # ventas/views.py
-from datetime import datetime
+from datetime import datetime, timedelta
 from rest_framework import generics, status, permissions, filters
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db import transaction
+from django.db.models import Count, Prefetch, Q, Sum
+from django.utils import timezone
 from decimal import Decimal
 import logging
 from .models import Venta
@@ -12,6 +14,11 @@ from detalle_venta.models import DetalleVenta
 from .serializers import VentaSerializer, RealizarCompraSerializer
 from reservas.views import EsVendedorOAdminEmpresaPermission
 from usuario_empresa.models import Usuario_Empresa
+from backend.exportacion.streaming import respuesta_exportacion, FORMATOS
+from producto import kardex
+from .analitica import analisis_productos, rango_fechas
+from producto.stock import vender, StockInsuficiente
+from reservas.models import Reserva
 logger = logging.getLogger(__name__)
 
 class RealizarCompraView(generics.CreateAPIView):
@@ -50,8 +57,21 @@ class RealizarCompraView(generics.CreateAPIView):
             )            
             logger.info(f"Venta creada ID: {venta.id_venta} por vendedor: {vendedor.id_usuario.email}")
             
+            # Tomar las reservas del vendedor: si otra operación ya la expiró o canceló,
+            # sus unidades volvieron al disponible y la venta no las descuenta como reservadas
+            reservado_por_producto = {}
+            reservas_consumidas = []
+            for reserva in reservas_pendientes:
+                eliminadas, _ = Reserva.objects.filter(pk=reserva.pk, estado='pendiente').delete()
+                if eliminadas:
+                    reservado_por_producto[reserva.id_producto_id] = (
+                        reservado_por_producto.get(reserva.id_producto_id, 0) + reserva.cantidad
+                    )
+                    reservas_consumidas.append(reserva)
+            
             # 3. Crear detalles de venta y actualizar stock
             detalles_venta = []
+            movimientos = []
             productos_agotados = []
             for info in productos_info:
                 producto = info['producto']
@@ -59,28 +79,26 @@ class RealizarCompraView(generics.CreateAPIView):
                 precio_unitario = info['precio_unitario']
                 subtotal = info['subtotal']                
                 
-                # Verificar stock nuevamente (doble verificación)
-                if producto.stock_actual < cantidad:
-                    raise serializers.ValidationError(
+                # Reducir stock con verificación en la misma sentencia (consume la reserva del vendedor).
+                # Si el producto se repite en los detalles, solo la primera línea consume la reserva
+                try:
+                    vender(producto.id_producto, cantidad, reservado=reservado_por_producto.pop(producto.id_producto, 0))
+                except StockInsuficiente:
+                    raise ValueError(
                         f"Stock insuficiente para {producto.nombre} durante el procesamiento"
-                    )                
-                
-                # Reducir stock
-                producto.stock_actual -= cantidad                
+                    )
+                producto.refresh_from_db(fields=['stock_actual', 'stock_reservado', 'estado'])
+                movimientos.append(kardex.movimiento(
+                    producto, 'venta', -cantidad, usuario=request.user, referencia=f'venta:{venta.id_venta}'
+                ))
                 
-                # Actualizar estado si es necesario
                 if producto.stock_actual <= 0:
-                    producto.estado = 'agotado'
                     # Agregar a lista de productos agotados
                     productos_agotados.append({
                         'nombre': producto.nombre,
                         'stock_anterior': producto.stock_actual + cantidad,
                         'stock_actual': producto.stock_actual
                     })
-                elif producto.stock_actual <= producto.stock_minimo:
-                    producto.estado = 'activo' # Mantener activo pero con stock bajo                
-                
-                producto.save()
                 
                 # Detalle venta
                 detalle = DetalleVenta.objects.create(
@@ -99,15 +117,15 @@ class RealizarCompraView(generics.CreateAPIView):
                 })
                 logger.info(f"Stock actualizado para {producto.nombre}: {producto.stock_actual}")
             
-            # 4. Eliminar las reservas (en lugar de solo confirmarlas)
+            kardex.registrar(movimientos)
+            
+            # 4. Las reservas se eliminaron al consumirlas (en lugar de solo confirmarlas)
             reservas_eliminadas = []
-            for reserva in reservas_pendientes:
+            for reserva in reservas_consumidas:
                 reservas_eliminadas.append({
                     'producto': reserva.id_producto.nombre,
                     'cantidad': reserva.cantidad
                 })
-                # Eliminar la reserva de la base de datos
-                reserva.delete()
                 logger.info(f"Reserva eliminada: {reserva.id_producto.nombre}")
             
             # 5. Crear notificación para el cliente
@@ -140,6 +158,8 @@ class RealizarCompraView(generics.CreateAPIView):
             
         except Exception as e:
             logger.error(f"Error al realizar venta: {str(e)}", exc_info=True)
+            # La excepción no sale de create: deshacer venta, detalles y stock ya descontado
+            transaction.set_rollback(True)
             return Response({
                 'error': 'Error al procesar la venta',
                 'detail': str(e),
@@ -420,9 +440,15 @@ class ListaVentasVendedorView(generics.ListAPIView):
                 usuario_empresa=usuario_empresa
             ).select_related(
                 'cliente',
+                'cliente__id_usuario',
                 'usuario_empresa',
                 'usuario_empresa__id_usuario',
                 'usuario_empresa__empresa'
+            ).prefetch_related(
+                Prefetch(
+                    'detalleventa_set',
+                    queryset=DetalleVenta.objects.select_related('id_producto__categoria')
+                )
             )
             
             # Aplicar filtros por fecha si se proporcionan
@@ -438,7 +464,7 @@ class ListaVentasVendedorView(generics.ListAPIView):
             
             if fecha_fin:
                 try:
-                    fecha_fin_dt = datetime.strptime(fecha_fin, '%Y-%m-%d') + datetime.timedelta(days=1)
+                    fecha_fin_dt = datetime.strptime(fecha_fin, '%Y-%m-%d') + timedelta(days=1)
                     queryset = queryset.filter(fecha_venta__lt=fecha_fin_dt)
                 except ValueError:
                     logger.warning(f"Fecha fin inválida: {fecha_fin}")
@@ -474,16 +500,18 @@ class ListaVentasVendedorView(generics.ListAPIView):
             usuario_empresa = Usuario_Empresa.objects.get(id_usuario=request.user)
             empresa = usuario_empresa.empresa
             
-            # Calcular estadísticas
-            total_ventas = queryset.count()
-            total_ganancias = sum(venta.precio_total for venta in queryset)
-            ventas_hoy = queryset.filter(
-                fecha_venta__date=datetime.now().date()
-            ).count()
-            ganancias_hoy = sum(
-                venta.precio_total 
-                for venta in queryset.filter(fecha_venta__date=datetime.now().date())
+            # Calcular estadísticas en una consulta (sin cargar las ventas)
+            hoy = Q(fecha_venta__date=datetime.now().date())
+            estadisticas = queryset.order_by().aggregate(
+                total_ventas=Count('id_venta'),
+                total_ganancias=Sum('precio_total'),
+                ventas_hoy=Count('id_venta', filter=hoy),
+                ganancias_hoy=Sum('precio_total', filter=hoy)
             )
+            total_ventas = estadisticas['total_ventas']
+            total_ganancias = estadisticas['total_ganancias'] or Decimal('0')
+            ventas_hoy = estadisticas['ventas_hoy']
+            ganancias_hoy = estadisticas['ganancias_hoy'] or Decimal('0')
             
             # Paginación
             page = self.paginate_queryset(queryset)
@@ -648,4 +676,135 @@ class EliminarVentaView(generics.DestroyAPIView):
                 'error': 'Error al eliminar la venta',
                 'detail': str(e),
                 'status': 'error'
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class ExportarVentasView(generics.GenericAPIView):
+    """
+    Vista para exportar las ventas de la empresa con sus líneas de detalle
+    GET /api/ventas/exportar/?formato=csv|xlsx&fecha_inicio=YYYY-MM-DD&fecha_fin=YYYY-MM-DD
+    """
+    permission_classes = [IsAuthenticated, EsVendedorOAdminEmpresaPermission]
+
+    COLUMNAS = [
+        ('id_venta', 'id_venta_id'),
+        ('fecha_venta', 'id_venta__fecha_venta'),
+        ('cliente_nit', 'id_venta__cliente__nit'),
+        ('cliente_nombre', 'id_venta__cliente__nombre_cliente'),
+        ('vendedor', 'id_venta__usuario_empresa__id_usuario__email'),
+        ('id_producto', 'id_producto_id'),
+        ('producto', 'id_producto__nombre'),
+        ('cantidad', 'cantidad'),
+        ('precio_unitario', 'precio_unitario'),
+        ('subtotal', 'subtotal'),
+        ('total_venta', 'id_venta__precio_total'),
+    ]
+
+    def get(self, request, *args, **kwargs):
+        formato = request.query_params.get('formato', 'csv').lower()
+        if formato not in FORMATOS:
+            return Response({
+                'error': 'Formato no soportado',
+                'detail': f'Formatos disponibles: {", ".join(FORMATOS)}',
+                'status': 'error'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            usuario_empresa = Usuario_Empresa.objects.select_related('empresa').get(id_usuario=request.user)
+        except Usuario_Empresa.DoesNotExist:
+            return Response({
+                'error': 'Vendedor sin empresa asignada',
+                'detail': 'No tienes una empresa asignada. Contacta al administrador.',
+                'status': 'error'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        detalles = DetalleVenta.objects.filter(
+            id_venta__usuario_empresa__empresa=usuario_empresa.empresa
+        )
+
+        fecha_inicio = request.query_params.get('fecha_inicio')
+        fecha_fin = request.query_params.get('fecha_fin')
+        try:
+            if fecha_inicio:
+                detalles = detalles.filter(
+                    id_venta__fecha_venta__gte=timezone.make_aware(datetime.strptime(fecha_inicio, '%Y-%m-%d'))
+                )
+            if fecha_fin:
+                detalles = detalles.filter(
+                    id_venta__fecha_venta__lt=timezone.make_aware(datetime.strptime(fecha_fin, '%Y-%m-%d')) + timedelta(days=1)
+                )
+        except ValueError:
+            return Response({
+                'error': 'Fecha inválida',
+                'detail': 'Use el formato YYYY-MM-DD',
+                'status': 'error'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        cliente_id = request.query_params.get('cliente_id')
+        if cliente_id:
+            detalles = detalles.filter(id_venta__cliente_id=cliente_id)
+
+        detalles = detalles.order_by('id_venta_id', 'id')
+
+        logger.info(f"Exportación de ventas ({formato}) por {request.user.email} - empresa {usuario_empresa.empresa_id}")
+        return respuesta_exportacion(detalles, self.COLUMNAS, 'ventas', formato)
+
+
+class AnalisisProductosView(generics.GenericAPIView):
+    """
+    Ranking de productos por ingresos, unidades o margen con clasificación ABC,
+    rotación y días de rotación (ventas/analitica.py)
+    GET /api/ventas/analitica/productos/?fecha_inicio=YYYY-MM-DD&fecha_fin=YYYY-MM-DD&orden=ingresos&clase=A&limite=100
+    """
+    permission_classes = [IsAuthenticated, EsVendedorOAdminEmpresaPermission]
+    ORDENES = {'ingresos', 'unidades', 'margen'}
+    LIMITE_MAXIMO = 1000
+
+    def get(self, request, *args, **kwargs):
+        try:
+            empresa = Usuario_Empresa.objects.select_related('empresa').get(id_usuario=request.user).empresa
+        except Usuario_Empresa.DoesNotExist:
+            return Response({
+                'error': 'Usuario sin empresa asignada',
+                'detail': 'No tienes una empresa asignada',
+                'status': 'error'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        orden = request.query_params.get('orden', 'ingresos')
+        clase = request.query_params.get('clase')
+        try:
+            desde, hasta = rango_fechas(
+                request.query_params.get('fecha_inicio'),
+                request.query_params.get('fecha_fin')
+            )
+            limite = min(int(request.query_params.get('limite', 100)), self.LIMITE_MAXIMO)
+            if orden not in self.ORDENES or (clase and clase not in ('A', 'B', 'C')) or limite < 1:
+                raise ValueError
+        except ValueError:
+            return Response({
+                'error': 'Parámetros inválidos',
+                'detail': 'Fechas YYYY-MM-DD (inicio <= fin), orden: ingresos|unidades|margen, clase: A|B|C, limite positivo',
+                'status': 'error'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        analisis = analisis_productos(empresa, desde, hasta)
+
+        productos = analisis['productos']
+        if clase:
+            productos = [p for p in productos if p['clase'] == clase]
+        if orden != 'ingresos':
+            # Sin costo de compra el margen no se conoce: al final
+            productos = sorted(
+                productos,
+                key=lambda p: (p[orden] is not None, p[orden] or 0),
+                reverse=True
+            )
+
+        return Response({
+            'status': 'success',
+            'rango': {
+                'fecha_inicio': timezone.localtime(desde).date().isoformat(),
+                'fecha_fin': (timezone.localtime(hasta) - timedelta(days=1)).date().isoformat()
+            },
+            'resumen': analisis['resumen'],
+            'productos': productos[:limite]
+        })